@@ -21,6 +21,9 @@ from core.analysis.data_analysis_functions import (
     analyze_messages_by_funnel_llm,
     analyze_message_effectiveness_reasons
 )
+from core.analysis.message_normalization import get_message_keys
+from core.analysis.significance import overall_significance
+from core.llm.resilience import offload_blocking
 from config.column_descriptions import COLUMN_DESCRIPTIONS
 
 logger = get_logger(__name__)
@@ -137,19 +140,26 @@ def compare_experiment_vs_control(csv_file_path: str) -> str:
     try:
         df = pd.read_csv(csv_file_path)
         
-        # 실험군 vs 대조군 비교
+        # 실험군 vs 대조군 비교 (발송/전환 합계 기준 z-검정 및 Newcombe 신뢰구간)
+        significance = overall_significance(df)
         comparison = {
             "experiment_avg_conversion": df['실험군_예약전환율'].mean(),
             "control_avg_conversion": df['대조군_예약전환율'].mean(),
             "lift_percentage": df['실험군_예약전환율'].mean() - df['대조군_예약전환율'].mean(),
-            "statistical_significance": "분석 필요",
+            "statistical_significance": {
+                "verdict": significance["verdict"],
+                "p_value": significance["p_value"],
+                "z_score": significance["z_score"],
+                "lift_ci": [significance["lift_ci_low"] * 100, significance["lift_ci_high"] * 100],
+            },
             "best_performing_campaigns": df.nlargest(5, '실험군_예약전환율')[['퍼널', '문구', '실험군_예약전환율']].to_dict('records')
         }
         
         # Context에 추가
         # analysis_context.update_statistical_analysis({"experiment_control_comparison": comparison})  # main.py의 context 사용
         
-        return f"실험군 vs 대조군 비교 완료: Lift {comparison['lift_percentage']:.2f}%"
+        return (f"실험군 vs 대조군 비교 완료: Lift {comparison['lift_percentage']:.2f}% "
+                f"(합계 기준 {significance['lift'] * 100:+.2f}%p, p={significance['p_value']:.3g}, {significance['verdict']})")
         
     except Exception as e:
         return f"실험군 vs 대조군 비교 오류: {str(e)}"
@@ -177,7 +187,8 @@ def generate_actionable_recommendations(csv_file_path: str) -> str:
         })
         
         # 2. 문구별 추천
-        message_performance = df.groupby('문구')['실험군_예약전환율'].agg(['mean', 'count']).round(3)
+        canonical = get_message_keys(df)['message_canonical'].rename('문구')
+        message_performance = df.groupby(canonical)['실험군_예약전환율'].agg(['mean', 'count']).round(3)
         best_message = message_performance['mean'].idxmax()
         
         recommendations.append({
@@ -245,7 +256,7 @@ comprehensive_agent = Agent(
     - 통합된 관점에서 종합적인 분석 수행
     """,
     tools=[
-        comprehensive_data_analysis,
+        offload_blocking(comprehensive_data_analysis),  # LLM 분석 포함 (작업 스레드에서 실행)
         generate_insights_report,
         analyze_specific_funnel,
         compare_experiment_vs_control,
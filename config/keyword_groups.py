@@ -0,0 +1,22 @@
+"""문구 키워드 그룹 정의 (키워드 지표/톤앤매너 분석에서 사용)"""
+
+# 전환율 기여 키워드 테이블에 사용하는 주요 키워드
+CONVERSION_KEYWORDS = ['할인', '무료', '즉시', '지금', '쿠폰', '특가', '마감', 'D-DAY', '확정', '예약']
+
+# 톤앤매너 분석 키워드 그룹
+TONE_KEYWORD_GROUPS = {
+    # 개인화 표현 (# 플레이스홀더, 호칭)
+    "personalization": ['#', '님'],
+    # 친근함: 고객 이름, 대화체, 짧은 문장
+    "friendly": ['님', '해주세요', '확정해', '이용해보세요'],
+    # 긴급성: 즉시 행동 유도
+    "urgency": ['지금', '바로', '빠르게', '오늘', '마감'],
+    # 감정적 어필: FOMO, 희귀성
+    "fomo": ['놓치', '마감', 'D-DAY', '한정'],
+}
+
+# 키워드 그룹 전체 (그룹명 -> 키워드 리스트)
+KEYWORD_GROUPS = {
+    "conversion": CONVERSION_KEYWORDS,
+    **TONE_KEYWORD_GROUPS,
+}
@@ -28,6 +28,67 @@ class Settings(BaseSettings):
     # Google API 설정
     GOOGLE_API_KEY: str = ""
 
+    # 분석 파라미터 (Lift 유의성 검정)
+    LIFT_SIGNIFICANCE_THRESHOLD: float = 0.05
+    MIN_SAMPLE_SIZE: int = 30
+    CONFIDENCE_INTERVAL: float = 0.95
+    # 한 실행의 전체 비교에 적용할 다중검정 보정 ("bh": Benjamini-Hochberg FDR, "holm": Holm FWER)
+    MULTIPLE_TESTING_METHOD: str = "bh"
+    # 퍼널별 합산 Lift 부트스트랩 (재표본 수, "multinomial" 인덱스 행렬 / "poisson" 가중치, shard 크기, 프로세스 수: 0이면 현재 프로세스)
+    BOOTSTRAP_RESAMPLES: int = 2000
+    BOOTSTRAP_METHOD: str = "multinomial"
+    BOOTSTRAP_SEED: int = 42
+    BOOTSTRAP_CHUNK: int = 500
+    BOOTSTRAP_WORKERS: int = 0
+    # 베이지안 Lift 사후분포 (사전분포 "empirical": 퍼널/전체 평균 쪽 경험적 베이즈 축소, "uniform": Beta(1, 1), 셀당 Monte Carlo 표본 수)
+    BAYES_PRIOR: str = "empirical"
+    BAYES_DRAWS: int = 4000
+    BAYES_SEED: int = 42
+    # Lift 3분위수용 KLL 분위수 스케치 크기 (rank 오차 약 1.7/k)
+    QUANTILE_SKETCH_K: int = 200
+    # 주차별 트렌드 이동 구간 (주 단위)
+    TREND_ROLLING_WEEKS: int = 4
+    # 문구 벡터 색인 문자 n-gram 범위 (어절 경계 char_wb)
+    MESSAGE_NGRAM_MIN: int = 2
+    MESSAGE_NGRAM_MAX: int = 3
+    # 근접 중복 문구 패밀리 MinHash/LSH 설정 (band당 행 수 = 해시 수 / band 수)
+    MINHASH_PERMUTATIONS: int = 128
+    MINHASH_BANDS: int = 32
+    NEAR_DUPLICATE_THRESHOLD: float = 0.6
+    # 과거 캠페인 문구 검색 색인 (차원 축소 크기, 0이면 해싱 벡터 그대로 / LSH 테이블 수 / 테이블당 비트 수)
+    SEARCH_VECTOR_DIM: int = 256
+    SEARCH_LSH_TABLES: int = 16
+    SEARCH_LSH_BITS: int = 12
+
+    # 성능 설정
+    CACHE_RESULTS: bool = True
+    MAX_CONCURRENT_AGENTS: int = 3
+
+    # 안정성 설정 (Agent/LLM 호출 타임아웃, 재시도, 서킷 브레이커)
+    AGENT_TIMEOUT: float = 300
+    LLM_CALL_TIMEOUT: float = 120
+    LLM_MAX_RETRIES: int = 3
+    LLM_BACKOFF_BASE: float = 1.0
+    LLM_BACKOFF_MAX: float = 30.0
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_TIMEOUT: float = 60.0
+
+    # Azure OpenAI 배포 한도 (분당 요청/토큰 수, 0이면 제한 없음)
+    LLM_RPM_LIMIT: int = 0
+    LLM_TPM_LIMIT: int = 0
+
+    # LLM 백엔드 ("azure" 또는 네트워크 없이 실행하는 "fake")
+    LLM_BACKEND: str = "azure"
+    FAKE_LLM_LATENCY: str = "fixed:0"
+    FAKE_LLM_SEED: int = 0
+    FAKE_LLM_ERROR_RATE: float = 0.0
+    FAKE_LLM_RESPONSES_PATH: str = ""
+    FAKE_LLM_CALL_TOOLS: bool = True
+
+    # 로컬 분석 서비스 (python main.py --serve)
+    SERVICE_HOST: str = "127.0.0.1"
+    SERVICE_PORT: int = 8765
+
 
 # 설정 인스턴스 생성
 settings = Settings()
@@ -41,13 +102,18 @@ _azure_llm = None
 def get_azure_llm():
     """Azure LLM 싱글톤 인스턴스를 반환합니다."""
     global _azure_llm
+    if _azure_llm is None and settings.LLM_BACKEND == "fake":
+        # 오프라인 벤치마크/회귀 테스트용 (Azure 호출 없음)
+        from core.llm.fake_llm import FakeLlm
+        _azure_llm = FakeLlm(model="fake/offline")
     if _azure_llm is None:
-        from google.adk.models.lite_llm import LiteLlm
-        _azure_llm = LiteLlm(
+        from core.llm.rate_limited_model import RateLimitedLiteLlm
+        _azure_llm = RateLimitedLiteLlm(
             model=f"azure/{settings.AZURE_OPENAI_DEPLOYMENT_NAME}",
             api_key=settings.AZURE_OPENAI_API_KEY,
             api_base=settings.AZURE_OPENAI_ENDPOINT,
             api_version=settings.AZURE_OPENAI_API_VERSION,
+            timeout=settings.LLM_CALL_TIMEOUT,
         )
     return _azure_llm
 
@@ -55,6 +121,15 @@ def get_azure_llm():
 azure_llm = get_azure_llm()
 
 
+def get_completion_client():
+    """litellm.completion 형식 호출용 클라이언트 (fake 백엔드면 오프라인 대체 구현, 아니면 litellm 모듈)"""
+    if settings.LLM_BACKEND == "fake":
+        from core.llm.fake_llm import get_fake_backend
+        return get_fake_backend()
+    import litellm
+    return litellm
+
+
 # ==== 공용 로깅 설정 ====
 
 
@@ -9,6 +9,7 @@ from datetime import datetime
 from typing import Dict, Any
 import warnings
 import os
+import time
 warnings.filterwarnings('ignore')
 
 # from google.adk.tools import FunctionTool
@@ -50,7 +51,7 @@ def structure_llm_analysis_for_html(csv_file_path: str, llm_analysis_result: str
 def prepare_category_analysis_data(csv_file_path: str) -> Dict[str, Any]:
     """카테고리 분석용 데이터 정제화 (Lift 기반)"""
     try:
-        df = pd.read_csv(csv_file_path)
+        df = read_csv_cached(csv_file_path)
         
         # Lift 계산 (실험군 - 대조군)
         df['lift'] = df['실험군_예약전환율'] - df['대조군_예약전환율']
@@ -101,7 +102,8 @@ def prepare_funnel_segment_data(csv_file_path: str) -> Dict[str, Any]:
         # Lift 계산
         df['lift'] = df['실험군_예약전환율'] - df['대조군_예약전환율']
         
-        # 퍼널별 Lift 분위수 계산
+        # 퍼널별 Lift 분위수 계산 (데이터셋별로 저장된 퍼널별 분위수 스케치 상태에서 조회)
+        quantile_state = get_csv_lift_quantile_state(csv_file_path)
         funnel_segments = {}
         for funnel in df['퍼널'].unique():
             if pd.isna(funnel):
@@ -109,9 +111,8 @@ def prepare_funnel_segment_data(csv_file_path: str) -> Dict[str, Any]:
                 
             funnel_data = df[df['퍼널'] == funnel]
             
-            # Lift 기준 3분위수 계산
-            q33 = funnel_data['lift'].quantile(0.33)
-            q67 = funnel_data['lift'].quantile(0.67)
+            # Lift 기준 3분위수
+            q33, q67 = quantile_state.funnel_terciles(funnel)
             
             # 세그먼트 분류 (Lift 기준)
             high_performers = funnel_data[funnel_data['lift'] >= q67]
@@ -213,7 +214,7 @@ def create_segment_lift_charts(csv_file_path: str) -> str:
         import seaborn as sns
         plt.rcParams['font.family'] = 'DejaVu Sans'
         
-        df = pd.read_csv(csv_file_path)
+        df = read_csv_cached(csv_file_path)
         df['lift'] = df['실험군_예약전환율'] - df['대조군_예약전환율']
         
         reports_dir = get_reports_dir()
@@ -265,12 +266,12 @@ def create_segment_lift_charts(csv_file_path: str) -> str:
         # 1-4. 퍼널별 Lift 상위/하위 세그먼트
         plt.subplot(2, 3, 4)
         funnel_segments = {}
+        quantile_state = get_csv_lift_quantile_state(csv_file_path)
         for funnel in df['퍼널'].unique():
             if pd.isna(funnel):
                 continue
             funnel_data = df[df['퍼널'] == funnel]
-            q33 = funnel_data['lift'].quantile(0.33)
-            q67 = funnel_data['lift'].quantile(0.67)
+            q33, q67 = quantile_state.funnel_terciles(funnel)
             
             high_count = len(funnel_data[funnel_data['lift'] >= q67])
             mid_count = len(funnel_data[(funnel_data['lift'] >= q33) & (funnel_data['lift'] < q67)])
@@ -424,6 +425,8 @@ def create_segment_lift_charts(csv_file_path: str) -> str:
         return f"세그먼트별 Lift 차트 생성 오류: {str(e)}"
 from .data_analysis_functions import (
     analyze_conversion_performance,
+    analyze_lift_significance,
+    analyze_bayesian_lift,
     analyze_message_effectiveness,
     analyze_funnel_performance,
     analyze_funnel_message_effectiveness,
@@ -434,6 +437,15 @@ from .data_analysis_functions import (
     # 주석처리된 함수들: analyze_message_effectiveness_reasons_batch, 
     # analyze_message_effectiveness_reasons_improved, analyze_message_effectiveness_reasons_global_batch
 )
+from .message_index import get_message_index
+from .text_features import get_text_features
+from .dataset_cache import read_csv_cached
+from .significance import run_comparisons
+from .bootstrap import funnel_bootstrap
+from .quantile_sketch import get_csv_lift_quantile_state
+from .message_search import get_message_search_index
+from config.keyword_groups import CONVERSION_KEYWORDS
+from config.settings import settings
 
 # 한글 폰트 설정
 plt.rcParams['font.family'] = 'DejaVu Sans'
@@ -451,16 +463,47 @@ def get_datetime_prefix():
 def analyze_conversion_performance_tool(csv_file_path: str) -> str:
     """실험군 vs 대조군 전환율 성과를 분석합니다."""
     try:
-        df = pd.read_csv(csv_file_path)
+        df = read_csv_cached(csv_file_path)
         result = analyze_conversion_performance(df)
         return str(result)
     except Exception as e:
         return f"오류: {str(e)}"
 
+def analyze_lift_significance_tool(csv_file_path: str) -> str:
+    """실험군 vs 대조군 Lift의 통계적 유의성(z-검정, 신뢰구간)을 캠페인/퍼널/채널/목적별로 분석합니다."""
+    try:
+        df = read_csv_cached(csv_file_path)
+        result = analyze_lift_significance(df)
+        return str(result)
+    except Exception as e:
+        return f"오류: {str(e)}"
+
+def analyze_bayesian_lift_tool(csv_file_path: str) -> str:
+    """퍼널/캠페인별 베이지안 Lift 사후분포(개선 확률 P(Lift>0), 기대 Lift, 신용구간)를 분석합니다. 발송량이 적은 퍼널도 안정적으로 비교합니다."""
+    try:
+        df = read_csv_cached(csv_file_path)
+        result = analyze_bayesian_lift(df)
+        return str(result)
+    except Exception as e:
+        return f"오류: {str(e)}"
+
+def find_similar_campaigns_tool(csv_file_path: str, draft_message: str, top_k: int = 5, funnel: str = "") -> str:
+    """새 문구 초안과 비슷한 과거 캠페인 상위 top_k개와 각 캠페인의 실험군/대조군 전환율, Lift(%p)를 찾습니다. funnel을 지정하면 해당 퍼널 캠페인만 검색합니다."""
+    try:
+        df = read_csv_cached(csv_file_path)
+        index = get_message_search_index(csv_file_path, df)
+        started = time.perf_counter()
+        result = index.search(draft_message, k=top_k, funnel=funnel or None)
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        result["index"] = index.stats()
+        return str(result)
+    except Exception as e:
+        return f"오류: {str(e)}"
+
 def analyze_message_effectiveness_tool(csv_file_path: str) -> str:
     """문구별 효과성을 분석합니다."""
     try:
-        df = pd.read_csv(csv_file_path)
+        df = read_csv_cached(csv_file_path)
         result = analyze_message_effectiveness(df)
         return str(result)
     except Exception as e:
@@ -469,7 +512,7 @@ def analyze_message_effectiveness_tool(csv_file_path: str) -> str:
 def analyze_funnel_performance_tool(csv_file_path: str) -> str:
     """퍼널별 성과를 분석합니다."""
     try:
-        df = pd.read_csv(csv_file_path)
+        df = read_csv_cached(csv_file_path)
         result = analyze_funnel_performance(df)
         return str(result)
     except Exception as e:
@@ -478,7 +521,7 @@ def analyze_funnel_performance_tool(csv_file_path: str) -> str:
 def analyze_funnel_message_effectiveness_tool(csv_file_path: str) -> str:
     """퍼널별 문구 효과성을 분석합니다."""
     try:
-        df = pd.read_csv(csv_file_path)
+        df = read_csv_cached(csv_file_path)
         result = analyze_funnel_message_effectiveness(df)
         return str(result)
     except Exception as e:
@@ -487,7 +530,7 @@ def analyze_funnel_message_effectiveness_tool(csv_file_path: str) -> str:
 def analyze_message_patterns_by_funnel_tool(csv_file_path: str) -> str:
     """퍼널별 문구 패턴을 분석합니다."""
     try:
-        df = pd.read_csv(csv_file_path)
+        df = read_csv_cached(csv_file_path)
         result = analyze_message_patterns_by_funnel(df)
         return str(result)
     except Exception as e:
@@ -521,7 +564,7 @@ def create_segment_conversion_table(csv_file_path: str) -> str:
     try:
         print("📊 세그먼트별 전환율 표 생성 중...")
         
-        df = pd.read_csv(csv_file_path)
+        df = read_csv_cached(csv_file_path)
         
         # 퍼널별 전환율 표
         funnel_table = df.groupby('퍼널').agg({
@@ -556,7 +599,7 @@ def create_conversion_visualization(csv_file_path: str) -> str:
     try:
         print("📈 전환율 시각화 그래프 생성 중...")
         
-        df = pd.read_csv(csv_file_path)
+        df = read_csv_cached(csv_file_path)
         
         # 1. 퍼널별 전환율 비교 그래프
         plt.figure(figsize=(12, 8))
@@ -615,45 +658,48 @@ def generate_text_analysis_report(csv_file_path: str) -> str:
     try:
         print("📝 텍스트 분석 결과 리포트 생성 중...")
         
-        df = pd.read_csv(csv_file_path)
-        
-        # 문구 길이 분석
-        df['문구길이'] = df['문구'].str.len()
-        
-        # 전환율과 문구 길이의 상관관계
-        length_correlation = df['문구길이'].corr(df['실험군_예약전환율'])
-        
-        # 이모지 사용 분석
-        import re
-        df['이모지수'] = df['문구'].str.count(r'[😀-🙏🌀-🗿]')
-        emoji_correlation = df['이모지수'].corr(df['실험군_예약전환율'])
-        
-        # 숫자 사용 분석
-        df['숫자수'] = df['문구'].str.count(r'\d+')
-        number_correlation = df['숫자수'].corr(df['실험군_예약전환율'])
-        
-        # 특수문자 사용 분석
-        df['특수문자수'] = df['문구'].str.count(r'[!@#$%^&*(),.?":{}|<>]')
-        special_correlation = df['특수문자수'].corr(df['실험군_예약전환율'])
+        df = read_csv_cached(csv_file_path)
+        
+        # 문구별 피처 행렬 (길이/이모지/숫자/특수문자 등, 데이터셋당 1회 계산 후 캐시)
+        # 문구가 비어 있는 행은 기존과 같이 상관관계 계산에서 제외
+        features = get_text_features(df)
+        count_features = features[['length', 'emoji_count', 'number_count', 'special_count']] \
+            .where(df['문구'].notna())
+        correlations = count_features.corrwith(df['실험군_예약전환율'])
+        
+        # 전환율과 문구 길이/이모지/숫자/특수문자 사용의 상관관계
+        length_correlation = correlations['length']
+        emoji_correlation = correlations['emoji_count']
+        number_correlation = correlations['number_count']
+        special_correlation = correlations['special_count']
+        
+        # 주요 키워드별 포함 문구 수/Lift (역색인 posting list 기반 질의)
+        message_index = get_message_index(df)
+        keyword_usage = {
+            keyword: message_index.lift_by_term(keyword)
+            for keyword in CONVERSION_KEYWORDS
+        }
         
         # 텍스트 분석 리포트 생성
         text_analysis_report = {
             "text_characteristics": {
-                "average_length": float(df['문구길이'].mean()),
-                "length_std": float(df['문구길이'].std()),
+                "average_length": float(count_features['length'].mean()),
+                "length_std": float(count_features['length'].std()),
                 "length_correlation": float(length_correlation),
                 "emoji_usage": {
-                    "average_emojis": float(df['이모지수'].mean()),
+                    "average_emojis": float(count_features['emoji_count'].mean()),
                     "emoji_correlation": float(emoji_correlation)
                 },
                 "number_usage": {
-                    "average_numbers": float(df['숫자수'].mean()),
+                    "average_numbers": float(count_features['number_count'].mean()),
                     "number_correlation": float(number_correlation)
                 },
                 "special_characters": {
-                    "average_special": float(df['특수문자수'].mean()),
+                    "average_special": float(count_features['special_count'].mean()),
                     "special_correlation": float(special_correlation)
-                }
+                },
+                "keyword_usage": keyword_usage,
+                "pattern_distribution": features['pattern_class'].value_counts().to_dict()
             },
             "insights": [
                 f"문구 길이와 전환율의 상관관계: {length_correlation:.3f}",
@@ -697,7 +743,7 @@ def generate_text_analysis_report(csv_file_path: str) -> str:
     try:
         print("🔧 프롬프트 튜닝 제안 생성 중...")
         
-        df = pd.read_csv(csv_file_path)
+        df = read_csv_cached(csv_file_path)
         
         # 현재 LLM 분석의 문제점 파악
         current_issues = [
@@ -827,7 +873,7 @@ def generate_text_analysis_report(csv_file_path: str) -> str:
         html_report_path = create_comprehensive_html_report(csv_file_path, agent_results)
         
         # 기존 JSON 리포트도 생성
-        df = pd.read_csv(csv_file_path)
+        df = read_csv_cached(csv_file_path)
         datetime_prefix = get_datetime_prefix()
         
         # 1. 데이터 기본 정보
@@ -1224,7 +1270,7 @@ def validate_html_report_consistency(csv_file_path: str) -> str:
         print("🔍 HTML 리포트 정합성 검증 중...")
         
         # 데이터 로드
-        df = pd.read_csv(csv_file_path)
+        df = read_csv_cached(csv_file_path)
         
         # 실제 계산된 값들
         total_exp_sent = df['실험군_발송'].sum()
@@ -1436,6 +1482,21 @@ def generate_data_report(csv_file_path: str) -> str:
     except Exception as e:
         return f"데이터 리포트 생성 오류: {str(e)}"
 
+def _summarize_text_features(features: pd.Series) -> Dict[str, Any]:
+    """LLM 프롬프트용 문구 텍스트 피처 요약"""
+    return {
+        "pattern": str(features['pattern_class']),
+        "discount_pct": float(features['discount_pct']),
+        "personalized": bool(features['has_personalization']),
+        "urgency": bool(features['urgency']),
+        "fomo": bool(features['fomo']),
+        "emoji_count": int(features['emoji_count'])
+    }
+
+def _round_p(value):
+    """p-value/q-value JSON 표시용 반올림 (결측은 None)"""
+    return float(f"{value:.3g}") if pd.notna(value) else None
+
 def prepare_funnel_message_analysis_data(csv_file_path: str, top_n: int = 5) -> str:
     """퍼널별 상위/하위 메시지 데이터를 준비합니다 (LLM Analysis Agent용)
     
@@ -1450,10 +1511,21 @@ def prepare_funnel_message_analysis_data(csv_file_path: str, top_n: int = 5) ->
         import pandas as pd
         import json
         
-        df = pd.read_csv(csv_file_path)
+        df = read_csv_cached(csv_file_path)
         
         print(f"🔍 퍼널별 메시지 데이터 준비 중 (상위/하위 각 {top_n}개)...")
         
+        # 문구별 텍스트 피처 (패턴 분류/할인율/개인화/톤) - LLM 프롬프트에 함께 전달
+        text_features = get_text_features(df)
+        
+        # 실행 전체 비교에 대해 다중검정 보정한 캠페인별 유의성
+        comparisons = run_comparisons(df)
+        campaign_significance = comparisons['campaign']
+        # 보정 후 유의한 양의 Lift 문구를 먼저, 유의한 음의 Lift 문구를 나중에 정렬
+        evidence = np.where(~campaign_significance['significant'], 0,
+                            np.where(campaign_significance['lift'] > 0, 1, -1))
+        evidence = pd.Series(evidence, index=campaign_significance.index)
+        
         # 전체 데이터 준비
         all_funnel_data = []
         funnel_stats = {}
@@ -1472,8 +1544,9 @@ def prepare_funnel_message_analysis_data(csv_file_path: str, top_n: int = 5) ->
             funnel_data['exp_rate'] = funnel_data['실험군_1일이내_예약생성'] / funnel_data['실험군_발송']
             funnel_data['ctrl_rate'] = funnel_data['대조군_1일이내_예약생성'] / funnel_data['대조군_발송']
             funnel_data['lift'] = funnel_data['exp_rate'] - funnel_data['ctrl_rate']
+            funnel_data['evidence'] = evidence.reindex(funnel_data.index).fillna(0)
             
-            funnel_data_sorted = funnel_data.sort_values('실험군_예약전환율', ascending=False)
+            funnel_data_sorted = funnel_data.sort_values(['evidence', '실험군_예약전환율'], ascending=False)
             
             if len(funnel_data_sorted) < 2:
                 continue
@@ -1509,6 +1582,10 @@ def prepare_funnel_message_analysis_data(csv_file_path: str, top_n: int = 5) ->
                     "lift": round(row['lift'] * 100, 2),
                     "channel": str(row['채널']) if '채널' in row else "N/A",
                     "length": len(str(row['문구'])),
+                    "text_features": _summarize_text_features(text_features.loc[idx]),
+                    "p_value": _round_p(campaign_significance.at[idx, 'p_value']),
+                    "q_value": _round_p(campaign_significance.at[idx, 'q_value']),
+                    "verdict": str(campaign_significance.at[idx, 'verdict']),
                     "rank": i + 1,
                     "group": "high_performing",
                     "funnel_avg_exp": round(funnel_avg_exp * 100, 2),
@@ -1526,6 +1603,10 @@ def prepare_funnel_message_analysis_data(csv_file_path: str, top_n: int = 5) ->
                     "lift": round(row['lift'] * 100, 2),
                     "channel": str(row['채널']) if '채널' in row else "N/A",
                     "length": len(str(row['문구'])),
+                    "text_features": _summarize_text_features(text_features.loc[idx]),
+                    "p_value": _round_p(campaign_significance.at[idx, 'p_value']),
+                    "q_value": _round_p(campaign_significance.at[idx, 'q_value']),
+                    "verdict": str(campaign_significance.at[idx, 'verdict']),
                     "rank": i + 1,
                     "group": "low_performing",
                     "funnel_avg_exp": round(funnel_avg_exp * 100, 2),
@@ -1538,7 +1619,13 @@ def prepare_funnel_message_analysis_data(csv_file_path: str, top_n: int = 5) ->
                 "total_funnels": len(funnel_stats),
                 "total_messages": len(all_funnel_data),
                 "top_n_per_funnel": top_n,
-                "analysis_type": "funnel_message_comparison"
+                "analysis_type": "funnel_message_comparison",
+                "multiple_testing": {
+                    "method": settings.MULTIPLE_TESTING_METHOD,
+                    "significance_level": settings.LIFT_SIGNIFICANCE_THRESHOLD,
+                    "comparisons": sum(len(frame) for frame in comparisons.values()),
+                    "significant_messages": int(campaign_significance['significant'].sum()),
+                }
             },
             "funnel_statistics": funnel_stats,
             "messages": all_funnel_data
@@ -1557,14 +1644,25 @@ def prepare_funnel_message_analysis_data(csv_file_path: str, top_n: int = 5) ->
         }
         return json.dumps(error_result, ensure_ascii=False)
 
+def _lift_ci_record(lift_ci, funnel) -> Dict[str, Any]:
+    """퍼널 부트스트랩 신뢰구간을 %p 단위 JSON 값으로 변환"""
+    if funnel not in lift_ci.index:
+        return {}
+    row = lift_ci.loc[funnel]
+    to_pct = lambda value: round(float(value) * 100, 2) if pd.notna(value) else None
+    return {
+        "percentile": [to_pct(row['pct_low']), to_pct(row['pct_high'])],
+        "bca": [to_pct(row['bca_low']), to_pct(row['bca_high'])],
+        "standard_error": to_pct(row['lift_se'])
+    }
+
 def prepare_funnel_quantile_data(csv_file_path: str) -> str:
     """퍼널별 분위수 계산 및 데이터 준비"""
     try:
-        import pandas as pd
         import numpy as np
         
         # 데이터 로드
-        df = pd.read_csv(csv_file_path)
+        df = read_csv_cached(csv_file_path)
         
         # Lift 계산
         df['exp_rate'] = df['실험군_1일이내_예약생성'] / df['실험군_발송']
@@ -1585,9 +1683,11 @@ def prepare_funnel_quantile_data(csv_file_path: str) -> str:
         funnel_stats['lift'] = funnel_stats['exp_rate'] - funnel_stats['ctrl_rate']
         funnel_stats['campaign_count'] = df.groupby('퍼널').size().reset_index(name='count')['count']
         
-        # 3분위수 기준 계산 (퍼널별 전체 Lift 기준)
-        q33 = funnel_stats['lift'].quantile(0.33)
-        q67 = funnel_stats['lift'].quantile(0.67)
+        # 퍼널 내 캠페인 재표본 부트스트랩으로 합산 Lift 신뢰구간 계산 (percentile / BCa)
+        lift_ci = funnel_bootstrap(df)
+        
+        # 3분위수 기준 계산 (퍼널별 전체 Lift 기준, 퍼널 합계 상태에서 조회)
+        q33, q67 = get_csv_lift_quantile_state(csv_file_path).funnel_lift_terciles()
         
         # 그룹별 분류
         high_group = funnel_stats[funnel_stats['lift'] >= q67].copy()
@@ -1615,6 +1715,7 @@ def prepare_funnel_quantile_data(csv_file_path: str) -> str:
                     "exp_rate": round(row['exp_rate'] * 100, 2),
                     "ctrl_rate": round(row['ctrl_rate'] * 100, 2),
                     "campaign_count": int(row['campaign_count']),
+                    "lift_ci": _lift_ci_record(lift_ci, funnel),
                     "top_messages": []
                 }
                 
@@ -1644,6 +1745,11 @@ def prepare_funnel_quantile_data(csv_file_path: str) -> str:
                 "q33": round(q33 * 100, 2),
                 "q67": round(q67 * 100, 2)
             },
+            "bootstrap": {
+                "method": settings.BOOTSTRAP_METHOD,
+                "resamples": settings.BOOTSTRAP_RESAMPLES,
+                "confidence": settings.CONFIDENCE_INTERVAL
+            },
             "high_performance_group": high_data,
             "medium_performance_group": medium_data,
             "low_performance_group": low_data
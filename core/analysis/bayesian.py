@@ -0,0 +1,224 @@
+"""
+Beta-Binomial 베이지안 Lift 사후분포 (닫힌 형식 + 배치 Monte Carlo, NumPy 벡터화)
+
+실험군/대조군 전환율마다 Beta 사후분포를 만들고 Lift(실험군 - 대조군 전환율)의 사후분포를 계산합니다.
+    - 닫힌 형식: 사후 평균/분산, 기대 Lift, 정규 근사 P(Lift > 0)
+    - Monte Carlo: (draws x 셀) 2차원 Beta 표본을 열 배치 단위로 생성해 P(Lift > 0)와 신뢰구간(credible interval) 계산
+      (모수가 충분히 커 정규 근사가 정확한 셀은 닫힌 형식 값을 그대로 사용)
+사전분포는 균등 Beta(1, 1) 또는 경험적 베이즈(empirical Bayes):
+    - 캠페인: 같은 퍼널 캠페인들의 전환율로 적률추정한 Beta 사전분포 -> 퍼널 평균 쪽으로 축소
+    - 퍼널: 전체 퍼널들의 전환율로 적률추정한 Beta 사전분포 -> 전체 평균 쪽으로 축소
+캠페인과 퍼널의 모든 셀을 이어 붙여 한 번의 호출로 계산합니다.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+from config.settings import settings
+from core.analysis.dataset_cache import get_or_build
+from core.analysis.significance import CTRL_CONVERSIONS, CTRL_SENT, EXP_CONVERSIONS, EXP_SENT
+
+BAYES_PRIORS = ("empirical", "uniform")
+
+# 경험적 베이즈 사전분포를 추정할 최소 캠페인(또는 퍼널) 수 (미만이면 상위 수준 사전분포 사용)
+MIN_PRIOR_UNITS = 3
+
+# Monte Carlo 한 배치의 최대 원소 수 (draws x 열), 메모리 사용량 상한
+MC_BATCH_ELEMENTS = 4_000_000
+
+# 네 Beta 모수가 모두 이 값 이상이면 사후분포가 정규에 가까우므로 Monte Carlo 없이 닫힌 형식 사용
+NORMAL_APPROX_MIN_PARAM = 50.0
+
+
+def _as_counts(successes, trials) -> Tuple[np.ndarray, np.ndarray]:
+    n = np.clip(np.nan_to_num(np.asarray(trials, dtype=float), nan=0.0), 0.0, None)
+    x = np.minimum(np.clip(np.nan_to_num(np.asarray(successes, dtype=float), nan=0.0), 0.0, None), n)
+    return x, n
+
+
+def method_of_moments_prior(successes, trials, codes: Optional[np.ndarray] = None,
+                            n_groups: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    그룹별 Beta 사전분포 적률추정 (발송 가중 평균/분산에서 이항 표본 분산을 뺀 그룹 간 분산 기준)
+
+    Returns:
+        (alpha, beta) 그룹별 배열 (추정 불가한 그룹은 NaN)
+    """
+    x, n = _as_counts(successes, trials)
+    codes = np.zeros(len(x), dtype=int) if codes is None else np.asarray(codes)
+    used = (codes >= 0) & (n > 0)
+    x, n, codes = x[used], n[used], codes[used]
+
+    units = np.bincount(codes, minlength=n_groups).astype(float)
+    total_n = np.bincount(codes, weights=n, minlength=n_groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.bincount(codes, weights=x, minlength=n_groups) / total_n
+        rate = x / n
+        spread = np.bincount(codes, weights=n * (rate - mean[codes]) ** 2, minlength=n_groups) / total_n
+        # 관측 분산 = 그룹 간 분산 + 평균 이항 분산 (발송 가중 평균 1/n = 단위 수 / 총 발송)
+        between = spread - mean * (1.0 - mean) * units / total_n
+        strength = mean * (1.0 - mean) / between - 1.0
+    # 그룹 간 분산이 없으면 완전 축소에 가깝게 (사전 강도 상한 = 그룹 총 발송)
+    strength = np.where(between > 0, strength, total_n)
+    strength = np.clip(strength, 2.0, np.maximum(total_n, 2.0))
+    mean = np.clip(mean, 1e-6, 1.0 - 1e-6)
+    valid = units >= MIN_PRIOR_UNITS
+    return np.where(valid, mean * strength, np.nan), np.where(valid, (1.0 - mean) * strength, np.nan)
+
+
+def lift_posterior(exp_alpha, exp_beta, ctrl_alpha, ctrl_beta, draws: Optional[int] = None,
+                   credible: Optional[float] = None, seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    두 Beta 사후분포 차이(실험군 - 대조군)의 요약 통계 (모든 셀을 한 번에, Monte Carlo는 열 배치 단위)
+
+    Args:
+        exp_alpha, exp_beta: 실험군 Beta 사후분포 모수 배열
+        ctrl_alpha, ctrl_beta: 대조군 Beta 사후분포 모수 배열
+        draws: 셀당 Monte Carlo 표본 수 (기본 settings.BAYES_DRAWS, 0이면 닫힌 형식만 계산)
+        credible: 신용구간 수준 (기본 settings.CONFIDENCE_INTERVAL)
+        seed: 난수 seed (기본 settings.BAYES_SEED)
+
+    Returns:
+        컬럼명 -> 배열 딕셔너리 (비율 단위)
+    """
+    draws = settings.BAYES_DRAWS if draws is None else draws
+    credible = settings.CONFIDENCE_INTERVAL if credible is None else credible
+    seed = settings.BAYES_SEED if seed is None else seed
+    a1, b1, a2, b2 = (np.asarray(v, dtype=float) for v in (exp_alpha, exp_beta, ctrl_alpha, ctrl_beta))
+
+    # 닫힌 형식: Beta 평균/분산과 정규 근사
+    exp_mean = a1 / (a1 + b1)
+    ctrl_mean = a2 / (a2 + b2)
+    exp_var = a1 * b1 / ((a1 + b1) ** 2 * (a1 + b1 + 1.0))
+    ctrl_var = a2 * b2 / ((a2 + b2) ** 2 * (a2 + b2 + 1.0))
+    expected_lift = exp_mean - ctrl_mean
+    lift_sd = np.sqrt(exp_var + ctrl_var)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        prob_normal = ndtr(expected_lift / lift_sd)
+    z = ndtri(1.0 - (1.0 - credible) / 2.0)
+
+    result = {
+        "exp_mean": exp_mean,
+        "ctrl_mean": ctrl_mean,
+        "expected_lift": expected_lift,
+        "lift_sd": lift_sd,
+        "prob_improvement_normal": prob_normal,
+        "prob_improvement": prob_normal.copy(),
+        "credible_low": expected_lift - z * lift_sd,
+        "credible_high": expected_lift + z * lift_sd,
+    }
+    if draws <= 0 or len(a1) == 0:
+        return result
+
+    # Monte Carlo: 정규 근사가 부정확한 셀만 (draws x 열 배치) Beta 표본으로 계산, 같은 Generator를 이어 써서 재현 가능
+    rng = np.random.default_rng(seed)
+    tail = (1.0 - credible) / 2.0
+    smallest = np.minimum(np.minimum(a1, b1), np.minimum(a2, b2))
+    sampled = np.flatnonzero(np.isfinite(smallest) & (smallest < NORMAL_APPROX_MIN_PARAM))
+    batch = max(1, MC_BATCH_ELEMENTS // draws)
+    for start in range(0, len(sampled), batch):
+        index = sampled[start:start + batch]
+        samples = (rng.beta(a1[index], b1[index], size=(draws, len(index)))
+                   - rng.beta(a2[index], b2[index], size=(draws, len(index))))
+        result["prob_improvement"][index] = (samples > 0).mean(axis=0)
+        result["credible_low"][index], result["credible_high"][index] = np.quantile(samples, [tail, 1.0 - tail], axis=0)
+    return result
+
+
+def _arm_priors(successes, trials, codes: np.ndarray, n_groups: int, prior: str) -> Tuple[np.ndarray, np.ndarray]:
+    """셀별 사전분포 모수 (그룹 사전분포 -> 추정 불가 시 전체 사전분포 -> 균등 사전분포 순서로 대체)"""
+    uniform = np.ones(len(codes)), np.ones(len(codes))
+    if prior == "uniform":
+        return uniform
+    global_alpha, global_beta = method_of_moments_prior(successes, trials)
+    if not np.isfinite(global_alpha[0]):
+        return uniform
+    if n_groups == 0:
+        return np.full(len(codes), global_alpha[0]), np.full(len(codes), global_beta[0])
+    alpha, beta = method_of_moments_prior(successes, trials, codes, n_groups)
+    alpha = np.where(np.isfinite(alpha), alpha, global_alpha[0])
+    beta = np.where(np.isfinite(beta), beta, global_beta[0])
+    safe_codes = np.where(codes >= 0, codes, 0)
+    return (np.where(codes >= 0, alpha[safe_codes], global_alpha[0]),
+            np.where(codes >= 0, beta[safe_codes], global_beta[0]))
+
+
+def _build_bayesian_lift(counts: np.ndarray, groups: np.ndarray, index: pd.Index,
+                         prior: str, draws: int, credible: float, seed: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    x1, n1 = _as_counts(counts[:, 0], counts[:, 1])
+    x2, n2 = _as_counts(counts[:, 2], counts[:, 3])
+    codes, labels = pd.factorize(pd.Series(groups), sort=False)
+    n_groups = len(labels)
+
+    # 캠페인: 퍼널 평균 쪽으로 축소
+    campaign_a1, campaign_b1 = _arm_priors(x1, n1, codes, n_groups, prior)
+    campaign_a2, campaign_b2 = _arm_priors(x2, n2, codes, n_groups, prior)
+
+    # 퍼널: 퍼널 합계에 전체 평균 쪽 사전분포 적용
+    used = codes >= 0
+    group_x1 = np.bincount(codes[used], weights=x1[used], minlength=n_groups)
+    group_n1 = np.bincount(codes[used], weights=n1[used], minlength=n_groups)
+    group_x2 = np.bincount(codes[used], weights=x2[used], minlength=n_groups)
+    group_n2 = np.bincount(codes[used], weights=n2[used], minlength=n_groups)
+    no_groups = np.zeros(n_groups, dtype=int)
+    group_a1, group_b1 = _arm_priors(group_x1, group_n1, no_groups, 0, prior)
+    group_a2, group_b2 = _arm_priors(group_x2, group_n2, no_groups, 0, prior)
+
+    # 캠페인 + 퍼널 셀을 이어 붙여 한 번에 계산
+    # 한쪽 군의 발송이 0인 셀은 사후분포가 사전분포뿐이라 Lift가 만들어지므로 NaN (significance의 표본 부족과 같은 기준)
+    observed = np.concatenate([(n1 > 0) & (n2 > 0), (group_n1 > 0) & (group_n2 > 0)])
+    posterior = lift_posterior(
+        *(np.where(observed, values, np.nan) for values in (
+            np.concatenate([campaign_a1 + x1, group_a1 + group_x1]),
+            np.concatenate([campaign_b1 + n1 - x1, group_b1 + group_n1 - group_x1]),
+            np.concatenate([campaign_a2 + x2, group_a2 + group_x2]),
+            np.concatenate([campaign_b2 + n2 - x2, group_b2 + group_n2 - group_x2]),
+        )),
+        draws=draws, credible=credible, seed=seed,
+    )
+    size = len(codes)
+    campaigns = pd.DataFrame({name: values[:size] for name, values in posterior.items()}, index=index)
+    campaigns["raw_lift"] = np.where((n1 > 0) & (n2 > 0), np.divide(x1, n1, where=n1 > 0, out=np.zeros(size))
+                                     - np.divide(x2, n2, where=n2 > 0, out=np.zeros(size)), np.nan)
+    funnels = pd.DataFrame({name: values[size:] for name, values in posterior.items()},
+                           index=pd.Index(labels, name="group"))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        funnels["raw_lift"] = np.where(observed[size:], group_x1 / group_n1 - group_x2 / group_n2, np.nan)
+    funnels["campaigns"] = np.bincount(codes[used], minlength=n_groups)
+    return campaigns, funnels
+
+
+def bayesian_lift(df: pd.DataFrame, group_column: str = "퍼널", prior: Optional[str] = None,
+                  draws: Optional[int] = None, credible: Optional[float] = None,
+                  seed: Optional[int] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    캠페인(행)별/퍼널별 베이지안 Lift 사후분포 요약 (같은 데이터셋/설정이면 캐시된 결과 재사용)
+
+    Args:
+        df: 발송/전환 건수 컬럼을 가진 캠페인 DataFrame
+        group_column: 축소 기준 그룹 컬럼 (기본 퍼널)
+        prior: "empirical"(경험적 베이즈 축소) 또는 "uniform" (기본 settings.BAYES_PRIOR)
+
+    Returns:
+        (캠페인 결과 DataFrame(원본 인덱스), 퍼널 결과 DataFrame(퍼널 인덱스))
+        실험군/대조군 중 발송이 0인 셀의 사후분포 값은 NaN
+    """
+    prior = (prior or settings.BAYES_PRIOR).lower()
+    draws = settings.BAYES_DRAWS if draws is None else draws
+    credible = settings.CONFIDENCE_INTERVAL if credible is None else credible
+    seed = settings.BAYES_SEED if seed is None else seed
+    if prior not in BAYES_PRIORS:
+        raise ValueError(f"알 수 없는 사전분포: {prior} (사용 가능: {', '.join(BAYES_PRIORS)})")
+    columns = [EXP_CONVERSIONS, EXP_SENT, CTRL_CONVERSIONS, CTRL_SENT]
+    missing = [c for c in columns if c not in df.columns]
+    if missing:
+        raise KeyError(f"베이지안 Lift 계산에 필요한 컬럼이 없습니다: {', '.join(missing)}")
+
+    groups = df[group_column].to_numpy() if group_column in df.columns else np.full(len(df), np.nan)
+    counts = df[columns].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    name = f"bayesian_lift:{group_column}:{prior}:{draws}:{credible}:{seed}"
+    return get_or_build(name, df, [group_column, *columns],
+                        lambda: _build_bayesian_lift(counts, groups, df.index, prior, draws, credible, seed))
@@ -0,0 +1,215 @@
+"""
+퍼널별 합산 Lift의 부트스트랩 신뢰구간 (NumPy 벡터화)
+
+각 퍼널 안에서 캠페인을 복원추출해 합산 Lift(퍼널 실험군 전환율 - 퍼널 대조군 전환율)의 분포를 만듭니다.
+    - multinomial: 퍼널별 (B x n) 인덱스 행렬 한 번으로 B회 재표본 (고전적 부트스트랩)
+    - poisson: 캠페인별 Poisson(1) 가중치 행렬 (B x n)과 퍼널 one-hot 행렬 곱으로 모든 퍼널을 한 번에 재표본
+재표본은 BOOTSTRAP_CHUNK 단위 shard로 나누어 계산하며, shard마다 SeedSequence에서 파생한 난수를 쓰므로
+프로세스 풀 사용 여부와 관계없이 같은 seed면 같은 결과가 나옵니다.
+신뢰구간은 percentile과 BCa(jackknife 가속 계수) 두 가지를 제공합니다.
+"""
+
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+from config.settings import settings
+from core.analysis.dataset_cache import get_or_build
+from core.analysis.significance import CTRL_CONVERSIONS, CTRL_SENT, EXP_CONVERSIONS, EXP_SENT
+
+BOOTSTRAP_METHODS = ("multinomial", "poisson")
+
+# 재표본 계산 순서와 같은 집계 컬럼 순서 (실험군 전환, 실험군 발송, 대조군 전환, 대조군 발송)
+BOOTSTRAP_COLUMNS = [EXP_CONVERSIONS, EXP_SENT, CTRL_CONVERSIONS, CTRL_SENT]
+
+
+def _pooled_lift(sums: np.ndarray) -> np.ndarray:
+    """(..., 4) 합계 배열의 합산 Lift (발송 0건이면 NaN)"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return sums[..., 0] / sums[..., 1] - sums[..., 2] / sums[..., 3]
+
+
+def _resample_shard(counts: np.ndarray, codes: np.ndarray, n_groups: int, replicates: int,
+                    method: str, seed: np.random.SeedSequence) -> np.ndarray:
+    """
+    shard 하나의 재표본 Lift 계산 (프로세스 풀에서 호출되므로 모듈 최상위 함수)
+
+    Returns:
+        (replicates x n_groups) 재표본 Lift 배열
+    """
+    rng = np.random.default_rng(seed)
+    if method == "poisson":
+        weights = rng.poisson(1.0, size=(replicates, len(counts))).astype(float)
+        # 퍼널 one-hot x 건수 행렬 (n x 그룹 x 4): (B x n) 가중치와의 곱 한 번으로 모든 퍼널 합계 계산
+        onehot = np.zeros((len(counts), n_groups, 4))
+        onehot[np.arange(len(counts)), codes] = counts
+        sums = np.tensordot(weights, onehot, axes=(1, 0))
+        return _pooled_lift(sums)
+
+    sums = np.zeros((replicates, n_groups, 4))
+    for group in range(n_groups):
+        group_counts = counts[codes == group]
+        if len(group_counts) == 0:
+            continue
+        # (B x n_퍼널) 인덱스 행렬 한 번으로 B회 복원추출
+        index = rng.integers(0, len(group_counts), size=(replicates, len(group_counts)))
+        for column in range(4):
+            sums[:, group, column] = group_counts[:, column][index].sum(axis=1)
+    return _pooled_lift(sums)
+
+
+def _jackknife_acceleration(counts: np.ndarray, codes: np.ndarray, n_groups: int) -> np.ndarray:
+    """퍼널별 leave-one-campaign-out Lift로 BCa 가속 계수 계산 (합계에서 빼기만 하므로 O(n))"""
+    totals = np.zeros((n_groups, 4))
+    np.add.at(totals, codes, counts)
+    leave_one_out = _pooled_lift(totals[codes] - counts)
+
+    acceleration = np.zeros(n_groups)
+    for group in range(n_groups):
+        values = leave_one_out[codes == group]
+        values = values[~np.isnan(values)]
+        if len(values) < 2:
+            continue
+        deviation = values.mean() - values
+        denominator = 6.0 * (deviation ** 2).sum() ** 1.5
+        acceleration[group] = (deviation ** 3).sum() / denominator if denominator > 0 else 0.0
+    return acceleration
+
+
+def _column_quantiles(replicates: np.ndarray, levels: np.ndarray) -> np.ndarray:
+    """열마다 다른 분위수 수준으로 NaN을 제외한 분위수 계산 (정렬 1회, 선형 보간)"""
+    ordered = np.sort(replicates, axis=0)
+    valid = (~np.isnan(ordered)).sum(axis=0)
+    position = np.clip(levels, 0.0, 1.0) * np.maximum(valid - 1, 0)
+    lower = np.floor(position).astype(int)
+    upper = np.minimum(lower + 1, np.maximum(valid - 1, 0))
+    low_values = np.take_along_axis(ordered, lower[np.newaxis, :], axis=0)[0]
+    high_values = np.take_along_axis(ordered, upper[np.newaxis, :], axis=0)[0]
+    quantiles = low_values + (high_values - low_values) * (position - lower)
+    return np.where(valid > 0, quantiles, np.nan)
+
+
+def bootstrap_pooled_lift(counts, groups, resamples: Optional[int] = None, confidence: Optional[float] = None,
+                          method: Optional[str] = None, seed: Optional[int] = None,
+                          workers: Optional[int] = None, chunk_size: Optional[int] = None) -> pd.DataFrame:
+    """
+    그룹(퍼널) 안에서 캠페인을 복원추출한 합산 Lift의 percentile/BCa 부트스트랩 신뢰구간
+
+    Args:
+        counts: (n x 4) 캠페인별 실험군 전환/발송, 대조군 전환/발송 건수
+        groups: 길이 n의 그룹 라벨 (결측 그룹의 캠페인은 제외)
+        resamples: 재표본 횟수 B (기본 settings.BOOTSTRAP_RESAMPLES)
+        confidence: 신뢰수준 (기본 settings.CONFIDENCE_INTERVAL)
+        method: "multinomial" 또는 "poisson" (기본 settings.BOOTSTRAP_METHOD)
+        seed: 난수 seed (기본 settings.BOOTSTRAP_SEED)
+        workers: shard를 나눠 계산할 프로세스 수 (0/1이면 현재 프로세스, 기본 settings.BOOTSTRAP_WORKERS)
+        chunk_size: shard당 재표본 수 (기본 settings.BOOTSTRAP_CHUNK)
+
+    Returns:
+        그룹을 index로 하는 DataFrame (lift, lift_se, pct_low/high, bca_low/high, campaigns, resamples; 비율 단위)
+    """
+    resamples = settings.BOOTSTRAP_RESAMPLES if resamples is None else resamples
+    confidence = settings.CONFIDENCE_INTERVAL if confidence is None else confidence
+    method = (method or settings.BOOTSTRAP_METHOD).lower()
+    seed = settings.BOOTSTRAP_SEED if seed is None else seed
+    workers = settings.BOOTSTRAP_WORKERS if workers is None else workers
+    chunk_size = settings.BOOTSTRAP_CHUNK if chunk_size is None else chunk_size
+    if method not in BOOTSTRAP_METHODS:
+        raise ValueError(f"알 수 없는 부트스트랩 방법: {method} (사용 가능: {', '.join(BOOTSTRAP_METHODS)})")
+
+    counts = np.clip(np.nan_to_num(np.asarray(counts, dtype=float), nan=0.0), 0.0, None)
+    codes, labels = pd.factorize(pd.Series(groups), sort=False)
+    keep = codes >= 0
+    counts, codes = counts[keep], codes[keep]
+    n_groups = len(labels)
+    if n_groups == 0 or resamples <= 0:
+        return pd.DataFrame(columns=["lift", "lift_se", "pct_low", "pct_high", "bca_low", "bca_high",
+                                     "campaigns", "resamples"])
+
+    # shard 구성은 chunk_size로만 정해지므로 workers 수와 무관하게 결과가 재현됨
+    shard_sizes = [min(chunk_size, resamples - start) for start in range(0, resamples, max(chunk_size, 1))]
+    seeds = np.random.SeedSequence(seed).spawn(len(shard_sizes))
+    args = [(counts, codes, n_groups, size, method, shard_seed) for size, shard_seed in zip(shard_sizes, seeds)]
+    if workers and workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(args))) as pool:
+            shards = list(pool.map(_resample_shard, *zip(*args)))
+    else:
+        shards = [_resample_shard(*shard_args) for shard_args in args]
+    replicates = np.vstack(shards)
+
+    totals = np.zeros((n_groups, 4))
+    np.add.at(totals, codes, counts)
+    estimate = _pooled_lift(totals)
+
+    alpha = 1.0 - confidence
+    levels = np.array([alpha / 2.0, 1.0 - alpha / 2.0])
+    pct_low = _column_quantiles(replicates, np.full(n_groups, levels[0]))
+    pct_high = _column_quantiles(replicates, np.full(n_groups, levels[1]))
+
+    # BCa: 편향 보정 z0 (재표본이 추정치보다 작은 비율) + jackknife 가속 계수
+    valid = ~np.isnan(replicates)
+    n_valid = np.maximum(valid.sum(axis=0), 1)
+    below = ((replicates < estimate) & valid).sum(axis=0) + 0.5 * ((replicates == estimate) & valid).sum(axis=0)
+    z0 = ndtri(np.clip(below / n_valid, 1.0 / (n_valid + 1), n_valid / (n_valid + 1)))
+    acceleration = _jackknife_acceleration(counts, codes, n_groups)
+    z_levels = ndtri(levels)
+    bca_bounds = []
+    for z_alpha in z_levels:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            adjusted = ndtr(z0 + (z0 + z_alpha) / (1.0 - acceleration * (z0 + z_alpha)))
+        bca_bounds.append(_column_quantiles(replicates, np.nan_to_num(adjusted, nan=0.5)))
+    with warnings.catch_warnings():
+        # 재표본이 모두 NaN인 그룹(발송 0건)은 표준오차도 NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        lift_se = np.nanstd(replicates, axis=0, ddof=1)
+
+    return pd.DataFrame({
+        "lift": estimate,
+        "lift_se": lift_se,
+        "pct_low": pct_low,
+        "pct_high": pct_high,
+        "bca_low": bca_bounds[0],
+        "bca_high": bca_bounds[1],
+        "campaigns": np.bincount(codes, minlength=n_groups),
+        "resamples": n_valid,
+    }, index=pd.Index(labels, name="group"))
+
+
+def funnel_bootstrap(df: pd.DataFrame, group_column: str = "퍼널", **kwargs) -> pd.DataFrame:
+    """
+    퍼널별 합산 Lift 부트스트랩 신뢰구간 (같은 데이터셋/설정이면 캐시된 결과 재사용)
+
+    Returns:
+        퍼널을 index로 하는 bootstrap_pooled_lift 결과 DataFrame
+    """
+    if group_column not in df.columns:
+        raise KeyError(f"부트스트랩 그룹 컬럼이 없습니다: {group_column}")
+    missing = [c for c in BOOTSTRAP_COLUMNS if c not in df.columns]
+    if missing:
+        raise KeyError(f"부트스트랩에 필요한 컬럼이 없습니다: {', '.join(missing)}")
+
+    options = {
+        "resamples": settings.BOOTSTRAP_RESAMPLES,
+        "confidence": settings.CONFIDENCE_INTERVAL,
+        "method": settings.BOOTSTRAP_METHOD,
+        "seed": settings.BOOTSTRAP_SEED,
+        "chunk_size": settings.BOOTSTRAP_CHUNK,
+    }
+    options.update(kwargs)
+    # workers는 결과에 영향이 없으므로 캐시 키에서 제외
+    name = "funnel_bootstrap:" + group_column + ":" + ":".join(
+        f"{key}={value}" for key, value in sorted(options.items()) if key != "workers")
+    counts = df[BOOTSTRAP_COLUMNS].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    return get_or_build(name, df, [group_column, *BOOTSTRAP_COLUMNS],
+                        lambda: bootstrap_pooled_lift(counts, df[group_column].to_numpy(), **options))
+
+
+def format_lift_interval(low: float, high: float) -> str:
+    """Lift 신뢰구간 표시 문자열 (비율 단위 입력 -> %p)"""
+    if pd.isna(low) or pd.isna(high):
+        return "-"
+    return f"{low * 100:+.1f} ~ {high * 100:+.1f}%p"
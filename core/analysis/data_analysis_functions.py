@@ -3,10 +3,21 @@
 import pandas as pd
 import numpy as np
 import json
-import re
 from collections import Counter
 from typing import Dict, Any, List
-from config.settings import settings, azure_llm  # azure_llm 싱글톤 import
+from config.settings import get_completion_client, settings
+from core.analysis.message_index import get_message_index
+from core.analysis.message_families import get_message_families
+from core.analysis.message_normalization import get_message_keys
+from core.analysis.message_vectors import get_message_vectors
+from core.llm.resilience import resilient_completion
+from core.analysis.bayesian import bayesian_lift
+from core.analysis.significance import (
+    SIGNIFICANCE_DIMENSIONS, SIGNIFICANT_POSITIVE, overall_significance, run_comparisons,
+)
+
+# litellm.completion 형식 호출용 클라이언트 (LLM_BACKEND=fake면 오프라인 대체 구현)
+completion_client = get_completion_client()
 
 # =============================================================================
 # 1. 통계 기반 분석 함수들
@@ -37,11 +48,125 @@ def analyze_conversion_performance(df) -> Dict[str, Any]:
     except Exception as e:
         return {"status": "error", "error_message": str(e)}
 
+def analyze_lift_significance(df, top_n: int = 5) -> Dict[str, Any]:
+    """실험군 vs 대조군 Lift 통계적 유의성 분석 (전체, 캠페인별, 퍼널/채널/목적별, 실행 전체 다중검정 보정)"""
+    try:
+        overall = overall_significance(df)
+        comparisons = run_comparisons(df)
+        campaigns = comparisons['campaign']
+        
+        # 캠페인별 판정 분포 및 유의한 캠페인 (Lift 크기순)
+        campaigns = campaigns.join(df[[c for c in ('퍼널', '채널', '문구') if c in df.columns]])
+        significant_campaigns = campaigns[campaigns['significant']].sort_values('lift', ascending=False)
+        
+        def to_records(frame: pd.DataFrame, columns: List[str]) -> List[Dict[str, Any]]:
+            rounded = frame[columns].copy()
+            for column in ('lift', 'lift_ci_low', 'lift_ci_high', 'exp_rate', 'ctrl_rate'):
+                if column in rounded.columns:
+                    rounded[column] = (rounded[column] * 100).round(2)
+            for column in ('p_value', 'q_value'):
+                if column in rounded.columns:
+                    rounded[column] = rounded[column].map(lambda v: float(f"{v:.3g}") if pd.notna(v) else None)
+            return rounded.to_dict('records')
+        
+        group_columns = ['group', 'exp_sent', 'ctrl_sent', 'exp_rate', 'ctrl_rate', 'lift',
+                         'lift_ci_low', 'lift_ci_high', 'p_value', 'q_value', 'verdict']
+        group_results = {
+            dimension: to_records(comparisons[dimension].rename_axis('group').reset_index()
+                                  .sort_values('lift', ascending=False), group_columns)
+            for dimension in SIGNIFICANCE_DIMENSIONS if dimension in comparisons
+        }
+        campaign_columns = [c for c in ('퍼널', '채널', '문구') if c in campaigns.columns] + \
+            ['exp_rate', 'ctrl_rate', 'lift', 'lift_ci_low', 'lift_ci_high', 'p_value', 'q_value', 'verdict']
+        tested = sum(len(frame) for frame in comparisons.values())
+        significant = sum(int(frame['significant'].sum()) for frame in comparisons.values())
+        
+        return {
+            "status": "success",
+            "settings": {
+                "significance_level": settings.LIFT_SIGNIFICANCE_THRESHOLD,
+                "confidence_interval": settings.CONFIDENCE_INTERVAL,
+                "min_sample_size": settings.MIN_SAMPLE_SIZE,
+                "multiple_testing_method": settings.MULTIPLE_TESTING_METHOD,
+            },
+            "multiple_testing": {
+                "comparisons": tested,
+                "significant_after_correction": significant,
+                "significant_before_correction": sum(
+                    int((frame['sufficient_sample'] & (frame['p_value'] < settings.LIFT_SIGNIFICANCE_THRESHOLD)).sum())
+                    for frame in comparisons.values()
+                ),
+            },
+            "overall": {
+                "exp_rate": round(overall["exp_rate"] * 100, 2),
+                "ctrl_rate": round(overall["ctrl_rate"] * 100, 2),
+                "lift": round(overall["lift"] * 100, 2),
+                "lift_ci": [round(overall["lift_ci_low"] * 100, 2), round(overall["lift_ci_high"] * 100, 2)],
+                "z_score": round(overall["z_score"], 3),
+                "p_value": float(f"{overall['p_value']:.3g}"),
+                "verdict": overall["verdict"],
+            },
+            "campaign_verdicts": campaigns['verdict'].value_counts().to_dict(),
+            "top_significant_campaigns": to_records(significant_campaigns.head(top_n), campaign_columns),
+            "group_significance": group_results,
+            "message": f"전체 Lift {overall['lift'] * 100:+.2f}%p "
+                       f"({settings.CONFIDENCE_INTERVAL:.0%} CI {overall['lift_ci_low'] * 100:+.2f}~{overall['lift_ci_high'] * 100:+.2f}%p, "
+                       f"p={overall['p_value']:.3g}, {overall['verdict']}), "
+                       f"실행 전체 비교 {tested}건 중 보정 후 유의 {significant}건"
+        }
+    except Exception as e:
+        return {"status": "error", "error_message": str(e)}
+
+def analyze_bayesian_lift(df, top_n: int = 5) -> Dict[str, Any]:
+    """Beta-Binomial 베이지안 Lift 분석 (퍼널별 개선 확률 P(Lift>0), 기대 Lift, 신용구간 / 소량 퍼널은 평균 쪽으로 축소)"""
+    try:
+        campaigns, funnels = bayesian_lift(df)
+        
+        def to_record(key: str, row: pd.Series) -> Dict[str, Any]:
+            return {
+                key: row.name,
+                "prob_improvement": round(float(row['prob_improvement']), 3),
+                "expected_lift": round(float(row['expected_lift']) * 100, 2),
+                "raw_lift": round(float(row['raw_lift']) * 100, 2) if pd.notna(row['raw_lift']) else None,
+                "credible_interval": [round(float(row['credible_low']) * 100, 2),
+                                      round(float(row['credible_high']) * 100, 2)],
+            }
+        
+        # 실험군/대조군 중 발송이 0인 셀(사후분포 NaN)은 표본 부족으로 순위에서 제외
+        insufficient = funnels['prob_improvement'].isna()
+        funnels = funnels[~insufficient].sort_values(['prob_improvement', 'expected_lift'], ascending=False)
+        funnel_results = [dict(to_record('funnel', row), campaigns=int(row['campaigns'])) for _, row in funnels.iterrows()]
+        
+        campaigns = campaigns.dropna(subset=['prob_improvement']).join(df[[c for c in ('퍼널', '문구') if c in df.columns]])
+        top_campaigns = []
+        for _, row in campaigns.sort_values(['prob_improvement', 'expected_lift'], ascending=False).head(top_n).iterrows():
+            record = to_record('index', row)
+            record.update({c: row[c] for c in ('퍼널', '문구') if c in campaigns.columns})
+            top_campaigns.append(record)
+        
+        likely = [r['funnel'] for r in funnel_results if r['prob_improvement'] >= 0.95]
+        return {
+            "status": "success",
+            "settings": {
+                "prior": settings.BAYES_PRIOR,
+                "draws": settings.BAYES_DRAWS,
+                "credible_interval": settings.CONFIDENCE_INTERVAL,
+            },
+            "funnel_posteriors": funnel_results,
+            "insufficient_sample_funnels": [str(f) for f in insufficient[insufficient].index],
+            "top_campaigns": top_campaigns,
+            "message": f"P(Lift>0) 95% 이상 퍼널 {len(likely)}/{len(funnel_results)}개"
+                       + (f": {', '.join(map(str, likely[:top_n]))}" if likely else "")
+        }
+    except Exception as e:
+        return {"status": "error", "error_message": str(e)}
+
 def analyze_message_effectiveness(df) -> Dict[str, Any]:
-    """문구별 효과성 분석"""
+    """문구별 효과성 분석 (광고 표기/수신거부/이모지/공백 차이는 같은 문구로 집계)"""
     try:
-        # 문구별 전환율 분석
-        message_analysis = df.groupby('문구')['실험군_예약전환율'].agg(['mean', 'count']).round(3)
+        # 표준형 문구별 전환율 분석
+        canonical = get_message_keys(df)['message_canonical'].rename('문구')
+        message_analysis = df.groupby(canonical)['실험군_예약전환율'].agg(['mean', 'count']).round(3)
         best_message = message_analysis['mean'].idxmax()
         best_rate = message_analysis['mean'].max()
         
@@ -79,10 +204,12 @@ def analyze_funnel_performance(df) -> Dict[str, Any]:
         return {"status": "error", "error_message": str(e)}
 
 def analyze_funnel_message_effectiveness(df) -> Dict[str, Any]:
-    """퍼널별 문구 효과성 분석"""
+    """퍼널별 문구 효과성 분석 (다중검정 보정 후 유의한 양의 Lift 문구 우선)"""
     try:
         funnel_message_analysis = df.groupby(['퍼널', '문구'])['실험군_예약전환율'].agg(['mean', 'count']).round(3)
-        funnel_message_analysis = funnel_message_analysis.reset_index()
+        significance = run_comparisons(df)['funnel_message'][['verdict', 'p_value', 'q_value']]
+        funnel_message_analysis = funnel_message_analysis.join(significance).reset_index()
+        funnel_message_analysis['proven'] = funnel_message_analysis['verdict'] == SIGNIFICANT_POSITIVE
         
         best_messages_by_funnel = {}
         for funnel in df['퍼널'].unique():
@@ -91,11 +218,14 @@ def analyze_funnel_message_effectiveness(df) -> Dict[str, Any]:
                 
             funnel_data = funnel_message_analysis[funnel_message_analysis['퍼널'] == funnel]
             if len(funnel_data) > 0:
-                best_message = funnel_data.loc[funnel_data['mean'].idxmax()]
+                best_message = funnel_data.sort_values(['proven', 'mean'], ascending=False).iloc[0]
                 best_messages_by_funnel[funnel] = {
                     'best_message': best_message['문구'],
                     'conversion_rate': float(best_message['mean']),
-                    'count': int(best_message['count'])
+                    'count': int(best_message['count']),
+                    'verdict': best_message['verdict'],
+                    'p_value': float(best_message['p_value']) if pd.notna(best_message['p_value']) else None,
+                    'q_value': float(best_message['q_value']) if pd.notna(best_message['q_value']) else None,
                 }
         
         return {
@@ -110,6 +240,7 @@ def analyze_message_patterns_by_funnel(df) -> Dict[str, Any]:
     """퍼널별 문구 패턴 분석"""
     try:
         pattern_analysis = {}
+        message_index = get_message_index(df)
         
         for funnel in df['퍼널'].unique():
             if pd.isna(funnel):
@@ -121,13 +252,8 @@ def analyze_message_patterns_by_funnel(df) -> Dict[str, Any]:
             # 상위 5개 문구 분석
             top_messages = funnel_data_sorted.head(5)
             
-            # 공통 키워드 분석
-            all_messages = funnel_data['문구'].dropna().str.cat(sep=' ')
-            
-            # 간단한 키워드 추출
-            korean_words = re.findall(r'[가-힣]{2,}', all_messages)
-            keyword_counts = Counter(korean_words)
-            top_keywords = keyword_counts.most_common(10)
+            # 공통 키워드 분석 (데이터셋당 한 번 구축한 역색인의 posting list로 집계)
+            top_keywords = message_index.top_tokens(10, funnel=funnel)
             
             pattern_analysis[funnel] = {
                 'total_messages': len(funnel_data),
@@ -200,7 +326,8 @@ def analyze_single_message_llm(message, funnel, conversion_rate, channel) -> Dic
     """
     
     try:
-        response = azure_llm.completion(
+        response = resilient_completion(
+            completion_client.completion,
             model=f"azure/{settings.AZURE_OPENAI_DEPLOYMENT_NAME}",
             messages=[{"role": "user", "content": prompt}],
             api_key=settings.AZURE_OPENAI_API_KEY,
@@ -226,11 +353,16 @@ def analyze_single_message_llm(message, funnel, conversion_rate, channel) -> Dic
         return {"error": f"분석 중 오류: {str(e)}"}
 
 def analyze_messages_by_funnel_llm(df, sample_size=3) -> Dict[str, Any]:
-    """LLM이 퍼널별로 메시지를 직접 분석"""
+    """LLM이 퍼널별로 메시지를 직접 분석 (근접 중복 문구 패밀리는 퍼널 안의 대표 문구와 합산 전환율로 한 번만 LLM 호출)"""
     
     try:
         funnel_analyses = {}
         
+        # 템플릿 변형 문구 패밀리: (퍼널, 패밀리)당 한 번만 분석하고 같은 퍼널의 같은 패밀리 변형에 결과 공유
+        families = get_message_families(df)
+        family_cache = {}
+        llm_calls = 0
+        
         for funnel in df['퍼널'].unique():
             if pd.isna(funnel):
                 continue
@@ -238,6 +370,8 @@ def analyze_messages_by_funnel_llm(df, sample_size=3) -> Dict[str, Any]:
             # 해당 퍼널의 데이터만 필터링
             funnel_data = df[df['퍼널'] == funnel]
             funnel_data_sorted = funnel_data.sort_values('실험군_예약전환율', ascending=False)
+            # 대표 문구/합산 전환율은 이 퍼널 안의 패밀리 변형만으로 계산
+            funnel_lift = families.family_lift(df.index.get_indexer(funnel_data.index))
             
             # 상위 샘플 선택
             sample_data = funnel_data_sorted.head(sample_size)
@@ -250,24 +384,44 @@ def analyze_messages_by_funnel_llm(df, sample_size=3) -> Dict[str, Any]:
             
             # 각 메시지별로 LLM 분석
             for idx, row in sample_data.iterrows():
-                analysis = analyze_single_message_llm(
-                    message=row['문구'],
-                    funnel=funnel,
-                    conversion_rate=row['실험군_예약전환율'],
-                    channel=row['채널']
-                )
+                family_id = int(families.family_ids[df.index.get_loc(idx)])
+                family = funnel_lift.loc[family_id]
+                family_rate = family['exp_rate']
+                cache_key = (funnel, family_id)
+                shared = cache_key in family_cache
+                if not shared:
+                    # 샘플 변형이 아닌 퍼널 내 패밀리 대표 문구와 퍼널 내 패밀리 합산 전환율로 분석 (변형 간 공유 가능한 결과)
+                    representative = df.iloc[int(family['representative_row'])]
+                    family_cache[cache_key] = analyze_single_message_llm(
+                        message=representative['문구'],
+                        funnel=funnel,
+                        conversion_rate=representative['실험군_예약전환율'] if pd.isna(family_rate) else family_rate,
+                        channel=representative['채널']
+                    )
+                    llm_calls += 1
+                analysis = family_cache[cache_key]
                 
                 if 'error' not in analysis:
                     funnel_analyses[funnel]['analyses'].append({
                         'message': row['문구'],
                         'conversion_rate': row['실험군_예약전환율'],
                         'channel': row['채널'],
+                        'family_id': family_id,
+                        'family_representative': family['representative'],
+                        'family_variants': int(family['variants']),
+                        'family_conversion_rate': None if pd.isna(family_rate) else float(family_rate),
+                        'family_lift': None if pd.isna(family['lift']) else float(family['lift']),
+                        'analysis_scope': 'funnel_family',
+                        'shared_analysis': shared,
                         'analysis': analysis
                     })
         
+        print(f"🧬 문구 패밀리 {families.n_families}개 (고유 문구 {len(families.messages)}개), LLM 호출 {llm_calls}회")
         return {
             "status": "success",
             "funnel_analyses": funnel_analyses,
+            "message_families": families.summary(),
+            "llm_calls": llm_calls,
             "message": "LLM 기반 퍼널별 문구 분석 완료"
         }
         
@@ -475,7 +629,8 @@ def analyze_messages_by_funnel_llm(df, sample_size=3) -> Dict[str, Any]:
         """
         
         try:
-            response = azure_llm.completion(
+            response = resilient_completion(
+                completion_client.completion,
                 model=f"azure/{settings.AZURE_OPENAI_DEPLOYMENT_NAME}",
                 messages=[{"role": "user", "content": batch_prompt}],
                 api_key=settings.AZURE_OPENAI_API_KEY,
@@ -697,7 +852,8 @@ def analyze_messages_by_funnel_llm(df, sample_size=3) -> Dict[str, Any]:
             """
             
             try:
-                response = azure_llm.completion(
+                response = resilient_completion(
+                    completion_client.completion,
                     model=f"azure/{settings.AZURE_OPENAI_DEPLOYMENT_NAME}",
                     messages=[{"role": "user", "content": batch_prompt}],
                     api_key=settings.AZURE_OPENAI_API_KEY,
@@ -913,7 +1069,8 @@ def analyze_messages_by_funnel_llm(df, sample_size=3) -> Dict[str, Any]:
             """
             
             try:
-                response = azure_llm.completion(
+                response = resilient_completion(
+                    completion_client.completion,
                     model=f"azure/{settings.AZURE_OPENAI_DEPLOYMENT_NAME}",
                     messages=[{"role": "user", "content": batch_prompt}],
                     api_key=settings.AZURE_OPENAI_API_KEY,
@@ -980,12 +1137,10 @@ def analyze_message_effectiveness_reasons(df) -> Dict[str, Any]:
     """문구 효과성 이유 분석 (텍스트 유사도 + LLM 분석)"""
     
     try:
-        from sklearn.feature_extraction.text import TfidfVectorizer
-        from sklearn.metrics.pairwise import cosine_similarity
-        import numpy as np
-        
         print("🔍 문구 효과성 이유 분석 시작...")
         
+        # 전체 문구로 한 번 학습한 TF-IDF 색인 (퍼널마다 다시 학습하지 않음)
+        message_vectors = get_message_vectors(df)
         effectiveness_analysis = {}
         
         # 퍼널별로 분석
@@ -1006,15 +1161,11 @@ def analyze_message_effectiveness_reasons(df) -> Dict[str, Any]:
                 continue
             
             # 1. 텍스트 유사도 분석
-            messages = top_messages['문구'].fillna('').tolist()
             conversion_rates = top_messages['실험군_예약전환율'].tolist()
             
-            # TF-IDF 벡터화
-            vectorizer = TfidfVectorizer(max_features=100, stop_words=None)
-            tfidf_matrix = vectorizer.fit_transform(messages)
-            
-            # 코사인 유사도 계산
-            similarity_matrix = cosine_similarity(tfidf_matrix)
+            # 상위 문구 간 평균 코사인 유사도와 유사 고성과 문구 (희소 행렬 내적)
+            top_rows = df.index.get_indexer(top_messages.index)
+            similarity_scores = message_vectors.group_similarity(top_rows)
             
             # 2. LLM 기반 효과성 이유 분석
             effectiveness_reasons = []
@@ -1057,7 +1208,7 @@ def analyze_message_effectiveness_reasons(df) -> Dict[str, Any]:
                 5. **텍스트 유사도 기반 분석** (수치 포함):
                    - 다른 고성과 문구와의 공통점 (구체적 패턴)
                    - 차별화 요소 (구체적 차이점)
-                   - 유사도 점수와 그 의미
+                   - 상위 문구 평균 유사도 점수 {similarity_scores[i]:.2f}와 그 의미
                 
                 6. **수치적 근거** (중요):
                    - 전환율 {conversion_rate}%가 높은 이유
@@ -1114,7 +1265,8 @@ def analyze_message_effectiveness_reasons(df) -> Dict[str, Any]:
                 """
                 
                 try:
-                    response = azure_llm.completion(
+                    response = resilient_completion(
+                        completion_client.completion,
                         model=f"azure/{settings.AZURE_OPENAI_DEPLOYMENT_NAME}",
                         messages=[{"role": "user", "content": prompt}],
                         api_key=settings.AZURE_OPENAI_API_KEY,
@@ -1134,13 +1286,12 @@ def analyze_message_effectiveness_reasons(df) -> Dict[str, Any]:
                         analysis_result = json.loads(json_str)
                         
                         # 유사도 점수 추가
-                        if i < len(similarity_matrix):
-                            avg_similarity = np.mean([similarity_matrix[i][j] for j in range(len(similarity_matrix)) if i != j])
-                            analysis_result['similarity_analysis']['similarity_score'] = float(avg_similarity)
+                        analysis_result.setdefault('similarity_analysis', {})['similarity_score'] = float(similarity_scores[i])
                         
                         effectiveness_reasons.append({
                             'message': message,
                             'conversion_rate': conversion_rate,
+                            'similar_high_lift_messages': message_vectors.similar_high_lift(int(top_rows[i]), k=3),
                             'analysis': analysis_result
                         })
                         
@@ -0,0 +1,92 @@
+"""데이터셋 단위 파생 결과(색인, 피처 행렬 등) 캐시"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Sequence
+
+import pandas as pd
+
+# 프로세스 내에서 유지할 파생 결과 최대 개수
+MAX_CACHED_ARTIFACTS = 32
+
+_artifacts: "OrderedDict[str, Any]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def dataset_fingerprint(df: pd.DataFrame, columns: Sequence[str]) -> str:
+    """지정한 컬럼 내용 기준 데이터셋 fingerprint 계산 (벡터화 해시 1회)"""
+    present = [c for c in columns if c in df.columns]
+    digest = hashlib.sha1(repr(present).encode("utf-8"))
+    digest.update(str(len(df)).encode("utf-8"))
+    if present:
+        digest.update(pd.util.hash_pandas_object(df[present], index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def dataset_path_key(csv_file_path: str) -> str:
+    """데이터셋 경로별 저장 파일 이름: 파일명 + 절대 경로 sha1 앞 8자리 (다른 폴더의 같은 파일명 구분)"""
+    stem = os.path.splitext(os.path.basename(csv_file_path))[0]
+    path_hash = hashlib.sha1(os.path.abspath(csv_file_path).encode("utf-8")).hexdigest()[:8]
+    return f"{stem}_{path_hash}"
+
+
+def get_or_build(name: str, df: pd.DataFrame, columns: Sequence[str], builder: Callable[[], Any]) -> Any:
+    """같은 데이터셋(컬럼 내용 기준)에 대해 한 번만 builder를 실행하고 결과를 재사용"""
+    key = f"{name}:{dataset_fingerprint(df, columns)}"
+    with _lock:
+        if key in _artifacts:
+            _artifacts.move_to_end(key)
+            return _artifacts[key]
+
+    artifact = builder()
+
+    with _lock:
+        _artifacts[key] = artifact
+        _artifacts.move_to_end(key)
+        while len(_artifacts) > MAX_CACHED_ARTIFACTS:
+            _artifacts.popitem(last=False)
+    return artifact
+
+
+def cache_stats() -> dict:
+    """캐시된 파생 결과/원본 CSV 개수"""
+    with _lock:
+        return {"artifacts": len(_artifacts), "csv_frames": len(_csv_frames)}
+
+
+def clear_dataset_cache():
+    """캐시된 파생 결과 전체 삭제"""
+    with _lock:
+        _artifacts.clear()
+        _csv_frames.clear()
+
+
+# 프로세스 내에서 유지할 원본 CSV 최대 개수 (배치 실행 시 데이터셋별 반복 로드 방지)
+MAX_CACHED_CSV = 8
+
+_csv_frames: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+
+
+def read_csv_cached(csv_file_path: str) -> pd.DataFrame:
+    """
+    CSV를 한 번만 파싱하고 재사용 (경로 + 수정 시각 + 크기 기준, 호출마다 복사본 반환)
+
+    도구 함수들이 같은 CSV를 여러 번 읽어도 파싱은 파일이 바뀌었을 때만 다시 수행합니다.
+    """
+    stat = os.stat(csv_file_path)
+    key = (os.path.abspath(csv_file_path), stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        if key in _csv_frames:
+            _csv_frames.move_to_end(key)
+            return _csv_frames[key].copy()
+
+    df = pd.read_csv(csv_file_path)
+
+    with _lock:
+        _csv_frames[key] = df
+        _csv_frames.move_to_end(key)
+        while len(_csv_frames) > MAX_CACHED_CSV:
+            _csv_frames.popitem(last=False)
+    return df.copy()
@@ -0,0 +1,118 @@
+"""문구 키워드 지표 엔진 - 컴파일된 멀티 패턴 매처 기반 단일 스캔 집계"""
+
+import re
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# 키워드 집계에 사용하는 발송/전환 컬럼 (행렬-벡터 곱 한 번으로 모두 합산)
+COUNT_COLUMNS = ['실험군_1일이내_예약생성', '실험군_발송', '대조군_1일이내_예약생성', '대조군_발송']
+
+
+class KeywordMatcher:
+    """
+    키워드 목록을 하나의 alternation 정규식으로 컴파일해 문구를 한 번만 스캔하는 매처
+
+    lookahead 패턴으로 겹치는 키워드(예: '확정해'와 '해주세요')도 모두 찾고,
+    같은 위치에서 시작하는 짧은 키워드는 접두사 관계로 함께 표시합니다.
+    """
+
+    def __init__(self, keywords: Sequence[str]):
+        # 순서를 유지한 중복 제거
+        self.keywords: List[str] = list(dict.fromkeys(k for k in keywords if k))
+        self.keyword_index: Dict[str, int] = {k: i for i, k in enumerate(self.keywords)}
+
+        # 긴 키워드를 먼저 시도해야 같은 위치의 접두사 키워드를 함께 복원할 수 있음
+        alternation = '|'.join(re.escape(k) for k in sorted(self.keywords, key=len, reverse=True))
+        self.pattern = re.compile(f'(?=({alternation}))') if self.keywords else None
+
+        # 매칭된 키워드 -> 같은 위치에서 함께 매칭되는 (접두사) 키워드 id 목록
+        self._implied_ids = {
+            k: [self.keyword_index[p] for p in self.keywords if k.startswith(p)]
+            for k in self.keywords
+        }
+
+    def finditer(self, text: str) -> Iterator[Tuple[str, int]]:
+        """문구 내 모든 키워드 매칭을 (키워드, 시작 위치) 순서로 반환"""
+        if self.pattern is None or not text:
+            return
+        for match in self.pattern.finditer(text):
+            for keyword_id in self._implied_ids[match.group(1)]:
+                yield self.keywords[keyword_id], match.start()
+
+    def incidence_matrix(self, messages: pd.Series) -> sparse.csr_matrix:
+        """문구 x 키워드 포함 여부 희소 행렬 생성 (문구당 한 번 스캔)"""
+        n_rows = len(messages)
+        if self.pattern is None or n_rows == 0:
+            return sparse.csr_matrix((n_rows, len(self.keywords)), dtype=np.int8)
+
+        texts = pd.Series(messages.to_numpy(), dtype=object).fillna('').astype(str)
+        hits = texts.str.findall(self.pattern).explode().dropna()
+        if hits.empty:
+            return sparse.csr_matrix((n_rows, len(self.keywords)), dtype=np.int8)
+
+        keyword_ids = hits.map(self._implied_ids).explode()
+        rows = keyword_ids.index.to_numpy(dtype=np.int64)
+        cols = keyword_ids.to_numpy(dtype=np.int64)
+
+        matrix = sparse.coo_matrix(
+            (np.ones(len(rows), dtype=np.int8), (rows, cols)),
+            shape=(n_rows, len(self.keywords))
+        ).tocsr()
+        # 한 문구에 같은 키워드가 여러 번 나와도 포함 여부(0/1)만 유지
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+        return matrix
+
+
+class KeywordIndicatorEngine:
+    """키워드 그룹 전체를 한 번에 매칭하고 행렬-벡터 곱으로 키워드별 지표를 집계하는 엔진"""
+
+    def __init__(self, keyword_groups: Dict[str, Sequence[str]]):
+        self.keyword_groups = {name: list(keywords) for name, keywords in keyword_groups.items()}
+        all_keywords = [k for keywords in self.keyword_groups.values() for k in keywords]
+        self.matcher = KeywordMatcher(all_keywords)
+        self.incidence: Optional[sparse.csr_matrix] = None
+        self.metrics: Optional[pd.DataFrame] = None
+
+    def fit(self, df: pd.DataFrame, text_column: str = '문구') -> "KeywordIndicatorEngine":
+        """문구를 한 번 스캔해 포함 행렬과 키워드별 집계 지표를 계산"""
+        messages = df[text_column] if text_column in df.columns else pd.Series([''] * len(df))
+        self.incidence = self.matcher.incidence_matrix(messages)
+
+        counts = df.reindex(columns=COUNT_COLUMNS).fillna(0).to_numpy(dtype=float)
+        # (키워드 x 문구) @ (문구 x 집계 컬럼) : 모든 키워드 합계를 한 번의 곱으로 계산
+        totals = self.incidence.T.astype(float) @ counts
+        message_count = np.asarray(self.incidence.sum(axis=0)).ravel()
+
+        metrics = pd.DataFrame(totals, index=self.matcher.keywords, columns=COUNT_COLUMNS)
+        metrics['message_count'] = message_count.astype(int)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            exp_rate = np.where(metrics['실험군_발송'] > 0,
+                                metrics['실험군_1일이내_예약생성'] / metrics['실험군_발송'], 0.0)
+            ctrl_rate = np.where(metrics['대조군_발송'] > 0,
+                                 metrics['대조군_1일이내_예약생성'] / metrics['대조군_발송'], 0.0)
+        metrics['exp_rate'] = exp_rate
+        metrics['ctrl_rate'] = ctrl_rate
+        metrics['lift'] = exp_rate - ctrl_rate
+
+        self.metrics = metrics
+        return self
+
+    def group_metrics(self, group: str) -> pd.DataFrame:
+        """키워드 그룹에 속한 키워드들의 집계 지표 (그룹 정의 순서 유지)"""
+        return self.metrics.loc[self.keyword_groups.get(group, [])]
+
+    def group_message_count(self, group: str) -> int:
+        """그룹 키워드별 포함 문구 수의 합 (키워드가 여러 개인 문구는 중복 집계)"""
+        return int(self.group_metrics(group)['message_count'].sum())
+
+    def messages_with_any(self, group: str) -> int:
+        """그룹 키워드 중 하나라도 포함한 문구 수"""
+        ids = [self.matcher.keyword_index[k] for k in self.keyword_groups.get(group, [])]
+        if not ids or self.incidence is None:
+            return 0
+        return int((self.incidence[:, ids].sum(axis=1) > 0).sum())
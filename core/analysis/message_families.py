@@ -0,0 +1,240 @@
+"""
+MinHash + LSH 기반 근접 중복 문구 패밀리 (같은 템플릿의 변형 문구 묶음)
+
+#NAME/고객명, 쿠폰 할인율, 지역명, (광고)/080 수신거부 문구만 다른 변형들을 하나의 패밀리로 묶어
+LLM 분석은 패밀리 대표 문구에 한 번만 수행하고, 성과는 패밀리 단위 합산 Lift로 봅니다.
+    - 표준형 문구(message_normalization)에서 템플릿 변수(숫자/개인화 변수)를 지운 뒤 문자 shingle 집합의 MinHash 서명 계산
+      (고유 shingle x 해시 함수 multiply-shift 해시 행렬 + reduceat 최솟값, 고유 문구 단위)
+    - 서명을 band로 나눠 band 키가 같은 문구만 후보 쌍으로 만들고,
+      서명 일치율(추정 Jaccard)이 임계값 이상인 쌍만 연결 요소로 묶음
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from config.settings import settings
+from core.analysis.dataset_cache import get_or_build
+from core.analysis.message_normalization import get_message_keys
+from core.analysis.significance import CTRL_CONVERSIONS, CTRL_SENT, EXP_CONVERSIONS, EXP_SENT
+
+MESSAGE_COLUMN = "문구"
+COUNT_COLUMNS = [EXP_CONVERSIONS, EXP_SENT, CTRL_CONVERSIONS, CTRL_SENT]
+
+# 표준형 문구에서 변형 간에 달라지는 템플릿 변수 (개인화 변수/호칭, 숫자)
+TEMPLATE_NOISE = re.compile(
+    r'\{[^{}]*\}|#\w+|\w{1,4}님'
+    r'|\d+(?:[.,]\d+)*'
+)
+NON_WORD = re.compile(r'[^가-힣a-zA-Z]+')
+
+SHINGLE_SIZE = 3
+# 템플릿 변수를 지운 뒤 이보다 짧은 문구는 근접 중복 판정에서 제외 (원문이 같을 때만 묶임)
+MIN_TEMPLATE_LENGTH = 2 * SHINGLE_SIZE
+EMPTY_HASH = np.iinfo(np.uint32).max
+# 서명 계산 시 한 번에 처리할 (shingle x 해시 함수) 원소 수
+SIGNATURE_BATCH_ELEMENTS = 8_000_000
+
+
+def template_text(text: str) -> str:
+    """표준형 문구에서 템플릿 변수와 공백/기호를 지운 비교용 문자열"""
+    return NON_WORD.sub('', TEMPLATE_NOISE.sub(' ', str(text)))
+
+
+def minhash_signatures(texts: List[str], num_perm: int, seed: int = 0) -> np.ndarray:
+    """
+    문구별 MinHash 서명 계산
+
+    Returns:
+        (문구 수, num_perm) uint32 배열 (shingle이 없는 문구는 전부 EMPTY_HASH)
+    """
+    shingle_lists = []
+    for text in texts:
+        if len(text) <= SHINGLE_SIZE:
+            shingle_lists.append([text] if text else [])
+        else:
+            shingle_lists.append(list({text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}))
+
+    lengths = np.fromiter((len(s) for s in shingle_lists), dtype=np.int64, count=len(shingle_lists))
+    signatures = np.full((len(texts), num_perm), EMPTY_HASH, dtype=np.uint32)
+    if lengths.sum() == 0:
+        return signatures
+
+    # 전체 shingle을 정수 id로 변환하고 고유 shingle마다 해시 함수 값을 한 번만 계산
+    shingle_ids, uniques = pd.factorize(pd.Series([s for shingles in shingle_lists for s in shingles], dtype=object))
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True) | np.uint64(1)
+    b = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True)
+    # multiply-shift 해시: (a*x + b) mod 2^64 의 상위 32비트
+    # (해시 함수 x 고유 shingle) 배치로 두어 reduceat이 연속 메모리를 따라 최솟값을 구하게 함
+    keys = np.arange(len(uniques), dtype=np.uint64)[None, :] + np.uint64(1)
+    hash_table = ((a[:, None] * keys + b[:, None]) >> np.uint64(32)).astype(np.uint32)
+
+    owners = np.flatnonzero(lengths)
+    starts = np.concatenate([[0], np.cumsum(lengths)])
+    # 문구 경계에 맞춰 batch를 나눠 reduceat 한 번으로 문구별 최솟값 계산
+    batch_rows = max(1, SIGNATURE_BATCH_ELEMENTS // num_perm)
+    position = 0
+    while position < len(owners):
+        end = position
+        while end < len(owners) and (starts[owners[end] + 1] - starts[owners[position]] <= batch_rows or end == position):
+            end += 1
+        chunk = owners[position:end]
+        lo, hi = starts[chunk[0]], starts[chunk[-1] + 1]
+        hashed = np.take(hash_table, shingle_ids[lo:hi], axis=1)
+        signatures[chunk] = np.minimum.reduceat(hashed, starts[chunk] - lo, axis=1).T
+        position = end
+    return signatures
+
+
+def lsh_families(signatures: np.ndarray, bands: int, threshold: float) -> np.ndarray:
+    """
+    LSH banding으로 후보 쌍을 찾고 추정 Jaccard >= threshold 인 쌍을 연결 요소로 묶음
+
+    Returns:
+        문구별 패밀리 id (0부터 연속)
+    """
+    n, num_perm = signatures.shape
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    rows_per_band = max(1, num_perm // bands)
+    empty = (signatures == EMPTY_HASH).all(axis=1)
+    # band 내 서명 값을 하나의 uint64 키로 섞음 (키 충돌로 생긴 후보는 아래 Jaccard 검증에서 걸러짐)
+    mixers = np.random.default_rng(1).integers(1, np.iinfo(np.int64).max, size=rows_per_band).astype(np.uint64) | np.uint64(1)
+
+    left, right = [], []
+    for band in range(0, rows_per_band * bands, rows_per_band):
+        block = signatures[:, band:band + rows_per_band].astype(np.uint64)
+        _, buckets = np.unique((block * mixers[:block.shape[1]]).sum(axis=1), return_inverse=True)
+        # bucket 첫 문구와 나머지 문구를 후보 쌍으로 연결 (bucket 내 모든 쌍 대신 star 형태)
+        order = np.argsort(buckets, kind="stable")
+        sorted_buckets = buckets[order]
+        heads = order[np.searchsorted(sorted_buckets, sorted_buckets)]
+        mask = heads != order
+        left.append(heads[mask])
+        right.append(order[mask])
+
+    left = np.concatenate(left)
+    right = np.concatenate(right)
+    if len(left):
+        pairs = np.unique(left.astype(np.int64) * n + right)
+        left, right = pairs // n, pairs % n
+        similarity = (signatures[left] == signatures[right]).mean(axis=1)
+        keep = (similarity >= threshold) & ~empty[left] & ~empty[right]
+        left, right = left[keep], right[keep]
+
+    graph = sparse.coo_matrix((np.ones(len(left), dtype=np.int8), (left, right)), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    return labels
+
+
+class MessageFamilies:
+    """
+    데이터셋 문구의 근접 중복 패밀리
+
+    family_ids는 행 위치(0..n-1)별 패밀리 id이며(빈/결측 문구 행은 각각 별도 패밀리), 대표 문구는 패밀리 내 실험군 발송이 가장 많은 변형입니다.
+    """
+
+    def __init__(self, df: pd.DataFrame, num_perm: Optional[int] = None, bands: Optional[int] = None,
+                 threshold: Optional[float] = None):
+        num_perm = settings.MINHASH_PERMUTATIONS if num_perm is None else num_perm
+        bands = settings.MINHASH_BANDS if bands is None else bands
+        self.threshold = settings.NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+
+        raw = (pd.Series(df[MESSAGE_COLUMN].to_numpy(), dtype=object) if MESSAGE_COLUMN in df.columns
+               else pd.Series([''] * len(df), dtype=object)).fillna('').astype(str)
+        # 표준형이 같은 문구(광고 표기/수신거부/이모지/공백 차이)는 한 번만 처리
+        keys = get_message_keys(df)
+        message_ids, _ = pd.factorize(keys['message_key'].to_numpy(), sort=False)
+        first_rows = np.unique(message_ids, return_index=True)[1]
+        texts = [template_text(text) for text in keys['message_canonical'].fillna('').to_numpy()[first_rows]]
+        texts = [text if len(text) >= MIN_TEMPLATE_LENGTH else '' for text in texts]
+        signatures = minhash_signatures(texts, num_perm)
+        unique_families = lsh_families(signatures, bands, self.threshold)
+
+        # 표준형 단위 대표 원문 (표준형별 첫 행)
+        self.messages = list(raw.to_numpy()[first_rows])
+        self.raw_messages = raw.to_numpy()
+        self.message_ids = message_ids
+        self.family_ids = unique_families[message_ids] if len(message_ids) else np.empty(0, dtype=np.int64)
+        # 빈/결측 문구 행은 서로 관련 없는 캠페인이므로 하나로 묶지 않고 행마다 별도 패밀리
+        empty = (keys['message_canonical'].fillna('').to_numpy(dtype=object) == '')
+        if empty.any():
+            self.family_ids = self.family_ids.copy()
+            self.family_ids[empty] = self.family_ids.max() + 1 + np.arange(int(empty.sum()))
+            self.family_ids = pd.factorize(self.family_ids, sort=True)[0]
+        self.n_families = int(len(np.unique(self.family_ids)))
+
+        if all(c in df.columns for c in COUNT_COLUMNS):
+            self.counts = df[COUNT_COLUMNS].apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(dtype=float)
+        else:
+            self.counts = np.zeros((len(df), len(COUNT_COLUMNS)))
+
+        # 패밀리 대표 행: 실험군 발송이 가장 많은 행 (동률이면 앞 행)
+        order = np.lexsort((np.arange(len(df)), -self.counts[:, 1], self.family_ids))
+        first = np.r_[True, self.family_ids[order][1:] != self.family_ids[order][:-1]] if len(order) else order
+        self.representatives = pd.Series(order[first], index=self.family_ids[order][first])
+
+    def representative_row(self, row: int) -> int:
+        """행이 속한 패밀리의 대표 행 위치"""
+        return int(self.representatives[self.family_ids[row]])
+
+    def family_lift(self, rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        패밀리별 합산 성과
+
+        Args:
+            rows: 집계할 행 위치 (퍼널 등 부분 집합, 기본 전체). 대표 행도 이 행들 안에서 고름
+
+        Returns:
+            family_id 인덱스 DataFrame: representative, representative_row, campaigns, variants,
+            발송/전환 합계, exp_rate/ctrl_rate/lift(%p)
+        """
+        rows = np.arange(len(self.family_ids)) if rows is None else np.asarray(rows, dtype=np.int64)
+        frame = pd.DataFrame(self.counts[rows], columns=COUNT_COLUMNS)
+        frame['family_id'] = self.family_ids[rows]
+        frame['message_id'] = self.message_ids[rows]
+        frame['row'] = rows
+        grouped = frame.groupby('family_id')
+        result = grouped[COUNT_COLUMNS].sum()
+        result['campaigns'] = grouped.size()
+        result['variants'] = grouped['message_id'].nunique()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result['exp_rate'] = (result[EXP_CONVERSIONS] / result[EXP_SENT] * 100).round(2)
+            result['ctrl_rate'] = (result[CTRL_CONVERSIONS] / result[CTRL_SENT] * 100).round(2)
+        result['lift'] = (result['exp_rate'] - result['ctrl_rate']).round(2)
+        # 대표 행: 실험군 발송이 가장 많은 행 (동률이면 앞 행)
+        representatives = frame.sort_values([EXP_SENT, 'row'], ascending=[False, True]).groupby('family_id')['row'].first()
+        result['representative_row'] = representatives.reindex(result.index)
+        result['representative'] = self.raw_messages[result['representative_row'].to_numpy()]
+        return result.sort_values(['campaigns', EXP_SENT], ascending=False)
+
+    def summary(self, top_n: int = 10) -> Dict[str, Any]:
+        """패밀리 구성 요약 (변형이 2개 이상인 패밀리 상위 top_n)"""
+        lift = self.family_lift()
+        multi = lift[lift['variants'] > 1].head(top_n)
+        return {
+            'total_campaigns': int(len(self.family_ids)),
+            'unique_messages': int(len(self.messages)),
+            'families': self.n_families,
+            'threshold': self.threshold,
+            'top_families': [{
+                'family_id': int(family_id),
+                'representative': row['representative'],
+                'variants': int(row['variants']),
+                'campaigns': int(row['campaigns']),
+                'exp_rate': None if pd.isna(row['exp_rate']) else float(row['exp_rate']),
+                'ctrl_rate': None if pd.isna(row['ctrl_rate']) else float(row['ctrl_rate']),
+                'lift': None if pd.isna(row['lift']) else float(row['lift']),
+            } for family_id, row in multi.iterrows()],
+        }
+
+
+def get_message_families(df: pd.DataFrame) -> MessageFamilies:
+    """데이터셋당 한 번만 계산한 문구 패밀리 (문구/발송/전환 컬럼 내용 기준 캐시)"""
+    key = f"message_families:{settings.MINHASH_PERMUTATIONS}:{settings.MINHASH_BANDS}:{settings.NEAR_DUPLICATE_THRESHOLD}"
+    return get_or_build(key, df, [MESSAGE_COLUMN, *COUNT_COLUMNS], lambda: MessageFamilies(df))
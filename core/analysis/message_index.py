@@ -0,0 +1,171 @@
+"""문구(문구 컬럼) 역색인 - 토큰/구문별 (행 id, 위치) posting list 기반 질의"""
+
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.keyword_groups import KEYWORD_GROUPS
+from core.analysis.dataset_cache import get_or_build
+from core.analysis.keyword_engine import COUNT_COLUMNS, KeywordMatcher
+
+# 한글 2자 이상 토큰 (기존 키워드 추출 정규식과 동일)
+TOKEN_PATTERN = re.compile(r'[가-힣]{2,}')
+
+
+class MessageInvertedIndex:
+    """
+    데이터셋당 한 번 구축하는 문구 역색인
+
+    - 토큰: 한글 2자 이상 연속 문자열 (re.findall(r'[가-힣]{2,}')과 동일한 단위)
+    - 구문: 설정된 키워드 구문의 부분 문자열 매칭 (str.contains와 동일한 단위)
+    각 posting은 (행 id, 문자 위치) 배열로 저장되며 행 id 순으로 정렬되어 있습니다.
+    """
+
+    def __init__(self, messages: pd.Series, phrases: Sequence[str] = (),
+                 funnels: Optional[pd.Series] = None, counts: Optional[np.ndarray] = None):
+        texts = pd.Series(messages.to_numpy(), dtype=object).fillna('').astype(str)
+        self.n_rows = len(texts)
+        self.phrase_matcher = KeywordMatcher(phrases)
+
+        token_rows: Dict[str, List[int]] = defaultdict(list)
+        token_positions: Dict[str, List[int]] = defaultdict(list)
+        phrase_rows: Dict[str, List[int]] = defaultdict(list)
+        phrase_positions: Dict[str, List[int]] = defaultdict(list)
+
+        # 문구당 토큰/구문 스캔 1회
+        for row_id, text in enumerate(texts):
+            if not text:
+                continue
+            for match in TOKEN_PATTERN.finditer(text):
+                token = match.group()
+                token_rows[token].append(row_id)
+                token_positions[token].append(match.start())
+            for phrase, position in self.phrase_matcher.finditer(text):
+                phrase_rows[phrase].append(row_id)
+                phrase_positions[phrase].append(position)
+
+        # 토큰은 첫 등장 순서로 유지 (Counter.most_common 동률 순서와 일치)
+        self.token_postings = {
+            token: (np.asarray(rows, dtype=np.int32), np.asarray(token_positions[token], dtype=np.int32))
+            for token, rows in token_rows.items()
+        }
+        self.phrase_postings = {}
+        for phrase, rows in phrase_rows.items():
+            rows = np.asarray(rows, dtype=np.int32)
+            positions = np.asarray(phrase_positions[phrase], dtype=np.int32)
+            order = np.lexsort((positions, rows))
+            self.phrase_postings[phrase] = (rows[order], positions[order])
+
+        # 퍼널별 행 id (퍼널 필터 질의용)
+        self.funnel_rows: Dict[Any, np.ndarray] = {}
+        if funnels is not None:
+            funnel_values = pd.Series(funnels.to_numpy(), dtype=object)
+            for funnel, rows in funnel_values.groupby(funnel_values, sort=False).indices.items():
+                self.funnel_rows[funnel] = np.asarray(rows, dtype=np.int32)
+
+        # 발송/전환 집계 배열 (lift 질의용, 행 순서와 동일)
+        self.counts = counts
+
+    # ------------------------------------------------------------------
+    # 기본 posting 조회
+    # ------------------------------------------------------------------
+
+    def _postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """구문으로 설정된 용어는 구문 posting, 그 외는 토큰 posting 반환"""
+        empty = (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32))
+        if term in self.phrase_postings or term in self.phrase_matcher.keyword_index:
+            return self.phrase_postings.get(term, empty)
+        return self.token_postings.get(term, empty)
+
+    def _row_mask(self, funnel: Any = None) -> Optional[np.ndarray]:
+        """퍼널 필터용 행 마스크 (퍼널 미지정 시 None)"""
+        if funnel is None:
+            return None
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.funnel_rows.get(funnel, np.empty(0, dtype=np.int32))] = True
+        return mask
+
+    def rows_containing(self, term: str, funnel: Any = None) -> np.ndarray:
+        """용어를 포함한 행 id 목록 (퍼널 지정 시 해당 퍼널 내에서만)"""
+        rows = np.unique(self._postings(term)[0])
+        if funnel is not None:
+            rows = np.intersect1d(rows, self.funnel_rows.get(funnel, np.empty(0, dtype=np.int32)))
+        return rows
+
+    def term_frequency(self, term: str, funnel: Any = None) -> int:
+        """용어 등장 횟수 (한 문구 내 반복 등장 포함)"""
+        rows = self._postings(term)[0]
+        mask = self._row_mask(funnel)
+        return int(len(rows) if mask is None else mask[rows].sum())
+
+    def document_frequency(self, term: str, funnel: Any = None) -> int:
+        """용어를 포함한 문구 수"""
+        return int(len(self.rows_containing(term, funnel)))
+
+    def cooccurrence(self, term_a: str, term_b: str, funnel: Any = None) -> int:
+        """두 용어를 함께 포함한 문구 수"""
+        return int(len(np.intersect1d(self.rows_containing(term_a, funnel), self.rows_containing(term_b, funnel))))
+
+    # ------------------------------------------------------------------
+    # 집계 질의
+    # ------------------------------------------------------------------
+
+    def top_tokens(self, n: int = 10, funnel: Any = None) -> List[Tuple[str, int]]:
+        """
+        빈도 상위 토큰 목록 [(토큰, 횟수)]
+
+        퍼널 문구를 이어 붙여 Counter.most_common을 쓴 결과와 같은 순서
+        (횟수 내림차순, 동률이면 첫 등장 위치 순)를 posting list만으로 계산합니다.
+        """
+        mask = self._row_mask(funnel)
+        ranked = []
+        for token, (rows, positions) in self.token_postings.items():
+            if mask is None:
+                count = len(rows)
+                first = 0
+            else:
+                hits = np.flatnonzero(mask[rows])
+                count = len(hits)
+                if count == 0:
+                    continue
+                first = hits[0]
+            ranked.append((-count, int(rows[first]), int(positions[first]), token))
+        ranked.sort()
+        return [(token, -neg_count) for neg_count, _, _, token in ranked[:n]]
+
+    def lift_by_term(self, term: str, funnel: Any = None) -> Dict[str, Any]:
+        """용어 포함 문구들의 pooled 전환율과 Lift (실험군 전환율 - 대조군 전환율)"""
+        rows = self.rows_containing(term, funnel)
+        result = {'term': term, 'message_count': int(len(rows)), 'exp_rate': 0.0, 'ctrl_rate': 0.0, 'lift': 0.0}
+        if self.counts is None or len(rows) == 0:
+            return result
+
+        exp_conv, exp_sent, ctrl_conv, ctrl_sent = self.counts[rows].sum(axis=0)
+        exp_rate = exp_conv / exp_sent if exp_sent > 0 else 0.0
+        ctrl_rate = ctrl_conv / ctrl_sent if ctrl_sent > 0 else 0.0
+        result.update({'exp_rate': float(exp_rate), 'ctrl_rate': float(ctrl_rate), 'lift': float(exp_rate - ctrl_rate)})
+        return result
+
+
+def build_message_index(df: pd.DataFrame, phrases: Optional[Sequence[str]] = None) -> MessageInvertedIndex:
+    """데이터프레임으로 문구 역색인 구축"""
+    if phrases is None:
+        phrases = [k for keywords in KEYWORD_GROUPS.values() for k in keywords]
+    messages = df['문구'] if '문구' in df.columns else pd.Series([''] * len(df))
+    funnels = df['퍼널'] if '퍼널' in df.columns else None
+    counts = None
+    if all(c in df.columns for c in COUNT_COLUMNS):
+        counts = df[COUNT_COLUMNS].fillna(0).to_numpy(dtype=float)
+    return MessageInvertedIndex(messages, phrases=phrases, funnels=funnels, counts=counts)
+
+
+def get_message_index(df: pd.DataFrame, phrases: Optional[Sequence[str]] = None) -> MessageInvertedIndex:
+    """데이터셋당 한 번만 구축한 문구 역색인 반환 (문구/퍼널/집계 컬럼 내용 기준 캐시)"""
+    phrase_key = 'default' if phrases is None else '|'.join(phrases)
+    return get_or_build(
+        f"message_index:{phrase_key}", df, ['문구', '퍼널'] + COUNT_COLUMNS,
+        lambda: build_message_index(df, phrases)
+    )
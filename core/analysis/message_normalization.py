@@ -0,0 +1,87 @@
+"""
+문구 정규화 - 캐시 키/그룹핑/중복 제거에 쓰는 문구 표준형(canonical form)과 fingerprint
+
+광고 표기((광고)[쏘카]), 수신거부 안내, 이모지, 공백 차이만 있는 문구를 같은 문구로 보고,
+개인화 변수(#NAME, OOO님, {{ 변수 }})는 지우지 않고 표준 표기({NAME}, {변수})로 통일합니다.
+데이터셋의 고유 문구에 대해서만 pandas 문자열 연산을 한 번 적용하고 행으로 펼칩니다.
+"""
+
+import re
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.analysis.dataset_cache import get_or_build
+
+MESSAGE_COLUMN = "문구"
+
+# (패턴, 치환) - 순서대로 적용
+NORMALIZATION_RULES: List[Tuple[str, str]] = [
+    # 광고 표기
+    (r'\(광고\)\s*(?:\[쏘카\])?|^\s*\[쏘카\]', ' '),
+    # 수신거부 안내: 대괄호 안내([수신거부 : 설정])와 080 번호가 붙은 안내(무료수신거부 080-xxx-xxxx)만
+    # (본문의 "수신거부 하셔도 ..." 같은 문장은 유지)
+    (r'\[\s*(?:무료)?\s*수신\s*거부\s*[:：]?[^\[\]\n]{0,20}\]', ' '),
+    (r'(?:무료)?\s*수신\s*거부\s*[:：]?\s*(?=080[-\s]?\d{3,4}[-\s]?\d{4})', ' '),
+    (r'080[-\s]?\d{3,4}[-\s]?\d{4}', ' '),
+    # 개인화 변수 표준 표기
+    (r'\{\{\s*([^{}]*?)\s*\}\}', r'{\1}'),
+    (r'#NAME|#\{?이름\}?|O{2,}(?=님)', '{NAME}'),
+    # 이모지/픽토그램, variation selector, zero-width joiner
+    ('[\U0001F000-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF\u23E9-\u23FA\uFE0F\u200D]', ' '),
+    # 공백/줄바꿈
+    (r'\s+', ' '),
+]
+COMPILED_RULES = [(re.compile(pattern), replacement) for pattern, replacement in NORMALIZATION_RULES]
+
+
+def canonicalize_messages(messages: pd.Series) -> pd.Series:
+    """
+    문구 Series의 표준형 계산 (고유 문구에만 정규식 적용)
+
+    Args:
+        messages: 문구 Series
+
+    Returns:
+        messages와 같은 인덱스의 표준형 문구 Series (결측 문구는 결측 유지)
+    """
+    missing = messages.isna().to_numpy()
+    texts = pd.Series(messages.to_numpy(), dtype=object).fillna('').astype(str)
+    codes, uniques = pd.factorize(texts, sort=False)
+    canonical = pd.Series(uniques, dtype=object)
+    for pattern, replacement in COMPILED_RULES:
+        canonical = canonical.str.replace(pattern, replacement, regex=True)
+    canonical = canonical.str.strip()
+    values = canonical.to_numpy(dtype=object)[codes] if len(codes) else np.empty(0, dtype=object)
+    values[missing] = np.nan
+    return pd.Series(values, index=messages.index, name=messages.name, dtype=object)
+
+
+def canonical_message(text: str) -> str:
+    """단일 문구 표준형 (검색 질의/LLM 캐시 키 등, canonicalize_messages와 같은 규칙)"""
+    canonical = '' if text is None else str(text)
+    for pattern, replacement in COMPILED_RULES:
+        canonical = pattern.sub(replacement, canonical)
+    return canonical.strip()
+
+
+def message_fingerprints(canonical: pd.Series) -> pd.Series:
+    """표준형 문구별 16자리 hex fingerprint (pandas 고정 키 해시라 실행 간에 안정적)"""
+    hashed = pd.util.hash_array(canonical.to_numpy(dtype=object), categorize=True)
+    return pd.Series([f"{value:016x}" for value in hashed], index=canonical.index, dtype=object)
+
+
+def build_message_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """데이터셋 문구의 표준형(message_canonical)과 fingerprint(message_key) 컬럼 계산"""
+    messages = df[MESSAGE_COLUMN] if MESSAGE_COLUMN in df.columns else pd.Series([''] * len(df), index=df.index)
+    canonical = canonicalize_messages(messages)
+    return pd.DataFrame({'message_canonical': canonical, 'message_key': message_fingerprints(canonical)},
+                        index=df.index)
+
+
+def get_message_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """데이터셋당 한 번만 계산한 문구 표준형/fingerprint (df와 같은 인덱스)"""
+    keys = get_or_build("message_keys", df, [MESSAGE_COLUMN], lambda: build_message_keys(df))
+    # fingerprint 캐시는 인덱스를 보지 않으므로 현재 데이터프레임 인덱스에 맞춤
+    return keys if keys.index.equals(df.index) else keys.set_axis(df.index)
@@ -0,0 +1,394 @@
+"""
+과거 캠페인 문구 검색 색인 - 새 초안과 비슷한 과거 캠페인과 그 성과(Lift)를 로컬에서 바로 조회
+
+네트워크 모델 없이 표준형 문구(message_normalization)를 문자 n-gram HashingVectorizer로 벡터화합니다.
+    - 어휘 학습이 없는 해싱 벡터라 새 캠페인은 기존 색인을 다시 만들지 않고 insert()로 추가
+    - SEARCH_VECTOR_DIM > 0 이면 희소 랜덤 투영으로 차원 축소한 dense 벡터를 보관 (0이면 해싱 벡터 그대로 보관해 정확히 재정렬)
+    - 근사 최근접 이웃: 축소 공간의 랜덤 초평면 LSH (테이블별 부호 비트 코드 bucket + 1비트 이웃 bucket multi-probe)
+      후보 문구만 내적으로 재정렬하고, 후보가 부족하면 전체 문구 내적으로 대체
+    - 문구 벡터는 표준형 fingerprint당 하나, 캠페인 행은 문구 id로 연결
+    - 데이터셋 경로별 .npz(벡터/LSH 코드) + .json(캠페인 메타)으로 저장하고, sync()로 CSV에 새로 생긴 행만 추가 색인
+      (수정/삭제되어 CSV에 더 이상 없는 캠페인 행은 색인에서 제거)
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.random_projection import SparseRandomProjection
+
+from config.settings import settings
+from core.analysis.dataset_cache import dataset_path_key
+from core.analysis.message_normalization import canonical_message, get_message_keys
+from core.analysis.quantile_sketch import CTRL_RATE, EXP_RATE
+from core.analysis.significance import EXP_SENT
+
+MESSAGE_SEARCH_DIR = "outputs/reports/message_search"
+
+# 벡터화/LSH 방식이 바뀌면 올려서 저장된 색인을 무효화
+MESSAGE_SEARCH_VERSION = 2
+
+HASH_FEATURES = 2 ** 18
+# SEARCH_VECTOR_DIM = 0 일 때 LSH 코드 계산에만 쓰는 축소 차원
+LSH_SPACE_DIM = 256
+SEARCH_SEED = 42
+
+MESSAGE_COLUMN = "문구"
+# 캠페인 식별(중복 추가 방지)에 쓰는 컬럼과 검색 결과에 함께 돌려줄 컬럼
+# (검색 결과에 보관하는 값이 모두 키에 들어가므로, 값이 수정된 행은 다른 캠페인으로 보고 이전 행을 교체)
+ROW_KEY_COLUMNS = ["실행일", "퍼널", "채널", MESSAGE_COLUMN, EXP_SENT, EXP_RATE, CTRL_RATE]
+META_COLUMNS = ["실행일", "퍼널", "채널"]
+
+
+class MessageSearchIndex:
+    """
+    증분 추가가 가능한 문구 ANN 검색 색인
+
+    messages: 표준형 문구별 벡터 (문구 id = 행 번호), campaigns: 캠페인 행 메타 (message_id로 문구 연결)
+    """
+
+    def __init__(self, dim: Optional[int] = None, tables: Optional[int] = None, bits: Optional[int] = None):
+        self.dim = settings.SEARCH_VECTOR_DIM if dim is None else dim
+        self.tables = settings.SEARCH_LSH_TABLES if tables is None else tables
+        self.bits = settings.SEARCH_LSH_BITS if bits is None else bits
+        self.ngram_range = (settings.MESSAGE_NGRAM_MIN, settings.MESSAGE_NGRAM_MAX)
+
+        self.hasher = HashingVectorizer(analyzer="char_wb", ngram_range=self.ngram_range, n_features=HASH_FEATURES,
+                                        alternate_sign=False, norm="l2", dtype=np.float32)
+        space_dim = self.dim if self.dim > 0 else LSH_SPACE_DIM
+        self.reducer = self._projection(space_dim, HASH_FEATURES)
+        # LSH 초평면 = 축소 공간에서 tables x bits 개 성분으로의 랜덤 투영 (부호만 사용)
+        self.planes = self._projection(self.tables * self.bits, space_dim, seed_offset=1)
+        self._bit_weights = (np.uint64(1) << np.arange(self.bits, dtype=np.uint64))
+
+        self.message_keys: Dict[str, int] = {}
+        self.message_texts: List[str] = []
+        self._vector_blocks: List[Any] = []
+        self._vectors: Any = None
+        self.codes = np.empty((0, self.tables), dtype=np.uint64)
+        self.buckets: List[Dict[int, List[int]]] = [{} for _ in range(self.tables)]
+
+        self.campaigns = pd.DataFrame(columns=["row_key", "message_id", "message", *META_COLUMNS,
+                                               "exp_rate", "ctrl_rate", "lift", "exp_sent"])
+        self.campaign_keys: set = set()
+
+    @staticmethod
+    def _projection(n_components: int, n_features: int, seed_offset: int = 0) -> SparseRandomProjection:
+        """시드 고정 희소 랜덤 투영 (입력 크기만 정하면 되므로 빈 행렬로 fit)"""
+        return SparseRandomProjection(n_components=n_components, dense_output=True,
+                                      random_state=SEARCH_SEED + seed_offset).fit(sparse.csr_matrix((1, n_features), dtype=np.float32))
+
+    # ------------------------------------------------------------------
+    # 벡터화 / LSH
+    # ------------------------------------------------------------------
+
+    def embed(self, canonical_texts: List[str]):
+        """
+        표준형 문구 벡터
+
+        Returns:
+            (보관/재정렬용 벡터, LSH 코드용 축소 벡터) - 차원 축소 시 둘 다 L2 정규화 dense 벡터,
+            SEARCH_VECTOR_DIM = 0 이면 보관용은 해싱 희소 벡터
+        """
+        hashed = self.hasher.transform(canonical_texts)
+        reduced = self.reducer.transform(hashed).astype(np.float32)
+        norms = np.linalg.norm(reduced, axis=1, keepdims=True)
+        reduced = np.divide(reduced, norms, out=np.zeros_like(reduced), where=norms > 0)
+        return (hashed.tocsr() if self.dim == 0 else reduced), reduced
+
+    def _codes(self, reduced: np.ndarray) -> np.ndarray:
+        """(문구 수, tables) LSH bucket 코드"""
+        signs = (self.planes.transform(reduced) > 0).reshape(-1, self.tables, self.bits)
+        return (signs.astype(np.uint64) * self._bit_weights).sum(axis=2, dtype=np.uint64)
+
+    @property
+    def vectors(self):
+        """전체 문구 벡터 (추가된 블록을 질의 시점에 한 번만 합침)"""
+        if self._vectors is None or len(self._vector_blocks) > 1:
+            if not self._vector_blocks:
+                return None
+            stacked = (sparse.vstack(self._vector_blocks).tocsr() if self.dim == 0
+                       else np.vstack(self._vector_blocks))
+            self._vector_blocks = [stacked]
+            self._vectors = stacked
+        return self._vectors
+
+    def _add_messages(self, keys: List[str], canonical_texts: List[str]):
+        """새 표준형 문구 벡터/LSH 코드 추가"""
+        start = len(self.message_texts)
+        vectors, reduced = self.embed(canonical_texts)
+        codes = self._codes(reduced)
+        self._vector_blocks.append(vectors)
+        self.codes = np.vstack([self.codes, codes])
+        for offset, key in enumerate(keys):
+            self.message_keys[key] = start + offset
+        self.message_texts.extend(canonical_texts)
+        self._index_codes(codes, start)
+
+    def _index_codes(self, codes: np.ndarray, start: int):
+        for table in range(self.tables):
+            buckets = self.buckets[table]
+            for offset, code in enumerate(codes[:, table].tolist()):
+                buckets.setdefault(code, []).append(start + offset)
+
+    # ------------------------------------------------------------------
+    # 증분 추가
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def row_keys(df: pd.DataFrame) -> pd.Series:
+        """캠페인 행 키 (ROW_KEY_COLUMNS 내용 해시)"""
+        key_columns = [c for c in ROW_KEY_COLUMNS if c in df.columns]
+        return pd.util.hash_pandas_object(df[key_columns].astype(str), index=False).map("{:016x}".format)
+
+    def insert(self, df: pd.DataFrame) -> int:
+        """
+        색인에 없는 캠페인 행만 추가
+
+        Returns:
+            새로 추가한 캠페인 수
+        """
+        if MESSAGE_COLUMN not in df.columns or len(df) == 0:
+            return 0
+        row_keys = self.row_keys(df)
+        # 같은 배치 안에서 겹치는 행과 이미 색인된 행 제외
+        new_mask = (~row_keys.isin(self.campaign_keys) & ~row_keys.duplicated() & df[MESSAGE_COLUMN].notna()).to_numpy()
+        if not new_mask.any():
+            return 0
+
+        rows = df.loc[new_mask]
+        keys = get_message_keys(df).loc[new_mask]
+        unseen = ~keys["message_key"].isin(self.message_keys) & ~keys["message_key"].duplicated()
+        if unseen.any():
+            self._add_messages(keys.loc[unseen, "message_key"].tolist(), keys.loc[unseen, "message_canonical"].tolist())
+
+        exp_rate = pd.to_numeric(rows[EXP_RATE], errors="coerce") if EXP_RATE in rows.columns else pd.Series(np.nan, index=rows.index)
+        ctrl_rate = pd.to_numeric(rows[CTRL_RATE], errors="coerce") if CTRL_RATE in rows.columns else pd.Series(np.nan, index=rows.index)
+        added = pd.DataFrame({
+            "row_key": row_keys.loc[new_mask].to_numpy(),
+            "message_id": keys["message_key"].map(self.message_keys).to_numpy(dtype=np.int64),
+            "message": rows[MESSAGE_COLUMN].astype(str).to_numpy(),
+            **{c: (rows[c].astype(str).to_numpy() if c in rows.columns else None) for c in META_COLUMNS},
+            "exp_rate": exp_rate.to_numpy(dtype=float),
+            "ctrl_rate": ctrl_rate.to_numpy(dtype=float),
+            "lift": (exp_rate - ctrl_rate).to_numpy(dtype=float),
+            "exp_sent": (pd.to_numeric(rows[EXP_SENT], errors="coerce").to_numpy(dtype=float)
+                         if EXP_SENT in rows.columns else np.nan),
+        })
+        self.campaigns = added if self.campaigns.empty else pd.concat([self.campaigns, added], ignore_index=True)
+        self.campaign_keys.update(added["row_key"])
+        return len(added)
+
+    def remove_missing(self, df: pd.DataFrame) -> int:
+        """
+        현재 데이터셋에 없는 캠페인 행(수정/삭제된 행) 제거
+
+        문구 벡터는 그대로 두고 캠페인만 지우므로, 검색 결과에는 나오지 않고 같은 문구가 다시 들어오면 재사용됩니다.
+
+        Returns:
+            제거한 캠페인 수
+        """
+        if self.campaigns.empty:
+            return 0
+        current = set(self.row_keys(df)) if MESSAGE_COLUMN in df.columns and len(df) else set()
+        stale = ~self.campaigns["row_key"].isin(current)
+        if not stale.any():
+            return 0
+        self.campaigns = self.campaigns.loc[~stale].reset_index(drop=True)
+        self.campaign_keys = set(self.campaigns["row_key"])
+        return int(stale.sum())
+
+    def sync(self, df: pd.DataFrame) -> Dict[str, int]:
+        """색인을 현재 데이터셋에 맞춤 (없어진 캠페인 제거 후 새 캠페인 추가)"""
+        removed = self.remove_missing(df)
+        added = self.insert(df)
+        return {"added": added, "removed": removed}
+
+    # ------------------------------------------------------------------
+    # 검색
+    # ------------------------------------------------------------------
+
+    def _candidates(self, codes: np.ndarray) -> np.ndarray:
+        """질의 bucket과 1비트 이웃 bucket(multi-probe)의 문구 id"""
+        found = []
+        flips = [0] + [1 << bit for bit in range(self.bits)]
+        for table, code in enumerate(codes.tolist()):
+            buckets = self.buckets[table]
+            for flip in flips:
+                members = buckets.get(code ^ flip)
+                if members:
+                    found.append(members)
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate([np.asarray(m, dtype=np.int64) for m in found]))
+
+    def _scores(self, query, message_ids: Optional[np.ndarray] = None) -> np.ndarray:
+        vectors = self.vectors if message_ids is None else self.vectors[message_ids]
+        if self.dim == 0:
+            return (vectors @ query.T).toarray().ravel()
+        return vectors @ query.ravel()
+
+    def search(self, text: str, k: int = 5, funnel: Optional[str] = None) -> Dict[str, Any]:
+        """
+        초안 문구와 비슷한 과거 캠페인 상위 k개
+
+        Args:
+            text: 초안 문구 (원문 그대로, 내부에서 표준형으로 정규화)
+            k: 반환할 캠페인 수
+            funnel: 지정 시 해당 퍼널 캠페인만
+
+        Returns:
+            query(표준형), exact(전체 비교 여부), candidates(재정렬한 문구 수), results(캠페인 목록)
+        """
+        canonical = canonical_message(text)
+        result = {"query": canonical, "exact": False, "candidates": 0, "results": []}
+        if not self.message_texts or not canonical:
+            return result
+
+        query, reduced = self.embed([canonical])
+        candidates = self._candidates(self._codes(reduced)[0])
+        scores = self._scores(query, candidates)
+        ranked = self._rank_campaigns(candidates, scores, k, funnel)
+        if len(ranked) < k and len(candidates) < len(self.message_texts):
+            # LSH 후보로 k개를 못 채우면 전체 문구 내적으로 대체 (문구 수만큼의 dense/희소 내적 1회)
+            candidates = np.arange(len(self.message_texts))
+            scores = self._scores(query)
+            ranked = self._rank_campaigns(candidates, scores, k, funnel)
+            result["exact"] = True
+        result["candidates"] = int(len(candidates))
+        result["results"] = ranked
+        return result
+
+    def _rank_campaigns(self, message_ids: np.ndarray, scores: np.ndarray, k: int,
+                        funnel: Optional[str]) -> List[Dict[str, Any]]:
+        """문구 유사도 내림차순으로 캠페인을 펼쳐 상위 k개 (같은 문구면 Lift 높은 캠페인 먼저)"""
+        message_scores = np.zeros(len(self.message_texts))
+        message_scores[message_ids] = scores
+        campaign_scores = message_scores[self.campaigns["message_id"].to_numpy(dtype=np.int64)]
+        eligible = campaign_scores > 0
+        if funnel:
+            eligible &= (self.campaigns["퍼널"] == funnel).to_numpy()
+        rows = np.flatnonzero(eligible)
+        lifts = self.campaigns["lift"].to_numpy(dtype=float)[rows]
+        rows = rows[np.lexsort((np.nan_to_num(-lifts, nan=np.inf), -campaign_scores[rows]))][:k]
+
+        ranked = []
+        for row, campaign in zip(rows, self.campaigns.iloc[rows].to_dict("records")):
+            ranked.append({
+                "message": campaign["message"],
+                "similarity": round(float(campaign_scores[row]), 4),
+                "실행일": campaign["실행일"],
+                "퍼널": campaign["퍼널"],
+                "채널": campaign["채널"],
+                **{key: None if pd.isna(campaign[key]) else round(float(campaign[key]), 2)
+                   for key in ("exp_rate", "ctrl_rate", "lift")},
+                "exp_sent": None if pd.isna(campaign["exp_sent"]) else int(campaign["exp_sent"]),
+            })
+        return ranked
+
+    # ------------------------------------------------------------------
+    # 직렬화
+    # ------------------------------------------------------------------
+
+    def save(self, path_stem: str):
+        """벡터/LSH 코드(.npz)와 문구/캠페인 메타(.json) 저장"""
+        os.makedirs(os.path.dirname(path_stem) or ".", exist_ok=True)
+        vectors = self.vectors
+        arrays = {"codes": self.codes}
+        if vectors is not None:
+            if self.dim == 0:
+                arrays.update(data=vectors.data, indices=vectors.indices, indptr=vectors.indptr)
+            else:
+                arrays["vectors"] = vectors
+        np.savez_compressed(f"{path_stem}.npz", **arrays)
+        meta = {
+            "version": MESSAGE_SEARCH_VERSION,
+            "config": [self.dim, self.tables, self.bits, list(self.ngram_range)],
+            "message_keys": list(self.message_keys),
+            "message_texts": self.message_texts,
+            "campaigns": json.loads(self.campaigns.to_json(orient="records", force_ascii=False)),
+        }
+        with open(f"{path_stem}.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path_stem: str) -> Optional["MessageSearchIndex"]:
+        """저장된 색인 로드 (없거나 버전/설정이 다르면 None)"""
+        if not (os.path.exists(f"{path_stem}.npz") and os.path.exists(f"{path_stem}.json")):
+            return None
+        with open(f"{path_stem}.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls()
+        if meta.get("version") != MESSAGE_SEARCH_VERSION or \
+                meta.get("config") != [index.dim, index.tables, index.bits, list(index.ngram_range)]:
+            return None
+
+        arrays = np.load(f"{path_stem}.npz")
+        index.message_texts = meta["message_texts"]
+        index.message_keys = {key: i for i, key in enumerate(meta["message_keys"])}
+        index.codes = arrays["codes"].astype(np.uint64)
+        if index.message_texts:
+            if index.dim == 0:
+                index._vector_blocks = [sparse.csr_matrix(
+                    (arrays["data"], arrays["indices"], arrays["indptr"]),
+                    shape=(len(index.message_texts), HASH_FEATURES))]
+            else:
+                index._vector_blocks = [arrays["vectors"]]
+        index._index_codes(index.codes, 0)
+
+        campaigns = pd.DataFrame(meta["campaigns"], columns=index.campaigns.columns)
+        numeric = ["exp_rate", "ctrl_rate", "lift", "exp_sent"]
+        campaigns[numeric] = campaigns[numeric].apply(pd.to_numeric, errors="coerce")
+        if len(campaigns):
+            index.campaigns = campaigns
+            index.campaign_keys = set(campaigns["row_key"])
+        return index
+
+    def stats(self) -> Dict[str, Any]:
+        return {"campaigns": int(len(self.campaigns)), "messages": len(self.message_texts),
+                "dim": self.dim or HASH_FEATURES, "tables": self.tables, "bits": self.bits}
+
+
+def search_index_path(csv_file_path: str, cache_dir: str = MESSAGE_SEARCH_DIR) -> str:
+    """데이터셋 경로별 색인 파일 경로 (확장자 제외)"""
+    return os.path.join(cache_dir, dataset_path_key(csv_file_path))
+
+
+_indexes: Dict[str, MessageSearchIndex] = {}
+_lock = threading.Lock()
+
+
+def get_message_search_index(csv_file_path: str, df: pd.DataFrame) -> MessageSearchIndex:
+    """
+    데이터셋 검색 색인 반환 (프로세스 내 재사용 → 저장된 색인 로드 → 변경분만 반영 후 저장)
+
+    Args:
+        csv_file_path: 색인 저장 위치를 정하는 데이터셋 경로
+        df: 현재 데이터셋 (색인에 없는 캠페인은 추가, 데이터셋에 없는 캠페인은 제거)
+    """
+    path_stem = search_index_path(csv_file_path)
+    with _lock:
+        index = _indexes.get(path_stem)
+        if index is None:
+            try:
+                index = MessageSearchIndex.load(path_stem)
+            except Exception as e:
+                print(f"⚠️ 문구 검색 색인 로드 실패, 새로 만듭니다: {e}")
+                index = None
+            index = index or MessageSearchIndex()
+            _indexes[path_stem] = index
+
+        changes = index.sync(df)
+        if changes["added"] or changes["removed"]:
+            print(f"🔎 문구 검색 색인에 캠페인 {changes['added']}개 추가, {changes['removed']}개 제거 "
+                  f"(전체 {len(index.campaigns)}개)")
+            try:
+                index.save(path_stem)
+            except Exception as e:
+                print(f"⚠️ 문구 검색 색인 저장 실패: {e}")
+    return index
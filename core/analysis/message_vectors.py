@@ -0,0 +1,299 @@
+"""
+문구 벡터 색인 - 전체 문구에 한 번 학습한 문자 n-gram TF-IDF (희소 행렬) 기반 유사도 질의
+
+형태소 분석기 없이 한국어 문구를 비교할 수 있도록 어절 경계 문자 n-gram(char_wb)을 사용합니다.
+    - 중복 문구는 한 번만 벡터화하고, 캠페인 행은 문구 id로 연결 (행렬 크기 = 고유 문구 수)
+    - 벡터는 L2 정규화되어 있어 희소 행렬 내적이 곧 코사인 유사도
+    - 퍼널 간 평균 유사도는 퍼널별 벡터 합의 내적으로 계산 (쌍별 유사도 행렬을 만들지 않음)
+    - 학습 결과는 데이터셋 fingerprint별 .npz(행렬) + .json(어휘/IDF/메타)으로 저장해 재사용
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from config.settings import settings
+from core.analysis.dataset_cache import dataset_fingerprint, get_or_build
+from core.analysis.quantile_sketch import CTRL_RATE, EXP_RATE, get_lift_quantile_state
+
+MESSAGE_VECTOR_DIR = "outputs/reports/message_vectors"
+
+# 학습/질의 로직이 바뀌면 올려서 저장된 색인을 무효화
+MESSAGE_VECTOR_VERSION = 1
+
+MESSAGE_COLUMN = "문구"
+FUNNEL_COLUMN = "퍼널"
+INDEX_COLUMNS = [MESSAGE_COLUMN, FUNNEL_COLUMN, EXP_RATE, CTRL_RATE]
+
+
+def _make_vectorizer(ngram_range, vocabulary=None) -> TfidfVectorizer:
+    return TfidfVectorizer(analyzer="char_wb", ngram_range=tuple(ngram_range), sublinear_tf=True,
+                           dtype=np.float32, vocabulary=vocabulary)
+
+
+class MessageVectorIndex:
+    """
+    데이터셋당 한 번 학습하는 문구 TF-IDF 색인
+
+    행 id는 데이터프레임의 위치(0..n-1)이며, 각 행은 message_ids로 고유 문구 벡터를 가리킵니다.
+    """
+
+    def __init__(self, vectorizer: TfidfVectorizer, matrix: sparse.csr_matrix, messages: List[str],
+                 message_ids: np.ndarray, funnels: np.ndarray, lifts: np.ndarray,
+                 high_lift_threshold: Optional[float] = None):
+        self.vectorizer = vectorizer
+        self.matrix = matrix.tocsr()
+        self.messages = messages
+        self.message_ids = message_ids
+        self.funnels = funnels
+        self.lifts = lifts
+        self.n_rows = len(message_ids)
+        # 질의용 전치 행렬 (n-gram -> 문구 posting 형태, 질의 n-gram 행만 읽음)
+        self._matrix_t: Optional[sparse.csr_matrix] = None
+        # 고성과 캠페인 Lift(%p) 경계 (전체 캠페인 Lift 상위 3분위)
+        self.high_lift_threshold = high_lift_threshold
+
+    @classmethod
+    def fit(cls, messages: pd.Series, funnels: Optional[pd.Series] = None,
+            lifts: Optional[np.ndarray] = None, ngram_range: Optional[Sequence[int]] = None) -> "MessageVectorIndex":
+        """문구 전체로 어휘/IDF를 한 번 학습하고 고유 문구 행렬 생성"""
+        ngram_range = ngram_range or (settings.MESSAGE_NGRAM_MIN, settings.MESSAGE_NGRAM_MAX)
+        texts = pd.Series(messages.to_numpy(), dtype=object).fillna("").astype(str)
+        message_ids, uniques = pd.factorize(texts, sort=False)
+        unique_texts = [str(text) for text in uniques]
+
+        vectorizer = _make_vectorizer(ngram_range)
+        if any(unique_texts):
+            matrix = vectorizer.fit_transform(unique_texts)
+        else:
+            # 학습할 문구가 없으면 빈 어휘로 둠
+            vectorizer = _make_vectorizer(ngram_range, vocabulary={})
+            matrix = sparse.csr_matrix((len(unique_texts), 0), dtype=np.float32)
+
+        funnel_values = (pd.Series(funnels.to_numpy(), dtype=object).to_numpy() if funnels is not None
+                         else np.full(len(texts), None, dtype=object))
+        lift_values = (np.asarray(lifts, dtype=float) if lifts is not None
+                       else np.full(len(texts), np.nan))
+        return cls(vectorizer, matrix, unique_texts, message_ids.astype(np.int32), funnel_values, lift_values)
+
+    # ------------------------------------------------------------------
+    # 벡터 조회
+    # ------------------------------------------------------------------
+
+    def transform(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """학습된 어휘로 새 문구 벡터화 (L2 정규화)"""
+        if self.matrix.shape[1] == 0:
+            return sparse.csr_matrix((len(texts), 0), dtype=np.float32)
+        return self.vectorizer.transform([str(text) for text in texts])
+
+    def row_vectors(self, rows: Sequence[int]) -> sparse.csr_matrix:
+        """행 id 목록의 문구 벡터"""
+        return self.matrix[self.message_ids[np.asarray(rows, dtype=np.int64)]]
+
+    def _row_scores(self, query: sparse.csr_matrix) -> np.ndarray:
+        """질의 벡터와 모든 행의 코사인 유사도 (고유 문구 단위 내적 1회 후 행으로 펼침)"""
+        if self._matrix_t is None:
+            self._matrix_t = self.matrix.T.tocsr()
+        scores = (query @ self._matrix_t).toarray().ravel()
+        return scores[self.message_ids]
+
+    # ------------------------------------------------------------------
+    # 유사도 질의
+    # ------------------------------------------------------------------
+
+    def similarity(self, rows_a: Sequence[int], rows_b: Optional[Sequence[int]] = None) -> np.ndarray:
+        """두 행 집합 간 코사인 유사도 행렬 (rows_b 생략 시 rows_a 내부)"""
+        left = self.row_vectors(rows_a)
+        right = left if rows_b is None else self.row_vectors(rows_b)
+        return np.asarray((left @ right.T).todense())
+
+    def group_similarity(self, rows: Sequence[int]) -> np.ndarray:
+        """
+        행 집합 내에서 각 행의 다른 행들과의 평균 유사도
+
+        벡터 합 s에 대해 (x_i·s - |x_i|²)/(n-1) 로 계산하므로 쌍별 행렬을 만들지 않습니다.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) < 2:
+            return np.zeros(len(rows))
+        vectors = self.row_vectors(rows)
+        total = np.asarray(vectors.sum(axis=0)).ravel()
+        self_sim = np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel()
+        return (vectors @ total - self_sim) / (len(rows) - 1)
+
+    def most_similar(self, query: Any, k: int = 5, funnel: Any = None, min_lift: Optional[float] = None,
+                     exclude_rows: Sequence[int] = ()) -> List[Dict[str, Any]]:
+        """
+        문구(문자열) 또는 행 id와 가장 유사한 캠페인 행 상위 k개
+
+        Args:
+            query: 문구 문자열 또는 행 id
+            k: 반환 개수
+            funnel: 지정 시 해당 퍼널 캠페인만 후보
+            min_lift: 지정 시 캠페인 Lift(%p)가 이 값 이상인 행만 후보
+            exclude_rows: 후보에서 제외할 행 id (질의 행은 행 id 질의 시 자동 제외)
+        """
+        if isinstance(query, (int, np.integer)):
+            vector = self.row_vectors([query])
+            excluded = [int(query), *exclude_rows]
+        else:
+            vector = self.transform([query])
+            excluded = list(exclude_rows)
+
+        scores = self._row_scores(vector)
+        candidates = np.ones(self.n_rows, dtype=bool)
+        if funnel is not None:
+            candidates &= self.funnels == funnel
+        if min_lift is not None:
+            candidates &= np.nan_to_num(self.lifts, nan=-np.inf) >= min_lift
+        if excluded:
+            candidates[np.asarray(excluded, dtype=np.int64)] = False
+        # 질의 문구와 같은 문구(다른 캠페인)도 후보에 남겨 문구별 성과 편차를 볼 수 있게 함
+        candidate_rows = np.flatnonzero(candidates & (scores > 0))
+        if len(candidate_rows) == 0:
+            return []
+
+        k = min(k, len(candidate_rows))
+        top = candidate_rows[np.argpartition(-scores[candidate_rows], k - 1)[:k]]
+        top = top[np.lexsort((top, -scores[top]))]
+        return [{
+            "row": int(row),
+            "message": self.messages[self.message_ids[row]],
+            "funnel": self.funnels[row],
+            "lift": round(float(self.lifts[row]), 2) if np.isfinite(self.lifts[row]) else None,
+            "similarity": round(float(scores[row]), 4),
+        } for row in top]
+
+    def similar_high_lift(self, query: Any, k: int = 5, funnel: Any = None,
+                          threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        질의와 가장 유사한 고성과(High Lift) 캠페인 행
+
+        threshold 생략 시 색인 생성 때 저장한 전체 캠페인 Lift 상위 3분위 경계를 사용합니다.
+        """
+        if threshold is None:
+            threshold = self.high_lift_threshold
+        return self.most_similar(query, k=k, funnel=funnel, min_lift=threshold)
+
+    def cross_funnel_similarity(self) -> pd.DataFrame:
+        """
+        퍼널 x 퍼널 평균 문구 유사도 (대각선은 같은 퍼널 내 서로 다른 캠페인 간 평균)
+
+        퍼널 A, B의 평균 유사도 = (Σa)·(Σb) / (|A||B|) 이므로 퍼널별 벡터 합만으로 계산합니다.
+        """
+        valid = pd.notna(self.funnels)
+        if not valid.any() or self.matrix.shape[1] == 0:
+            return pd.DataFrame()
+        codes, funnels = pd.factorize(pd.Series(self.funnels[valid], dtype=object), sort=True)
+        rows = np.flatnonzero(valid)
+        membership = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (codes, np.arange(len(rows)))),
+                                       shape=(len(funnels), len(rows)))
+        vectors = self.row_vectors(rows)
+        sums = membership @ vectors
+        dots = np.asarray((sums @ sums.T).todense(), dtype=float)
+        sizes = np.bincount(codes, minlength=len(funnels)).astype(float)
+        self_sim = np.bincount(codes, weights=np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel(),
+                               minlength=len(funnels))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = dots / np.outer(sizes, sizes)
+            within = (np.diag(dots) - self_sim) / (sizes * (sizes - 1))
+        # 캠페인이 1개인 퍼널은 내부 유사도 정의 불가
+        np.fill_diagonal(result, np.where(sizes > 1, within, np.nan))
+        return pd.DataFrame(np.round(result, 4), index=list(funnels), columns=list(funnels))
+
+    # ------------------------------------------------------------------
+    # 직렬화
+    # ------------------------------------------------------------------
+
+    def save(self, path_stem: str):
+        """희소 행렬(.npz)과 어휘/IDF/행 메타(.json) 저장"""
+        os.makedirs(os.path.dirname(path_stem) or ".", exist_ok=True)
+        sparse.save_npz(f"{path_stem}.npz", self.matrix)
+        meta = {
+            "version": MESSAGE_VECTOR_VERSION,
+            "ngram_range": list(self.vectorizer.ngram_range),
+            "vocabulary": {term: int(idx) for term, idx in (getattr(self.vectorizer, "vocabulary_", None) or {}).items()},
+            "idf": self.vectorizer.idf_.tolist() if self.matrix.shape[1] else [],
+            "messages": self.messages,
+            "message_ids": self.message_ids.tolist(),
+            "funnels": [None if pd.isna(f) else f for f in self.funnels],
+            "lifts": [None if not np.isfinite(v) else float(v) for v in self.lifts],
+            "high_lift_threshold": self.high_lift_threshold,
+        }
+        with open(f"{path_stem}.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path_stem: str) -> Optional["MessageVectorIndex"]:
+        """저장된 색인 로드 (없거나 버전이 다르면 None)"""
+        if not (os.path.exists(f"{path_stem}.npz") and os.path.exists(f"{path_stem}.json")):
+            return None
+        with open(f"{path_stem}.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != MESSAGE_VECTOR_VERSION:
+            return None
+        vectorizer = _make_vectorizer(meta["ngram_range"], vocabulary=meta["vocabulary"])
+        if meta["idf"]:
+            vectorizer.idf_ = np.asarray(meta["idf"], dtype=np.float32)
+        return cls(vectorizer, sparse.load_npz(f"{path_stem}.npz"), meta["messages"],
+                   np.asarray(meta["message_ids"], dtype=np.int32), np.asarray(meta["funnels"], dtype=object),
+                   np.asarray([np.nan if v is None else v for v in meta["lifts"]], dtype=float),
+                   meta.get("high_lift_threshold"))
+
+
+def _campaign_lifts(df: pd.DataFrame) -> Optional[np.ndarray]:
+    """캠페인 Lift(%p) = 실험군 전환율 - 대조군 전환율"""
+    if EXP_RATE not in df.columns or CTRL_RATE not in df.columns:
+        return None
+    lift = pd.to_numeric(df[EXP_RATE], errors="coerce") - pd.to_numeric(df[CTRL_RATE], errors="coerce")
+    return lift.to_numpy(dtype=float)
+
+
+def build_message_vectors(df: pd.DataFrame, cache_dir: Optional[str] = MESSAGE_VECTOR_DIR) -> MessageVectorIndex:
+    """
+    데이터셋 문구 색인 생성 (같은 내용의 데이터셋으로 저장된 색인이 있으면 로드)
+
+    Args:
+        df: 문구/퍼널/전환율 컬럼을 가진 캠페인 DataFrame
+        cache_dir: 색인 저장 디렉토리 (None이면 저장하지 않음)
+    """
+    ngram_range = (settings.MESSAGE_NGRAM_MIN, settings.MESSAGE_NGRAM_MAX)
+    path_stem = None
+    if cache_dir:
+        fingerprint = dataset_fingerprint(df, INDEX_COLUMNS)[:16]
+        path_stem = os.path.join(cache_dir, f"{fingerprint}_{ngram_range[0]}_{ngram_range[1]}")
+        try:
+            index = MessageVectorIndex.load(path_stem)
+            if index is not None and index.n_rows == len(df):
+                print(f"📦 문구 벡터 색인 로드: {path_stem}.npz")
+                return index
+        except Exception as e:
+            print(f"⚠️ 문구 벡터 색인 로드 실패, 다시 학습합니다: {e}")
+
+    messages = df[MESSAGE_COLUMN] if MESSAGE_COLUMN in df.columns else pd.Series([""] * len(df))
+    funnels = df[FUNNEL_COLUMN] if FUNNEL_COLUMN in df.columns else None
+    lifts = _campaign_lifts(df)
+    index = MessageVectorIndex.fit(messages, funnels, lifts, ngram_range)
+    if lifts is not None:
+        # 퍼널 세그먼트/차트와 같은 Lift 분위수 상태의 상위 3분위 경계
+        upper = get_lift_quantile_state(df).global_terciles()[1]
+        index.high_lift_threshold = float(upper) if np.isfinite(upper) else None
+
+    if path_stem:
+        try:
+            index.save(path_stem)
+        except Exception as e:
+            print(f"⚠️ 문구 벡터 색인 저장 실패: {e}")
+    return index
+
+
+def get_message_vectors(df: pd.DataFrame) -> MessageVectorIndex:
+    """데이터셋당 한 번만 학습한 문구 벡터 색인 반환 (문구/퍼널/전환율 컬럼 내용 기준 캐시)"""
+    ngram_key = f"{settings.MESSAGE_NGRAM_MIN}_{settings.MESSAGE_NGRAM_MAX}"
+    return get_or_build(f"message_vectors:{ngram_key}", df, INDEX_COLUMNS, lambda: build_message_vectors(df))
@@ -0,0 +1,350 @@
+"""
+병합 가능한 스트리밍 분위수 스케치 (KLL) 및 퍼널별 Lift 3분위수 상태
+
+전체 Lift 컬럼을 메모리에 들고 매번 quantile을 다시 계산하는 대신, 데이터를 청크 단위로 읽으면서
+퍼널별/전체 캠페인 Lift 스케치와 퍼널별 발송/전환 합계를 유지합니다.
+    - KLLSketch: 레벨별 compactor 배열로 유지하는 KLL 스케치 (rank 오차 약 1.7/k, 병합/직렬화 가능)
+      compaction 전까지는 모든 값을 그대로 보관하므로 pandas quantile(선형 보간)과 같은 값을 반환
+    - LiftQuantileState: 퍼널별 스케치 + 전체 스케치 + 퍼널 합계, 3분위수 임계값은 갱신 전까지 캐시되어 O(1)
+    - get_csv_lift_quantile_state: 데이터셋 경로별 JSON으로 저장해 다음 적재 때 파일 끝에 추가된 행만 청크로 반영
+"""
+
+import hashlib
+import io
+import json
+import math
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.settings import settings
+from core.analysis.dataset_cache import dataset_path_key, get_or_build
+from core.analysis.significance import CTRL_CONVERSIONS, CTRL_SENT, EXP_CONVERSIONS, EXP_SENT
+
+# 캠페인 Lift(%p) = 실험군 전환율 - 대조군 전환율 (퍼널 세그먼트/차트의 기존 정의)
+EXP_RATE = "실험군_예약전환율"
+CTRL_RATE = "대조군_예약전환율"
+COUNT_COLUMNS = [EXP_CONVERSIONS, EXP_SENT, CTRL_CONVERSIONS, CTRL_SENT]
+
+TERCILES = (0.33, 0.67)
+
+LIFT_QUANTILE_DIR = "outputs/reports/lift_quantiles"
+
+# 스케치/집계 방식이 바뀌면 올려서 저장된 상태를 무효화
+LIFT_QUANTILE_VERSION = 1
+
+# 스트리밍 적재 시 한 번에 읽는 행 수
+DEFAULT_CHUNK_ROWS = 100_000
+
+# 적재한 파일 앞부분 해시 계산 시 한 번에 읽는 바이트 수
+HASH_BLOCK_BYTES = 1 << 20
+
+
+class KLLSketch:
+    """병합 가능한 KLL 분위수 스케치 (결정적 compaction)"""
+
+    def __init__(self, k: Optional[int] = None):
+        self.k = settings.QUANTILE_SKETCH_K if k is None else k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        # 레벨별 compaction 시작 위치 (짝/홀 번갈아 사용해 편향 상쇄)
+        self.parity: List[int] = [0]
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - 1 - level
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _compress(self):
+        while sum(len(items) for items in self.levels) > sum(self._capacity(h) for h in range(len(self.levels))):
+            for level, items in enumerate(self.levels):
+                if len(items) > self._capacity(level):
+                    break
+            if level == len(self.levels) - 1:
+                self.levels.append(np.empty(0))
+                self.parity.append(0)
+            items = np.sort(self.levels[level])
+            # 홀수 개이면 가장 큰 값 하나는 현재 레벨에 남김
+            even = len(items) - len(items) % 2
+            offset = self.parity[level]
+            self.parity[level] ^= 1
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[offset:even:2]])
+            self.levels[level] = items[even:]
+
+    def update(self, values: Iterable[float]) -> "KLLSketch":
+        """값 배열 추가 (NaN 제외)"""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self.n += len(values)
+            self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """다른 스케치를 병합 (같은 k 사용)"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+            self.parity.append(0)
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    @property
+    def exact(self) -> bool:
+        """compaction이 한 번도 일어나지 않아 모든 값을 보관 중인지 여부"""
+        return len(self.levels) == 1
+
+    def quantiles(self, qs: Iterable[float]) -> np.ndarray:
+        """분위수 (값이 없으면 NaN)"""
+        qs = np.asarray(list(qs), dtype=float)
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        if self.exact:
+            return np.quantile(self.levels[0], qs)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(values), 2.0 ** level) for level, values in enumerate(self.levels)])
+        order = np.argsort(items, kind="mergesort")
+        cumulative = np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, qs * cumulative[-1], side="left")
+        return items[order][np.minimum(positions, len(items) - 1)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"k": self.k, "n": self.n, "levels": [items.tolist() for items in self.levels],
+                "parity": list(self.parity)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "KLLSketch":
+        sketch = cls(data["k"])
+        sketch.n = int(data["n"])
+        sketch.levels = [np.asarray(items, dtype=float) for items in data["levels"]] or [np.empty(0)]
+        sketch.parity = list(data.get("parity") or [0] * len(sketch.levels))
+        return sketch
+
+
+class LiftQuantileState:
+    """
+    퍼널별/전체 캠페인 Lift 스케치와 퍼널별 발송/전환 합계를 누적하는 병합 가능한 집계 상태
+
+    update()로 청크를 계속 추가하거나 merge()로 다른 상태(다른 파일/기간)를 합칠 수 있고,
+    to_dict()/save()로 직렬화해 다음 적재 때 이어서 갱신합니다.
+    source는 적재한 CSV 앞부분(바이트 수, sha1)으로, 파일 끝에 행이 추가되었는지 판단하는 데 씁니다.
+    """
+
+    def __init__(self, k: Optional[int] = None):
+        self.k = settings.QUANTILE_SKETCH_K if k is None else k
+        self.funnel_sketches: Dict[str, KLLSketch] = {}
+        self.global_sketch = KLLSketch(self.k)
+        self.funnel_counts: Dict[str, np.ndarray] = {}
+        self.rows = 0
+        self.source: Dict[str, Any] = {"bytes": 0, "sha1": None}
+        self._terciles: Dict[Any, Tuple[float, float]] = {}
+
+    def update(self, df: pd.DataFrame) -> "LiftQuantileState":
+        """데이터 청크 추가 (퍼널 단위 groupby 한 번, 행 단위 반복 없음)"""
+        self._terciles.clear()
+        self.rows += len(df)
+        if EXP_RATE in df.columns and CTRL_RATE in df.columns:
+            lift = (pd.to_numeric(df[EXP_RATE], errors="coerce") - pd.to_numeric(df[CTRL_RATE], errors="coerce"))
+            self.global_sketch.update(lift.to_numpy())
+            if "퍼널" in df.columns:
+                for funnel, values in lift.groupby(df["퍼널"], dropna=True, sort=False):
+                    self.funnel_sketches.setdefault(funnel, KLLSketch(self.k)).update(values.to_numpy())
+        if "퍼널" in df.columns and all(c in df.columns for c in COUNT_COLUMNS):
+            counts = df[COUNT_COLUMNS].apply(pd.to_numeric, errors="coerce").fillna(0)
+            for funnel, totals in counts.groupby(df["퍼널"], dropna=True, sort=False).sum().iterrows():
+                self.funnel_counts[funnel] = self.funnel_counts.get(funnel, np.zeros(4)) + totals.to_numpy(dtype=float)
+        return self
+
+    def merge(self, other: "LiftQuantileState") -> "LiftQuantileState":
+        """다른 상태를 병합"""
+        self._terciles.clear()
+        self.rows += other.rows
+        self.global_sketch.merge(other.global_sketch)
+        for funnel, sketch in other.funnel_sketches.items():
+            self.funnel_sketches.setdefault(funnel, KLLSketch(self.k)).merge(sketch)
+        for funnel, totals in other.funnel_counts.items():
+            self.funnel_counts[funnel] = self.funnel_counts.get(funnel, np.zeros(4)) + totals
+        return self
+
+    def funnel_terciles(self, funnel: Any) -> Tuple[float, float]:
+        """퍼널 내 캠페인 Lift(%p)의 33/67% 분위수"""
+        key = ("funnel", funnel)
+        if key not in self._terciles:
+            sketch = self.funnel_sketches.get(funnel)
+            values = sketch.quantiles(TERCILES) if sketch is not None else [np.nan, np.nan]
+            self._terciles[key] = (float(values[0]), float(values[1]))
+        return self._terciles[key]
+
+    def global_terciles(self) -> Tuple[float, float]:
+        """전체 캠페인 Lift(%p)의 33/67% 분위수"""
+        if "global" not in self._terciles:
+            values = self.global_sketch.quantiles(TERCILES)
+            self._terciles["global"] = (float(values[0]), float(values[1]))
+        return self._terciles["global"]
+
+    def pooled_funnel_lift(self) -> pd.Series:
+        """퍼널별 합산 Lift (비율 단위, 발송 0건이면 NaN)"""
+        if not self.funnel_counts:
+            return pd.Series(dtype=float)
+        totals = np.vstack(list(self.funnel_counts.values()))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lift = totals[:, 0] / totals[:, 1] - totals[:, 2] / totals[:, 3]
+        return pd.Series(np.where(np.isfinite(lift), lift, np.nan), index=list(self.funnel_counts.keys()))
+
+    def funnel_lift_terciles(self) -> Tuple[float, float]:
+        """퍼널 간 합산 Lift(비율 단위)의 33/67% 분위수 (퍼널 수만큼의 값으로 정확히 계산)"""
+        if "funnel_lift" not in self._terciles:
+            values = self.pooled_funnel_lift().dropna()
+            self._terciles["funnel_lift"] = ((float(values.quantile(TERCILES[0])), float(values.quantile(TERCILES[1])))
+                                             if len(values) else (np.nan, np.nan))
+        return self._terciles["funnel_lift"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": LIFT_QUANTILE_VERSION,
+            "k": self.k,
+            "rows": self.rows,
+            "source": self.source,
+            "global": self.global_sketch.to_dict(),
+            "funnels": {str(funnel): sketch.to_dict() for funnel, sketch in self.funnel_sketches.items()},
+            "funnel_counts": {str(funnel): totals.tolist() for funnel, totals in self.funnel_counts.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LiftQuantileState":
+        state = cls(data["k"])
+        state.rows = int(data.get("rows", 0))
+        state.source = data.get("source") or {"bytes": 0, "sha1": None}
+        state.global_sketch = KLLSketch.from_dict(data["global"])
+        state.funnel_sketches = {funnel: KLLSketch.from_dict(sketch) for funnel, sketch in data["funnels"].items()}
+        state.funnel_counts = {funnel: np.asarray(totals, dtype=float) for funnel, totals in data["funnel_counts"].items()}
+        return state
+
+    def save(self, path: str):
+        """JSON으로 저장"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["LiftQuantileState"]:
+        """저장된 상태 로드 (없거나 버전/스케치 크기가 다르면 None)"""
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != LIFT_QUANTILE_VERSION or data.get("k") != settings.QUANTILE_SKETCH_K:
+            return None
+        return cls.from_dict(data)
+
+
+def get_lift_quantile_state(df: pd.DataFrame) -> LiftQuantileState:
+    """메모리에 있는 데이터셋의 Lift 분위수 상태 (데이터셋별 1회 계산)"""
+    columns = ["퍼널", EXP_RATE, CTRL_RATE, *COUNT_COLUMNS]
+    return get_or_build(f"lift_quantile_state:{settings.QUANTILE_SKETCH_K}", df, columns,
+                        lambda: LiftQuantileState().update(df))
+
+
+def build_lift_quantile_state(csv_file_path: str, state: Optional[LiftQuantileState] = None,
+                              chunk_rows: int = DEFAULT_CHUNK_ROWS, offset: int = 0) -> LiftQuantileState:
+    """
+    CSV를 청크 단위로 읽으며 Lift 분위수 상태를 갱신 (파일 전체를 메모리에 올리지 않음)
+
+    Args:
+        csv_file_path: 적재할 CSV 파일 경로
+        state: 이어서 갱신할 기존 상태 (없으면 새로 생성)
+        chunk_rows: 한 번에 읽을 행 수
+        offset: 이 바이트 위치(행 시작)부터 적재 (0이면 헤더 다음 행부터 전체)
+    """
+    state = state or LiftQuantileState()
+    with open(csv_file_path, "rb") as f:
+        header = f.readline()
+        # 헤더만 따로 파싱해 중복 컬럼명도 pandas와 같은 이름으로 맞춤
+        names = list(pd.read_csv(io.BytesIO(header), encoding="utf-8", nrows=0).columns)
+        f.seek(max(offset, len(header)))
+        usecols = [c for c in names if c in ("퍼널", EXP_RATE, CTRL_RATE, *COUNT_COLUMNS)]
+        for chunk in pd.read_csv(f, header=None, names=names, usecols=usecols, chunksize=chunk_rows,
+                                 encoding="utf-8", on_bad_lines="skip"):
+            state.update(chunk)
+    return state
+
+
+def _file_digests(csv_file_path: str, prefix_bytes: int) -> Tuple[Optional[str], str, int]:
+    """(앞 prefix_bytes 바이트 sha1 - 파일이 더 짧으면 None, 파일 전체 sha1, 파일 크기) 한 번에 계산"""
+    digest = hashlib.sha1()
+    prefix = None
+    size = 0
+    with open(csv_file_path, "rb") as f:
+        while True:
+            if prefix is None and size == prefix_bytes:
+                prefix = digest.hexdigest()
+            limit = prefix_bytes - size if prefix is None else HASH_BLOCK_BYTES
+            block = f.read(min(limit, HASH_BLOCK_BYTES))
+            if not block:
+                break
+            digest.update(block)
+            size += len(block)
+    return prefix, digest.hexdigest(), size
+
+
+def _ends_with_newline(csv_file_path: str, size: int) -> bool:
+    """size 바이트 위치가 행 경계인지 (직전 바이트가 줄바꿈)"""
+    with open(csv_file_path, "rb") as f:
+        f.seek(size - 1)
+        return f.read(1) == b"\n"
+
+
+def lift_quantile_path(csv_file_path: str, cache_dir: str = LIFT_QUANTILE_DIR) -> str:
+    """데이터셋 경로별 상태 파일 경로"""
+    return os.path.join(cache_dir, f"{dataset_path_key(csv_file_path)}.json")
+
+
+# 상태 파일 경로 -> (적재 시점 파일 (크기, 수정 시각), 상태)
+_states: Dict[str, Tuple[Tuple[int, int], LiftQuantileState]] = {}
+_lock = threading.Lock()
+
+
+def get_csv_lift_quantile_state(csv_file_path: str) -> LiftQuantileState:
+    """
+    CSV 데이터셋의 Lift 분위수 상태 (프로세스 내 재사용 → 저장된 상태 로드 → 파일 끝에 추가된 행만 청크 적재 후 저장)
+
+    스케치는 값을 뺄 수 없으므로, 이미 적재한 앞부분이 바뀐 파일은 처음부터 청크 단위로 다시 적재합니다.
+    """
+    path = lift_quantile_path(csv_file_path)
+    stat = os.stat(csv_file_path)
+    file_key = (stat.st_size, stat.st_mtime_ns)
+    with _lock:
+        cached = _states.get(path)
+        if cached is not None and cached[0] == file_key:
+            return cached[1]
+        state = cached[1] if cached is not None else None
+        if state is None:
+            try:
+                state = LiftQuantileState.load(path)
+            except Exception as e:
+                print(f"⚠️ Lift 분위수 상태 로드 실패, 새로 만듭니다: {e}")
+                state = None
+
+        ingested = state.source["bytes"] if state is not None else 0
+        prefix, digest, size = _file_digests(csv_file_path, ingested)
+        if state is None or state.source["sha1"] != digest:
+            if state is not None and ingested and prefix == state.source["sha1"] \
+                    and _ends_with_newline(csv_file_path, ingested):
+                before = state.rows
+                build_lift_quantile_state(csv_file_path, state, offset=ingested)
+                print(f"📐 Lift 분위수 스케치에 추가된 행 {state.rows - before}개 반영 (전체 {state.rows}개)")
+            else:
+                state = build_lift_quantile_state(csv_file_path)
+                print(f"📐 Lift 분위수 스케치 적재: {state.rows}개 행")
+            state.source = {"bytes": size, "sha1": digest}
+            try:
+                state.save(path)
+            except Exception as e:
+                print(f"⚠️ Lift 분위수 상태 저장 실패: {e}")
+        _states[path] = (file_key, state)
+        return state
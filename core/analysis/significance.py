@@ -0,0 +1,342 @@
+"""
+실험군 vs 대조군 Lift 유의성 검정 (NumPy 벡터화)
+
+캠페인 행 전체와 퍼널/채널/목적 그룹 전체를 배열 연산 한 번으로 계산합니다.
+    - 두 비율 z-검정 (합동 분산, 양측 p-value)
+    - 그룹별 전환율의 Wilson score 신뢰구간
+    - Lift(실험군 전환율 - 대조군 전환율)의 Newcombe hybrid score 신뢰구간
+    - 한 실행의 모든 비교(캠페인/퍼널×문구/퍼널/채널/목적/키워드)에 대한 다중검정 보정 (Benjamini-Hochberg, Holm)
+"""
+
+import hashlib
+import json
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+from config.keyword_groups import KEYWORD_GROUPS
+from config.settings import settings
+from core.analysis.dataset_cache import get_or_build
+from core.analysis.keyword_engine import KeywordIndicatorEngine
+
+EXP_SENT = "실험군_발송"
+EXP_CONVERSIONS = "실험군_1일이내_예약생성"
+CTRL_SENT = "대조군_발송"
+CTRL_CONVERSIONS = "대조군_1일이내_예약생성"
+
+# 그룹 유의성 기본 분석 차원
+SIGNIFICANCE_DIMENSIONS = ("퍼널", "채널", "목적")
+
+SIGNIFICANT_POSITIVE = "유의 (양의 Lift)"
+SIGNIFICANT_NEGATIVE = "유의 (음의 Lift)"
+NOT_SIGNIFICANT = "유의하지 않음"
+INSUFFICIENT_SAMPLE = "표본 부족"
+
+
+def _as_counts(values) -> np.ndarray:
+    """발송/전환 건수 배열 (결측은 0, 음수는 0으로 처리)"""
+    counts = np.asarray(values, dtype=float)
+    return np.clip(np.nan_to_num(counts, nan=0.0), 0.0, None)
+
+
+def z_critical(confidence: float) -> float:
+    """양측 신뢰수준에 해당하는 표준정규 임계값 (0.95 -> 1.96)"""
+    return float(ndtri(1.0 - (1.0 - confidence) / 2.0))
+
+
+def wilson_interval(successes, trials, confidence: Optional[float] = None):
+    """
+    Wilson score 신뢰구간 (벡터화)
+
+    Returns:
+        (하한, 상한) 배열 (trials가 0이면 NaN)
+    """
+    confidence = settings.CONFIDENCE_INTERVAL if confidence is None else confidence
+    x = _as_counts(successes)
+    n = _as_counts(trials)
+    x = np.minimum(x, n)
+    z = z_critical(confidence)
+    z2 = z * z
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = x / n
+        denominator = 1.0 + z2 / n
+        center = (p + z2 / (2.0 * n)) / denominator
+        half = z * np.sqrt(p * (1.0 - p) / n + z2 / (4.0 * n * n)) / denominator
+    return center - half, center + half
+
+
+def newcombe_interval(exp_successes, exp_trials, ctrl_successes, ctrl_trials,
+                      confidence: Optional[float] = None):
+    """
+    두 비율 차이(실험군 - 대조군)의 Newcombe hybrid score 신뢰구간 (Wilson 구간 결합, 벡터화)
+
+    Returns:
+        (하한, 상한) 배열
+    """
+    n1 = _as_counts(exp_trials)
+    n2 = _as_counts(ctrl_trials)
+    x1 = np.minimum(_as_counts(exp_successes), n1)
+    x2 = np.minimum(_as_counts(ctrl_successes), n2)
+    l1, u1 = wilson_interval(x1, n1, confidence)
+    l2, u2 = wilson_interval(x2, n2, confidence)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p1 = x1 / n1
+        p2 = x2 / n2
+        diff = p1 - p2
+        lower = diff - np.sqrt((p1 - l1) ** 2 + (u2 - p2) ** 2)
+        upper = diff + np.sqrt((u1 - p1) ** 2 + (p2 - l2) ** 2)
+    return lower, upper
+
+
+def two_proportion_ztest(exp_successes, exp_trials, ctrl_successes, ctrl_trials):
+    """
+    두 비율 z-검정 (합동 분산, 양측, 벡터화)
+
+    Returns:
+        (z 통계량, p-value) 배열 (두 군 전환율이 모두 0 또는 1이면 z=0, p=1 / 발송 0건이면 NaN)
+    """
+    n1 = _as_counts(exp_trials)
+    n2 = _as_counts(ctrl_trials)
+    x1 = np.minimum(_as_counts(exp_successes), n1)
+    x2 = np.minimum(_as_counts(ctrl_successes), n2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pooled = (x1 + x2) / (n1 + n2)
+        se = np.sqrt(pooled * (1.0 - pooled) * (1.0 / n1 + 1.0 / n2))
+        z = (x1 / n1 - x2 / n2) / se
+    valid = (n1 > 0) & (n2 > 0)
+    z = np.where(valid & (se == 0), 0.0, z)
+    z = np.where(valid, z, np.nan)
+    p_value = 2.0 * ndtr(-np.abs(z))
+    return z, p_value
+
+
+def lift_significance(exp_successes, exp_trials, ctrl_successes, ctrl_trials,
+                      alpha: Optional[float] = None, confidence: Optional[float] = None,
+                      min_sample_size: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    A/B 셀 배열 전체의 전환율, Lift, z-검정, 신뢰구간, 유의성 판정을 한 번에 계산
+
+    Args:
+        exp_successes, exp_trials: 실험군 전환/발송 건수 배열
+        ctrl_successes, ctrl_trials: 대조군 전환/발송 건수 배열
+        alpha: 유의수준 (기본 settings.LIFT_SIGNIFICANCE_THRESHOLD)
+        confidence: 신뢰수준 (기본 settings.CONFIDENCE_INTERVAL)
+        min_sample_size: 판정에 필요한 군별 최소 발송 건수 (기본 settings.MIN_SAMPLE_SIZE)
+
+    Returns:
+        컬럼명 -> 배열 딕셔너리 (비율/Lift는 0~1 비율 단위)
+    """
+    alpha = settings.LIFT_SIGNIFICANCE_THRESHOLD if alpha is None else alpha
+    min_sample_size = settings.MIN_SAMPLE_SIZE if min_sample_size is None else min_sample_size
+
+    n1 = _as_counts(exp_trials)
+    n2 = _as_counts(ctrl_trials)
+    x1 = np.minimum(_as_counts(exp_successes), n1)
+    x2 = np.minimum(_as_counts(ctrl_successes), n2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        exp_rate = x1 / n1
+        ctrl_rate = x2 / n2
+    z, p_value = two_proportion_ztest(x1, n1, x2, n2)
+    exp_low, exp_high = wilson_interval(x1, n1, confidence)
+    ctrl_low, ctrl_high = wilson_interval(x2, n2, confidence)
+    lift_low, lift_high = newcombe_interval(x1, n1, x2, n2, confidence)
+
+    lift = exp_rate - ctrl_rate
+    sufficient = (n1 >= max(min_sample_size, 1)) & (n2 >= max(min_sample_size, 1))
+    significant = sufficient & (p_value < alpha)
+    verdict = np.where(~sufficient, INSUFFICIENT_SAMPLE,
+                       np.where(~significant, NOT_SIGNIFICANT,
+                                np.where(lift > 0, SIGNIFICANT_POSITIVE, SIGNIFICANT_NEGATIVE)))
+
+    return {
+        "exp_sent": n1,
+        "exp_conversions": x1,
+        "ctrl_sent": n2,
+        "ctrl_conversions": x2,
+        "exp_rate": exp_rate,
+        "ctrl_rate": ctrl_rate,
+        "lift": lift,
+        "z_score": z,
+        "p_value": p_value,
+        "exp_ci_low": exp_low,
+        "exp_ci_high": exp_high,
+        "ctrl_ci_low": ctrl_low,
+        "ctrl_ci_high": ctrl_high,
+        "lift_ci_low": lift_low,
+        "lift_ci_high": lift_high,
+        "sufficient_sample": sufficient,
+        "significant": significant,
+        "verdict": verdict,
+    }
+
+
+def _count_columns(df: pd.DataFrame) -> pd.DataFrame:
+    missing = [c for c in (EXP_SENT, EXP_CONVERSIONS, CTRL_SENT, CTRL_CONVERSIONS) if c not in df.columns]
+    if missing:
+        raise KeyError(f"유의성 검정에 필요한 컬럼이 없습니다: {', '.join(missing)}")
+    return df[[EXP_SENT, EXP_CONVERSIONS, CTRL_SENT, CTRL_CONVERSIONS]].apply(pd.to_numeric, errors="coerce")
+
+
+def campaign_significance(df: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    """캠페인(행)별 유의성 결과 (원본 인덱스 유지)"""
+    counts = _count_columns(df)
+    result = lift_significance(counts[EXP_CONVERSIONS].values, counts[EXP_SENT].values,
+                               counts[CTRL_CONVERSIONS].values, counts[CTRL_SENT].values, **kwargs)
+    return pd.DataFrame(result, index=df.index)
+
+
+def group_significance(df: pd.DataFrame, dimensions: Sequence[str] = SIGNIFICANCE_DIMENSIONS,
+                       **kwargs) -> pd.DataFrame:
+    """
+    여러 차원의 그룹별 유의성 결과 (차원별 발송/전환 합계를 이어 붙여 한 번에 검정)
+
+    Returns:
+        dimension, group 컬럼 + lift_significance 결과 컬럼 DataFrame
+    """
+    counts = _count_columns(df)
+    frames = []
+    for dimension in dimensions:
+        if dimension not in df.columns:
+            continue
+        summed = counts.groupby(df[dimension], dropna=True, sort=True).sum()
+        frames.append(pd.DataFrame({"dimension": dimension, "group": summed.index.astype(str)})
+                      .join(summed.reset_index(drop=True)))
+    if not frames:
+        return pd.DataFrame(columns=["dimension", "group", *lift_significance([], [], [], []).keys()])
+
+    stacked = pd.concat(frames, ignore_index=True)
+    result = lift_significance(stacked[EXP_CONVERSIONS].values, stacked[EXP_SENT].values,
+                               stacked[CTRL_CONVERSIONS].values, stacked[CTRL_SENT].values, **kwargs)
+    return pd.concat([stacked[["dimension", "group"]], pd.DataFrame(result)], axis=1)
+
+
+def overall_significance(df: pd.DataFrame, **kwargs) -> Dict[str, float]:
+    """전체 합계 기준 유의성 결과"""
+    totals = _count_columns(df).sum()
+    result = lift_significance([totals[EXP_CONVERSIONS]], [totals[EXP_SENT]],
+                               [totals[CTRL_CONVERSIONS]], [totals[CTRL_SENT]], **kwargs)
+    return {name: values[0].item() for name, values in result.items()}
+
+
+# =============================================================================
+# 다중검정 보정
+# =============================================================================
+
+MULTIPLE_TESTING_METHODS = ("bh", "holm")
+
+
+def benjamini_hochberg(p_values) -> np.ndarray:
+    """
+    Benjamini-Hochberg q-value (FDR 보정, 정렬 1회 O(n log n))
+
+    NaN p-value는 검정 수에서 제외하고 결과도 NaN으로 유지합니다.
+    """
+    p = np.asarray(p_values, dtype=float)
+    adjusted = np.full(p.shape, np.nan)
+    valid = ~np.isnan(p)
+    m = int(valid.sum())
+    if m == 0:
+        return adjusted
+    ordered_index = np.argsort(p[valid], kind="mergesort")
+    ordered = p[valid][ordered_index] * m / np.arange(1, m + 1)
+    # 큰 p-value부터 누적 최솟값을 취해 단조성 보장
+    ordered = np.minimum.accumulate(ordered[::-1])[::-1]
+    values = np.empty(m)
+    values[ordered_index] = np.minimum(ordered, 1.0)
+    adjusted[valid] = values
+    return adjusted
+
+
+def holm_bonferroni(p_values) -> np.ndarray:
+    """Holm step-down 보정 p-value (FWER 보정, 정렬 1회 O(n log n), NaN 유지)"""
+    p = np.asarray(p_values, dtype=float)
+    adjusted = np.full(p.shape, np.nan)
+    valid = ~np.isnan(p)
+    m = int(valid.sum())
+    if m == 0:
+        return adjusted
+    ordered_index = np.argsort(p[valid], kind="mergesort")
+    ordered = p[valid][ordered_index] * (m - np.arange(m))
+    ordered = np.maximum.accumulate(ordered)
+    values = np.empty(m)
+    values[ordered_index] = np.minimum(ordered, 1.0)
+    adjusted[valid] = values
+    return adjusted
+
+
+def _family_counts(df: pd.DataFrame, keyword_groups: Dict[str, Sequence[str]]) -> List[Tuple[str, pd.DataFrame]]:
+    """비교 family별 발송/전환 합계 (index = 비교 대상 키)"""
+    counts = _count_columns(df)
+    families = [("campaign", counts)]
+    if "퍼널" in df.columns and "문구" in df.columns:
+        families.append(("funnel_message", counts.groupby([df["퍼널"], df["문구"]], dropna=True, sort=True).sum()))
+    for dimension in SIGNIFICANCE_DIMENSIONS:
+        if dimension in df.columns:
+            families.append((dimension, counts.groupby(df[dimension], dropna=True, sort=True).sum()))
+    if "문구" in df.columns and keyword_groups:
+        metrics = KeywordIndicatorEngine(keyword_groups).fit(df).metrics
+        # 포함 문구가 없는 키워드는 비교 대상이 아님
+        metrics = metrics[metrics["message_count"] > 0]
+        families.append(("keyword", metrics[[EXP_SENT, EXP_CONVERSIONS, CTRL_SENT, CTRL_CONVERSIONS]]))
+    return families
+
+
+def _build_run_comparisons(df: pd.DataFrame, keyword_groups: Dict[str, Sequence[str]],
+                           alpha: float, method: str) -> Dict[str, pd.DataFrame]:
+    families = _family_counts(df, keyword_groups)
+    stacked = np.vstack([frame[[EXP_CONVERSIONS, EXP_SENT, CTRL_CONVERSIONS, CTRL_SENT]].to_numpy(dtype=float)
+                         for _, frame in families])
+    result = lift_significance(stacked[:, 0], stacked[:, 1], stacked[:, 2], stacked[:, 3], alpha=alpha)
+
+    # 모든 비교의 p-value 벡터 전체를 한 family로 보정
+    result["q_value"] = benjamini_hochberg(result["p_value"])
+    result["p_holm"] = holm_bonferroni(result["p_value"])
+    adjusted = result["q_value"] if method == "bh" else result["p_holm"]
+    result["significant"] = result["sufficient_sample"] & (adjusted < alpha)
+    result["verdict"] = np.where(~result["sufficient_sample"], INSUFFICIENT_SAMPLE,
+                                 np.where(~result["significant"], NOT_SIGNIFICANT,
+                                          np.where(result["lift"] > 0, SIGNIFICANT_POSITIVE, SIGNIFICANT_NEGATIVE)))
+
+    comparisons = {}
+    offset = 0
+    for family, frame in families:
+        size = len(frame)
+        comparisons[family] = pd.DataFrame({name: values[offset:offset + size] for name, values in result.items()},
+                                           index=frame.index)
+        offset += size
+    return comparisons
+
+
+def run_comparisons(df: pd.DataFrame, keyword_groups: Optional[Dict[str, Sequence[str]]] = None,
+                    alpha: Optional[float] = None, method: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+    """
+    한 실행에서 순위를 매기는 모든 A/B 비교의 유의성을 계산하고 전체 p-value 벡터를 한 번에 다중검정 보정
+
+    family: campaign(행 인덱스), funnel_message((퍼널, 문구)), 퍼널, 채널, 목적, keyword(키워드)
+    각 결과에는 원래 p_value와 함께 q_value(BH), p_holm(Holm)이 추가되고, significant/verdict는
+    method(기본 settings.MULTIPLE_TESTING_METHOD)로 보정한 값 기준입니다. 데이터셋별로 한 번만 계산합니다.
+
+    Returns:
+        {family: 비교 대상 키를 index로 하는 DataFrame}
+    """
+    keyword_groups = KEYWORD_GROUPS if keyword_groups is None else keyword_groups
+    alpha = settings.LIFT_SIGNIFICANCE_THRESHOLD if alpha is None else alpha
+    method = (method or settings.MULTIPLE_TESTING_METHOD).lower()
+    if method not in MULTIPLE_TESTING_METHODS:
+        raise ValueError(f"알 수 없는 다중검정 보정 방법: {method} (사용 가능: {', '.join(MULTIPLE_TESTING_METHODS)})")
+
+    groups_key = hashlib.sha1(json.dumps(keyword_groups, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+    name = (f"lift_comparisons:{groups_key}:{alpha}:{method}:"
+            f"{settings.MIN_SAMPLE_SIZE}:{settings.CONFIDENCE_INTERVAL}")
+    columns = ["문구", *SIGNIFICANCE_DIMENSIONS, EXP_SENT, EXP_CONVERSIONS, CTRL_SENT, CTRL_CONVERSIONS]
+    return get_or_build(name, df, columns, lambda: _build_run_comparisons(df, keyword_groups, alpha, method))
+
+
+def format_q_value(q_value: float) -> str:
+    """보고서/프롬프트 표시용 q-value 문자열"""
+    if q_value is None or pd.isna(q_value):
+        return "-"
+    return "<0.001" if q_value < 0.001 else f"{q_value:.3f}"
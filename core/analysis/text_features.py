@@ -0,0 +1,119 @@
+"""문구 텍스트 피처 행렬 - 문구별 길이/이모지/숫자/특수문자/개인화/할인율/톤/패턴 분류"""
+
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.keyword_groups import TONE_KEYWORD_GROUPS
+from core.analysis.dataset_cache import get_or_build
+from core.analysis.keyword_engine import KeywordMatcher
+
+# 문자 단위 카운트 패턴을 하나로 묶은 정규식 (각 그룹은 서로 겹치지 않는 문자 집합)
+#   - discount: '%'가 뒤따르는 숫자 (숫자 카운트에도 포함)
+#   - number: 그 외 연속 숫자
+FEATURE_PATTERN = (
+    r'(?P<emoji>[😀-🙏🌀-🗿])'
+    r'|(?P<discount>\d+)(?=\s*%)'
+    r'|(?P<number>\d+)'
+    r'|(?P<special>[!@#$%^&*(),.?":{}|<>])'
+)
+
+PERSONALIZATION_TOKEN = '#NAME'
+
+# 패턴 분류 규칙 (우선순위 순) : (패턴명, 모두 포함해야 하는 키워드 그룹들)
+# 각 키워드 그룹은 "하나라도 포함"이면 충족
+PATTERN_RULES: List[Tuple[str, List[List[str]]]] = [
+    ("전기차 혜택 패턴", [['전기차'], ['주행요금']]),
+    ("대폭 할인 패턴", [['할인'], ['60%', '65%', '75%']]),
+    ("긴급성 FOMO 패턴", [['지금'], ['놓치', '마감']]),
+    ("즉시 행동 패턴", [['지금', '바로', '즉시']]),
+    ("FOMO 패턴", [['마감', 'D-DAY', '놓치']]),
+    ("개인화 패턴", [['#', '님']]),
+    ("무료 혜택 패턴", [['무료', '0원']]),
+    ("할인 혜택 패턴", [['할인']]),
+]
+DEFAULT_PATTERN = "일반 안내 패턴"
+
+FEATURE_COLUMNS = [
+    'length', 'emoji_count', 'number_count', 'special_count', 'has_personalization',
+    'discount_pct', 'urgency', 'fomo', 'pattern_class'
+]
+
+
+def _feature_keywords() -> List[str]:
+    """피처 계산에 필요한 모든 리터럴 키워드 (한 번의 스캔으로 매칭)"""
+    keywords = [PERSONALIZATION_TOKEN]
+    for _, groups in PATTERN_RULES:
+        for group in groups:
+            keywords.extend(group)
+    keywords.extend(TONE_KEYWORD_GROUPS['urgency'])
+    keywords.extend(TONE_KEYWORD_GROUPS['fomo'])
+    return list(dict.fromkeys(keywords))
+
+
+def extract_text_features(messages: pd.Series) -> pd.DataFrame:
+    """
+    문구별 텍스트 피처 행렬 계산 (벡터화)
+
+    Args:
+        messages: 문구 Series
+
+    Returns:
+        FEATURE_COLUMNS 컬럼을 가진 DataFrame (messages와 같은 인덱스)
+    """
+    texts = pd.Series(messages.to_numpy(), dtype=object).fillna('').astype(str)
+    n_rows = len(texts)
+
+    # 1) 문자 단위 카운트: 이모지/숫자/특수문자/할인율을 하나의 정규식 스캔으로 추출
+    counts = pd.DataFrame(0, index=range(n_rows), columns=['emoji', 'discount', 'number', 'special'])
+    discount_pct = pd.Series(0.0, index=range(n_rows))
+    matches = texts.str.extractall(FEATURE_PATTERN) if n_rows else pd.DataFrame()
+    if len(matches) > 0:
+        per_row = matches.notna().groupby(level=0).sum()
+        counts.loc[per_row.index, per_row.columns] = per_row.to_numpy()
+        discounts = pd.to_numeric(matches['discount'], errors='coerce').groupby(level=0).max().dropna()
+        discount_pct.loc[discounts.index] = discounts.to_numpy()
+
+    # 2) 키워드 포함 여부: 모든 리터럴 키워드를 한 번의 alternation 스캔으로 매칭
+    matcher = KeywordMatcher(_feature_keywords())
+    incidence = matcher.incidence_matrix(texts).toarray().astype(bool)
+
+    def contains_any(keywords: List[str]) -> np.ndarray:
+        return incidence[:, [matcher.keyword_index[k] for k in keywords]].any(axis=1)
+
+    conditions = [
+        np.logical_and.reduce([contains_any(group) for group in groups])
+        for _, groups in PATTERN_RULES
+    ]
+    pattern_class = np.select(conditions, [name for name, _ in PATTERN_RULES], default=DEFAULT_PATTERN) \
+        if n_rows else np.empty(0, dtype=object)
+
+    features = pd.DataFrame({
+        'length': texts.str.len().to_numpy(),
+        'emoji_count': counts['emoji'].to_numpy(),
+        'number_count': (counts['discount'] + counts['number']).to_numpy(),
+        'special_count': counts['special'].to_numpy(),
+        'has_personalization': contains_any([PERSONALIZATION_TOKEN]),
+        'discount_pct': discount_pct.to_numpy(),
+        'urgency': contains_any(TONE_KEYWORD_GROUPS['urgency']),
+        'fomo': contains_any(TONE_KEYWORD_GROUPS['fomo']),
+        'pattern_class': pattern_class,
+    }, columns=FEATURE_COLUMNS)
+    features.index = messages.index
+    return features
+
+
+def classify_message_pattern(message: str) -> str:
+    """단일 문구 패턴 분류 (피처 행렬과 같은 규칙 사용)"""
+    return extract_text_features(pd.Series([message]))['pattern_class'].iloc[0]
+
+
+def get_text_features(df: pd.DataFrame, text_column: str = '문구') -> pd.DataFrame:
+    """데이터셋당 한 번 계산한 텍스트 피처 행렬 반환 (df와 같은 인덱스)"""
+    messages = df[text_column] if text_column in df.columns else pd.Series([''] * len(df), index=df.index)
+    features = get_or_build(
+        f"text_features:{text_column}", df, [text_column],
+        lambda: extract_text_features(messages.reset_index(drop=True))
+    )
+    return features.set_axis(df.index)
@@ -0,0 +1,335 @@
+"""
+실행일 기준 주차별 트렌드 집계 (증분 갱신, NumPy/pandas 벡터화)
+
+주(월요일 시작) x 차원(전체/퍼널/채널) x 그룹별 발송/전환 합계와 반영한 캠페인 행 키별 기여분을 상태로 보관합니다.
+새 캠페인 행은 합계에 더하고 수정/삭제된 행은 기여분만 빼므로 과거 데이터를 다시 집계하지 않고,
+주차별/이동 구간(rolling) 합산 전환율과 Lift는 (주 x 그룹) 행렬의 rolling sum 한 번으로 계산합니다.
+상태는 데이터셋 경로별 JSON으로 저장되어 다음 실행에서는 CSV에서 바뀐 행만 반영합니다.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from config.settings import settings
+from core.analysis.dataset_cache import dataset_path_key
+from core.analysis.significance import CTRL_CONVERSIONS, CTRL_SENT, EXP_CONVERSIONS, EXP_SENT
+
+WEEKLY_TRENDS_DIR = "outputs/reports/weekly_trends"
+
+# 집계 방식/행 키가 바뀌면 올려서 저장된 상태를 무효화
+WEEKLY_TRENDS_VERSION = 3
+
+DATE_COLUMN = "실행일"
+COUNT_COLUMNS = [EXP_CONVERSIONS, EXP_SENT, CTRL_CONVERSIONS, CTRL_SENT]
+# 캠페인 행 식별(중복 집계 방지)에 쓰는 컬럼
+ROW_KEY_COLUMNS = [DATE_COLUMN, "퍼널", "채널", "문구", *COUNT_COLUMNS]
+
+# 집계 차원 (ALL_DIMENSION은 전체 합계)
+ALL_DIMENSION = "전체"
+TREND_DIMENSIONS = ("퍼널", "채널")
+
+STATE_COLUMNS = COUNT_COLUMNS + ["campaigns"]
+
+
+def week_start(dates) -> pd.Series:
+    """실행일을 해당 주 월요일 날짜로 변환 (해석 불가한 값은 NaT)"""
+    parsed = pd.to_datetime(pd.Series(dates), errors="coerce").dt.normalize()
+    return parsed - pd.to_timedelta(parsed.dt.dayofweek, unit="D")
+
+
+class WeeklyTrendState:
+    """
+    (차원, 그룹, 주) 단위 발송/전환 합계 상태
+
+    update()는 새로 들어온 행만 집계해 기존 합계에 더하고, sync()는 현재 데이터셋에 없는 행(수정/삭제된 행)의
+    기여분을 빼낸 뒤 새 행을 더합니다. row_table은 반영한 행 키별 기여분(실행일/차원 그룹/발송·전환 건수)과
+    행 수 n으로, 같은 내용의 행이 여러 번 있어도 이미 반영한 개수를 넘는 행만 새 행으로 봅니다.
+    to_dict()/save()로 직렬화해 다음 실행에서 이어서 갱신할 수 있습니다.
+    """
+
+    def __init__(self, dimensions: Sequence[str] = TREND_DIMENSIONS):
+        self.dimensions = tuple(dimensions)
+        self.totals = pd.DataFrame(
+            columns=STATE_COLUMNS, dtype=float,
+            index=pd.MultiIndex.from_arrays([[], [], pd.DatetimeIndex([])], names=["dimension", "group", "week"]))
+        # 반영한 캠페인 행 키 -> 기여분 (합계에서 빼낼 수 있도록 보관)
+        self.row_table = pd.DataFrame(
+            {DATE_COLUMN: pd.Series(dtype="datetime64[ns]"),
+             **{dimension: pd.Series(dtype=object) for dimension in self.dimensions},
+             **{column: pd.Series(dtype=float) for column in COUNT_COLUMNS},
+             "n": pd.Series(dtype=int)},
+            index=pd.Index([], name="row_key", dtype=object))
+
+    @property
+    def rows(self) -> int:
+        """지금까지 반영한 캠페인 행 수"""
+        return int(self.row_table["n"].sum())
+
+    @property
+    def watermark(self) -> Optional[pd.Timestamp]:
+        """반영된 행 중 가장 최근 실행일 (요약 표시용)"""
+        return self.row_table[DATE_COLUMN].max() if len(self.row_table) else None
+
+    def _row_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """실행일이 유효한 행의 기여분 (행 키 인덱스, 행마다 n=1)"""
+        if DATE_COLUMN not in df.columns:
+            raise KeyError(f"주차별 트렌드에 필요한 컬럼이 없습니다: {DATE_COLUMN}")
+        missing = [c for c in COUNT_COLUMNS if c not in df.columns]
+        if missing:
+            raise KeyError(f"주차별 트렌드에 필요한 컬럼이 없습니다: {', '.join(missing)}")
+
+        key_columns = [c for c in ROW_KEY_COLUMNS if c in df.columns]
+        row_keys = pd.util.hash_pandas_object(df[key_columns].astype(str), index=False).map("{:016x}".format)
+        frame = pd.DataFrame({
+            DATE_COLUMN: pd.to_datetime(df[DATE_COLUMN], errors="coerce").dt.normalize().to_numpy(),
+            **{dimension: (df[dimension].to_numpy(dtype=object) if dimension in df.columns else None)
+               for dimension in self.dimensions},
+            **{column: pd.to_numeric(df[column], errors="coerce").fillna(0).to_numpy(dtype=float)
+               for column in COUNT_COLUMNS},
+            "n": 1,
+        }, index=pd.Index(row_keys.to_numpy(), name="row_key"))
+        return frame[frame[DATE_COLUMN].notna().to_numpy()]
+
+    def _aggregate(self, rows: pd.DataFrame) -> pd.DataFrame:
+        """기여분 행(n배)을 (dimension, group, week) 합계로 집계"""
+        counts = rows[COUNT_COLUMNS].mul(rows["n"], axis=0)
+        counts["campaigns"] = rows["n"].astype(float)
+        counts.index = pd.RangeIndex(len(counts))
+        weeks = week_start(rows[DATE_COLUMN]).to_numpy()
+
+        frames = [counts.groupby(weeks).sum().assign(dimension=ALL_DIMENSION, group=ALL_DIMENSION)]
+        for dimension in self.dimensions:
+            summed = counts.groupby([rows[dimension].to_numpy(), weeks]).sum()
+            if summed.empty:
+                continue
+            summed.index.names = ["group", "week"]
+            frames.append(summed.reset_index("group").assign(dimension=dimension))
+        aggregated = pd.concat(frames)
+        aggregated.index.name = "week"
+        return aggregated.reset_index().set_index(["dimension", "group", "week"])[STATE_COLUMNS]
+
+    def _apply(self, rows: pd.DataFrame, sign: int):
+        """기여분 행을 합계와 row_table에 더하거나(sign=1) 뺌(sign=-1)"""
+        if rows.empty:
+            return
+        change = self._aggregate(rows) * sign
+        self.totals = change if self.totals.empty else self.totals.add(change, fill_value=0)
+        # 기여 캠페인이 모두 빠진 (차원, 그룹, 주)는 제거
+        self.totals = self.totals[self.totals["campaigns"] > 0]
+
+        n = rows.groupby(level=0)["n"].sum() * sign
+        counts = self.row_table["n"].add(n, fill_value=0)
+        new_keys = n.index.difference(self.row_table.index)
+        if len(new_keys):
+            added = rows[~rows.index.duplicated()].loc[new_keys]
+            self.row_table = added if self.row_table.empty else pd.concat([self.row_table, added])
+        self.row_table["n"] = counts.reindex(self.row_table.index).astype(int)
+        self.row_table = self.row_table[self.row_table["n"] > 0]
+
+    def update(self, df: pd.DataFrame, only_new: bool = False) -> "WeeklyTrendState":
+        """
+        데이터 청크의 주차별 합계를 상태에 더함
+
+        Args:
+            df: 실행일과 발송/전환 건수 컬럼을 가진 캠페인 DataFrame
+            only_new: True이면 아직 반영하지 않은 행만 반영 (같은 파일이나 행이 추가된 파일을 다시 넘겨도
+                중복 집계하지 않음, 이미 반영한 날짜에 추가된 행도 반영)
+        """
+        rows = self._row_frame(df)
+        if only_new and len(self.row_table):
+            # 같은 키의 n번째 행은 이미 반영한 개수 이상일 때만 새 행
+            occurrence = rows.groupby(level=0).cumcount().to_numpy()
+            seen = self.row_table["n"].reindex(rows.index).fillna(0).to_numpy()
+            rows = rows[occurrence >= seen]
+        self._apply(rows, 1)
+        return self
+
+    def sync(self, df: pd.DataFrame) -> Dict[str, int]:
+        """
+        상태를 현재 데이터셋에 맞춤 (데이터셋에 없는 행의 기여분을 뺀 뒤 새 행을 더함)
+
+        값이 수정된 행은 키가 바뀌므로 이전 행은 빠지고 수정된 행이 새로 반영됩니다.
+
+        Returns:
+            {"added": 새로 반영한 행 수, "removed": 빼낸 행 수}
+        """
+        current = self._row_frame(df).index.value_counts()
+        excess = self.row_table["n"] - current.reindex(self.row_table.index).fillna(0)
+        excess = excess[excess > 0].astype(int)
+        if len(excess):
+            self._apply(self.row_table.loc[excess.index].assign(n=excess), -1)
+        before = self.rows
+        self.update(df, only_new=True)
+        return {"added": self.rows - before, "removed": int(excess.sum())}
+
+    def merge(self, other: "WeeklyTrendState") -> "WeeklyTrendState":
+        """다른 상태의 합계를 병합"""
+        self._apply(other.row_table, 1)
+        return self
+
+    @property
+    def weeks(self) -> pd.DatetimeIndex:
+        """첫 주부터 마지막 주까지 빠짐없는 주 목록"""
+        if self.totals.empty:
+            return pd.DatetimeIndex([])
+        observed = self.totals.index.get_level_values("week")
+        return pd.date_range(observed.min(), observed.max(), freq="7D")
+
+    def trend(self, dimension: str = ALL_DIMENSION, window: int = 1) -> pd.DataFrame:
+        """
+        주차별(window=1) 또는 이동 구간(window주) 합산 전환율/Lift
+
+        Returns:
+            (group, week) 인덱스 DataFrame: 합계 컬럼 + exp_rate, ctrl_rate, lift (비율 단위)
+        """
+        if self.totals.empty or dimension not in self.totals.index.get_level_values("dimension"):
+            return pd.DataFrame(columns=STATE_COLUMNS + ["exp_rate", "ctrl_rate", "lift"])
+        weeks = self.weeks
+        totals = self.totals.xs(dimension, level="dimension")
+        # (주 x 그룹) 행렬로 펼쳐 빈 주를 0으로 채운 뒤 rolling sum 한 번으로 이동 구간 합계 계산
+        matrices = {}
+        for column in STATE_COLUMNS:
+            matrix = totals[column].unstack("group").reindex(weeks).fillna(0)
+            matrices[column] = matrix.rolling(window, min_periods=1).sum() if window > 1 else matrix
+        result = pd.concat({column: matrix.stack() for column, matrix in matrices.items()}, axis=1)
+        result.index.names = ["week", "group"]
+        result = result.swaplevel().sort_index()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result["exp_rate"] = result[EXP_CONVERSIONS] / result[EXP_SENT]
+            result["ctrl_rate"] = result[CTRL_CONVERSIONS] / result[CTRL_SENT]
+        result["lift"] = result["exp_rate"] - result["ctrl_rate"]
+        return result
+
+    def summary(self, window: Optional[int] = None) -> Dict[str, Any]:
+        """AnalysisContext.weekly_trends에 저장할 직렬화 가능한 요약 (%p 단위)"""
+        window = settings.TREND_ROLLING_WEEKS if window is None else window
+
+        def records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+            rows = []
+            for (group, week), row in frame.iterrows():
+                # 해당 주(이동 구간)에 캠페인이 없는 그룹은 생략
+                if row["campaigns"] == 0:
+                    continue
+                rows.append({
+                    "group": group,
+                    "week": week.strftime("%Y-%m-%d"),
+                    "campaigns": int(row["campaigns"]),
+                    "exp_sent": int(row[EXP_SENT]),
+                    "exp_rate": round(float(row["exp_rate"]) * 100, 2) if pd.notna(row["exp_rate"]) else None,
+                    "ctrl_rate": round(float(row["ctrl_rate"]) * 100, 2) if pd.notna(row["ctrl_rate"]) else None,
+                    "lift": round(float(row["lift"]) * 100, 2) if pd.notna(row["lift"]) else None,
+                })
+            return rows
+
+        overall = self.trend(ALL_DIMENSION)
+        lifts = overall["lift"].dropna()
+        latest_change = None
+        if len(lifts) >= 2:
+            latest_change = round(float(lifts.iloc[-1] - lifts.iloc[-2]) * 100, 2)
+        return {
+            "weeks": [week.strftime("%Y-%m-%d") for week in self.weeks],
+            "rolling_window_weeks": window,
+            "watermark": self.watermark.strftime("%Y-%m-%d") if self.watermark is not None else None,
+            "overall": records(overall),
+            "overall_rolling": records(self.trend(ALL_DIMENSION, window)),
+            "by_dimension": {
+                dimension: {"weekly": records(self.trend(dimension)),
+                            "rolling": records(self.trend(dimension, window))}
+                for dimension in self.dimensions
+            },
+            "latest_week_lift_change": latest_change,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        frame = self.totals.reset_index()
+        frame["week"] = frame["week"].dt.strftime("%Y-%m-%d")
+        row_table = self.row_table.reset_index()
+        row_table[DATE_COLUMN] = row_table[DATE_COLUMN].dt.strftime("%Y-%m-%d")
+        return {
+            "version": WEEKLY_TRENDS_VERSION,
+            "dimensions": list(self.dimensions),
+            "totals": frame.to_dict("records"),
+            "row_table": json.loads(row_table.to_json(orient="records", force_ascii=False)),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "WeeklyTrendState":
+        state = cls(data.get("dimensions") or TREND_DIMENSIONS)
+        if data.get("totals"):
+            frame = pd.DataFrame(data["totals"])
+            frame["week"] = pd.to_datetime(frame["week"])
+            state.totals = frame.set_index(["dimension", "group", "week"])[STATE_COLUMNS].astype(float)
+        if data.get("row_table"):
+            row_table = pd.DataFrame(data["row_table"], columns=["row_key", *state.row_table.columns])
+            row_table[DATE_COLUMN] = pd.to_datetime(row_table[DATE_COLUMN])
+            row_table[COUNT_COLUMNS] = row_table[COUNT_COLUMNS].astype(float)
+            row_table["n"] = row_table["n"].astype(int)
+            state.row_table = row_table.set_index("row_key")
+        return state
+
+    def save(self, path: str):
+        """JSON으로 저장"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["WeeklyTrendState"]:
+        """저장된 상태 로드 (없거나 버전이 다르면 None)"""
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != WEEKLY_TRENDS_VERSION:
+            return None
+        return cls.from_dict(data)
+
+
+def weekly_trends_path(csv_file_path: str, cache_dir: str = WEEKLY_TRENDS_DIR) -> str:
+    """데이터셋 경로별 상태 파일 경로"""
+    return os.path.join(cache_dir, f"{dataset_path_key(csv_file_path)}.json")
+
+
+_states: Dict[str, WeeklyTrendState] = {}
+_lock = threading.Lock()
+
+
+def get_weekly_trend_state(csv_file_path: str, df: pd.DataFrame) -> WeeklyTrendState:
+    """
+    데이터셋 주차별 트렌드 상태 반환 (프로세스 내 재사용 → 저장된 상태 로드 → 바뀐 행만 반영 후 저장)
+
+    Args:
+        csv_file_path: 상태 저장 위치를 정하는 데이터셋 경로
+        df: 현재 데이터셋 (상태에 없는 캠페인 행은 더하고, 데이터셋에 없는 행은 뺌)
+    """
+    path = weekly_trends_path(csv_file_path)
+    with _lock:
+        state = _states.get(path)
+        if state is None:
+            try:
+                state = WeeklyTrendState.load(path)
+            except Exception as e:
+                print(f"⚠️ 주차별 트렌드 상태 로드 실패, 새로 만듭니다: {e}")
+                state = None
+            state = state or WeeklyTrendState()
+
+        changes = state.sync(df)
+        if (state.totals[STATE_COLUMNS] < 0).any().any():
+            # 저장된 기여분이 합계와 맞지 않으면 현재 데이터셋으로 다시 집계
+            print("⚠️ 주차별 트렌드 상태가 데이터셋과 맞지 않아 다시 집계합니다")
+            state = WeeklyTrendState().update(df)
+            changes = {"added": state.rows, "removed": 0}
+        _states[path] = state
+
+        if changes["added"] or changes["removed"]:
+            print(f"📈 주차별 트렌드에 캠페인 {changes['added']}개 반영, {changes['removed']}개 제외 (전체 {state.rows}개)")
+            try:
+                state.save(path)
+            except Exception as e:
+                print(f"⚠️ 주차별 트렌드 상태 저장 실패: {e}")
+        return state
@@ -3,6 +3,8 @@
 import re
 from typing import Dict, Any, List
 
+from .glossary_index import GlossarySubstringIndex, extract_term_contexts
+
 class DomainKnowledge:
     """쏘카 도메인 지식 및 컬럼 설명"""
     
@@ -245,6 +247,8 @@ class TerminologyValidator:
     
     def __init__(self):
         self.domain_terms = DomainTerminology.get_all_terms()
+        # 부분 일치(모호 용어) 조회용 용어사전 키 색인
+        self.term_index = GlossarySubstringIndex(self.domain_terms.keys())
         self.unknown_terms = set()
         self.term_confidence = {}
     
@@ -280,20 +284,26 @@ class TerminologyValidator:
                     "definition": self.domain_terms[term],
                     "confidence": "high"
                 })
-            elif any(term in key for key in self.domain_terms.keys()):
-                # 부분 일치하는 용어
-                ambiguous_terms.append({
-                    "term": term,
-                    "suggestions": [key for key in self.domain_terms.keys() if term in key],
-                    "confidence": "medium"
-                })
             else:
-                # 알 수 없는 용어
-                unknown_terms.append({
-                    "term": term,
-                    "confidence": "low",
-                    "context": self._get_term_context(text, term)
-                })
+                suggestions = self.term_index.keys_containing(term)
+                if suggestions:
+                    # 부분 일치하는 용어
+                    ambiguous_terms.append({
+                        "term": term,
+                        "suggestions": suggestions,
+                        "confidence": "medium"
+                    })
+                else:
+                    # 알 수 없는 용어 (컨텍스트는 아래에서 한 번에 추출)
+                    unknown_terms.append({
+                        "term": term,
+                        "confidence": "low",
+                        "context": ""
+                    })
+        
+        contexts = extract_term_contexts(text, [item["term"] for item in unknown_terms])
+        for item in unknown_terms:
+            item["context"] = contexts[item["term"]]
         
         return {
             "total_terms": len(extracted_terms),
@@ -304,14 +314,8 @@ class TerminologyValidator:
         }
     
     def _get_term_context(self, text: str, term: str) -> str:
-        """용어 주변 컨텍스트 추출"""
-        # 용어 주변 50자씩 추출
-        pattern = f".{{0,50}}{re.escape(term)}.{{0,50}}"
-        match = re.search(pattern, text)
-        
-        if match:
-            return match.group(0)
-        return ""
+        """용어 주변 컨텍스트 추출 (용어 주변 50자씩)"""
+        return extract_term_contexts(text, [term])[term]
     
     def get_terminology_report(self, text: str) -> Dict[str, Any]:
         """용어 이해도 종합 보고서"""
@@ -0,0 +1,265 @@
+"""
+오프라인 LLM 대체 백엔드 - 네트워크 없이 Agent 파이프라인 전체를 재현 가능하게 실행/벤치마크
+
+settings.LLM_BACKEND = "fake"이면 get_azure_llm()이 RateLimitedLiteLlm 대신 FakeLlm을 반환합니다.
+ADK Agent용 generate_content_async와 분석 함수용 completion(litellm.completion 형식)을 모두 제공하며,
+레이트 리미터는 실제 모델과 같이 거치므로 스케줄러/캐시/동시성 변경을 그대로 측정할 수 있습니다.
+
+응답 결정 순서:
+    1. FAKE_LLM_RESPONSES_PATH의 기록 응답 ({"match": 프롬프트에 포함된 문자열, "response": 응답} 목록, JSON 또는 JSONL)
+    2. 합성 응답: Agent 첫 호출은 CSV 경로로 호출 가능한 도구들을 호출하고, 도구 결과를 받으면 결과 요약 텍스트로 응답
+       completion 호출은 프롬프트의 JSON 출력 예시를 그대로 반환 (예시가 없으면 요약 텍스트)
+
+지연 시간 분포 (FAKE_LLM_LATENCY, 초 단위):
+    fixed:0.5 | uniform:0.2,1.5 | normal:0.8,0.2 | lognormal:-0.5,0.6 | exponential:0.7
+"""
+
+import asyncio
+import inspect
+import json
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from .rate_limited_model import acquire_for_request, record_response_usage, request_texts
+
+# 도구 인자 중 CSV 경로로 채울 수 있는 이름
+CSV_ARG_NAMES = ("csv_file_path", "csv_file", "file_path")
+
+# 합성 텍스트 응답에 포함할 도구 결과 최대 길이 (도구당)
+TOOL_SUMMARY_CHARS = 300
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+
+class FakeLlmError(RuntimeError):
+    """장애 주입용 오류 (status_code 429로 재시도/서킷 브레이커 경로를 그대로 탐)"""
+
+    status_code = 429
+
+
+def parse_latency(spec: str) -> Tuple[str, List[float]]:
+    """지연 시간 분포 문자열 파싱 ("uniform:0.2,1.5" -> ("uniform", [0.2, 1.5]))"""
+    name, _, args = (spec or "fixed:0").partition(":")
+    name = name.strip().lower()
+    if name not in LATENCY_DISTRIBUTIONS:
+        raise ValueError(f"알 수 없는 지연 시간 분포: {name} (사용 가능: {', '.join(LATENCY_DISTRIBUTIONS)})")
+    values = [float(v) for v in args.split(",") if v.strip()]
+    required = {"fixed": 1, "exponential": 1, "uniform": 2, "normal": 2, "lognormal": 2}[name]
+    if len(values) != required:
+        raise ValueError(f"{name} 분포에는 인자 {required}개가 필요합니다: {spec}")
+    return name, values
+
+
+def extract_json_template(prompt: str) -> Optional[Any]:
+    """프롬프트에 포함된 JSON 출력 예시 중 마지막으로 해석 가능한 객체"""
+    template = None
+    depth = 0
+    start = -1
+    for i, char in enumerate(prompt):
+        if char == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif char == "}" and depth > 0:
+            depth -= 1
+            if depth == 0:
+                try:
+                    template = json.loads(prompt[start:i + 1])
+                except ValueError:
+                    pass
+    return template
+
+
+def find_csv_path(text: str) -> Optional[str]:
+    """프롬프트에 언급된 실제 존재하는 CSV 경로 (공백이 포함된 경로도 인식)"""
+    for line in text.splitlines():
+        for match in re.finditer(r"\.csv", line):
+            end = match.end()
+            for start in range(end):
+                candidate = line[start:end].strip(" '\"`:(")
+                if candidate and os.path.isfile(candidate):
+                    return candidate
+    return None
+
+
+class FakeLlmBackend:
+    """기록/합성 응답과 지연 시간 분포를 가진 결정적 LLM 대체 구현 (ADK 비의존)"""
+
+    def __init__(self, latency: str = "fixed:0", seed: int = 0, error_rate: float = 0.0,
+                 responses_path: str = "", call_tools: bool = True):
+        self.latency_name, self.latency_args = parse_latency(latency)
+        self.error_rate = error_rate
+        self.call_tools = call_tools
+        self.recorded = self._load_recorded(responses_path)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    @staticmethod
+    def _load_recorded(path: str) -> List[Dict[str, str]]:
+        """기록 응답 로드 (JSON 배열 또는 JSONL)"""
+        if not path:
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            raw = f.read().strip()
+        entries = json.loads(raw) if raw.startswith("[") else [json.loads(line) for line in raw.splitlines() if line.strip()]
+        return [entry for entry in entries if "match" in entry and "response" in entry]
+
+    def sample_latency(self) -> float:
+        """호출 1회의 지연 시간 (seed 기준 재현 가능)"""
+        with self._lock:
+            self.calls += 1
+            name, args = self.latency_name, self.latency_args
+            if name == "fixed":
+                delay = args[0]
+            elif name == "uniform":
+                delay = self._rng.uniform(args[0], args[1])
+            elif name == "normal":
+                delay = self._rng.gauss(args[0], args[1])
+            elif name == "lognormal":
+                delay = self._rng.lognormvariate(args[0], args[1])
+            else:
+                delay = self._rng.expovariate(1.0 / args[0]) if args[0] > 0 else 0.0
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+        if fail:
+            raise FakeLlmError("오프라인 LLM 장애 주입 (429)")
+        return max(0.0, delay)
+
+    def recorded_response(self, prompt: str) -> Optional[str]:
+        for entry in self.recorded:
+            if entry["match"] in prompt:
+                return entry["response"]
+        return None
+
+    def completion_text(self, prompt: str) -> str:
+        """분석 함수용 completion 응답 텍스트"""
+        recorded = self.recorded_response(prompt)
+        if recorded is not None:
+            return recorded
+        template = extract_json_template(prompt)
+        if template is not None:
+            return json.dumps(template, ensure_ascii=False)
+        return f"[오프라인 LLM 응답] {prompt.strip()[:200]}"
+
+    def completion(self, **kwargs: Any) -> SimpleNamespace:
+        """litellm.completion 형식 호출 (choices[0].message.content, usage.total_tokens)"""
+        time.sleep(self.sample_latency())
+        messages = kwargs.get("messages") or []
+        prompt = "\n".join(m.get("content", "") for m in messages if isinstance(m, dict) and isinstance(m.get("content"), str))
+        text = self.completion_text(prompt)
+        prompt_tokens = len(prompt) // 2 + 1
+        completion_tokens = len(text) // 2 + 1
+        return SimpleNamespace(
+            model=kwargs.get("model", "fake"),
+            choices=[SimpleNamespace(index=0, finish_reason="stop",
+                                     message=SimpleNamespace(role="assistant", content=text))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                  total_tokens=prompt_tokens + completion_tokens),
+        )
+
+    def tool_calls(self, tools: Dict[str, Any], prompt: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """CSV 경로만으로 호출 가능한 도구 호출 목록 (도구 선언 순서)"""
+        if not self.call_tools or not tools:
+            return []
+        csv_path = find_csv_path(prompt)
+        calls = []
+        for name, tool in tools.items():
+            func = getattr(tool, "func", None)
+            if func is None:
+                continue
+            args: Dict[str, Any] = {}
+            callable_with_csv = True
+            for param in inspect.signature(func).parameters.values():
+                if param.name in CSV_ARG_NAMES and csv_path:
+                    args[param.name] = csv_path
+                elif param.default is inspect.Parameter.empty and param.kind not in (
+                        param.VAR_POSITIONAL, param.VAR_KEYWORD):
+                    callable_with_csv = False
+                    break
+            if callable_with_csv and args:
+                calls.append((name, args))
+        return calls
+
+    def agent_text(self, prompt: str, tool_results: List[Tuple[str, Any]]) -> str:
+        """Agent 최종 응답 텍스트 (도구 결과 요약)"""
+        recorded = self.recorded_response(prompt)
+        if recorded is not None:
+            return recorded
+        lines = ["[오프라인 LLM 응답] 도구 결과 요약"]
+        for name, result in tool_results:
+            summary = result if isinstance(result, str) else json.dumps(result, ensure_ascii=False, default=str)
+            lines.append(f"- {name}: {summary[:TOOL_SUMMARY_CHARS]}")
+        if not tool_results:
+            lines.append(prompt.strip()[:TOOL_SUMMARY_CHARS])
+        return "\n".join(lines)
+
+
+class FakeLlm(BaseLlm):
+    """ADK Agent와 completion 호출부에서 Azure LiteLlm 대신 사용하는 오프라인 모델"""
+
+    async def generate_content_async(self, llm_request, stream: bool = False) -> AsyncGenerator:
+        backend = get_fake_backend()
+        estimated = await acquire_for_request(llm_request)
+        await asyncio.sleep(backend.sample_latency())
+
+        prompt = "\n".join(request_texts(llm_request))
+        contents = llm_request.contents or []
+        tool_results = [
+            (part.function_response.name, part.function_response.response)
+            for content in contents for part in content.parts or []
+            if getattr(part, "function_response", None)
+        ]
+        last_parts = (contents[-1].parts or []) if contents else []
+        awaiting_tools = not any(getattr(part, "function_response", None) for part in last_parts)
+
+        calls = backend.tool_calls(getattr(llm_request, "tools_dict", None) or {}, prompt) if awaiting_tools else []
+        if calls:
+            parts = [types.Part(function_call=types.FunctionCall(name=name, args=args)) for name, args in calls]
+        else:
+            parts = [types.Part(text=backend.agent_text(prompt, tool_results))]
+
+        prompt_tokens = len(prompt) // 2 + 1
+        completion_tokens = sum(len(part.text or "") for part in parts) // 2 + 1
+        response = LlmResponse(
+            content=types.Content(role="model", parts=parts),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=completion_tokens,
+                total_token_count=prompt_tokens + completion_tokens,
+            ),
+        )
+        record_response_usage(estimated, response)
+        yield response
+
+    def completion(self, **kwargs: Any) -> SimpleNamespace:
+        """litellm.completion 형식 호출 (분석 함수는 get_completion_client()로 백엔드를 직접 사용)"""
+        return get_fake_backend().completion(**kwargs)
+
+
+_fake_backend: Optional[FakeLlmBackend] = None
+_fake_backend_lock = threading.Lock()
+
+
+def get_fake_backend() -> FakeLlmBackend:
+    """settings 기준 공용 오프라인 백엔드 반환"""
+    global _fake_backend
+    with _fake_backend_lock:
+        if _fake_backend is None:
+            from config.settings import settings
+            _fake_backend = FakeLlmBackend(
+                latency=settings.FAKE_LLM_LATENCY,
+                seed=settings.FAKE_LLM_SEED,
+                error_rate=settings.FAKE_LLM_ERROR_RATE,
+                responses_path=settings.FAKE_LLM_RESPONSES_PATH,
+                call_tools=settings.FAKE_LLM_CALL_TOOLS,
+            )
+        return _fake_backend
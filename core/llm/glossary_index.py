@@ -0,0 +1,108 @@
+"""용어사전 부분 문자열 색인 및 단일 스캔 컨텍스트 추출"""
+
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set
+
+from core.analysis.keyword_engine import KeywordMatcher
+
+# 부분 문자열 색인에 사용하는 문자 n-gram 길이
+NGRAM_SIZE = 2
+
+# 용어 주변 컨텍스트 길이 (앞/뒤 각각)
+CONTEXT_WINDOW = 50
+
+
+class GlossarySubstringIndex:
+    """
+    용어사전 키의 문자 bigram posting 색인
+
+    term이 포함된 키는 term의 모든 bigram을 포함하므로 posting 교집합으로 후보를 좁힌 뒤
+    실제 포함 여부만 확인합니다. 1글자 용어는 문자(unigram) posting으로 조회합니다.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys: List[str] = list(dict.fromkeys(keys))
+        self._ngram_postings: Dict[str, Set[int]] = defaultdict(set)
+        self._char_postings: Dict[str, Set[int]] = defaultdict(set)
+        for key_id, key in enumerate(self.keys):
+            for char in key:
+                self._char_postings[char].add(key_id)
+            for gram in self._ngrams(key):
+                self._ngram_postings[gram].add(key_id)
+
+    @staticmethod
+    def _ngrams(text: str) -> Set[str]:
+        return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+    def _candidates(self, term: str) -> Set[int]:
+        if len(term) < NGRAM_SIZE:
+            return self._char_postings.get(term, set())
+        # posting이 작은 n-gram부터 교집합
+        postings = sorted((self._ngram_postings.get(g, set()) for g in self._ngrams(term)), key=len)
+        if not postings or not postings[0]:
+            return set()
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                break
+        return candidates
+
+    def keys_containing(self, term: str) -> List[str]:
+        """term을 부분 문자열로 포함하는 용어사전 키 목록 (용어사전 정의 순서)"""
+        if not term:
+            return list(self.keys)
+        return [self.keys[i] for i in sorted(self._candidates(term)) if term in self.keys[i]]
+
+    def has_key_containing(self, term: str) -> bool:
+        """term을 포함하는 용어사전 키 존재 여부"""
+        if not term:
+            return bool(self.keys)
+        return any(term in self.keys[i] for i in self._candidates(term))
+
+
+def extract_term_contexts(text: str, terms: Iterable[str], window: int = CONTEXT_WINDOW) -> Dict[str, str]:
+    """
+    여러 용어의 주변 컨텍스트를 텍스트 한 번 스캔으로 추출
+
+    용어마다 re.search(f".{{0,{window}}}용어.{{0,{window}}}", text)를 실행한 결과와 같습니다.
+    (첫 등장 위치 기준, 줄바꿈을 넘지 않음, 앞쪽 창 안에 같은 용어가 또 있으면 가장 뒤의 등장까지 포함)
+
+    Returns:
+        {용어: 컨텍스트} (텍스트에 없는 용어는 "")
+    """
+    terms = list(dict.fromkeys(terms))
+    contexts = {term: "" for term in terms}
+    matcher = KeywordMatcher(terms)
+
+    occurrences: Dict[str, List[int]] = defaultdict(list)
+    for term, position in matcher.finditer(text):
+        occurrences[term].append(position)
+    if not occurrences:
+        return contexts
+
+    newlines = [i for i, char in enumerate(text) if char == '\n']
+
+    def line_bounds(position: int):
+        line_no = bisect_right(newlines, position)
+        start = newlines[line_no - 1] + 1 if line_no > 0 else 0
+        end = newlines[line_no] if line_no < len(newlines) else len(text)
+        return start, end
+
+    for term, positions in occurrences.items():
+        if '\n' in term:
+            continue
+        first = positions[0]
+        line_start, line_end = line_bounds(first)
+        start = max(first - window, line_start)
+        # 앞쪽 창은 greedy: 창 안(같은 줄)에서 가장 뒤에 있는 등장까지 확장
+        limit = start + window
+        anchor = first
+        for position in positions[1:]:
+            if position > limit or position + len(term) > line_end:
+                break
+            anchor = position
+        end = min(anchor + len(term) + window, line_end)
+        contexts[term] = text[start:end]
+    return contexts
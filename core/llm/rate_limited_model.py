@@ -0,0 +1,73 @@
+"""
+레이트 리미터를 거쳐 호출하는 LiteLlm 모델 (ADK Agent용)
+"""
+
+import asyncio
+from typing import AsyncGenerator, List
+
+from google.adk.models.lite_llm import LiteLlm
+
+
+def request_texts(llm_request) -> List[str]:
+    """LlmRequest의 시스템 지시문과 메시지 텍스트 목록"""
+    texts = []
+    system_instruction = getattr(getattr(llm_request, "config", None), "system_instruction", None)
+    if isinstance(system_instruction, str):
+        texts.append(system_instruction)
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            if getattr(part, "text", None):
+                texts.append(part.text)
+    return texts
+
+
+async def acquire_for_request(llm_request) -> int:
+    """공용 RPM/TPM 스케줄러에서 요청 허용을 받을 때까지 대기. 추정 토큰 수 반환"""
+    # config.settings가 이 모듈을 import하므로 레이트 리미터는 호출 시점에 import (순환 import 방지)
+    from .rate_limiter import estimate_tokens, llm_rate_limiter
+
+    estimated = estimate_tokens(request_texts(llm_request))
+    waited = await llm_rate_limiter.acquire_async(estimated)
+    if waited >= 1.0:
+        print(f"⏳ LLM 레이트 리밋 대기: {waited:.1f}초")
+    return estimated
+
+
+def record_response_usage(estimated: int, response):
+    """LlmResponse의 usage_metadata로 TPM 버킷 보정"""
+    from .rate_limiter import llm_rate_limiter
+
+    usage = getattr(response, "usage_metadata", None)
+    total_tokens = getattr(usage, "total_token_count", None)
+    if total_tokens:
+        llm_rate_limiter.record_usage(estimated, total_tokens)
+
+
+class RateLimitedLiteLlm(LiteLlm):
+    """
+    요청 전 공용 RPM/TPM 스케줄러에서 허용을 받은 뒤 LiteLlm 호출
+
+    재시도는 resilience 모듈과 같은 규칙(429/5xx/타임아웃, 지터 지수 백오프)으로 여기서만 하며,
+    응답을 하나라도 내보낸 뒤의 오류는 재시도하지 않습니다. 대기는 모두 이벤트 루프를 막지 않습니다.
+    """
+
+    async def generate_content_async(self, llm_request, stream: bool = False) -> AsyncGenerator:
+        from config.settings import settings
+        from .resilience import backoff_delay, is_retryable_error
+
+        max_retries = settings.LLM_MAX_RETRIES
+        for attempt in range(max_retries + 1):
+            estimated = await acquire_for_request(llm_request)
+            yielded = False
+            try:
+                async for response in super().generate_content_async(llm_request, stream=stream):
+                    yielded = True
+                    record_response_usage(estimated, response)
+                    yield response
+                return
+            except Exception as e:
+                if yielded or attempt >= max_retries or not is_retryable_error(e):
+                    raise
+                delay = backoff_delay(attempt)
+                print(f"⏳ LLM 호출 재시도 {attempt + 1}/{max_retries} ({type(e).__name__}, {delay:.1f}초 대기)")
+            await asyncio.sleep(delay)
@@ -0,0 +1,252 @@
+"""
+Azure OpenAI 분당 요청/토큰 한도(RPM/TPM)용 클라이언트 측 레이트 리미터 - 토큰 버킷 + 우선순위 대기열
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from config.settings import settings
+
+# 우선순위 (작을수록 먼저 처리)
+PRIORITY_EXECUTIVE = 0   # 경영진 보고서 생성을 막는 단계
+PRIORITY_DEFAULT = 1
+PRIORITY_BACKGROUND = 2  # 보고서와 무관한 부가 단계 (데이터 리포트, 비판적 검토 등)
+
+PRIORITY_NAMES = {PRIORITY_EXECUTIVE: "executive", PRIORITY_DEFAULT: "default", PRIORITY_BACKGROUND: "background"}
+
+# 응답 토큰 수를 알 수 없을 때 요청당 예상 응답 토큰 수
+DEFAULT_COMPLETION_TOKENS = 1000
+
+# 현재 실행 흐름(Agent 단계)의 LLM 호출 우선순위
+current_llm_priority: ContextVar[int] = ContextVar("current_llm_priority", default=PRIORITY_DEFAULT)
+
+
+@contextmanager
+def llm_priority(priority: int) -> Iterator[None]:
+    """블록 안에서 발생하는 LLM 호출의 우선순위 지정 (asyncio task에도 전파)"""
+    token = current_llm_priority.set(priority)
+    try:
+        yield
+    finally:
+        current_llm_priority.reset(token)
+
+
+def estimate_tokens(texts: Iterable[str], completion_tokens: Optional[int] = None) -> int:
+    """요청 토큰 수 추정 (한글 기준 약 2자당 1토큰 + 예상 응답 토큰)"""
+    prompt_chars = sum(len(text) for text in texts if text)
+    return prompt_chars // 2 + 1 + (DEFAULT_COMPLETION_TOKENS if completion_tokens is None else completion_tokens)
+
+
+def estimate_message_tokens(messages: Any, max_tokens: Optional[int] = None) -> int:
+    """litellm messages 형식의 요청 토큰 수 추정"""
+    texts = []
+    for message in messages or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            texts.append(content)
+    return estimate_tokens(texts, max_tokens)
+
+
+def _on_event_loop_thread() -> bool:
+    """현재 스레드에서 asyncio 이벤트 루프가 실행 중인지 여부"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class TokenBucket:
+    """분당 한도를 초당 보충률로 환산한 토큰 버킷 (capacity <= 0이면 무제한)"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.refill_rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """amount만큼 사용 가능해질 때까지 남은 시간 (초)"""
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        # 한도보다 큰 요청은 버킷이 가득 찼을 때 허용 (영구 대기 방지)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_rate
+
+    def consume(self, amount: float, now: float):
+        if not self.unlimited:
+            self._refill(now)
+            self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float, now: float):
+        """실제 사용량과 추정치의 차이 반영 (양수면 추가 차감, 음수면 환급)"""
+        if not self.unlimited:
+            self._refill(now)
+            self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class RateLimitScheduler:
+    """
+    RPM/TPM 토큰 버킷 두 개를 함께 확인하는 우선순위 스케줄러
+
+    대기 중인 호출은 (우선순위, 도착 순서)로 정렬되어 맨 앞 호출만 버킷을 사용할 수 있으므로,
+    한도에 가까워지면 경영진 보고서 단계 호출이 먼저 나갑니다. 동기 호출(acquire)과
+    비동기 호출(acquire_async)이 같은 대기열을 공유합니다.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self._queue: list = []
+        # acquire_async로 대기 중인 ticket (이벤트 루프 스레드의 동기 호출은 이 ticket들 뒤에서 기다리지 않음)
+        self._async_tickets: set = set()
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def _enqueue(self, priority: int) -> tuple:
+        ticket = (priority, next(self._sequence))
+        heapq.heappush(self._queue, ticket)
+        return ticket
+
+    def _discard(self, ticket: tuple):
+        """허용받지 못하고 끝난(취소/예외) ticket을 대기열에서 제거해 뒤 호출이 멈추지 않게 함"""
+        self._async_tickets.discard(ticket)
+        if ticket in self._queue:
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+            self._condition.notify_all()
+
+    def _head(self, skip_async: bool) -> tuple:
+        """대기열 맨 앞 ticket (skip_async면 비동기 대기 ticket 제외)"""
+        if not skip_async:
+            return self._queue[0]
+        return min(ticket for ticket in self._queue if ticket not in self._async_tickets)
+
+    def _try_acquire(self, ticket: tuple, tokens: int, skip_async: bool = False) -> float:
+        """맨 앞 호출이면 버킷 사용 시도. 성공 시 0, 실패 시 다시 확인할 때까지의 대기 시간"""
+        if self._head(skip_async) != ticket:
+            return 0.05
+        now = time.monotonic()
+        wait = max(self.request_bucket.wait_time(1, now), self.token_bucket.wait_time(tokens, now))
+        if wait > 0:
+            return wait
+        self.request_bucket.consume(1, now)
+        self.token_bucket.consume(tokens, now)
+        self._queue.remove(ticket)
+        heapq.heapify(self._queue)
+        self._async_tickets.discard(ticket)
+        return 0.0
+
+    def _record(self, priority: int, waited: float):
+        stat = self.stats.setdefault(PRIORITY_NAMES.get(priority, str(priority)),
+                                     {"calls": 0, "total_wait": 0.0, "max_wait": 0.0})
+        stat["calls"] += 1
+        stat["total_wait"] += waited
+        stat["max_wait"] = max(stat["max_wait"], waited)
+
+    def acquire(self, tokens: int, priority: Optional[int] = None) -> float:
+        """
+        호출 허용까지 대기 (동기). 대기한 시간(초) 반환
+
+        이벤트 루프 스레드에서 호출되면 같은 루프에서 대기 중인 비동기 호출이 진행될 수 없으므로
+        비동기 ticket 뒤에서 기다리지 않고 다른 동기 호출과의 순서만 지킵니다.
+        """
+        priority = current_llm_priority.get() if priority is None else priority
+        skip_async = _on_event_loop_thread()
+        started = time.monotonic()
+        with self._condition:
+            ticket = self._enqueue(priority)
+            acquired = False
+            try:
+                while True:
+                    wait = self._try_acquire(ticket, tokens, skip_async)
+                    if wait == 0.0:
+                        acquired = True
+                        break
+                    self._condition.wait(timeout=wait)
+            finally:
+                if not acquired:
+                    self._discard(ticket)
+            self._condition.notify_all()
+            waited = time.monotonic() - started
+            self._record(priority, waited)
+        return waited
+
+    async def acquire_async(self, tokens: int, priority: Optional[int] = None) -> float:
+        """호출 허용까지 대기 (이벤트 루프를 막지 않음). 대기한 시간(초) 반환"""
+        priority = current_llm_priority.get() if priority is None else priority
+        started = time.monotonic()
+        with self._condition:
+            ticket = self._enqueue(priority)
+            self._async_tickets.add(ticket)
+        acquired = False
+        try:
+            while True:
+                with self._condition:
+                    wait = self._try_acquire(ticket, tokens)
+                    if wait == 0.0:
+                        acquired = True
+                        self._condition.notify_all()
+                        waited = time.monotonic() - started
+                        self._record(priority, waited)
+                        return waited
+                await asyncio.sleep(wait)
+        finally:
+            # Agent 마감 시간(run_with_deadline) 등으로 취소되면 ticket이 맨 앞에 남아 모든 호출이 멈추므로 제거
+            if not acquired:
+                with self._condition:
+                    self._discard(ticket)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """응답의 실제 토큰 사용량으로 TPM 버킷 보정"""
+        if actual_tokens is None:
+            return
+        with self._condition:
+            self.token_bucket.adjust(actual_tokens - estimated_tokens, time.monotonic())
+            self._condition.notify_all()
+
+    def report(self) -> Dict[str, Any]:
+        """우선순위별 호출 수와 대기 시간 요약"""
+        with self._condition:
+            summary = {}
+            for name, stat in self.stats.items():
+                calls = stat["calls"]
+                summary[name] = {
+                    "calls": int(calls),
+                    "avg_wait_seconds": round(stat["total_wait"] / calls, 3) if calls else 0.0,
+                    "max_wait_seconds": round(stat["max_wait"], 3),
+                }
+            return summary
+
+
+# Azure OpenAI 배포 단위 공용 스케줄러 (원시 completion 호출과 Agent 모델이 함께 사용)
+llm_rate_limiter = RateLimitScheduler(settings.LLM_RPM_LIMIT, settings.LLM_TPM_LIMIT)
+
+
+def response_total_tokens(response: Any) -> Optional[int]:
+    """litellm 응답의 usage.total_tokens (없으면 None)"""
+    usage = getattr(response, "usage", None)
+    if usage is None and isinstance(response, dict):
+        usage = response.get("usage")
+    if usage is None:
+        return None
+    total = usage.get("total_tokens") if isinstance(usage, dict) else getattr(usage, "total_tokens", None)
+    return int(total) if total is not None else None
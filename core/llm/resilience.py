@@ -0,0 +1,193 @@
+"""
+LLM 호출 안정성 계층 - 레이트 리밋 대기, 호출/Agent 단위 타임아웃, 지터 지수 백오프 재시도, 서킷 브레이커
+"""
+
+import asyncio
+import functools
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from config.settings import settings
+from .rate_limiter import estimate_message_tokens, llm_rate_limiter, response_total_tokens
+
+# 재시도 대상 HTTP 상태 코드 (rate limit + 서버 오류)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# status_code가 없는 예외 중 재시도 대상 (litellm/openai 예외 클래스명 기준)
+RETRYABLE_ERROR_NAMES = {
+    "RateLimitError",
+    "Timeout",
+    "APITimeoutError",
+    "APIConnectionError",
+    "ServiceUnavailableError",
+    "InternalServerError",
+}
+
+
+class CircuitOpenError(RuntimeError):
+    """서킷이 열려 LLM 호출을 시도하지 않은 경우"""
+
+
+class CircuitBreaker:
+    """
+    연속 실패 횟수 기반 서킷 브레이커
+
+    - closed: 정상 호출
+    - open: failure_threshold회 연속 실패 후 reset_timeout초 동안 호출 차단
+    - half_open: reset_timeout 경과 후 한 번의 시험 호출 허용 (성공 시 closed, 실패 시 다시 open)
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, name: str = "llm"):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """호출 가능 여부 (open 상태에서 reset_timeout이 지나면 시험 호출 1회 허용)"""
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = "half_open"
+                return True
+            if self.state == "half_open":
+                # 시험 호출이 끝날 때까지 다른 호출은 차단
+                return False
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"🔌 {self.name} 서킷 open: 연속 실패 {self.consecutive_failures}회, "
+                          f"{self.reset_timeout:.0f}초 후 재시도")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == "open" and time.monotonic() - self.opened_at < self.reset_timeout
+
+
+# LLM 엔드포인트 공용 서킷 (원시 completion 호출과 Agent 실행이 함께 사용)
+llm_circuit_breaker = CircuitBreaker(settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_TIMEOUT)
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """429/5xx, 타임아웃, 연결 오류 여부"""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int):
+        return status_code in RETRYABLE_STATUS_CODES
+    return type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+
+def backoff_delay(attempt: int, base: Optional[float] = None, cap: Optional[float] = None) -> float:
+    """지수 백오프 full jitter 대기 시간: uniform(0, min(cap, base * 2^attempt))"""
+    base = settings.LLM_BACKOFF_BASE if base is None else base
+    cap = settings.LLM_BACKOFF_MAX if cap is None else cap
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def resilient_completion(completion_fn: Callable[..., Any], *args: Any,
+                         max_retries: Optional[int] = None, breaker: CircuitBreaker = llm_circuit_breaker,
+                         priority: Optional[int] = None, **kwargs: Any) -> Any:
+    """
+    LLM completion 호출을 레이트 리미터/타임아웃/재시도/서킷 브레이커로 감싸서 실행
+
+    Args:
+        completion_fn: litellm.completion 등 동기 completion 함수
+        max_retries: 재시도 횟수 (기본 settings.LLM_MAX_RETRIES)
+        breaker: 사용할 서킷 브레이커
+        priority: 레이트 리미터 대기열 우선순위 (기본: 현재 llm_priority 컨텍스트)
+        **kwargs: completion_fn 인자 (timeout 미지정 시 settings.LLM_CALL_TIMEOUT 적용)
+
+    Raises:
+        CircuitOpenError: 서킷이 열려 있는 경우 (호출부의 기존 예외 처리로 기본값/통계 결과 사용)
+    """
+    max_retries = settings.LLM_MAX_RETRIES if max_retries is None else max_retries
+    kwargs.setdefault("timeout", settings.LLM_CALL_TIMEOUT)
+    estimated_tokens = estimate_message_tokens(kwargs.get("messages"), kwargs.get("max_tokens"))
+
+    for attempt in range(max_retries + 1):
+        if not breaker.allow():
+            raise CircuitOpenError("LLM 엔드포인트 서킷이 열려 있어 호출을 생략합니다.")
+        endpoint_ok = None
+        try:
+            waited = llm_rate_limiter.acquire(estimated_tokens, priority)
+            if waited >= 1.0:
+                print(f"⏳ LLM 레이트 리밋 대기: {waited:.1f}초")
+            response = completion_fn(*args, **kwargs)
+            endpoint_ok = True
+        except Exception as e:
+            # 요청 자체의 오류(400 등)는 엔드포인트 상태와 무관
+            endpoint_ok = not is_retryable_error(e)
+            if endpoint_ok or attempt >= max_retries:
+                raise
+            delay = backoff_delay(attempt)
+            print(f"⏳ LLM 호출 재시도 {attempt + 1}/{max_retries} ({type(e).__name__}, {delay:.1f}초 대기)")
+        finally:
+            # 취소/BaseException으로 끝난 호출도 실패로 기록해 half_open 서킷이 남지 않게 함
+            if endpoint_ok:
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+        if endpoint_ok:
+            llm_rate_limiter.record_usage(estimated_tokens, response_total_tokens(response))
+            return response
+        time.sleep(delay)
+
+
+def offload_blocking(func: Callable[..., Any]) -> Callable[..., Awaitable[Any]]:
+    """
+    동기 LLM 도구를 작업 스레드에서 실행하는 비동기 도구로 감쌈
+
+    ADK는 동기 FunctionTool을 이벤트 루프에서 직접 실행하므로, resilient_completion의
+    레이트 리밋 대기/백오프가 다른 데이터셋과 Agent 마감 시간까지 멈추지 않도록 Agent 도구 등록 시 사용합니다.
+    (asyncio.to_thread가 contextvars를 복사하므로 llm_priority/분석 컨텍스트도 유지)
+    """
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return wrapper
+
+
+async def run_with_deadline(run: Callable[[], Awaitable[Any]], timeout: Optional[float] = None,
+                            breaker: CircuitBreaker = llm_circuit_breaker) -> Any:
+    """
+    Agent 실행 등 비동기 작업을 마감 시간 안에서 실행 (서킷 상태 반영)
+
+    Raises:
+        CircuitOpenError: 서킷이 열려 있는 경우
+        asyncio.TimeoutError: 마감 시간 초과
+    """
+    timeout = settings.AGENT_TIMEOUT if timeout is None else timeout
+    if not breaker.allow():
+        raise CircuitOpenError("LLM 엔드포인트 서킷이 열려 있어 Agent 실행을 생략합니다.")
+    endpoint_ok = None
+    try:
+        result = await asyncio.wait_for(run(), timeout=timeout)
+        endpoint_ok = True
+    except Exception as e:
+        endpoint_ok = not is_retryable_error(e)
+        raise
+    finally:
+        # 취소된 실행도 실패로 기록해 half_open 서킷이 남지 않게 함
+        if endpoint_ok:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+    return result
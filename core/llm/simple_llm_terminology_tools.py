@@ -1,66 +1,74 @@
 """간단한 LLM 기반 용어 검증 도구"""
 
-import re
 import json
-import pandas as pd
 from typing import Dict, Any, List
 from .domain_knowledge import DomainKnowledge
-import litellm
-from config.settings import settings
+from .term_extraction import (
+    extract_terms_from_csv,
+    get_glossary_trie,
+    match_glossary_term,
+    rank_terms_for_validation,
+    relevant_glossary_entries,
+)
+from .term_memory import get_term_memory
+from .resilience import resilient_completion
+from config.settings import get_completion_client, settings
 
-# Azure OpenAI 모델 설정
-azure_llm = litellm
+# Azure OpenAI 모델 설정 (LLM_BACKEND=fake면 오프라인 대체 구현)
+azure_llm = get_completion_client()
+
+# 한 번의 LLM 호출로 검증할 용어 수
+TERM_SAMPLE_SIZE = 10
 
 def validate_csv_terms_with_llm(csv_file_path: str) -> Dict[str, Any]:
     """CSV 파일의 용어들을 LLM으로 검증"""
     print("--- Tool: validate_csv_terms_with_llm called ---")
     
     try:
-        # 1. CSV에서 용어 추출
-        df = pd.read_csv(csv_file_path)
-        all_text = ""
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                all_text += " " + df[col].astype(str).str.cat(sep=" ")
-        
-        # 한글 용어 추출 (2글자 이상)
-        korean_terms = re.findall(r'[가-힣]{2,}', all_text)
-        english_terms = re.findall(r'[A-Z][a-zA-Z]*', all_text)
-        all_terms = list(set(korean_terms + english_terms))
+        # 1. CSV에서 용어 추출 (컬럼/셀 단위 스트리밍 토큰화, 빈도와 첫 등장 컨텍스트를 한 번에 수집)
+        term_stats = extract_terms_from_csv(csv_file_path)
         
         # 2. 도메인 용어사전 로드
-        from domain_knowledge import DomainTerminology
+        from .domain_knowledge import DomainTerminology
+        glossary_trie = get_glossary_trie()
         domain_terms = DomainTerminology.get_domain_terms()
         technical_terms = DomainTerminology.get_technical_terms()
         business_metrics = DomainTerminology.get_business_metrics()
         all_domain_terms = {**domain_terms, **technical_terms, **business_metrics}
         
-        # 3. 배치로 용어 이해도 평가 (API 호출 최적화)
+        # 3. 검증 대상 용어 선택 (신규성 → 빈도 → 첫 등장 순서로 결정적 정렬)
+        #    이미 검증된 용어를 먼저 제외한 뒤 상위 TERM_SAMPLE_SIZE개를 골라, 상위 용어가 모두 검증되어도 다음 순위 용어를 검증
+        term_memory = get_term_memory() if settings.CACHE_RESULTS else None
+        ranked_terms = rank_terms_for_validation(term_stats["counts"], glossary_trie)
+        remembered_evaluations = term_memory.recall(ranked_terms[:TERM_SAMPLE_SIZE]) if term_memory else []
+        terms_to_analyze = [term for term in ranked_terms
+                            if term_memory is None or term not in term_memory][:TERM_SAMPLE_SIZE]
+        
         term_evaluations = []
         total_score = 0
+        overall_score = 0
         
-        # 상위 10개 용어를 한 번에 분석
-        terms_to_analyze = all_terms[:10]
-        print(f"🚀 배치 용어 분석 중: {len(terms_to_analyze)}개 용어 (API 호출 1회)")
+        if not terms_to_analyze:
+            print(f"♻️ 새 용어 없음: 이전 검증 결과 {len(remembered_evaluations)}개 재사용 (API 호출 생략)")
+            return _summarize_term_evaluations(csv_file_path, remembered_evaluations)
+        
+        # 선택된 용어를 한 번에 분석
+        print(f"🚀 배치 용어 분석 중: {len(terms_to_analyze)}개 신규 용어 (API 호출 1회, 기존 검증 {len(remembered_evaluations)}개 재사용)")
         
         # 용어별 컨텍스트와 용어사전 정의 수집
         term_data = []
         for term in terms_to_analyze:
-            context = ""
-            for col in df.columns:
-                if df[col].dtype == 'object':
-                    mask = df[col].astype(str).str.contains(term, na=False)
-                    if mask.any():
-                        context = df[mask][col].astype(str).iloc[0][:100]
-                        break
-            
-            dictionary_definition = all_domain_terms.get(term, None)
+            # 용어사전 매칭은 trie로 정확 일치/최장 접두 일치 조회
+            glossary_key, _ = match_glossary_term(term, glossary_trie)
             term_data.append({
                 "term": term,
-                "context": context,
-                "dictionary_definition": dictionary_definition
+                "context": term_stats["contexts"].get(term, ""),
+                "dictionary_definition": all_domain_terms.get(glossary_key) if glossary_key else None
             })
         
+        # 선택된 용어와 관련된 용어사전 항목만 프롬프트에 포함
+        related_domain_terms = relevant_glossary_entries(terms_to_analyze, all_domain_terms, glossary_trie)
+        
         # 배치 프롬프트 생성
         batch_prompt = f"""
         다음 쏘카 CRM 마케팅 데이터의 용어들을 한 번에 분석해주세요:
@@ -68,8 +76,8 @@ def validate_csv_terms_with_llm(csv_file_path: str) -> Dict[str, Any]:
         분석할 용어들:
         {json.dumps(term_data, ensure_ascii=False, indent=2)}
         
-        도메인 용어사전:
-        {json.dumps(all_domain_terms, ensure_ascii=False, indent=2)}
+        관련 도메인 용어사전:
+        {json.dumps(related_domain_terms, ensure_ascii=False, indent=2)}
         
         각 용어에 대해 다음을 평가해주세요:
         1. 용어 이해도 점수 (0-100)
@@ -98,7 +106,8 @@ def validate_csv_terms_with_llm(csv_file_path: str) -> Dict[str, Any]:
         """
         
         try:
-            response = azure_llm.completion(
+            response = resilient_completion(
+                azure_llm.completion,
                 model=f"azure/{settings.AZURE_OPENAI_DEPLOYMENT_NAME}",
                 messages=[{"role": "user", "content": batch_prompt}],
                 api_key=settings.AZURE_OPENAI_API_KEY,
@@ -119,6 +128,11 @@ def validate_csv_terms_with_llm(csv_file_path: str) -> Dict[str, Any]:
                 overall_score = batch_result.get('overall_score', 0)
                 total_score = overall_score * len(term_evaluations)
                 
+                # 정상 평가된 용어만 기록해 다음 실행에서 재사용
+                if term_memory is not None:
+                    term_memory.remember(term_evaluations)
+                    term_memory.save()
+                
                 print(f"✅ 배치 분석 완료: 평균 이해도 {overall_score:.1f}%")
             else:
                 # JSON 파싱 실패시 기본값
@@ -140,19 +154,10 @@ def validate_csv_terms_with_llm(csv_file_path: str) -> Dict[str, Any]:
                     "score": 0,
                     "explanation": f"오류: {str(e)}"
                 })
-        # 4. 결과 정리
-        high_terms = [e for e in term_evaluations if e.get("score", 0) >= 70]
-        low_terms = [e for e in term_evaluations if e.get("score", 0) < 50]
-        
-        return {
-            "status": "success",
-            "csv_file": csv_file_path,
-            "total_terms_analyzed": len(term_evaluations),
-            "overall_score": overall_score,
-            "high_understanding_terms": high_terms,
-            "low_understanding_terms": low_terms,
-            "message": f"CSV 용어 검증 완료: {overall_score:.1f}% 이해도"
-        }
+        # 4. 결과 정리 (이전 실행에서 검증된 용어 포함)
+        if remembered_evaluations:
+            return _summarize_term_evaluations(csv_file_path, remembered_evaluations + term_evaluations)
+        return _summarize_term_evaluations(csv_file_path, term_evaluations, overall_score)
         
     except Exception as e:
         return {
@@ -160,12 +165,32 @@ def validate_csv_terms_with_llm(csv_file_path: str) -> Dict[str, Any]:
             "error_message": f"CSV 용어 검증 중 오류: {str(e)}"
         }
 
+def _summarize_term_evaluations(csv_file_path: str, term_evaluations: List[Dict[str, Any]],
+                                overall_score: float = None) -> Dict[str, Any]:
+    """용어 평가 목록을 검증 결과로 정리 (overall_score 미지정 시 평가 점수 평균)"""
+    if overall_score is None:
+        scores = [e.get("score", 0) for e in term_evaluations]
+        overall_score = sum(scores) / len(scores) if scores else 0
+    
+    high_terms = [e for e in term_evaluations if e.get("score", 0) >= 70]
+    low_terms = [e for e in term_evaluations if e.get("score", 0) < 50]
+    
+    return {
+        "status": "success",
+        "csv_file": csv_file_path,
+        "total_terms_analyzed": len(term_evaluations),
+        "overall_score": overall_score,
+        "high_understanding_terms": high_terms,
+        "low_understanding_terms": low_terms,
+        "message": f"CSV 용어 검증 완료: {overall_score:.1f}% 이해도"
+    }
+
 def get_domain_glossary() -> Dict[str, Any]:
     """도메인 용어 사전 조회"""
     print("--- Tool: get_domain_glossary called ---")
     
     try:
-        from domain_knowledge import DomainTerminology
+        from .domain_knowledge import DomainTerminology
         domain_terms = DomainTerminology.get_domain_terms()
         technical_terms = DomainTerminology.get_technical_terms()
         business_metrics = DomainTerminology.get_business_metrics()
@@ -190,20 +215,13 @@ def validate_csv_terms_simple(csv_file_path: str) -> Dict[str, Any]:
     print("--- Tool: validate_csv_terms_simple called ---")
     
     try:
-        # 1. CSV에서 용어 추출
-        df = pd.read_csv(csv_file_path)
-        all_text = ""
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                all_text += " " + df[col].astype(str).str.cat(sep=" ")
-        
-        # 한글 용어 추출 (2글자 이상)
-        korean_terms = re.findall(r'[가-힣]{2,}', all_text)
-        english_terms = re.findall(r'[A-Z][a-zA-Z]*', all_text)
-        all_terms = list(set(korean_terms + english_terms))
+        # 1. CSV에서 용어 추출 (컬럼/셀 단위 스트리밍 토큰화, 빈도와 첫 등장 컨텍스트를 한 번에 수집)
+        term_stats = extract_terms_from_csv(csv_file_path)
+        all_terms = list(term_stats["counts"])  # 첫 등장 순서
         
         # 2. 도메인 용어사전 로드
-        from domain_knowledge import DomainTerminology
+        from .domain_knowledge import DomainTerminology
+        glossary_trie = get_glossary_trie()
         domain_terms = DomainTerminology.get_domain_terms()
         technical_terms = DomainTerminology.get_technical_terms()
         business_metrics = DomainTerminology.get_business_metrics()
@@ -214,11 +232,14 @@ def validate_csv_terms_simple(csv_file_path: str) -> Dict[str, Any]:
         unmatched_terms = []
         
         for term in all_terms[:20]:  # 상위 20개만 분석
-            if term in all_domain_terms:
+            glossary_key, match_type = match_glossary_term(term, glossary_trie)
+            if glossary_key:
                 matched_terms.append({
                     "term": term,
-                    "definition": all_domain_terms[term],
-                    "category": "domain" if term in domain_terms else "technical" if term in technical_terms else "business"
+                    "glossary_term": glossary_key,
+                    "match_type": match_type,
+                    "definition": all_domain_terms[glossary_key],
+                    "category": "domain" if glossary_key in domain_terms else "technical" if glossary_key in technical_terms else "business"
                 })
             else:
                 unmatched_terms.append(term)
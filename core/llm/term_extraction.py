@@ -0,0 +1,214 @@
+"""CSV 용어 추출 엔진 및 용어사전 trie 매칭"""
+
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from .domain_knowledge import DomainTerminology
+
+# 한글 2자 이상 / 대문자로 시작하는 영문 용어 (두 패턴은 문자 집합이 겹치지 않아 한 번에 스캔 가능)
+TERM_PATTERN = re.compile(r'[가-힣]{2,}|[A-Z][a-zA-Z]*')
+
+# CSV를 나눠 읽을 행 단위 (전체 텍스트를 한 문자열로 합치지 않음)
+TERM_EXTRACTION_CHUNK_SIZE = 10_000
+
+# 컨텍스트 스니펫 최대 길이
+CONTEXT_LENGTH = 100
+
+# 접두 일치로 인정하는 용어사전 키 뒤의 조사/어미 (예: '쏘카존에서', '예약하세요')
+# 그 밖의 글자가 이어지면 다른 단어로 봄 (예: '예약률', '주차장'은 '예약', '주차'와 매칭하지 않음)
+GLOSSARY_SUFFIXES = frozenset({
+    "은", "는", "이", "가", "을", "를", "의", "에", "에서", "에게", "께", "한테", "로", "으로", "로는", "으로는",
+    "와", "과", "도", "만", "까지", "부터", "보다", "처럼", "이나", "나", "랑", "이랑", "이며", "이고", "이면",
+    "에는", "에도", "에서는", "에서도", "까지는", "부터는", "만의", "들", "들이", "들을", "들의", "들은",
+    "하기", "하고", "하면", "하는", "하세요", "해요", "해", "한", "할", "해서", "했던", "했어요", "하시면", "하신",
+    "된", "되는", "되면", "되어", "돼요", "입니다", "이에요", "예요", "이다", "님",
+})
+
+
+class GlossaryTrie:
+    """용어사전 키를 문자 단위로 저장한 trie (정확 일치 및 최장 접두 일치 조회)"""
+
+    _END = "\0"
+
+    def __init__(self, terms: Optional[Dict[str, Any]] = None):
+        self.root: Dict[str, Any] = {}
+        self.size = 0
+        for term in (terms or {}):
+            self.insert(term)
+
+    def insert(self, term: str):
+        """용어 추가"""
+        node = self.root
+        for char in term:
+            node = node.setdefault(char, {})
+        if self._END not in node:
+            node[self._END] = term
+            self.size += 1
+
+    def contains(self, term: str) -> bool:
+        """정확히 일치하는 용어가 있는지 확인"""
+        node = self.root
+        for char in term:
+            node = node.get(char)
+            if node is None:
+                return False
+        return self._END in node
+
+    def longest_prefix(self, text: str, start: int = 0) -> Optional[str]:
+        """text[start:]의 접두사 중 가장 긴 용어사전 키 반환 (예: '쏘카존에서' -> '쏘카존')"""
+        node = self.root
+        longest = None
+        for index in range(start, len(text)):
+            node = node.get(text[index])
+            if node is None:
+                break
+            if self._END in node:
+                longest = node[self._END]
+        return longest
+
+    def prefixes(self, text: str, start: int = 0) -> List[str]:
+        """text[start:]의 접두사인 용어사전 키 전체 (짧은 것부터)"""
+        node = self.root
+        found = []
+        for index in range(start, len(text)):
+            node = node.get(text[index])
+            if node is None:
+                break
+            if self._END in node:
+                found.append(node[self._END])
+        return found
+
+    def find_all(self, text: str) -> List[Tuple[str, int]]:
+        """텍스트에 등장하는 모든 용어사전 키 (용어, 시작 위치) 목록"""
+        found = []
+        for start in range(len(text)):
+            node = self.root
+            for index in range(start, len(text)):
+                node = node.get(text[index])
+                if node is None:
+                    break
+                if self._END in node:
+                    found.append((node[self._END], start))
+        return found
+
+
+@lru_cache(maxsize=1)
+def get_glossary_trie() -> GlossaryTrie:
+    """DomainTerminology.get_all_terms()로 한 번만 구축한 용어사전 trie"""
+    return GlossaryTrie(DomainTerminology.get_all_terms())
+
+
+def _is_text_column(series: pd.Series) -> bool:
+    """문자열 컬럼 여부 (object dtype 및 pandas string dtype)"""
+    return series.dtype == 'object' or isinstance(series.dtype, pd.StringDtype)
+
+
+def _iter_object_columns(csv_file_path: str, chunksize: int) -> Iterator[Tuple[int, str, pd.Series]]:
+    """CSV를 청크 단위로 읽어 (컬럼 순번, 컬럼명, 텍스트 컬럼 Series)를 순서대로 반환"""
+    for chunk in pd.read_csv(csv_file_path, chunksize=chunksize):
+        for col_index, col in enumerate(chunk.columns):
+            if _is_text_column(chunk[col]):
+                yield col_index, col, chunk[col]
+
+
+def extract_terms_from_csv(csv_file_path: str, chunksize: int = TERM_EXTRACTION_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    CSV 텍스트 컬럼을 컬럼/셀 단위로 스트리밍 토큰화해 용어 빈도와 첫 등장 컨텍스트를 한 번에 수집
+
+    Args:
+        csv_file_path: CSV 파일 경로
+        chunksize: 한 번에 읽을 행 수
+
+    Returns:
+        {"counts": Counter(용어 -> 등장 횟수, 첫 등장 순서 유지),
+         "contexts": {용어: 첫 등장 셀 텍스트 앞 100자},
+         "columns": {용어: 첫 등장 컬럼명}}
+    """
+    counts: Counter = Counter()
+    # 용어 -> (컬럼 순번, 컨텍스트, 컬럼명): 앞선 컬럼의 등장을 우선 (청크가 나뉘어도 동일)
+    first_seen: Dict[str, Tuple[int, str, str]] = {}
+
+    for col_index, col, values in _iter_object_columns(csv_file_path, chunksize):
+        for value in values:
+            text = value if isinstance(value, str) else str(value)
+            for match in TERM_PATTERN.finditer(text):
+                term = match.group()
+                counts[term] += 1
+                seen = first_seen.get(term)
+                if seen is None or col_index < seen[0]:
+                    first_seen[term] = (col_index, text[:CONTEXT_LENGTH], col)
+
+    return {
+        "counts": counts,
+        "contexts": {term: seen[1] for term, seen in first_seen.items()},
+        "columns": {term: seen[2] for term, seen in first_seen.items()},
+    }
+
+
+def match_glossary_term(term: str, trie: Optional[GlossaryTrie] = None) -> Tuple[Optional[str], str]:
+    """
+    추출 용어를 용어사전 키에 매칭
+
+    Returns:
+        (매칭된 용어사전 키, 매칭 방식 "exact" | "prefix" | "none")
+        prefix는 토큰이 용어사전 키 + 조사/어미(GLOSSARY_SUFFIXES)로만 이루어진 경우 (예: '쏘카존에서')
+        (짧은 키가 관련 없는 긴 단어의 앞부분과 겹치는 경우는 매칭하지 않음)
+    """
+    trie = trie or get_glossary_trie()
+    if trie.contains(term):
+        return term, "exact"
+    for prefix in reversed(trie.prefixes(term)):
+        if term[len(prefix):] in GLOSSARY_SUFFIXES:
+            return prefix, "prefix"
+    return None, "none"
+
+
+# 매칭 방식별 신규성 순위 (용어사전에 없는 용어를 가장 먼저 검증)
+NOVELTY_RANK = {"none": 0, "prefix": 1, "exact": 2}
+
+
+def rank_terms_for_validation(counts: Counter, trie: Optional[GlossaryTrie] = None,
+                              limit: Optional[int] = None) -> List[str]:
+    """
+    LLM 검증 대상 용어를 결정적으로 정렬
+
+    정렬 기준: 용어사전 대비 신규성(미등록 > 접두 일치 > 정확 일치) → 등장 빈도 내림차순 → 첫 등장 순서
+
+    Args:
+        counts: extract_terms_from_csv의 "counts" (첫 등장 순서 유지 Counter)
+        trie: 용어사전 trie
+        limit: 반환할 최대 용어 수
+
+    Returns:
+        정렬된 용어 목록
+    """
+    trie = trie or get_glossary_trie()
+    ranked = sorted(
+        enumerate(counts.items()),
+        key=lambda item: (NOVELTY_RANK[match_glossary_term(item[1][0], trie)[1]], -item[1][1], item[0])
+    )
+    terms = [term for _, (term, _) in ranked]
+    return terms if limit is None else terms[:limit]
+
+
+def relevant_glossary_entries(terms: List[str], glossary: Dict[str, str],
+                              trie: Optional[GlossaryTrie] = None) -> Dict[str, str]:
+    """
+    선택된 용어와 관련된 용어사전 항목만 추출 (정확/접두 일치 키 + 용어 안에 포함된 키)
+
+    Returns:
+        {용어사전 키: 정의} (용어 순서, 용어 내 등장 위치 순)
+    """
+    trie = trie or get_glossary_trie()
+    entries: Dict[str, str] = {}
+    for term in terms:
+        glossary_key, _ = match_glossary_term(term, trie)
+        keys = ([glossary_key] if glossary_key else []) + [key for key, _ in trie.find_all(term)]
+        for key in keys:
+            if key in glossary and key not in entries:
+                entries[key] = glossary[key]
+    return entries
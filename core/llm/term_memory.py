@@ -0,0 +1,100 @@
+"""
+LLM 용어 검증 결과를 실행 간에 보관하는 검증 용어 저장소
+"""
+
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+# 평가 프롬프트/판정 기준이 바뀌면 올려서 기존 기록을 무효화
+TERM_MEMORY_VERSION = 1
+
+TERM_MEMORY_PATH = "outputs/reports/term_cache/validated_terms.json"
+
+
+class ValidatedTermMemory:
+    """
+    용어별 LLM 평가 결과를 JSON 파일로 보관 (이미 검증된 용어는 다시 LLM에 보내지 않음)
+
+    배치/서비스 작업이 프로세스 공용 인스턴스를 함께 쓰므로 조회/기록/저장은 잠금 안에서 수행합니다.
+    """
+
+    def __init__(self, memory_path: str = TERM_MEMORY_PATH):
+        self.memory_path = memory_path
+        self.terms: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        """저장소 파일 로드 (버전 불일치/손상 시 빈 저장소로 시작)"""
+        if not os.path.exists(self.memory_path):
+            return
+        try:
+            with open(self.memory_path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            if payload.get("version") == TERM_MEMORY_VERSION:
+                self.terms = payload.get("terms", {})
+        except Exception as e:
+            print(f"⚠️ 검증 용어 기록 로드 실패 (새로 생성): {str(e)}")
+            self.terms = {}
+
+    def __contains__(self, term: str) -> bool:
+        with self._lock:
+            return term in self.terms
+
+    def get(self, term: str) -> Optional[Dict[str, Any]]:
+        """저장된 용어 평가 반환 (없으면 None)"""
+        with self._lock:
+            return self.terms.get(term)
+
+    def remember(self, evaluations: Iterable[Dict[str, Any]]):
+        """LLM 평가 결과 저장 (term 키가 있는 항목만)"""
+        with self._lock:
+            for evaluation in evaluations:
+                term = evaluation.get("term")
+                if term:
+                    self.terms[term] = dict(evaluation)
+                    self._dirty = True
+
+    def recall(self, terms: Iterable[str]) -> List[Dict[str, Any]]:
+        """저장된 평가가 있는 용어들의 평가 목록 (입력 순서)"""
+        with self._lock:
+            return [dict(self.terms[term]) for term in terms if term in self.terms]
+
+    def save(self):
+        """변경된 기록을 파일로 저장 (고유 임시 파일에 쓴 뒤 교체)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = None
+            try:
+                directory = os.path.dirname(self.memory_path) or "."
+                os.makedirs(directory, exist_ok=True)
+                with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory, suffix=".tmp",
+                                                 delete=False) as f:
+                    tmp_path = f.name
+                    json.dump({"version": TERM_MEMORY_VERSION, "terms": self.terms}, f, ensure_ascii=False)
+                os.replace(tmp_path, self.memory_path)
+                self._dirty = False
+                print(f"💾 검증 용어 기록 저장: {self.memory_path} ({len(self.terms)}개)")
+            except Exception as e:
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                print(f"⚠️ 검증 용어 기록 저장 실패: {str(e)}")
+
+
+# 프로세스 공용 저장소 (배치/서비스 실행 시 매 호출마다 파일을 다시 읽지 않음)
+_shared_memory: Optional[ValidatedTermMemory] = None
+_shared_lock = threading.Lock()
+
+
+def get_term_memory() -> ValidatedTermMemory:
+    """프로세스 공용 검증 용어 저장소 반환"""
+    global _shared_memory
+    with _shared_lock:
+        if _shared_memory is None:
+            _shared_memory = ValidatedTermMemory()
+        return _shared_memory
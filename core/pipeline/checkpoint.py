@@ -0,0 +1,174 @@
+"""
+Agent 파이프라인 단계별 체크포인트 - 실행 id와 데이터셋 해시 기준 저장 및 재개
+"""
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from core.pipeline.context import AnalysisContext, ContextSnapshot
+
+# 체크포인트 포맷/단계 정의가 바뀌면 올려서 기존 체크포인트를 무효화
+CHECKPOINT_VERSION = 1
+
+CHECKPOINT_DIR = "outputs/checkpoints"
+
+
+def dataset_file_hash(csv_file_path: str, block_size: int = 1 << 20) -> str:
+    """데이터셋 파일 내용의 sha256 (블록 단위로 읽음)"""
+    digest = hashlib.sha256()
+    with open(csv_file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def new_run_id() -> str:
+    """실행 id 생성 (시각 + uuid 접미사, 같은 초에 시작한 동시 실행도 구분)"""
+    return f"{datetime.now().strftime('%y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+class PipelineCheckpoint:
+    """
+    파이프라인 단계 완료 시마다 AnalysisContext와 단계 산출물을 JSON으로 저장하는 체크포인트
+
+    각 단계의 fingerprint는 직전 단계 fingerprint + 단계명 + 단계 입력(쿼리/맥락)으로 계산합니다.
+    앞 단계가 다시 실행되거나 입력이 바뀌면 이후 단계는 모두 무효화되어 다시 실행됩니다.
+    """
+
+    def __init__(self, csv_file_path: str, stages: Sequence[str], run_id: Optional[str] = None,
+                 checkpoint_dir: str = CHECKPOINT_DIR, dataset_hash: Optional[str] = None):
+        self.csv_file_path = csv_file_path
+        self.stages: List[str] = list(stages)
+        self.run_id = run_id or new_run_id()
+        self.checkpoint_dir = checkpoint_dir
+        self.dataset_hash = dataset_hash or dataset_file_hash(csv_file_path)
+        self.checkpoint_path = os.path.join(checkpoint_dir, f"{self.run_id}_{self.dataset_hash[:12]}.json")
+
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.saved_context: Dict[str, Any] = {}
+        self._previous_fingerprint = self.dataset_hash
+        self._pending: Dict[str, str] = {}
+        self._load()
+
+    @classmethod
+    def resume_latest(cls, csv_file_path: str, stages: Sequence[str],
+                      checkpoint_dir: str = CHECKPOINT_DIR) -> "PipelineCheckpoint":
+        """같은 데이터셋의 가장 최근 체크포인트로 재개 (없으면 새 실행)"""
+        dataset_hash = dataset_file_hash(csv_file_path)
+        candidates = glob.glob(os.path.join(checkpoint_dir, f"*_{dataset_hash[:12]}.json"))
+        if not candidates:
+            print("ℹ️ 재개할 체크포인트가 없습니다. 처음부터 실행합니다.")
+            return cls(csv_file_path, stages, checkpoint_dir=checkpoint_dir, dataset_hash=dataset_hash)
+        latest = max(candidates, key=os.path.getmtime)
+        run_id = os.path.basename(latest)[:-len(f"_{dataset_hash[:12]}.json")]
+        print(f"♻️ 체크포인트 재개: {latest}")
+        return cls(csv_file_path, stages, run_id=run_id, checkpoint_dir=checkpoint_dir, dataset_hash=dataset_hash)
+
+    def _load(self):
+        """체크포인트 파일 로드 (버전/데이터셋 불일치 또는 손상 시 빈 상태로 시작)"""
+        if not os.path.exists(self.checkpoint_path):
+            return
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            if payload.get("version") == CHECKPOINT_VERSION and payload.get("dataset_hash") == self.dataset_hash:
+                self.records = payload.get("stages", {})
+                self.saved_context = payload.get("context", {})
+        except Exception as e:
+            print(f"⚠️ 체크포인트 로드 실패 (처음부터 실행): {str(e)}")
+            self.records = {}
+            self.saved_context = {}
+
+    def restore_context(self, context: AnalysisContext):
+        """저장된 컨텍스트를 현재 컨텍스트에 반영"""
+        if self.saved_context:
+            restored = AnalysisContext.from_dict(self.saved_context)
+            context.update(**restored.to_dict())
+
+    def _fingerprint(self, stage: str, stage_input: Any) -> str:
+        digest = hashlib.sha256(self._previous_fingerprint.encode("utf-8"))
+        digest.update(stage.encode("utf-8"))
+        digest.update(json.dumps(stage_input, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def should_run(self, stage: str, stage_input: Any = None) -> bool:
+        """
+        단계 실행 필요 여부 (완료 기록이 없거나 fingerprint가 다르면 True)
+
+        단계 순서대로 호출해야 하며, 완료된 단계를 건너뛸 때도 fingerprint 체인은 이어집니다.
+        """
+        fingerprint = self._fingerprint(stage, stage_input)
+        record = self.records.get(stage)
+        if record and record.get("fingerprint") == fingerprint:
+            self._previous_fingerprint = fingerprint
+            print(f"⏭️ {stage} 단계 건너뜀 (체크포인트 완료 기록 사용)")
+            return False
+        self._pending[stage] = fingerprint
+        return True
+
+    def complete(self, stage: str, context: AnalysisContext, started: Optional[ContextSnapshot] = None,
+                 output: Any = None):
+        """
+        단계 완료 기록 및 컨텍스트 저장
+
+        Args:
+            stage: 단계명
+            context: 현재 컨텍스트
+            started: 단계 시작 시점 스냅샷 (지정 시 이 단계에서 바뀐 필드를 산출물로 기록)
+            output: 추가로 기록할 단계 산출물
+        """
+        fingerprint = self._pending.pop(stage, None) or self._fingerprint(stage, None)
+        snapshot = context.snapshot()
+        changed_fields = []
+        if started is not None:
+            changed_fields = [name for name, version in snapshot.versions.items()
+                              if started.versions.get(name, 0) != version]
+
+        self.records[stage] = {
+            "fingerprint": fingerprint,
+            "completed_at": datetime.now().isoformat(timespec="seconds"),
+            "changed_fields": changed_fields,
+            "output": output if output is not None else {name: getattr(snapshot, name) for name in changed_fields},
+        }
+        # 이후 단계 기록은 이 단계 결과를 전제로 하므로, 다시 실행된 단계 뒤의 기록은 제거
+        if stage in self.stages:
+            for later in self.stages[self.stages.index(stage) + 1:]:
+                self.records.pop(later, None)
+        self._previous_fingerprint = fingerprint
+        self.save(snapshot)
+
+    def resume_stage(self) -> Optional[str]:
+        """완료 기록이 없는 첫 단계 (모두 완료면 None, 입력 변경으로 인한 무효화는 should_run에서 판단)"""
+        for stage in self.stages:
+            if stage not in self.records:
+                return stage
+        return None
+
+    def save(self, snapshot: ContextSnapshot):
+        """체크포인트 파일 저장 (고유 임시 파일에 쓴 뒤 교체)"""
+        tmp_path = None
+        try:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=self.checkpoint_dir, suffix=".tmp",
+                                             delete=False) as f:
+                tmp_path = f.name
+                json.dump({
+                    "version": CHECKPOINT_VERSION,
+                    "run_id": self.run_id,
+                    "csv_file": self.csv_file_path,
+                    "dataset_hash": self.dataset_hash,
+                    "stages": self.records,
+                    "context": snapshot.to_dict(),
+                }, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, self.checkpoint_path)
+            print(f"💾 체크포인트 저장: {self.checkpoint_path} ({len(self.records)}/{len(self.stages)} 단계 완료)")
+        except Exception as e:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            print(f"⚠️ 체크포인트 저장 실패: {str(e)}")
@@ -0,0 +1,189 @@
+"""
+Agent 간 공유되는 분석 컨텍스트 - 필드별 버전 관리 및 copy-on-write 스냅샷
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, fields, replace
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+# 여러 번 누적되는 필드 (tuple로 보관해 스냅샷 간 공유해도 안전)
+APPEND_FIELDS = ("insights", "recommendations")
+
+
+@dataclass(frozen=True, slots=True)
+class ContextSnapshot:
+    """특정 시점의 분석 컨텍스트 (불변, 값은 이전 스냅샷과 참조 공유)"""
+
+    # 1단계: 데이터 이해 결과
+    data_info: Optional[Dict[str, Any]] = None
+    data_understanding_summary: Optional[str] = None
+    analysis_requirements: Optional[Dict[str, Any]] = None
+    analysis_plan: Optional[Dict[str, Any]] = None
+
+    # 2단계: 전처리 결과
+    preprocessing_stats: Optional[Dict[str, Any]] = None
+    preprocessed_file_path: Optional[str] = None
+
+    # 3단계: 분석 결과 (기존)
+    funnel_analysis: Optional[str] = None
+    message_analysis: Optional[str] = None
+    weekly_trends: Optional[Dict[str, Any]] = None
+
+    # 3단계: 분석 결과 (신규 - Lift 기반)
+    category_analysis: Optional[str] = None
+    funnel_segment_analysis: Optional[str] = None
+    funnel_strategy_analysis: Optional[str] = None
+    llm_analysis: Optional[str] = None
+
+    # 4단계: 보고서 결과
+    insights: Tuple[Any, ...] = ()
+    recommendations: Tuple[Any, ...] = ()
+    final_report: Optional[Any] = None
+
+    # Comprehensive Agent 결과 (HTML 규격 구조화)
+    structured_llm_analysis: Optional[Any] = None
+
+    # 용어 이해도 결과
+    terminology_analysis: Optional[Dict[str, Any]] = None
+
+    # 필드별 버전 (값이 바뀔 때마다 1씩 증가) 및 전체 리비전
+    versions: Mapping[str, int] = field(default_factory=lambda: MappingProxyType({}))
+    revision: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """직렬화 가능한 딕셔너리로 변환 (값은 복사하지 않음)"""
+        result = {}
+        for name in CONTEXT_FIELDS:
+            value = getattr(self, name)
+            result[name] = list(value) if name in APPEND_FIELDS else value
+        return result
+
+
+CONTEXT_FIELDS: Tuple[str, ...] = tuple(
+    f.name for f in fields(ContextSnapshot) if f.name not in ("versions", "revision")
+)
+
+
+class AnalysisContext:
+    """
+    Agent 간 공유되는 분석 컨텍스트
+
+    현재 상태는 불변 ContextSnapshot 하나로 보관하고, 쓰기마다 바뀐 필드만 교체한 새 스냅샷으로
+    참조를 바꿉니다. 읽는 쪽은 snapshot()으로 받은 스냅샷을 잠금 없이 일관되게 사용할 수 있습니다.
+    기존 코드와 같이 context.data_info 형태로 읽고 쓸 수 있습니다.
+    """
+
+    __slots__ = ("_snapshot", "_write_lock")
+
+    def __init__(self, snapshot: Optional[ContextSnapshot] = None):
+        object.__setattr__(self, "_snapshot", snapshot or ContextSnapshot())
+        object.__setattr__(self, "_write_lock", threading.Lock())
+
+    def __getattr__(self, name: str) -> Any:
+        # 슬롯에 없는 속성은 현재 스냅샷의 필드로 조회
+        if name in CONTEXT_FIELDS or name in ("versions", "revision"):
+            return getattr(self._snapshot, name)
+        raise AttributeError(f"'AnalysisContext' object has no attribute '{name}'")
+
+    def __setattr__(self, name: str, value: Any):
+        if name not in CONTEXT_FIELDS:
+            raise AttributeError(f"알 수 없는 컨텍스트 필드: {name}")
+        self.update(**{name: value})
+
+    def update(self, **changes: Any) -> ContextSnapshot:
+        """여러 필드를 한 번에 교체한 새 스냅샷을 현재 상태로 설정"""
+        unknown = [name for name in changes if name not in CONTEXT_FIELDS]
+        if unknown:
+            raise AttributeError(f"알 수 없는 컨텍스트 필드: {', '.join(unknown)}")
+        for name in APPEND_FIELDS:
+            if name in changes:
+                changes[name] = tuple(changes[name] or ())
+
+        with self._write_lock:
+            current = self._snapshot
+            versions = dict(current.versions)
+            for name in changes:
+                versions[name] = versions.get(name, 0) + 1
+            snapshot = replace(current, **changes, versions=MappingProxyType(versions),
+                               revision=current.revision + 1)
+            object.__setattr__(self, "_snapshot", snapshot)
+        return snapshot
+
+    def append(self, name: str, value: Any) -> ContextSnapshot:
+        """누적 필드(insights, recommendations)에 값 추가"""
+        if name not in APPEND_FIELDS:
+            raise AttributeError(f"누적 필드가 아닙니다: {name}")
+        with self._write_lock:
+            current = self._snapshot
+            versions = dict(current.versions)
+            versions[name] = versions.get(name, 0) + 1
+            snapshot = replace(current, **{name: getattr(current, name) + (value,)},
+                               versions=MappingProxyType(versions), revision=current.revision + 1)
+            object.__setattr__(self, "_snapshot", snapshot)
+        return snapshot
+
+    def snapshot(self) -> ContextSnapshot:
+        """현재 시점의 불변 스냅샷 (복사 없음)"""
+        return self._snapshot
+
+    def version(self, name: str) -> int:
+        """필드 버전 (한 번도 설정되지 않았으면 0)"""
+        return self._snapshot.versions.get(name, 0)
+
+    def reset(self):
+        """빈 컨텍스트로 초기화"""
+        with self._write_lock:
+            object.__setattr__(self, "_snapshot", ContextSnapshot())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """직렬화 가능한 딕셔너리로 변환"""
+        return self._snapshot.to_dict()
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "AnalysisContext":
+        """to_dict 결과로 컨텍스트 복원 (알 수 없는 키는 무시)"""
+        context = cls()
+        values = {name: data[name] for name in CONTEXT_FIELDS if name in data}
+        if values:
+            context.update(**values)
+        return context
+
+
+# 현재 실행 흐름(데이터셋 단위 실행)에서 사용하는 컨텍스트 (asyncio task마다 분리)
+_default_context = AnalysisContext()
+_active_context: ContextVar[AnalysisContext] = ContextVar("active_analysis_context", default=_default_context)
+
+
+def current_context() -> AnalysisContext:
+    """현재 실행 흐름의 분석 컨텍스트"""
+    return _active_context.get()
+
+
+@contextmanager
+def use_context(context: AnalysisContext) -> Iterator[AnalysisContext]:
+    """블록 안(및 그 안에서 생성한 asyncio task)에서 사용할 분석 컨텍스트 지정"""
+    token = _active_context.set(context)
+    try:
+        yield context
+    finally:
+        _active_context.reset(token)
+
+
+class AnalysisContextProxy:
+    """
+    현재 실행 흐름의 AnalysisContext로 읽기/쓰기를 위임하는 전역 컨텍스트 객체
+
+    여러 데이터셋을 한 프로세스에서 동시에 분석할 때도 도구 함수들은 기존처럼
+    전역 context를 사용하면서 각자 데이터셋의 컨텍스트에 접근합니다.
+    """
+
+    __slots__ = ()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(_active_context.get(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(_active_context.get(), name, value)
@@ -0,0 +1,346 @@
+"""
+로컬 분석 서비스 - asyncio HTTP 서버 + 비동기 작업 API
+
+프로세스를 유지한 채 요청을 처리하므로 Agent Runner, 파싱된 데이터셋, 도구/보고서 캐시,
+검증 용어 기록, 레이트 리미터/서킷 상태가 요청 간에 그대로 재사용됩니다.
+
+엔드포인트:
+    GET  /health                    서비스 상태 및 캐시 현황
+    POST /jobs                      작업 제출 (JSON {"csv_path", "mode", "resume", "force"} 또는 CSV 본문 업로드)
+    GET  /jobs                      작업 목록
+    GET  /jobs/{job_id}             작업 상태
+    GET  /jobs/{job_id}/report      생성된 HTML 보고서 (?index=n)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from core.pipeline.checkpoint import dataset_file_hash
+from core.pipeline.context import AnalysisContext, use_context
+
+# 업로드된 CSV 저장 위치 (내용 해시 기준 파일명이라 같은 데이터는 같은 경로로 저장)
+SERVICE_UPLOAD_DIR = "outputs/service/uploads"
+
+# 메모리에 유지할 작업 기록 최대 개수 (완료된 오래된 작업부터 제거)
+MAX_JOB_HISTORY = 200
+
+# 업로드 본문 최대 크기
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+
+# 모드 실행 함수: (csv_file, file_tag, resume) -> 생성된 보고서 경로 목록
+ModeRunner = Callable[[str, str, bool], Awaitable[Optional[List[str]]]]
+
+HTTP_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+@dataclass
+class AnalysisJob:
+    """분석 작업 상태 (queued → running → succeeded/failed)"""
+
+    job_id: str
+    mode: str
+    csv_file: str
+    dataset_hash: str
+    resume: bool = True
+    status: str = "queued"
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    report_paths: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    # 같은 데이터셋/모드의 이전 완료 결과를 그대로 반환한 작업
+    cached: bool = False
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    @property
+    def file_tag(self) -> str:
+        stem = os.path.splitext(os.path.basename(self.csv_file))[0]
+        return f"{stem}_{self.job_id[:6]}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = asdict(self)
+        result["dataset_hash"] = self.dataset_hash[:12]
+        return result
+
+
+class AnalysisService:
+    """
+    분석 작업 큐와 HTTP API
+
+    HTTP 요청은 메인 이벤트 루프에서, 분석 작업은 별도 스레드의 장기 실행 이벤트 루프에서 처리합니다.
+    (분석 중 동기 pandas 연산이 있어도 상태 조회가 막히지 않고, Runner/LLM 클라이언트는 항상 같은 루프에서 사용)
+    같은 데이터셋(내용 해시)과 모드의 작업이 진행 중이면 그 작업을, 이미 완료되었으면 완료 결과를 반환합니다.
+    """
+
+    def __init__(self, modes: Dict[str, ModeRunner], max_concurrent_jobs: int = 1,
+                 upload_dir: str = SERVICE_UPLOAD_DIR,
+                 warmup: Optional[Callable[[], None]] = None,
+                 stats: Optional[Callable[[], Dict[str, Any]]] = None):
+        self.modes = modes
+        self.upload_dir = upload_dir
+        self.warmup = warmup
+        self.stats = stats
+        self.jobs: "OrderedDict[str, AnalysisJob]" = OrderedDict()
+        self._latest: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrent_jobs))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # 작업 실행
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """작업 실행용 이벤트 루프 스레드 시작 및 캐시 예열"""
+        if self._loop is not None:
+            return
+        if self.warmup is not None:
+            self.warmup()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="analysis-jobs", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """작업 실행 루프 종료 (진행 중인 작업은 중단됨)"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop = None
+
+    def submit(self, csv_file: str, mode: str, resume: bool = True, force: bool = False,
+               dataset_hash: Optional[str] = None) -> AnalysisJob:
+        """
+        분석 작업 제출
+
+        Args:
+            csv_file: 분석할 CSV 경로
+            mode: 실행 모드 (modes 키)
+            resume: 체크포인트 재개 여부 (완료된 단계는 다시 실행하지 않음)
+            force: True면 이전 완료 결과를 재사용하지 않고 새로 실행
+            dataset_hash: 이미 계산한 데이터셋 해시
+
+        Raises:
+            ValueError: 알 수 없는 모드
+            FileNotFoundError: CSV 파일이 없는 경우
+        """
+        if mode not in self.modes:
+            raise ValueError(f"알 수 없는 모드: {mode} (사용 가능: {', '.join(sorted(self.modes))})")
+        if not os.path.isfile(csv_file):
+            raise FileNotFoundError(f"CSV 파일이 없습니다: {csv_file}")
+        if self._loop is None:
+            self.start()
+        dataset_hash = dataset_hash or dataset_file_hash(csv_file)
+        key = (mode, dataset_hash)
+
+        with self._lock:
+            previous = self.jobs.get(self._latest.get(key, ""))
+            if previous is not None and not force:
+                if not previous.finished:
+                    return previous
+                if previous.status == "succeeded" and all(os.path.exists(p) for p in previous.report_paths):
+                    job = AnalysisJob(uuid.uuid4().hex[:12], mode, csv_file, dataset_hash, resume,
+                                      status="succeeded", report_paths=list(previous.report_paths), cached=True)
+                    job.started_at = job.finished_at = job.created_at
+                    self._add(job)
+                    return job
+
+            job = AnalysisJob(uuid.uuid4().hex[:12], mode, os.path.abspath(csv_file), dataset_hash, resume)
+            self._add(job)
+            self._latest[key] = job.job_id
+
+        asyncio.run_coroutine_threadsafe(self._execute(job), self._loop)
+        print(f"📥 작업 접수: {job.job_id} [{mode}] {csv_file}")
+        return job
+
+    def _add(self, job: AnalysisJob):
+        self.jobs[job.job_id] = job
+        if len(self.jobs) > MAX_JOB_HISTORY:
+            for job_id in [j.job_id for j in self.jobs.values() if j.finished][:len(self.jobs) - MAX_JOB_HISTORY]:
+                del self.jobs[job_id]
+
+    async def _execute(self, job: AnalysisJob):
+        async with self._semaphore:
+            job.status = "running"
+            job.started_at = datetime.now().isoformat(timespec="seconds")
+            print(f"▶️ 작업 실행: {job.job_id} [{job.mode}] {job.csv_file}")
+            try:
+                with use_context(AnalysisContext()):
+                    report_paths = await self.modes[job.mode](job.csv_file, job.file_tag, job.resume)
+                job.report_paths = [path for path in report_paths or [] if path and os.path.exists(path)]
+                if job.report_paths:
+                    job.status = "succeeded"
+                else:
+                    job.status = "failed"
+                    job.error = "보고서가 생성되지 않았습니다."
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+            job.finished_at = datetime.now().isoformat(timespec="seconds")
+            icon = "✅" if job.status == "succeeded" else "❌"
+            print(f"{icon} 작업 종료: {job.job_id} ({job.status}) {job.error or ''}")
+
+    def save_upload(self, body: bytes, filename: str = "upload.csv") -> Tuple[str, str]:
+        """업로드된 CSV 본문 저장. (저장 경로, 데이터셋 해시) 반환"""
+        dataset_hash = hashlib.sha256(body).hexdigest()
+        stem = re.sub(r"[^\w.-]", "_", os.path.splitext(os.path.basename(filename))[0]) or "upload"
+        os.makedirs(self.upload_dir, exist_ok=True)
+        path = os.path.join(self.upload_dir, f"{stem}_{dataset_hash[:12]}.csv")
+        if not os.path.exists(path):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        return path, dataset_hash
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    async def serve(self, host: str, port: int):
+        """HTTP 서버 실행 (종료될 때까지 대기)"""
+        self.start()
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        print(f"🌐 분석 서비스 시작: http://{host}:{port} (모드: {', '.join(sorted(self.modes))})")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.stop()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            try:
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+            except ValueError:
+                status, content_type, payload = self._json(400, {"error": "잘못된 HTTP 요청입니다."})
+            else:
+                if length > MAX_UPLOAD_BYTES:
+                    status, content_type, payload = self._json(413, {"error": "업로드 크기 제한을 초과했습니다."})
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, content_type, payload = await self.dispatch(method.upper(), target, headers, body)
+
+            writer.write(
+                f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                "Connection: close\r\n\r\n".encode("latin-1") + payload
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _json(status: int, data: Any) -> Tuple[int, str, bytes]:
+        return status, "application/json; charset=utf-8", json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+
+    async def dispatch(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> Tuple[int, str, bytes]:
+        """요청 라우팅. (상태 코드, Content-Type, 본문) 반환"""
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split("/") if part]
+
+        try:
+            if parts == ["health"] and method == "GET":
+                return self._json(200, self.health())
+            if parts == ["jobs"]:
+                if method == "GET":
+                    return self._json(200, [job.to_dict() for job in reversed(self.jobs.values())])
+                if method == "POST":
+                    return await self._submit_request(headers, body, query)
+                return self._json(405, {"error": "허용되지 않는 메서드입니다."})
+            if len(parts) in (2, 3) and parts[0] == "jobs" and method == "GET":
+                job = self.jobs.get(parts[1])
+                if job is None:
+                    return self._json(404, {"error": f"작업을 찾을 수 없습니다: {parts[1]}"})
+                if len(parts) == 2:
+                    return self._json(200, job.to_dict())
+                if parts[2] == "report":
+                    return self._report_response(job, query)
+            return self._json(404, {"error": f"알 수 없는 경로입니다: {url.path}"})
+        except Exception as e:
+            return self._json(500, {"error": str(e)})
+
+    async def _submit_request(self, headers: Dict[str, str], body: bytes,
+                              query: Dict[str, str]) -> Tuple[int, str, bytes]:
+        """JSON 요청(csv_path 지정) 또는 CSV 본문 업로드로 작업 제출"""
+        if headers.get("content-type", "").startswith("application/json"):
+            try:
+                params = {**query, **json.loads(body.decode("utf-8") or "{}")}
+            except ValueError:
+                return self._json(400, {"error": "JSON 본문을 해석할 수 없습니다."})
+            csv_file = params.get("csv_path")
+            if not csv_file:
+                return self._json(400, {"error": "csv_path가 필요합니다."})
+            dataset_hash = None
+        else:
+            params = query
+            if not body:
+                return self._json(400, {"error": "CSV 본문 또는 JSON(csv_path)이 필요합니다."})
+            csv_file, dataset_hash = await asyncio.to_thread(self.save_upload, body, params.get("filename", "upload.csv"))
+
+        mode = params.get("mode", "comprehensive")
+        try:
+            if dataset_hash is None and os.path.isfile(csv_file):
+                dataset_hash = await asyncio.to_thread(dataset_file_hash, csv_file)
+            job = self.submit(csv_file, mode, resume=_as_bool(params.get("resume", True)),
+                              force=_as_bool(params.get("force", False)), dataset_hash=dataset_hash)
+        except (ValueError, FileNotFoundError) as e:
+            return self._json(400, {"error": str(e)})
+        return self._json(200 if job.finished else 202, job.to_dict())
+
+    def _report_response(self, job: AnalysisJob, query: Dict[str, str]) -> Tuple[int, str, bytes]:
+        if not job.finished:
+            return self._json(409, {"error": f"작업이 아직 완료되지 않았습니다: {job.status}"})
+        try:
+            path = job.report_paths[int(query.get("index", 0))]
+        except (ValueError, IndexError):
+            return self._json(404, {"error": "보고서가 없습니다.", "report_paths": job.report_paths})
+        if not os.path.exists(path):
+            return self._json(404, {"error": f"보고서 파일이 삭제되었습니다: {path}"})
+        with open(path, "rb") as f:
+            return 200, "text/html; charset=utf-8", f.read()
+
+    def health(self) -> Dict[str, Any]:
+        """서비스 상태 및 캐시 현황"""
+        counts: Dict[str, int] = {}
+        for job in list(self.jobs.values()):
+            counts[job.status] = counts.get(job.status, 0) + 1
+        result = {"status": "ok", "modes": sorted(self.modes), "jobs": counts}
+        if self.stats is not None:
+            result["caches"] = self.stats()
+        return result
+
+
+def _as_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "y")
+    return bool(value)
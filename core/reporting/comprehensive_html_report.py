@@ -7,9 +7,23 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
+import html
 import json
 import os
-from typing import Dict, Any, List
+import asyncio
+import inspect
+import itertools
+from typing import Dict, Any, List, Iterator, Callable, TextIO, Optional, Sequence
+from core.reporting.section_cache import ReportSectionCache, compute_section_fingerprint
+from core.analysis.keyword_engine import KeywordIndicatorEngine
+from core.analysis.text_features import get_text_features, classify_message_pattern
+from core.analysis.dataset_cache import read_csv_cached
+from core.analysis.significance import SIGNIFICANT_POSITIVE, format_q_value, run_comparisons
+from core.analysis.bootstrap import format_lift_interval, funnel_bootstrap
+from core.analysis.bayesian import bayesian_lift
+from core.analysis.quantile_sketch import get_lift_quantile_state
+from config.keyword_groups import KEYWORD_GROUPS
+from config.settings import settings
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -19,16 +33,28 @@ def get_datetime_prefix():
     now = datetime.now()
     return now.strftime("%y%m%d_%H%M")
 
+# 섹션 fingerprint 계산에 사용하는 집계 컬럼
+COUNT_COLUMNS = ['실험군_1일이내_예약생성', '실험군_발송', '대조군_1일이내_예약생성', '대조군_발송']
+
 class ComprehensiveHTMLReportGenerator:
-    def __init__(self, csv_file_path: str):
+    def __init__(self, csv_file_path: str, section_cache: Optional[ReportSectionCache] = None,
+                 keyword_groups: Optional[Dict[str, List[str]]] = None):
         self.csv_file_path = csv_file_path
         self.df = None
         self.agent_results = {}
+        # 키워드 지표/톤앤매너 분석에 사용할 키워드 그룹 (config.keyword_groups 기본값)
+        self.keyword_groups = keyword_groups or KEYWORD_GROUPS
+        self._keyword_engine = None
+        # 설정 시 입력이 바뀌지 않은 섹션은 캐시된 HTML 조각을 재사용
+        self.section_cache = section_cache
+        # 현재 렌더링 중인 섹션에서 오류 대체 출력을 사용했는지 여부 (캐시 저장 생략)
+        self._render_failed = False
         
     def load_data(self):
         """CSV 데이터 로드"""
         try:
-            self.df = pd.read_csv(self.csv_file_path)
+            self.df = read_csv_cached(self.csv_file_path)
+            self._keyword_engine = None
             print(f"✅ 데이터 로드 완료: {len(self.df)}행 x {len(self.df.columns)}열")
         except Exception as e:
             print(f"❌ 데이터 로드 오류: {str(e)}")
@@ -74,6 +100,7 @@ class ComprehensiveHTMLReportGenerator:
             }
         except Exception as e:
             print(f"⚠️ 핵심 지표 계산 오류: {str(e)}")
+            self._render_failed = True
             return {
                 'experiment_conversion_rate': 0,
                 'average_lift': 0,
@@ -83,64 +110,80 @@ class ComprehensiveHTMLReportGenerator:
     
     def _generate_funnel_analysis(self) -> str:
         """퍼널별 분석 동적 생성"""
+        return ''.join(self._iter_funnel_analysis())
+
+    def _iter_funnel_stats(self) -> Iterator[Dict[str, Any]]:
+        """퍼널별 전환율/Lift/성과 등급을 한 번의 groupby 집계로 계산해 행 단위로 반환"""
+        count_columns = ['실험군_1일이내_예약생성', '실험군_발송', '대조군_1일이내_예약생성', '대조군_발송']
+        sums = self.df.reindex(columns=['퍼널'] + count_columns).fillna({c: 0 for c in count_columns})
+        # nan 값 제거하고 유효한 퍼널만 처리 (등장 순서 유지)
+        grouped = sums.dropna(subset=['퍼널']).groupby('퍼널', sort=False)
+        totals = grouped[count_columns].sum()
+        campaigns = grouped.size()
+
+        exp_sent = totals['실험군_발송']
+        ctrl_sent = totals['대조군_발송']
+        exp_rate = (totals['실험군_1일이내_예약생성'] / exp_sent * 100).where(exp_sent > 0, 0)
+        ctrl_rate = (totals['대조군_1일이내_예약생성'] / ctrl_sent * 100).where(ctrl_sent > 0, 0)
+        exact_lift = exp_rate - ctrl_rate
+        lift = exact_lift.round(1)
+
+        # 퍼널 내 캠페인 재표본 부트스트랩 BCa 신뢰구간
+        lift_ci = funnel_bootstrap(self.df)
+        # 베이지안 개선 확률 P(Lift>0) (캠페인/퍼널 전체를 한 번에 계산한 사후분포)
+        prob_improvement = bayesian_lift(self.df)[1]['prob_improvement'].reindex(lift.index)
+
+        # 개선 확률(표시 단위 반올림), Lift 순으로 내림차순 정렬 후 Lift 3분위수 기준으로 등급 계산
+        order = pd.DataFrame({'prob': prob_improvement.fillna(0).round(2), 'lift': lift}) \
+            .sort_values(['prob', 'lift'], ascending=False, kind='stable').index
+        # 퍼널 간 합산 Lift 3분위수는 퍼널 합계 상태에서 조회 (비율 -> %p)
+        q33, q67 = (q * 100 for q in get_lift_quantile_state(self.df).funnel_lift_terciles())
+
+        for funnel in order:
+            funnel_lift = lift[funnel]
+            if exact_lift[funnel] >= q67:
+                grade, grade_text = "high", "상위"
+            elif exact_lift[funnel] >= q33:
+                grade, grade_text = "medium", "중위"
+            else:
+                grade, grade_text = "low", "하위"
+
+            yield {
+                'funnel': funnel,
+                'exp_rate': round(exp_rate[funnel], 1),
+                'ctrl_rate': round(ctrl_rate[funnel], 1),
+                'lift': funnel_lift,
+                'campaigns': int(campaigns[funnel]),
+                'prob_improvement': f"{prob_improvement[funnel]:.0%}" if pd.notna(prob_improvement[funnel]) else "-",
+                'lift_ci': format_lift_interval(lift_ci.at[funnel, 'bca_low'], lift_ci.at[funnel, 'bca_high'])
+                           if funnel in lift_ci.index else "-",
+                'grade': grade,
+                'grade_text': grade_text
+            }
+
+    def _iter_funnel_analysis(self) -> Iterator[str]:
+        """퍼널별 분석 테이블을 행 단위 HTML 조각으로 생성"""
         if self.df is None or len(self.df) == 0:
-            return "<p>데이터가 없습니다.</p>"
-        
+            yield "<p>데이터가 없습니다.</p>"
+            return
+
+        # 퍼널별 그룹화 및 분석
+        if '퍼널' not in self.df.columns:
+            yield "<p>퍼널 데이터가 없습니다.</p>"
+            return
+
         try:
-            # 퍼널별 그룹화 및 분석
-            if '퍼널' not in self.df.columns:
-                return "<p>퍼널 데이터가 없습니다.</p>"
-            
-            funnel_stats = []
-            # nan 값 제거하고 유효한 퍼널만 처리
-            valid_funnels = self.df['퍼널'].dropna().unique()
-            for funnel in valid_funnels:
-                funnel_data = self.df[self.df['퍼널'] == funnel]
-                
-                exp_conversions = funnel_data['실험군_1일이내_예약생성'].sum() if '실험군_1일이내_예약생성' in funnel_data.columns else 0
-                exp_sent = funnel_data['실험군_발송'].sum() if '실험군_발송' in funnel_data.columns else 0
-                ctrl_conversions = funnel_data['대조군_1일이내_예약생성'].sum() if '대조군_1일이내_예약생성' in funnel_data.columns else 0
-                ctrl_sent = funnel_data['대조군_발송'].sum() if '대조군_발송' in funnel_data.columns else 0
-                
-                exp_rate = (exp_conversions / exp_sent * 100) if exp_sent > 0 else 0
-                ctrl_rate = (ctrl_conversions / ctrl_sent * 100) if ctrl_sent > 0 else 0
-                lift = exp_rate - ctrl_rate
-                
-                # 성과 등급 결정 (3분위수 기준으로 나중에 계산)
-                grade = "pending"
-                grade_text = "계산중"
-                
-                funnel_stats.append({
-                    'funnel': funnel,
-                    'exp_rate': round(exp_rate, 1),
-                    'ctrl_rate': round(ctrl_rate, 1),
-                    'lift': round(lift, 1),
-                    'campaigns': len(funnel_data),
-                    'grade': grade,
-                    'grade_text': grade_text
-                })
-            
-            # Lift 기준으로 내림차순 정렬
-            funnel_stats.sort(key=lambda x: x['lift'], reverse=True)
-            
-            # 3분위수 기준으로 등급 재계산
-            lifts = [stat['lift'] for stat in funnel_stats]
-            q33 = pd.Series(lifts).quantile(0.33)
-            q67 = pd.Series(lifts).quantile(0.67)
-            
-            for stat in funnel_stats:
-                if stat['lift'] >= q67:
-                    stat['grade'] = "high"
-                    stat['grade_text'] = "상위"
-                elif stat['lift'] >= q33:
-                    stat['grade'] = "medium"
-                    stat['grade_text'] = "중위"
-                else:
-                    stat['grade'] = "low"
-                    stat['grade_text'] = "하위"
-            
-            # HTML 생성
-            funnel_html = """
+            rows = self._iter_funnel_stats()
+            # 첫 행을 미리 계산해 집계 오류가 테이블 머리말 출력 전에 드러나도록 함
+            first_row = next(rows, None)
+        except Exception as e:
+            print(f"⚠️ 퍼널별 분석 오류: {str(e)}")
+            self._render_failed = True
+            yield "<p>퍼널별 분석 중 오류가 발생했습니다.</p>"
+            return
+
+        # HTML 생성
+        yield f"""
                         <h4>🎯 퍼널별 Lift 성과 분석</h4>
                         <table class="analysis-table">
                             <thead>
@@ -149,35 +192,34 @@ class ComprehensiveHTMLReportGenerator:
                                     <th>실험군 전환율</th>
                                     <th>대조군 전환율</th>
                                     <th>Lift</th>
+                                    <th>Lift {settings.CONFIDENCE_INTERVAL:.0%} CI (BCa)</th>
+                                    <th>개선 확률</th>
                                     <th>캠페인 수</th>
                                     <th>성과 등급</th>
                                 </tr>
                             </thead>
                             <tbody>
             """
-            
-            for stat in funnel_stats:
-                funnel_html += f"""
+
+        if first_row is not None:
+            for stat in itertools.chain([first_row], rows):
+                yield f"""
                                 <tr class="{stat['grade']}">
                                     <td>{stat['funnel']}</td>
                                     <td>{stat['exp_rate']}%</td>
                                     <td>{stat['ctrl_rate']}%</td>
                                     <td>{stat['lift']:+.1f}%p</td>
+                                    <td>{stat['lift_ci']}</td>
+                                    <td>{stat['prob_improvement']}</td>
                                     <td>{stat['campaigns']}개</td>
                                     <td>{stat['grade_text']}</td>
                                 </tr>
                 """
-            
-            funnel_html += """
+
+        yield """
                             </tbody>
                         </table>
             """
-            
-            return funnel_html
-            
-        except Exception as e:
-            print(f"⚠️ 퍼널별 분석 오류: {str(e)}")
-            return "<p>퍼널별 분석 중 오류가 발생했습니다.</p>"
     
     def _extract_llm_sections(self, llm_result) -> Dict[str, str]:
         """LLM 결과에서 섹션별 내용 추출 - 개선된 버전"""
@@ -586,63 +628,71 @@ class ComprehensiveHTMLReportGenerator:
                     </ul>
             """
     
+    def _get_keyword_engine(self) -> KeywordIndicatorEngine:
+        """문구를 한 번만 스캔한 키워드 포함 행렬/집계 엔진 반환 (데이터셋별 1회 계산)"""
+        if self._keyword_engine is None:
+            self._keyword_engine = KeywordIndicatorEngine(self.keyword_groups).fit(self.df)
+        return self._keyword_engine
+
     def _calculate_keyword_metrics(self) -> List[Dict[str, Any]]:
         """키워드별 지표 계산"""
         if self.df is None or len(self.df) == 0:
             return []
         
         try:
-            # 주요 키워드 리스트
-            keywords = ['할인', '무료', '즉시', '지금', '쿠폰', '특가', '마감', 'D-DAY', '확정', '예약']
+            # 주요 키워드별 합계는 포함 행렬 x 집계 벡터 곱으로 한 번에 계산됨
+            metrics = self._get_keyword_engine().group_metrics('conversion')
+            # 실행 전체 비교에 대해 다중검정 보정한 키워드별 유의성
+            significance = run_comparisons(self.df, self.keyword_groups)['keyword']
             keyword_metrics = []
             
-            for keyword in keywords:
-                # 키워드가 포함된 문구들 필터링
-                keyword_messages = self.df[self.df['문구'].str.contains(keyword, na=False)]
+            for keyword, row in metrics.iterrows():
+                frequency = int(row['message_count'])
+                if frequency == 0:
+                    continue
                 
-                if len(keyword_messages) > 0:
-                    # 키워드별 평균 Lift 계산 (실시간 계산)
-                    exp_rate = keyword_messages['실험군_1일이내_예약생성'].sum() / keyword_messages['실험군_발송'].sum() if keyword_messages['실험군_발송'].sum() > 0 else 0
-                    ctrl_rate = keyword_messages['대조군_1일이내_예약생성'].sum() / keyword_messages['대조군_발송'].sum() if keyword_messages['대조군_발송'].sum() > 0 else 0
-                    avg_lift = exp_rate - ctrl_rate
-                    
-                    # 키워드별 전환율 계산
-                    total_conversions = keyword_messages['실험군_1일이내_예약생성'].sum()
-                    total_sent = keyword_messages['실험군_발송'].sum()
-                    conversion_rate = (total_conversions / total_sent * 100) if total_sent > 0 else 0
-                    
-                    # 사용 빈도 계산
-                    frequency = len(keyword_messages)
-                    if frequency >= 10:
-                        freq_level = "높음"
-                    elif frequency >= 5:
-                        freq_level = "중간"
-                    else:
-                        freq_level = "낮음"
-                    
-                    keyword_metrics.append({
-                        'keyword': keyword,
-                        'avg_lift': round(avg_lift, 1),
-                        'conversion_rate': round(conversion_rate, 1),
-                        'frequency': freq_level,
-                        'count': frequency
-                    })
+                # 키워드별 평균 Lift 및 포함 문구 전환율
+                avg_lift = row['lift']
+                conversion_rate = row['exp_rate'] * 100
+                
+                # 사용 빈도 계산
+                if frequency >= 10:
+                    freq_level = "높음"
+                elif frequency >= 5:
+                    freq_level = "중간"
+                else:
+                    freq_level = "낮음"
+                
+                keyword_metrics.append({
+                    'keyword': keyword,
+                    'avg_lift': round(avg_lift, 1),
+                    'conversion_rate': round(conversion_rate, 1),
+                    'frequency': freq_level,
+                    'count': frequency,
+                    'q_value': significance.at[keyword, 'q_value'] if keyword in significance.index else np.nan,
+                    'proven': keyword in significance.index and significance.at[keyword, 'verdict'] == SIGNIFICANT_POSITIVE
+                })
             
-            # Lift 기준으로 정렬
-            keyword_metrics.sort(key=lambda x: x['avg_lift'], reverse=True)
+            # 보정 후 유의한 양의 Lift 키워드 우선, 그다음 Lift 기준으로 정렬
+            keyword_metrics.sort(key=lambda x: (x['proven'], x['avg_lift']), reverse=True)
             return keyword_metrics[:5]  # 상위 5개만 반환
             
         except Exception as e:
             print(f"⚠️ 키워드 지표 계산 오류: {str(e)}")
+            self._render_failed = True
             return []
     
     def _generate_keyword_analysis(self) -> str:
         """키워드 분석 테이블 동적 생성 - 1719 HTML 구조"""
+        return ''.join(self._iter_keyword_analysis())
+
+    def _iter_keyword_analysis(self) -> Iterator[str]:
+        """키워드 분석 테이블을 행 단위 HTML 조각으로 생성"""
         keyword_metrics = self._calculate_keyword_metrics()
         
         if not keyword_metrics:
             # 데이터 없음 처리
-            return """
+            yield """
             <div class="insight-section">
                 <h5>📊 전환율 기여 상위 키워드</h5>
                 <table class="analysis-table">
@@ -652,11 +702,12 @@ class ComprehensiveHTMLReportGenerator:
                             <th>평균 Lift</th>
                             <th>포함 문구 전환율</th>
                             <th>사용 빈도</th>
+                            <th>q-value</th>
                         </tr>
                     </thead>
                     <tbody>
                         <tr>
-                            <td colspan="4" style="text-align: center; padding: 20px; color: #666;">
+                            <td colspan="5" style="text-align: center; padding: 20px; color: #666;">
                                 키워드 분석 데이터가 없습니다.
                             </td>
                         </tr>
@@ -664,9 +715,10 @@ class ComprehensiveHTMLReportGenerator:
                 </table>
             </div>
             """
+            return
         
         # 동적 데이터로 테이블 생성
-        table_html = """
+        yield """
             <div class="insight-section">
                 <h5>📊 전환율 기여 상위 키워드</h5>
                 <table class="analysis-table">
@@ -676,6 +728,7 @@ class ComprehensiveHTMLReportGenerator:
                             <th>평균 Lift</th>
                             <th>포함 문구 전환율</th>
                             <th>사용 빈도</th>
+                            <th>q-value</th>
                         </tr>
                     </thead>
                     <tbody>
@@ -690,22 +743,21 @@ class ComprehensiveHTMLReportGenerator:
             else:
                 row_class = "low"
             
-            table_html += f"""
+            yield f"""
                         <tr class="{row_class}">
                             <td>{metric['keyword']}</td>
                             <td>{metric['avg_lift']:+.1f}%p</td>
                             <td>{metric['conversion_rate']}%</td>
                             <td>{metric['frequency']}</td>
+                            <td>{html.escape(format_q_value(metric['q_value']))}</td>
                         </tr>
             """
         
-        table_html += """
+        yield """
                     </tbody>
                 </table>
             </div>
         """
-        
-        return table_html
     
     def _get_top_messages(self) -> List[Dict[str, Any]]:
         """상위 Lift 문구들 추출"""
@@ -713,10 +765,18 @@ class ComprehensiveHTMLReportGenerator:
             return []
         
         try:
-            # Lift 실시간 계산하여 상위 5개 문구 추출
+            # Lift 실시간 계산하여 상위 5개 문구 추출 (보정 후 유의한 양의 Lift 문구 우선)
             self.df['Lift_calculated'] = (self.df['실험군_1일이내_예약생성'] / self.df['실험군_발송'] - 
                                         self.df['대조군_1일이내_예약생성'] / self.df['대조군_발송']).fillna(0)
-            top_messages = self.df.nlargest(5, 'Lift_calculated')
+            significance = run_comparisons(self.df, self.keyword_groups)['campaign']
+            ranking = pd.DataFrame({
+                'proven': significance['verdict'] == SIGNIFICANT_POSITIVE,
+                'lift': self.df['Lift_calculated'],
+            })
+            top_messages = self.df.loc[ranking.sort_values(['proven', 'lift'], ascending=False).index[:5]]
+            
+            # 패턴 분류는 데이터셋당 한 번 계산한 텍스트 피처 행렬에서 조회
+            pattern_classes = get_text_features(self.df)['pattern_class']
             
             patterns = []
             for idx, row in top_messages.iterrows():
@@ -727,49 +787,38 @@ class ComprehensiveHTMLReportGenerator:
                 lift = exp_rate - ctrl_rate
                 
                 # 패턴 타입 결정
-                pattern_type = self._analyze_message_pattern(message)
+                pattern_type = pattern_classes.loc[idx]
                 
                 patterns.append({
                     'type': pattern_type,
                     'message': message[:100] + "..." if len(message) > 100 else message,
-                    'lift': lift * 100  # 백분율로 변환
+                    'lift': lift * 100,  # 백분율로 변환
+                    'q_value': significance.at[idx, 'q_value']
                 })
             
             return patterns
             
         except Exception as e:
             print(f"⚠️ 상위 문구 추출 오류: {str(e)}")
+            self._render_failed = True
             return []
     
     def _analyze_message_pattern(self, message: str) -> str:
         """문구 패턴 분석 (더 구체적인 분류)"""
-        # 우선순위에 따라 패턴 분류
-        if '전기차' in message and '주행요금' in message:
-            return "전기차 혜택 패턴"
-        elif '할인' in message and ('60%' in message or '65%' in message or '75%' in message):
-            return "대폭 할인 패턴"
-        elif '지금' in message and ('놓치' in message or '마감' in message):
-            return "긴급성 FOMO 패턴"
-        elif '지금' in message or '바로' in message or '즉시' in message:
-            return "즉시 행동 패턴"
-        elif '마감' in message or 'D-DAY' in message or '놓치' in message:
-            return "FOMO 패턴"
-        elif '#' in message or '님' in message:
-            return "개인화 패턴"
-        elif '무료' in message or '0원' in message:
-            return "무료 혜택 패턴"
-        elif '할인' in message:
-            return "할인 혜택 패턴"
-        else:
-            return "일반 안내 패턴"
+        # 우선순위 규칙은 text_features.PATTERN_RULES에서 관리
+        return classify_message_pattern(message)
     
     def _generate_pattern_analysis(self) -> str:
         """문구 패턴 분석 동적 생성 - 1719 HTML 구조"""
+        return ''.join(self._iter_pattern_analysis())
+
+    def _iter_pattern_analysis(self) -> Iterator[str]:
+        """문구 패턴 그리드를 항목 단위 HTML 조각으로 생성"""
         top_patterns = self._get_top_messages()
         
         if not top_patterns:
             # 데이터 없음 처리
-            return """
+            yield """
             <div class="insight-section">
                 <h5>🎯 효과적 문구 패턴</h5>
                 <div class="pattern-grid">
@@ -780,29 +829,28 @@ class ComprehensiveHTMLReportGenerator:
                 </div>
             </div>
             """
+            return
         
         # 동적 데이터로 패턴 그리드 생성
-        pattern_html = """
+        yield """
             <div class="insight-section">
                 <h5>🎯 효과적 문구 패턴</h5>
                 <div class="pattern-grid">
         """
         
         for pattern in top_patterns:
-            pattern_html += f"""
+            yield f"""
                 <div class="pattern-item">
                     <strong>{pattern['type']}:</strong><br>
                     "{pattern['message']}"<br>
-                    <span class="conversion-rate">Lift: {pattern['lift']:+.1f}%p</span>
+                    <span class="conversion-rate">Lift: {pattern['lift']:+.1f}%p (q={html.escape(format_q_value(pattern['q_value']))})</span>
                 </div>
             """
         
-        pattern_html += """
+        yield """
                 </div>
             </div>
         """
-        
-        return pattern_html
     
     def _analyze_tone_effectiveness(self) -> List[Dict[str, str]]:
         """톤앤매너 효과성 분석"""
@@ -812,10 +860,13 @@ class ComprehensiveHTMLReportGenerator:
         try:
             tone_analysis = []
             
+            # 키워드 그룹은 한 번의 스캔으로 만든 포함 행렬에서 집계
+            engine = self._get_keyword_engine()
+            
             # 전체 톤 분석
             total_messages = len(self.df)
             emoji_messages = len(self.df[self.df['문구'].str.contains('[😀-🙏]', na=False)])
-            name_messages = len(self.df[self.df['문구'].str.contains('#|님', na=False)])
+            name_messages = engine.messages_with_any('personalization')
             
             tone_analysis.append({
                 'type': '전체 톤',
@@ -823,8 +874,7 @@ class ComprehensiveHTMLReportGenerator:
             })
             
             # 친근함 분석
-            friendly_keywords = ['님', '해주세요', '확정해', '이용해보세요']
-            friendly_count = sum([len(self.df[self.df['문구'].str.contains(keyword, na=False)]) for keyword in friendly_keywords])
+            friendly_count = engine.group_message_count('friendly')
             
             tone_analysis.append({
                 'type': '친근함',
@@ -832,8 +882,7 @@ class ComprehensiveHTMLReportGenerator:
             })
             
             # 긴급성 분석
-            urgency_keywords = ['지금', '바로', '빠르게', '오늘', '마감']
-            urgency_count = sum([len(self.df[self.df['문구'].str.contains(keyword, na=False)]) for keyword in urgency_keywords])
+            urgency_count = engine.group_message_count('urgency')
             
             tone_analysis.append({
                 'type': '긴급성',
@@ -841,8 +890,7 @@ class ComprehensiveHTMLReportGenerator:
             })
             
             # 감정적 어필 분석
-            fomo_keywords = ['놓치', '마감', 'D-DAY', '한정']
-            fomo_count = sum([len(self.df[self.df['문구'].str.contains(keyword, na=False)]) for keyword in fomo_keywords])
+            fomo_count = engine.group_message_count('fomo')
             
             tone_analysis.append({
                 'type': '감정적 어필',
@@ -853,15 +901,20 @@ class ComprehensiveHTMLReportGenerator:
             
         except Exception as e:
             print(f"⚠️ 톤앤매너 분석 오류: {str(e)}")
+            self._render_failed = True
             return []
     
     def _generate_tone_effectiveness(self) -> str:
         """톤앤매너 효과성 동적 생성 - 1719 HTML 구조"""
+        return ''.join(self._iter_tone_effectiveness())
+
+    def _iter_tone_effectiveness(self) -> Iterator[str]:
+        """톤앤매너 그리드를 항목 단위 HTML 조각으로 생성"""
         tone_analysis = self._analyze_tone_effectiveness()
         
         if not tone_analysis:
             # 데이터 없음 처리
-            return """
+            yield """
             <div class="insight-section">
                 <h5>📈 톤앤매너 효과성</h5>
                 <div class="pattern-grid">
@@ -872,49 +925,65 @@ class ComprehensiveHTMLReportGenerator:
                 </div>
             </div>
             """
+            return
         
         # 동적 데이터로 톤앤매너 그리드 생성
-        tone_html = """
+        yield """
             <div class="insight-section">
                 <h5>📈 톤앤매너 효과성</h5>
                 <div class="pattern-grid">
         """
         
         for tone in tone_analysis:
-            tone_html += f"""
+            yield f"""
                 <div class="pattern-item">
                     <strong>{tone['type']}:</strong><br>
                     <span>{tone['description']}</span>
                 </div>
             """
         
-        tone_html += """
+        yield """
                 </div>
             </div>
         """
         
-        return tone_html
-        
     def generate_new_executive_report(self) -> str:
         """새로운 경영진용 2박스 구조 보고서 생성"""
+        return ''.join(self.iter_new_executive_report())
+
+    def write_new_executive_report(self, file_obj: TextIO) -> int:
+        """경영진용 보고서를 섹션 단위로 파일 핸들에 스트리밍 저장 (기록한 문자 수 반환)"""
+        written = 0
+        for chunk in self.iter_new_executive_report():
+            file_obj.write(chunk)
+            written += len(chunk)
+        return written
+
+    async def astream_new_executive_report(self, write: Callable[[bytes], Any]) -> int:
+        """경영진용 보고서를 비동기 HTTP 응답 등 write 콜백으로 스트리밍 (기록한 바이트 수 반환)"""
+        written = 0
+        for chunk in self.iter_new_executive_report():
+            data = chunk.encode('utf-8')
+            result = write(data)
+            if inspect.isawaitable(result):
+                await result
+            written += len(data)
+            # 섹션 사이에 이벤트 루프 양보
+            await asyncio.sleep(0)
+        return written
+
+    def iter_new_executive_report(self) -> Iterator[str]:
+        """새로운 경영진용 2박스 구조 보고서를 섹션 단위 HTML 조각으로 생성"""
         try:
-            df = pd.read_csv(self.csv_file_path)
+            if self.df is None:
+                self.load_data()
+            df = self.df.copy()
             
             # 주차 계산
             from datetime import datetime
             today = datetime.now()
             week_number = today.isocalendar()[1]
             
-            # 동적 핵심 지표 계산
-            core_metrics = self._calculate_core_metrics()
-            
-            # 기존 변수들도 유지 (호환성을 위해)
-            total_campaigns = len(df)
-            total_conversions = core_metrics['experiment_conversions']
-            total_sent = core_metrics['total_sent']
-            exp_rate = core_metrics['experiment_conversion_rate'] / 100
-            total_lift = core_metrics['average_lift'] / 100
-            
             # 카테고리별 분석 (Lift 기준)
             category_analysis = ""
             if '목적' in df.columns and '실험군_발송' in df.columns and '실험군_1일이내_예약생성' in df.columns and '대조군_발송' in df.columns and '대조군_1일이내_예약생성' in df.columns:
@@ -950,7 +1019,7 @@ class ComprehensiveHTMLReportGenerator:
                 """
             
             # 퍼널별 그룹 분석 (Lift 기준)
-            funnel_analysis = ""
+            has_funnel_section = False
             if '퍼널' in df.columns and '실험군_발송' in df.columns and '실험군_1일이내_예약생성' in df.columns and '대조군_발송' in df.columns and '대조군_1일이내_예약생성' in df.columns:
                 # Lift 계산 (올바른 계산)
                 df['exp_rate'] = df['실험군_1일이내_예약생성'] / df['실험군_발송']
@@ -968,184 +1037,7 @@ class ComprehensiveHTMLReportGenerator:
                 medium_performers = funnel_stats[(funnel_stats['lift_pct'] >= q33) & (funnel_stats['lift_pct'] < q67)]
                 low_performers = funnel_stats[funnel_stats['lift_pct'] < q33]
                 
-                # 동적 퍼널별 분석 생성
-                funnel_table_html = self._generate_funnel_analysis()
-                if False:  # 기존 코드 비활성화
-                    funnel_table_html = f"""
-                    <div class="funnel-analysis-table">
-                        <h4>🎯 퍼널별 Lift 성과 분석</h4>
-                        <table class="analysis-table">
-                            <thead>
-                                <tr>
-                                    <th>퍼널</th>
-                                    <th>실험군 전환율</th>
-                                    <th>대조군 전환율</th>
-                                    <th>Lift</th>
-                                    <th>캠페인 수</th>
-                                    <th>성과 등급</th>
-                                </tr>
-                            </thead>
-                            <tbody>
-                    """
-                    
-                    # 3분위수 기준 계산
-                    q33 = funnel_stats['lift_pct'].quantile(0.33)
-                    q67 = funnel_stats['lift_pct'].quantile(0.67)
-                    
-                    for _, row in funnel_stats.iterrows():
-                        # 성과 등급 결정 (3분위수 기준)
-                        if row['lift_pct'] >= q67:
-                            grade = "상위"
-                            grade_class = "high"
-                        elif row['lift_pct'] >= q33:
-                            grade = "중위"
-                            grade_class = "medium"
-                        else:
-                            grade = "하위"
-                            grade_class = "low"
-                        
-                        # 실험군/대조군 전환율 계산 (퍼널별 전체 전환율)
-                        funnel_data = df[df['퍼널'] == row['퍼널']]
-                        exp_rate = funnel_data['실험군_1일이내_예약생성'].sum() / funnel_data['실험군_발송'].sum()
-                        ctrl_rate = funnel_data['대조군_1일이내_예약생성'].sum() / funnel_data['대조군_발송'].sum()
-                        
-                        # 실시간 Lift 계산
-                        lift = exp_rate - ctrl_rate
-                        
-                        funnel_table_html += f"""
-                                <tr class="{grade_class}">
-                                    <td>{row['퍼널']}</td>
-                                    <td>{exp_rate*100:.1f}%</td>
-                                    <td>{ctrl_rate*100:.1f}%</td>
-                                    <td>{lift*100:+.1f}%p</td>
-                                    <td>{int(row['count'])}</td>
-                                    <td><span class="grade-badge {grade_class}">{grade}</span></td>
-                                </tr>
-                        """
-                    
-                    funnel_table_html += """
-                            </tbody>
-                        </table>
-        </div>
-        """
-        
-                # 퍼널별 메시지 전략 제안 섹션 추가
-                strategy_section = ""
-                if len(funnel_stats) > 0:
-                    # 3분위수 기준 그룹화 (첫 번째 계산과 동일한 기준 사용)
-                    q33 = funnel_stats['lift_pct'].quantile(0.33)
-                    q67 = funnel_stats['lift_pct'].quantile(0.67)
-                    
-                    high_group = funnel_stats[funnel_stats['lift_pct'] >= q67]
-                    medium_group = funnel_stats[(funnel_stats['lift_pct'] >= q33) & (funnel_stats['lift_pct'] < q67)]
-                    low_group = funnel_stats[funnel_stats['lift_pct'] < q33]
-                    
-                    # Funnel Strategy Agent 결과 파싱
-                    strategy_data = {}
-                    
-                    # 디버깅: Agent 결과 확인
-                    print(f"🔍 Agent 결과 디버깅:")
-                    print(f"  - self.agent_results 존재: {self.agent_results is not None}")
-                    if self.agent_results:
-                        print(f"  - Agent 결과 키들: {list(self.agent_results.keys())}")
-                        print(f"  - funnel_strategy_analysis 존재: {'funnel_strategy_analysis' in self.agent_results}")
-                        if 'funnel_strategy_analysis' in self.agent_results:
-                            print(f"  - funnel_strategy_analysis 타입: {type(self.agent_results['funnel_strategy_analysis'])}")
-                            print(f"  - funnel_strategy_analysis 내용 (처음 200자): {str(self.agent_results['funnel_strategy_analysis'])[:200]}")
-                    
-                    if self.agent_results and 'funnel_strategy_analysis' in self.agent_results:
-                        try:
-                            import json
-                            strategy_result = self.agent_results['funnel_strategy_analysis']
-                            if isinstance(strategy_result, str):
-                                strategy_data = json.loads(strategy_result)
-                            else:
-                                strategy_data = strategy_result
-                        except Exception as e:
-                            print(f"⚠️ 전략 데이터 파싱 실패: {e}")
-                            strategy_data = {}
-                    
-                    # 디버깅: 파싱된 strategy_data 확인
-                    print(f"🔍 파싱된 strategy_data:")
-                    print(f"  - strategy_data 존재: {bool(strategy_data)}")
-                    if strategy_data:
-                        print(f"  - strategy_data 키들: {list(strategy_data.keys())}")
-                        if 'high_performance_group' in strategy_data:
-                            high_funnels = strategy_data['high_performance_group'].get('funnels', [])
-                            high_funnel_names = [f['funnel'] for f in high_funnels] if high_funnels else []
-                            print(f"  - 상위 그룹 퍼널: {high_funnel_names}")
-                    else:
-                        print(f"  - strategy_data가 비어있음")
-                    
-                    # 그룹별 전략 HTML 생성 함수
-                    def generate_group_strategy(group_type, group_df, q_range):
-                        group_key = f"{group_type}_performance_group"
-                        if strategy_data and group_key in strategy_data:
-                            group_info = strategy_data[group_key]
-                            
-                            # 퍼널 태그 - strategy_data에서 퍼널 목록 추출
-                            funnel_names = []
-                            if 'funnels' in group_info:
-                                funnel_names = [funnel['funnel'] for funnel in group_info['funnels']]
-                            else:
-                                # fallback: group_df 사용
-                                funnel_names = [row["퍼널"] for _, row in group_df.iterrows()]
-                            
-                            funnel_tags = ''.join([f'<span class="funnel-tag {group_type}">{name}</span>' for name in funnel_names])
-                            
-                            # 전략 정보 추출 (새로운 JSON 구조)
-                            strategy = group_info.get('strategy', '데이터 기반 전략 수립 필요')
-                            message_pattern = group_info.get('message_pattern', '패턴 분석 중')
-                            common_features = group_info.get('common_features', [])
-                            recommendations = group_info.get('recommendations', [])
-                            keywords = group_info.get('keywords', [])
-                            funnel_top_messages = group_info.get('funnel_top_messages', [])
-                            
-                            # 퍼널별 최고 성과 문구를 리스트로 포맷팅
-                            funnel_msg_list = '<br>'.join([f'• {msg}' for msg in funnel_top_messages]) if funnel_top_messages else '• 분석 중'
-                            
-                            return f"""
-                            <div class="strategy-group {group_type}-group">
-                                <h5>{'🎯' if group_type == 'high' else '⚖️' if group_type == 'medium' else '⚠️'} {q_range}</h5>
-                                <div class="group-funnels">{funnel_tags}</div>
-                                <div class="strategy-recommendation">
-                                    <strong>전략:</strong> {strategy}<br>
-                                    <strong>메시지 패턴:</strong> {message_pattern}<br>
-                                    <strong>공통 특징:</strong> {', '.join(common_features) if common_features else '분석 중'}<br>
-                                    <strong>구체적 제안:</strong><br>{('<br>'.join([f'  {i+1}. {rec}' for i, rec in enumerate(recommendations)]) if recommendations else '  분석 중')}<br>
-                                    <strong>핵심 키워드:</strong> {', '.join([f'"{k}"' for k in keywords]) if keywords else '분석 중'}<br>
-                                    <strong>퍼널별 가장 효과적인 문구 (전환율 포함):</strong><br>{funnel_msg_list}
-                    </div>
-                </div>
-                            """
-                        else:
-                            # 기본 하드코딩 (Agent 결과 없을 때)
-                            funnel_names = [row["퍼널"] for _, row in group_df.iterrows()]
-                            funnel_tags = ''.join([f'<span class="funnel-tag {group_type}">{name}</span>' for name in funnel_names])
-                            return f"""
-                            <div class="strategy-group {group_type}-group">
-                                <h5>{'🎯' if group_type == 'high' else '⚖️' if group_type == 'medium' else '⚠️'} {q_range}</h5>
-                                <div class="group-funnels">{funnel_tags}</div>
-                                <div class="strategy-recommendation">
-                                    <strong>전략:</strong> Agent 분석 결과 대기 중<br>
-                                    <strong>메시지 패턴:</strong> 분석 중<br>
-                                    <strong>공통점:</strong> 분석 중
-            </div>
-                            </div>
-                            """
-                    
-                    strategy_section = f"""
-                    <div class="funnel-strategy-section">
-                        <h4>💡 퍼널별 메시지 전략 제안 (3분위수 기준)</h4>
-                        <div class="strategy-groups">
-                            {generate_group_strategy('high', high_group, '상위 그룹')}
-                            {generate_group_strategy('medium', medium_group, '중위 그룹')}
-                            {generate_group_strategy('low', low_group, '하위 그룹')}
-                    </div>
-                </div>
-                    """
-                
-                funnel_analysis = funnel_table_html + strategy_section
+                has_funnel_section = True
             
             # 문구 효과성 분석 (Lift 기준) - 두 번째 박스에서 처리하므로 여기서는 제거
             message_analysis = ""
@@ -1187,8 +1079,107 @@ class ComprehensiveHTMLReportGenerator:
             except Exception as e:
                 print(f"Boxplot 생성 오류: {str(e)}")
                 boxplot_html = ""
-            
-            html_content = f"""
+        except Exception as e:
+            yield f"<div class='error'>새로운 경영진용 보고서 생성 오류: {str(e)}</div>"
+            return
+
+        try:
+            metric_inputs = self._section_inputs(COUNT_COLUMNS)
+            # 다중검정 보정은 실행 전체 비교(퍼널/채널/목적 포함)와 설정값에 의존
+            significance_inputs = (self._section_inputs(['문구', '퍼널', '채널', '목적'] + COUNT_COLUMNS),
+                                   settings.LIFT_SIGNIFICANCE_THRESHOLD, settings.MULTIPLE_TESTING_METHOD,
+                                   settings.MIN_SAMPLE_SIZE, settings.CONFIDENCE_INTERVAL)
+
+            yield self._render_executive_head()
+            yield from self._iter_cached_section(
+                'core_metrics', (metric_inputs, week_number),
+                lambda: iter([self._render_core_metrics_grid(week_number)]))
+            if has_funnel_section:
+                # 퍼널 테이블은 행 단위로 스트리밍
+                yield from self._iter_cached_section(
+                    'funnel_table', (self._section_inputs(['퍼널'] + COUNT_COLUMNS), settings.CONFIDENCE_INTERVAL,
+                                     settings.BOOTSTRAP_METHOD, settings.BOOTSTRAP_RESAMPLES,
+                                     settings.BOOTSTRAP_SEED, settings.BOOTSTRAP_CHUNK, settings.BAYES_PRIOR,
+                                     settings.BAYES_DRAWS, settings.BAYES_SEED),
+                    self._iter_funnel_analysis)
+                yield from self._iter_cached_section(
+                    'funnel_strategy', (funnel_stats, self.agent_results.get('funnel_strategy_analysis')),
+                    lambda: iter([self._generate_funnel_strategy_section(funnel_stats)]))
+            yield """
+                    </div>
+                    
+                    <!-- 두 번째 박스: 문구 효과성 분석 & 키워드 패턴 -->
+                    <div class="message-effectiveness-box">
+                        <h2>📈 문구 효과성 분석 & 키워드 패턴</h2>
+                        
+                        """ + message_analysis + """
+                        
+                        <div class="llm-insights">
+                            <h4>🧠 LLM 기반 문구 분석 인사이트</h4>
+                            
+                            <div class="llm-insights-text-box">
+                                <h5>📋 LLM 분석 종합 결과</h5>
+                                <div class="llm-insights-content">
+                                    """
+            yield from self._iter_cached_section(
+                'llm_box', (self.agent_results.get('llm_analysis', ''),),
+                lambda: iter([self._generate_llm_analysis_content()]))
+            yield """
+                                </div>
+                </div>
+                
+                            """
+            yield from self._iter_cached_section('keyword_table', (*significance_inputs, self.keyword_groups), self._iter_keyword_analysis)
+            yield from self._iter_cached_section('pattern_grid', (*significance_inputs, self.keyword_groups), self._iter_pattern_analysis)
+            yield from self._iter_cached_section('tone_table', (self._section_inputs(['문구']), self.keyword_groups), self._iter_tone_effectiveness)
+            yield """
+                        </div>
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+        except Exception as e:
+            yield f"<div class='error'>새로운 경영진용 보고서 생성 오류: {str(e)}</div>"
+        finally:
+            if self.section_cache is not None:
+                self.section_cache.save()
+
+    def _section_inputs(self, columns: Sequence[str]) -> pd.DataFrame:
+        """섹션 fingerprint 계산용 입력 컬럼 추출 (없는 컬럼은 제외)"""
+        if self.df is None:
+            return pd.DataFrame()
+        return self.df[[c for c in columns if c in self.df.columns]]
+
+    def _iter_cached_section(self, section: str, inputs: tuple, render: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """
+        입력 fingerprint가 이전 실행과 같으면 캐시된 섹션 HTML을, 다르면 새로 렌더링한 조각을 반환
+
+        렌더링 중 오류로 대체 출력(오류 안내, 빈 결과)을 사용한 섹션은 다음 실행에서 다시 렌더링하도록 캐시하지 않습니다.
+        """
+        if self.section_cache is None:
+            yield from render()
+            return
+
+        fingerprint = compute_section_fingerprint(*inputs)
+        cached_html = self.section_cache.get(section, fingerprint)
+        if cached_html is not None:
+            yield cached_html
+            return
+
+        self._render_failed = False
+        chunks = []
+        for chunk in render():
+            chunks.append(chunk)
+            yield chunk
+        if self._render_failed:
+            print(f"⚠️ {section} 섹션 렌더링 오류로 캐시 저장 생략")
+            return
+        self.section_cache.put(section, fingerprint, ''.join(chunks))
+
+    def _render_executive_head(self) -> str:
+        """경영진용 보고서 헤더(스타일, 생성일) HTML 생성"""
+        return f"""
             <!DOCTYPE html>
         <html lang="ko">
         <head>
@@ -1503,7 +1494,18 @@ class ComprehensiveHTMLReportGenerator:
                     <!-- 첫 번째 박스: Matt Agent : 퍼널 별 성과 분석 -->
                     <div class="executive-summary-box">
                         <h2>Matt Agent: 퍼널 별 성과 분석</h2>
-                        
+                        """
+
+    def _render_core_metrics_grid(self, week_number: int) -> str:
+        """핵심 지표 그리드 HTML 생성"""
+        # 동적 핵심 지표 계산
+        core_metrics = self._calculate_core_metrics()
+        total_conversions = core_metrics['experiment_conversions']
+        total_sent = core_metrics['total_sent']
+        exp_rate = core_metrics['experiment_conversion_rate'] / 100
+        total_lift = core_metrics['average_lift'] / 100
+
+        return f"""
                         <div class="key-metrics-grid">
                             <div class="metric-box">
                                 <div class="metric-label">현재 주차</div>
@@ -1525,42 +1527,130 @@ class ComprehensiveHTMLReportGenerator:
                     </div>
                 </div>
                 
-                        {funnel_analysis}
-                    </div>
+                        """
+
+    def _generate_funnel_strategy_section(self, funnel_stats: pd.DataFrame) -> str:
+        """퍼널별 메시지 전략 제안 섹션 생성 (3분위수 기준)"""
+        strategy_section = ""
+        if len(funnel_stats) > 0:
+            # 3분위수 기준 그룹화 (첫 번째 계산과 동일한 기준 사용)
+            q33 = funnel_stats['lift_pct'].quantile(0.33)
+            q67 = funnel_stats['lift_pct'].quantile(0.67)
+            
+            high_group = funnel_stats[funnel_stats['lift_pct'] >= q67]
+            medium_group = funnel_stats[(funnel_stats['lift_pct'] >= q33) & (funnel_stats['lift_pct'] < q67)]
+            low_group = funnel_stats[funnel_stats['lift_pct'] < q33]
+            
+            # Funnel Strategy Agent 결과 파싱
+            strategy_data = {}
+            
+            # 디버깅: Agent 결과 확인
+            print(f"🔍 Agent 결과 디버깅:")
+            print(f"  - self.agent_results 존재: {self.agent_results is not None}")
+            if self.agent_results:
+                print(f"  - Agent 결과 키들: {list(self.agent_results.keys())}")
+                print(f"  - funnel_strategy_analysis 존재: {'funnel_strategy_analysis' in self.agent_results}")
+                if 'funnel_strategy_analysis' in self.agent_results:
+                    print(f"  - funnel_strategy_analysis 타입: {type(self.agent_results['funnel_strategy_analysis'])}")
+                    print(f"  - funnel_strategy_analysis 내용 (처음 200자): {str(self.agent_results['funnel_strategy_analysis'])[:200]}")
+            
+            if self.agent_results and 'funnel_strategy_analysis' in self.agent_results:
+                try:
+                    import json
+                    strategy_result = self.agent_results['funnel_strategy_analysis']
+                    if isinstance(strategy_result, str):
+                        strategy_data = json.loads(strategy_result)
+                    else:
+                        strategy_data = strategy_result
+                except Exception as e:
+                    print(f"⚠️ 전략 데이터 파싱 실패: {e}")
+                    strategy_data = {}
+            
+            # 디버깅: 파싱된 strategy_data 확인
+            print(f"🔍 파싱된 strategy_data:")
+            print(f"  - strategy_data 존재: {bool(strategy_data)}")
+            if strategy_data:
+                print(f"  - strategy_data 키들: {list(strategy_data.keys())}")
+                if 'high_performance_group' in strategy_data:
+                    high_funnels = strategy_data['high_performance_group'].get('funnels', [])
+                    high_funnel_names = [f['funnel'] for f in high_funnels] if high_funnels else []
+                    print(f"  - 상위 그룹 퍼널: {high_funnel_names}")
+            else:
+                print(f"  - strategy_data가 비어있음")
+            
+            # 그룹별 전략 HTML 생성 함수
+            def generate_group_strategy(group_type, group_df, q_range):
+                group_key = f"{group_type}_performance_group"
+                if strategy_data and group_key in strategy_data:
+                    group_info = strategy_data[group_key]
                     
-                    <!-- 두 번째 박스: 문구 효과성 분석 & 키워드 패턴 -->
-                    <div class="message-effectiveness-box">
-                        <h2>📈 문구 효과성 분석 & 키워드 패턴</h2>
-                        
-                        {message_analysis}
-                        
-                        <div class="llm-insights">
-                            <h4>🧠 LLM 기반 문구 분석 인사이트</h4>
-                            
-                            <div class="llm-insights-text-box">
-                                <h5>📋 LLM 분석 종합 결과</h5>
-                                <div class="llm-insights-content">
-                                    {self._generate_llm_analysis_content()}
-                                </div>
-                </div>
-                
-                            {self._generate_keyword_analysis()}
-                            {self._generate_pattern_analysis()}
-                            {self._generate_tone_effectiveness()}
-                        </div>
-                </div>
+                    # 퍼널 태그 - strategy_data에서 퍼널 목록 추출
+                    funnel_names = []
+                    if 'funnels' in group_info:
+                        funnel_names = [funnel['funnel'] for funnel in group_info['funnels']]
+                    else:
+                        # fallback: group_df 사용
+                        funnel_names = [row["퍼널"] for _, row in group_df.iterrows()]
+                    
+                    funnel_tags = ''.join([f'<span class="funnel-tag {group_type}">{name}</span>' for name in funnel_names])
+                    
+                    # 전략 정보 추출 (새로운 JSON 구조)
+                    strategy = group_info.get('strategy', '데이터 기반 전략 수립 필요')
+                    message_pattern = group_info.get('message_pattern', '패턴 분석 중')
+                    common_features = group_info.get('common_features', [])
+                    recommendations = group_info.get('recommendations', [])
+                    keywords = group_info.get('keywords', [])
+                    funnel_top_messages = group_info.get('funnel_top_messages', [])
+                    
+                    # 퍼널별 최고 성과 문구를 리스트로 포맷팅
+                    funnel_msg_list = '<br>'.join([f'• {msg}' for msg in funnel_top_messages]) if funnel_top_messages else '• 분석 중'
+                    
+                    return f"""
+                    <div class="strategy-group {group_type}-group">
+                        <h5>{'🎯' if group_type == 'high' else '⚖️' if group_type == 'medium' else '⚠️'} {q_range}</h5>
+                        <div class="group-funnels">{funnel_tags}</div>
+                        <div class="strategy-recommendation">
+                            <strong>전략:</strong> {strategy}<br>
+                            <strong>메시지 패턴:</strong> {message_pattern}<br>
+                            <strong>공통 특징:</strong> {', '.join(common_features) if common_features else '분석 중'}<br>
+                            <strong>구체적 제안:</strong><br>{('<br>'.join([f'  {i+1}. {rec}' for i, rec in enumerate(recommendations)]) if recommendations else '  분석 중')}<br>
+                            <strong>핵심 키워드:</strong> {', '.join([f'"{k}"' for k in keywords]) if keywords else '분석 중'}<br>
+                            <strong>퍼널별 가장 효과적인 문구 (전환율 포함):</strong><br>{funnel_msg_list}
             </div>
-        </body>
-        </html>
-        """
-            
-            return html_content
+        </div>
+                    """
+                else:
+                    # 기본 하드코딩 (Agent 결과 없을 때)
+                    funnel_names = [row["퍼널"] for _, row in group_df.iterrows()]
+                    funnel_tags = ''.join([f'<span class="funnel-tag {group_type}">{name}</span>' for name in funnel_names])
+                    return f"""
+                    <div class="strategy-group {group_type}-group">
+                        <h5>{'🎯' if group_type == 'high' else '⚖️' if group_type == 'medium' else '⚠️'} {q_range}</h5>
+                        <div class="group-funnels">{funnel_tags}</div>
+                        <div class="strategy-recommendation">
+                            <strong>전략:</strong> Agent 분석 결과 대기 중<br>
+                            <strong>메시지 패턴:</strong> 분석 중<br>
+                            <strong>공통점:</strong> 분석 중
+    </div>
+                    </div>
+                    """
             
-        except Exception as e:
-            return f"<div class='error'>새로운 경영진용 보고서 생성 오류: {str(e)}</div>"
+            strategy_section = f"""
+            <div class="funnel-strategy-section">
+                <h4>💡 퍼널별 메시지 전략 제안 (3분위수 기준)</h4>
+                <div class="strategy-groups">
+                    {generate_group_strategy('high', high_group, '상위 그룹')}
+                    {generate_group_strategy('medium', medium_group, '중위 그룹')}
+                    {generate_group_strategy('low', low_group, '하위 그룹')}
+            </div>
+        </div>
+            """
+
+        return strategy_section
+
         
-    def generate_comprehensive_report(self, agent_results: Dict[str, Any]) -> str:
-        """종합 리포트 생성"""
+    def generate_comprehensive_report(self, agent_results: Dict[str, Any], file_tag: str = "") -> str:
+        """종합 리포트 생성 (file_tag 지정 시 파일명에 포함 - 여러 데이터셋 동시 생성 시 구분용)"""
         print("🚀 종합 HTML 리포트 생성 시작...")
         
         # 데이터 로드
@@ -1569,9 +1659,6 @@ class ComprehensiveHTMLReportGenerator:
         # Agent 결과 설정
         self.set_agent_results(agent_results)
         
-        # HTML 리포트 생성 (2박스 구조)
-        html_content = self.generate_new_executive_report()
-        
         # 파일 저장 (날짜시간 prefix 추가)
         datetime_prefix = get_datetime_prefix()
         
@@ -1581,17 +1668,21 @@ class ComprehensiveHTMLReportGenerator:
         reports_dir = f"outputs/reports/{today}"
         os.makedirs(reports_dir, exist_ok=True)
         
-        report_path = f"{reports_dir}/{datetime_prefix}_comprehensive_data_analysis_report.html"
+        tag = f"_{file_tag}" if file_tag else ""
+        report_path = f"{reports_dir}/{datetime_prefix}{tag}_comprehensive_data_analysis_report.html"
         with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+            # HTML 리포트 생성 (2박스 구조) - 섹션 단위 스트리밍 저장
+            self.write_new_executive_report(f)
             
         print(f"✅ 종합 HTML 리포트 생성 완료: {report_path}")
         return report_path
 
-def create_comprehensive_html_report(csv_file_path: str, agent_results: Dict[str, Any]) -> str:
+def create_comprehensive_html_report(csv_file_path: str, agent_results: Dict[str, Any],
+                                     section_cache: Optional[ReportSectionCache] = None,
+                                     file_tag: str = "") -> str:
     """종합 HTML 리포트 생성 함수"""
-    generator = ComprehensiveHTMLReportGenerator(csv_file_path)
-    return generator.generate_comprehensive_report(agent_results)
+    generator = ComprehensiveHTMLReportGenerator(csv_file_path, section_cache=section_cache)
+    return generator.generate_comprehensive_report(agent_results, file_tag=file_tag)
 
 if __name__ == "__main__":
     # 테스트용
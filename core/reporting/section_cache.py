@@ -0,0 +1,91 @@
+"""
+리포트 섹션 단위 증분 재생성을 위한 fingerprint 캐시
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from core.analysis.dataset_cache import dataset_path_key
+
+# 섹션 렌더링 로직이 바뀌면 올려서 기존 캐시를 무효화
+SECTION_CACHE_VERSION = 1
+
+SECTION_CACHE_DIR = "outputs/reports/section_cache"
+
+
+def compute_section_fingerprint(*inputs: Any) -> str:
+    """섹션 입력 데이터(DataFrame/Series/Agent 결과 등)의 sha256 fingerprint 계산"""
+    digest = hashlib.sha256(f"v{SECTION_CACHE_VERSION}".encode("utf-8"))
+    for value in inputs:
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            # 컬럼/인덱스 구조와 행 단위 해시를 함께 반영
+            structure = list(value.columns) if isinstance(value, pd.DataFrame) else value.name
+            digest.update(repr(structure).encode("utf-8"))
+            digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+        else:
+            digest.update(json.dumps(value, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class ReportSectionCache:
+    """섹션별 fingerprint와 렌더링된 HTML 조각을 리포트 옆에 JSON으로 보관하는 캐시"""
+
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        self.sections: Dict[str, Dict[str, str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._load()
+
+    @classmethod
+    def for_dataset(cls, csv_file_path: str, cache_dir: str = SECTION_CACHE_DIR) -> "ReportSectionCache":
+        """데이터셋 경로별 캐시 파일을 사용하는 인스턴스 생성"""
+        return cls(os.path.join(cache_dir, f"{dataset_path_key(csv_file_path)}.json"))
+
+    def _load(self):
+        """캐시 파일 로드 (버전 불일치/손상 시 빈 캐시로 시작)"""
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            if payload.get("version") == SECTION_CACHE_VERSION:
+                self.sections = payload.get("sections", {})
+        except Exception as e:
+            print(f"⚠️ 섹션 캐시 로드 실패 (새로 생성): {str(e)}")
+            self.sections = {}
+
+    def get(self, section: str, fingerprint: str) -> Optional[str]:
+        """fingerprint가 일치하는 섹션 HTML 반환 (없으면 None)"""
+        entry = self.sections.get(section)
+        if entry and entry.get("fingerprint") == fingerprint:
+            self.hits += 1
+            return entry.get("html")
+        self.misses += 1
+        return None
+
+    def put(self, section: str, fingerprint: str, html: str):
+        """섹션 HTML과 fingerprint 저장"""
+        self.sections[section] = {"fingerprint": fingerprint, "html": html}
+        self._dirty = True
+
+    def save(self):
+        """변경된 캐시를 파일로 저장"""
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": SECTION_CACHE_VERSION, "sections": self.sections}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+            self._dirty = False
+            print(f"💾 섹션 캐시 저장: {self.cache_path} (재사용 {self.hits}개, 재생성 {self.misses}개)")
+        except Exception as e:
+            print(f"⚠️ 섹션 캐시 저장 실패: {str(e)}")
@@ -1,11 +1,15 @@
 """Context 전달이 포함된 Agent 체인 시스템 (간단한 LLM 기반 용어 검증 포함)"""
 
 import asyncio
-import pandas as pd
 import numpy as np
 import json
 import os
-from typing import Dict, Any, List
+import sys
+import time
+import glob
+import uuid
+import argparse
+from typing import Dict, Any, List, Callable, Optional
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
@@ -24,10 +28,13 @@ from core.llm.prompt_engineering import PromptEngineering
 from core.llm.simple_llm_terminology_tools import validate_csv_terms_with_llm, get_domain_glossary, validate_csv_terms_simple
 from core.analysis.analysis_tools import (
     analyze_conversion_performance_tool,
+    analyze_lift_significance_tool,
+    analyze_bayesian_lift_tool,
     analyze_message_effectiveness_tool,
     analyze_funnel_performance_tool,
     analyze_funnel_message_effectiveness_tool,
     analyze_message_patterns_by_funnel_tool,
+    find_similar_campaigns_tool,
     prepare_funnel_message_analysis_data,
     prepare_funnel_quantile_data,
     structure_llm_analysis_for_html,
@@ -59,6 +66,13 @@ from core.analysis.analysis_tools import (
     get_datetime_prefix
 )
 from core.analysis.data_preprocessing import preprocess_crm_data
+from core.analysis.dataset_cache import cache_stats, dataset_path_key, read_csv_cached
+from core.analysis.weekly_trends import get_weekly_trend_state
+from core.llm.rate_limiter import PRIORITY_BACKGROUND, PRIORITY_EXECUTIVE, llm_priority, llm_rate_limiter
+from core.llm.resilience import CircuitOpenError, is_retryable_error, llm_circuit_breaker, offload_blocking, run_with_deadline
+from core.pipeline.checkpoint import PipelineCheckpoint
+from core.pipeline.context import AnalysisContext, AnalysisContextProxy, use_context
+from core.pipeline.service import AnalysisService
 from config.column_descriptions import COLUMN_DESCRIPTIONS
 
 logger = get_logger(__name__)
@@ -83,61 +97,10 @@ DEFAULT_CSV_FILE = "/Users/saint/Jupyter/1. Task/crm-analysis-agent/data/raw/251
 # 1. 공통 컨텍스트 클래스
 # =============================================================================
 
-class AnalysisContext:
-    """Agent 간 공유되는 분석 컨텍스트"""
-    
-    def __init__(self):
-        # 1단계: 데이터 이해 결과
-        self.data_info = None
-        self.analysis_requirements = None
-        self.analysis_plan = None
-        
-        # 2단계: 전처리 결과
-        self.preprocessing_stats = None
-        self.preprocessed_file_path = None
-        
-        # 3단계: 분석 결과 (기존)
-        self.funnel_analysis = None
-        self.message_analysis = None
-        self.weekly_trends = None
-        
-        # 3단계: 분석 결과 (신규 - Lift 기반)
-        self.category_analysis = None
-        self.funnel_segment_analysis = None
-        self.funnel_strategy_analysis = None
-        
-        # 4단계: 보고서 결과
-        self.insights = []
-        self.recommendations = []
-        self.final_report = None
-        
-        # Comprehensive Agent 결과 (HTML 규격 구조화)
-        self.structured_llm_analysis = None
-        
-        # 용어 이해도 결과
-        self.terminology_analysis = None
-    
-    def to_dict(self):
-        """직렬화 가능한 딕셔너리로 변환"""
-        return {
-            "data_info": self.data_info,
-            "analysis_requirements": self.analysis_requirements,
-            "analysis_plan": self.analysis_plan,
-            "preprocessing_stats": self.preprocessing_stats,
-            "preprocessed_file_path": self.preprocessed_file_path,
-            "funnel_analysis": self.funnel_analysis,
-            "message_analysis": self.message_analysis,
-            "weekly_trends": self.weekly_trends,
-            "category_analysis": self.category_analysis,
-            "funnel_segment_analysis": self.funnel_segment_analysis,
-            "insights": self.insights,
-            "recommendations": self.recommendations,
-            "final_report": self.final_report,
-            "terminology_analysis": self.terminology_analysis
-        }
+# AnalysisContext는 core.pipeline.context의 스냅샷 기반 컨텍스트 사용
 
-# 전역 컨텍스트
-context = AnalysisContext()
+# 전역 컨텍스트 (실행 흐름별 AnalysisContext로 위임 - 배치 실행 시 데이터셋마다 분리)
+context = AnalysisContextProxy()
 
 # =============================================================================
 # 2. Data Understanding Agent (1단계) - 간단한 LLM 기반 용어 검증 포함
@@ -148,7 +111,7 @@ def analyze_data_structure(file_path: str) -> Dict[str, Any]:
     print(f"--- Tool: analyze_data_structure called for file: {file_path} ---")
     
     try:
-        df = pd.read_csv(file_path)
+        df = read_csv_cached(file_path)
         
         # 기본 정보 (직렬화 가능한 형태로)
         data_info = {
@@ -281,6 +244,30 @@ def create_analysis_plan() -> Dict[str, Any]:
             "error_message": f"분석 계획 수립 중 오류: {str(e)}"
         }
 
+def analyze_weekly_trends(file_path: str) -> Dict[str, Any]:
+    """실행일 기준 주차별/이동 구간 전환율과 Lift 트렌드를 계산해 컨텍스트에 저장합니다."""
+    print(f"--- Tool: analyze_weekly_trends called for file: {file_path} ---")
+
+    try:
+        df = read_csv_cached(file_path)
+        # 저장된 상태에 CSV의 새 캠페인 행만 반영
+        weekly_trends = get_weekly_trend_state(file_path, df).summary()
+
+        # 컨텍스트에 저장
+        context.weekly_trends = weekly_trends
+
+        return {
+            "status": "success",
+            "weekly_trends": weekly_trends,
+            "message": f"{len(weekly_trends['weeks'])}개 주차 트렌드가 계산되었습니다."
+        }
+
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": f"주차별 트렌드 분석 중 오류: {str(e)}"
+        }
+
 # Data Understanding Agent with Simple LLM Terminology Validation
 data_understanding_agent = Agent(
     name="data_understanding_agent",
@@ -291,7 +278,7 @@ data_understanding_agent = Agent(
         analyze_data_structure, 
         identify_analysis_requirements, 
         create_analysis_plan,
-        validate_csv_terms_with_llm,  # LLM 기반 용어 검증 (배치 처리)
+        offload_blocking(validate_csv_terms_with_llm),  # LLM 기반 용어 검증 (배치 처리, 작업 스레드에서 실행)
         validate_csv_terms_simple,   # 간단한 용어 검증 (LLM 호출 없음)
         get_domain_glossary  # 도메인 용어 사전
     ],
@@ -323,7 +310,9 @@ statistical_analyst_agent = Agent(
     8. 퍼널별 문구 패턴 분석
     
     ## 분석 원칙
-    - 모든 분석은 통계적 유의성을 고려
+    - 모든 분석은 통계적 유의성을 고려 (analyze_lift_significance_tool의 p-value/신뢰구간으로 판정)
+    - 발송량이 적은 퍼널은 analyze_bayesian_lift_tool의 개선 확률 P(Lift>0)과 신용구간으로 비교
+    - 주차별 변화는 analyze_weekly_trends의 주차별/이동 구간 Lift로 확인
     - 퍼널, 소재, 목적, 타겟 등 비즈니스 컨텍스트를 종합적으로 고려
     - 실험군/대조군 비교를 통한 효과성 검증
     - 발송량, 전환율, 리프트 등 핵심 지표 중심 분석
@@ -337,6 +326,9 @@ statistical_analyst_agent = Agent(
     """,
     tools=[
         analyze_conversion_performance_tool,
+        analyze_lift_significance_tool,
+        analyze_bayesian_lift_tool,
+        analyze_weekly_trends,
         analyze_message_effectiveness_tool,
         analyze_funnel_performance_tool,
         analyze_funnel_message_effectiveness_tool,
@@ -507,6 +499,7 @@ llm_analyst_agent = Agent(
         - 추상적인 설명보다는 실제 데이터 기반의 구체적 분석 우선
         - 각 분석 항목별로 명확한 구조와 형식 준수
         - 비즈니스 인사이트와 실행 가능한 권장사항 제시
+        - 특정 문구와 비슷한 과거 캠페인 성과가 필요하면 find_similar_campaigns_tool로 조회 (LLM 호출 없음)
         
         ## 필수 작업 순서
         1. prepare_funnel_message_analysis_data 도구를 호출하여 데이터 수집
@@ -516,6 +509,7 @@ llm_analyst_agent = Agent(
     tools=[
         prepare_funnel_message_analysis_data,  # 퍼널별 메시지 데이터 준비 (LLM 호출 없음)
         structure_llm_analysis_for_html,  # 분석 결과를 HTML 규격에 맞게 구조화
+        find_similar_campaigns_tool,  # 비슷한 과거 캠페인과 Lift 검색 (로컬 색인)
     ],
 )
 
@@ -965,20 +959,39 @@ criticizer_agent = Agent(
 # 3. 실행 함수
 # =============================================================================
 
-async def run_agent_with_llm(agent, query: str, agent_name: str, context_info: str = ""):
-    """LLM Agent 실행 (맥락 정보 포함)"""
+# Agent Runner 풀 (Agent별 Runner를 한 번만 생성해 데이터셋/단계 간 공유)
+_session_service = InMemorySessionService()
+_runners: Dict[str, Runner] = {}
+
+def get_runner(agent, agent_name: str) -> Runner:
+    """Agent별 공유 Runner 반환"""
+    runner = _runners.get(agent_name)
+    if runner is None or runner.agent is not agent:
+        runner = Runner(
+            agent=agent,
+            session_service=_session_service,
+            app_name=f"{agent_name}_app"
+        )
+        _runners[agent_name] = runner
+    return runner
+
+async def run_agent_with_llm(agent, query: str, agent_name: str, context_info: str = "",
+                             fallback: Optional[Callable[[], str]] = None) -> bool:
+    """LLM Agent 실행 (맥락 정보 포함)
+
+    Args:
+        fallback: 시간 초과/LLM 장애로 Agent를 완료하지 못했을 때 대신 저장할 응답을 만드는 함수
+
+    Returns:
+        Agent가 정상 완료되었는지 여부 (대체 응답을 사용한 경우 False)
+    """
     user_id = "test_user"
-    session_id = f"session_{agent_name}"
+    # 여러 데이터셋이 같은 Runner를 공유하므로 세션은 실행마다 고유하게 생성
+    session_id = f"session_{agent_name}_{uuid.uuid4().hex[:8]}"
     
-    # 세션 서비스 생성
-    session_service = InMemorySessionService()
-    
-    # Runner 생성
-    runner = Runner(
-        agent=agent,
-        session_service=session_service,
-        app_name=f"{agent_name}_app"
-    )
+    # Runner 재사용 (세션 서비스는 프로세스 전체에서 공유)
+    runner = get_runner(agent, agent_name)
+    session_service = _session_service
     
     # 세션 생성
     await session_service.create_session(
@@ -1004,55 +1017,138 @@ async def run_agent_with_llm(agent, query: str, agent_name: str, context_info: s
     
     content = types.Content(role="user", parts=[types.Part(text=enhanced_query)])
     
-    async for event in runner.run_async(user_id=user_id, session_id=session_id, new_message=content):
-        # 도구 호출 결과 추출 (LLM Analysis Agent 또는 Comprehensive Agent의 structure_llm_analysis_for_html 호출)
-        if hasattr(event, 'tool_call') and event.tool_call:
-            tool_name = event.tool_call.name if hasattr(event.tool_call, 'name') else None
-            tool_result = event.tool_call.result if hasattr(event.tool_call, 'result') else None
-            
-            # LLM Analysis Agent나 Comprehensive Agent에서 호출하면 저장
-            if tool_name == "structure_llm_analysis_for_html":
-                context.structured_llm_analysis = tool_result
-                print(f"✅ HTML 규격 구조화 완료 (structure_llm_analysis_for_html by {agent_name})")
-        
-        if event.is_final_response():
-            if event.content and event.content.parts:
-                response = event.content.parts[0].text
-                print(f"📝 {agent_name} 응답: {response}")
+    async def consume_events():
+        async for event in runner.run_async(user_id=user_id, session_id=session_id, new_message=content):
+            # 도구 호출 결과 추출 (LLM Analysis Agent 또는 Comprehensive Agent의 structure_llm_analysis_for_html 호출)
+            if hasattr(event, 'tool_call') and event.tool_call:
+                tool_name = event.tool_call.name if hasattr(event.tool_call, 'name') else None
+                tool_result = event.tool_call.result if hasattr(event.tool_call, 'result') else None
                 
-                # 응답을 컨텍스트에 저장
-                if agent_name == "data_understanding":
-                    context.data_info = response
-                elif agent_name == "category_analysis":
-                    context.category_analysis = response
-                elif agent_name == "funnel_segment_analysis":
-                    context.funnel_segment_analysis = response
-                elif agent_name == "funnel_strategy_analysis":
-                    context.funnel_strategy_analysis = response
-                    print(f"🔍 Funnel Strategy Agent 결과 디버깅:")
-                    print(f"  - 응답 길이: {len(response) if response else 0}")
-                    print(f"  - 응답 타입: {type(response)}")
-                    print(f"  - 응답 내용 (처음 200자): {response[:200] if response else 'None'}")
-                    print(f"  - JSON 형식인지 확인: {'{' in response if response else False}")
-                elif agent_name == "statistical_analysis":
-                    context.funnel_analysis = response
-                elif agent_name == "llm_analysis":
-                    context.llm_analysis = response
-                elif agent_name == "comprehensive_analysis":
-                    context.final_report = response
-                elif agent_name == "data_report":
-                    context.insights.append(response)
-                elif agent_name == "criticizer_analysis":
-                    context.recommendations.append(response)
-            break
-
-async def run_comprehensive_analysis():
-    """종합 분석 시스템 실행 (Lift 기반 경영진용 보고서 포함)"""
+                # LLM Analysis Agent나 Comprehensive Agent에서 호출하면 저장
+                if tool_name == "structure_llm_analysis_for_html":
+                    context.structured_llm_analysis = tool_result
+                    print(f"✅ HTML 규격 구조화 완료 (structure_llm_analysis_for_html by {agent_name})")
+            
+            if event.is_final_response():
+                if event.content and event.content.parts:
+                    response = event.content.parts[0].text
+                    print(f"📝 {agent_name} 응답: {response}")
+                    store_agent_response(agent_name, response)
+                break
+    
+    # Agent 단위 마감 시간(AGENT_TIMEOUT) + LLM 서킷 브레이커
+    try:
+        await run_with_deadline(consume_events, timeout=settings.AGENT_TIMEOUT)
+        return True
+    except (CircuitOpenError, asyncio.TimeoutError) as e:
+        reason = "시간 초과" if isinstance(e, asyncio.TimeoutError) else "LLM 엔드포인트 불안정"
+    except Exception as e:
+        if not is_retryable_error(e):
+            raise
+        reason = f"LLM 호출 실패 ({type(e).__name__})"
+    
+    print(f"⚠️ {agent_name} Agent 실행 중단: {reason}")
+    if fallback is not None:
+        print(f"📊 {agent_name}: 통계 기반 결과로 대체합니다.")
+        store_agent_response(agent_name, fallback())
+    return False
+
+def store_agent_response(agent_name: str, response: str):
+    """Agent 응답을 컨텍스트에 저장"""
+    if agent_name == "data_understanding":
+        # 구조화된 data_info(analyze_data_structure 결과)는 유지하고 응답 텍스트만 별도 보관
+        context.data_understanding_summary = response
+    elif agent_name == "category_analysis":
+        context.category_analysis = response
+    elif agent_name == "funnel_segment_analysis":
+        context.funnel_segment_analysis = response
+    elif agent_name == "funnel_strategy_analysis":
+        context.funnel_strategy_analysis = response
+        print(f"🔍 Funnel Strategy Agent 결과 디버깅:")
+        print(f"  - 응답 길이: {len(response) if response else 0}")
+        print(f"  - 응답 타입: {type(response)}")
+        print(f"  - 응답 내용 (처음 200자): {response[:200] if response else 'None'}")
+        print(f"  - JSON 형식인지 확인: {'{' in response if response else False}")
+    elif agent_name == "statistical_analysis":
+        context.funnel_analysis = response
+    elif agent_name == "llm_analysis":
+        context.llm_analysis = response
+    elif agent_name == "comprehensive_analysis":
+        context.final_report = response
+    elif agent_name == "data_report":
+        context.append("insights", response)
+    elif agent_name == "criticizer_analysis":
+        context.append("recommendations", response)
+
+def deterministic_fallback(agent_name: str, csv_file: str) -> str:
+    """LLM 없이 계산 가능한 통계 결과 (Agent 실행 불가 시 대체 응답)"""
+    if agent_name == "funnel_strategy_analysis":
+        return prepare_funnel_quantile_data(csv_file)
+    if agent_name in ("category_analysis", "funnel_segment_analysis", "statistical_analysis"):
+        return "\n\n".join([
+            analyze_conversion_performance_tool(csv_file),
+            analyze_funnel_performance_tool(csv_file),
+        ])
+    return analyze_conversion_performance_tool(csv_file)
+
+# 종합 분석 파이프라인 단계 (체크포인트 단계명 = Agent 이름)
+COMPREHENSIVE_STAGES = [
+    "data_understanding",
+    "category_analysis",
+    "funnel_segment_analysis",
+    "funnel_strategy_analysis",
+    "statistical_analysis",
+    "llm_analysis",
+    "comprehensive_analysis",
+    "data_report",
+    "criticizer_analysis",
+    "html_report",
+]
+
+# 경영진 보고서 생성에 필요하지 않은 단계 (LLM 호출 우선순위 낮음)
+BACKGROUND_STAGES = {"data_report", "criticizer_analysis"}
+
+async def run_checkpointed_agent(checkpoint: PipelineCheckpoint, agent, query: str, agent_name: str,
+                                 context_info: str = ""):
+    """체크포인트에 유효한 완료 기록이 없을 때만 Agent를 실행하고 단계 완료를 기록"""
+    # 단계 입력은 쿼리 기준 (맥락 정보는 앞 단계 결과이므로 fingerprint 체인으로 반영됨)
+    if not checkpoint.should_run(agent_name, query):
+        return
+    started = context.snapshot()
+    # 경영진 보고서에 필요한 단계의 LLM 호출을 레이트 리미터 대기열에서 먼저 처리
+    priority = PRIORITY_BACKGROUND if agent_name in BACKGROUND_STAGES else PRIORITY_EXECUTIVE
+    with llm_priority(priority):
+        completed = await run_agent_with_llm(agent, query, agent_name, context_info,
+                                             fallback=lambda: deterministic_fallback(agent_name, checkpoint.csv_file_path))
+    # 통계 기반 대체 결과는 완료로 기록하지 않아 재개 시 Agent를 다시 실행
+    if completed:
+        checkpoint.complete(agent_name, context, started)
+
+async def run_comprehensive_analysis(resume: bool = False, csv_file: Optional[str] = None,
+                                     file_tag: str = "") -> List[str]:
+    """종합 분석 시스템 실행 (Lift 기반 경영진용 보고서 포함)
+
+    Args:
+        resume: True면 같은 데이터셋의 최근 체크포인트에서 완료되지 않은 단계부터 재개
+        csv_file: 분석할 CSV 경로 (기본 DEFAULT_CSV_FILE)
+        file_tag: 보고서 파일명에 붙일 데이터셋 구분자 (배치 실행용)
+
+    Returns:
+        생성된 보고서 경로 목록 (보고서 단계가 체크포인트로 건너뛰어지면 기록된 경로)
+    """
     print("🚀 종합 분석 시스템 시작 (Lift 기반)")
     print("=" * 80)
 
     # CSV 파일 경로
-    csv_file = DEFAULT_CSV_FILE
+    csv_file = csv_file or DEFAULT_CSV_FILE
+
+    # 단계별 체크포인트 (실행 id + 데이터셋 해시 기준)
+    if resume:
+        checkpoint = PipelineCheckpoint.resume_latest(csv_file, COMPREHENSIVE_STAGES)
+        checkpoint.restore_context(context)
+        print(f"▶️ 재개 단계: {checkpoint.resume_stage() or '없음 (모든 단계 완료)'}")
+    else:
+        checkpoint = PipelineCheckpoint(csv_file, COMPREHENSIVE_STAGES)
 
     # 1. Data Understanding Agent 실행
     print("\n📊 1단계: Data Understanding Agent 실행...")
@@ -1068,7 +1164,7 @@ async def run_comprehensive_analysis():
 
     각 단계마다 도구를 사용해서 실제 분석을 수행해주세요.
     """
-    await run_agent_with_llm(data_understanding_agent, understanding_query, "data_understanding")
+    await run_checkpointed_agent(checkpoint, data_understanding_agent, understanding_query, "data_understanding")
 
     # 2. Category Analysis Agent 실행 (신규)
     print("\n🏷️ 2단계: Category Analysis Agent 실행...")
@@ -1083,7 +1179,7 @@ async def run_comprehensive_analysis():
 
     각 분석마다 도구를 사용해서 실제 카테고리 분석을 수행해주세요.
     """
-    await run_agent_with_llm(category_analysis_agent, category_query, "category_analysis")
+    await run_checkpointed_agent(checkpoint, category_analysis_agent, category_query, "category_analysis")
 
     # 3. Funnel Segment Analysis Agent 실행 (신규)
     print("\n🎯 3단계: Funnel Segment Analysis Agent 실행...")
@@ -1098,7 +1194,7 @@ async def run_comprehensive_analysis():
 
     각 분석마다 도구를 사용해서 실제 세그먼트 분석을 수행해주세요.
     """
-    await run_agent_with_llm(funnel_segment_agent, segment_query, "funnel_segment_analysis")
+    await run_checkpointed_agent(checkpoint, funnel_segment_agent, segment_query, "funnel_segment_analysis")
 
     # 3-1. Funnel Strategy Agent 실행 (신규 - 퍼널별 메시지 전략 제안)
     print("\n💡 3-1단계: Funnel Strategy Agent 실행...")
@@ -1140,7 +1236,7 @@ async def run_comprehensive_analysis():
       "low_performance_group": {{...}}
     }}
     """
-    await run_agent_with_llm(funnel_strategy_agent, strategy_query, "funnel_strategy_analysis")
+    await run_checkpointed_agent(checkpoint, funnel_strategy_agent, strategy_query, "funnel_strategy_analysis")
 
     # 4. Statistical Analysis Agent 실행
     print("\n📈 4단계: Statistical Analysis Agent 실행...")
@@ -1162,7 +1258,7 @@ async def run_comprehensive_analysis():
     이전 분석 결과들:
     
     Data Understanding Agent 결과:
-    - 데이터 구조: {context.data_info if context.data_info else "아직 분석 중"}
+    - 데이터 구조: {context.data_understanding_summary or context.data_info or "아직 분석 중"}
     - 분석 계획: {context.analysis_plan if context.analysis_plan else "아직 분석 중"}
     
     Category Analysis Agent 결과:
@@ -1172,7 +1268,7 @@ async def run_comprehensive_analysis():
     - 퍼널 세그먼트 분석: {context.funnel_segment_analysis if hasattr(context, 'funnel_segment_analysis') and context.funnel_segment_analysis else "아직 분석 중"}
     """
     
-    await run_agent_with_llm(statistical_analyst_agent, statistical_query, "statistical_analysis", context_info)
+    await run_checkpointed_agent(checkpoint, statistical_analyst_agent, statistical_query, "statistical_analysis", context_info)
 
     # 5. LLM Analysis Agent 실행
     print("\n🤖 5단계: LLM Analysis Agent 실행...")
@@ -1211,7 +1307,7 @@ async def run_comprehensive_analysis():
     이전 분석 결과들:
     
     Data Understanding Agent 결과:
-    - 데이터 구조: {context.data_info if context.data_info else "아직 분석 중"}
+    - 데이터 구조: {context.data_understanding_summary or context.data_info or "아직 분석 중"}
     - 분석 계획: {context.analysis_plan if context.analysis_plan else "아직 분석 중"}
     
     Category Analysis Agent 결과:
@@ -1224,7 +1320,7 @@ async def run_comprehensive_analysis():
     - 퍼널 분석: {context.funnel_analysis if context.funnel_analysis else "아직 분석 중"}
     """
     
-    await run_agent_with_llm(llm_analyst_agent, llm_query, "llm_analysis", context_info)
+    await run_checkpointed_agent(checkpoint, llm_analyst_agent, llm_query, "llm_analysis", context_info)
     
     # structured_llm_analysis 참조하지 않음 - 원본 llm_analysis만 사용
 
@@ -1253,7 +1349,7 @@ async def run_comprehensive_analysis():
     전체 분석 결과들:
     
     Data Understanding Agent 결과:
-    - 데이터 구조: {context.data_info if context.data_info else "아직 분석 중"}
+    - 데이터 구조: {context.data_understanding_summary or context.data_info or "아직 분석 중"}
     - 분석 계획: {context.analysis_plan if context.analysis_plan else "아직 분석 중"}
     
     Category Analysis Agent 결과:
@@ -1272,7 +1368,7 @@ async def run_comprehensive_analysis():
     - 메시지 분석: {context.message_analysis if context.message_analysis else "아직 분석 중"}
     """
     
-    await run_agent_with_llm(comprehensive_agent, comprehensive_query, "comprehensive_analysis", context_info)
+    await run_checkpointed_agent(checkpoint, comprehensive_agent, comprehensive_query, "comprehensive_analysis", context_info)
 
     # 7. Data Report Agent 실행 (표, 그래프, 텍스트 리포트 생성)
     print("\n📊 7단계: Data Report Agent 실행...")
@@ -1289,7 +1385,7 @@ async def run_comprehensive_analysis():
     Context에서 이전 분석 결과들을 확인하고 이해하기 쉬운 형태로 리포트를 생성해주세요.
     특히 Lift 기반 분석 결과를 중심으로 경영진이 이해하기 쉬운 형태로 제시해주세요.
     """
-    await run_agent_with_llm(data_report_agent, data_report_query, "data_report")
+    await run_checkpointed_agent(checkpoint, data_report_agent, data_report_query, "data_report")
 
     # 8. Criticizer Agent 실행 (성능 평가 및 비판적 분석)
     print("\n🔍 8단계: Criticizer Agent 실행...")
@@ -1311,16 +1407,21 @@ async def run_comprehensive_analysis():
     HTML 리포트에서 표시되는 전환율, Lift, 발송건수 등이 
     실제 데이터와 일치하는지 정합성을 검증해주세요.
     """
-    await run_agent_with_llm(criticizer_agent, criticizer_query, "criticizer_analysis")
+    await run_checkpointed_agent(checkpoint, criticizer_agent, criticizer_query, "criticizer_analysis")
 
     # 9. HTML 보고서 생성
     print("\n📄 9단계: HTML 보고서 생성...")
+    if not checkpoint.should_run("html_report", csv_file):
+        print("\n✅ 종합 분석 시스템 완료! (Lift 기반 경영진용 보고서 포함)")
+        print("=" * 80)
+        return list(checkpoint.records["html_report"].get("output", {}).values())
+    report_paths = []
     try:
         from core.reporting.comprehensive_html_report import create_comprehensive_html_report
         
         # Agent 결과들을 딕셔너리로 정리
         agent_results = {
-            'data_understanding': context.data_info if context.data_info else "분석 중",
+            'data_understanding': context.data_understanding_summary or context.data_info or "분석 중",
             'statistical_analysis': context.funnel_analysis if context.funnel_analysis else "분석 중",
             'llm_analysis': context.llm_analysis if hasattr(context, 'llm_analysis') and context.llm_analysis else "분석 중",
             'comprehensive_analysis': context.insights[-1] if context.insights else "분석 중",
@@ -1330,36 +1431,46 @@ async def run_comprehensive_analysis():
             'structured_llm_analysis': "분석 중"  # 참조하지 않음
         }
         
+        # 입력이 바뀌지 않은 섹션은 이전 실행의 HTML 조각 재사용
+        from core.reporting.section_cache import ReportSectionCache
+        section_cache = ReportSectionCache.for_dataset(csv_file) if settings.CACHE_RESULTS else None
+        
         # HTML 보고서 생성 (기존)
-        report_path = create_comprehensive_html_report(csv_file, agent_results)
+        report_path = create_comprehensive_html_report(csv_file, agent_results, section_cache=section_cache,
+                                                       file_tag=file_tag)
         
         # 새로운 경영진용 2박스 구조 보고서 생성
         from core.reporting.comprehensive_html_report import ComprehensiveHTMLReportGenerator
-        new_report_generator = ComprehensiveHTMLReportGenerator(csv_file)
+        new_report_generator = ComprehensiveHTMLReportGenerator(csv_file, section_cache=section_cache)
         new_report_generator.set_agent_results(agent_results)  # Agent 결과 설정
-        new_report_content = new_report_generator.generate_new_executive_report()
         
-        # 새로운 보고서 저장
+        # 새로운 보고서 저장 (섹션 단위 스트리밍)
         from datetime import datetime
         today = datetime.now().strftime('%Y%m%d')
         reports_dir = f"outputs/reports/{today}"
         os.makedirs(reports_dir, exist_ok=True)
-        new_report_path = f"{reports_dir}/{datetime.now().strftime('%y%m%d_%H%M')}_executive_summary_report.html"
+        new_report_path = f"{reports_dir}/{datetime.now().strftime('%y%m%d_%H%M')}{tagged(file_tag)}_executive_summary_report.html"
         
         with open(new_report_path, 'w', encoding='utf-8') as f:
-            f.write(new_report_content)
+            new_report_generator.write_new_executive_report(f)
         
         print(f"✅ HTML 보고서 생성 완료: {report_path}")
         print(f"✅ 경영진용 2박스 보고서 생성 완료: {new_report_path}")
         print(f"📂 파일 위치: {os.path.abspath(new_report_path)}")
         
+        checkpoint.complete("html_report", context,
+                            output={"report_path": report_path, "executive_report_path": new_report_path})
+        report_paths = [report_path, new_report_path]
+        
     except Exception as e:
         print(f"❌ HTML 보고서 생성 오류: {str(e)}")
         import traceback
         traceback.print_exc()
 
+    print(f"\n⏱️ LLM 레이트 리밋 대기 현황: {llm_rate_limiter.report()}")
     print("\n✅ 종합 분석 시스템 완료! (Lift 기반 경영진용 보고서 포함)")
     print("=" * 80)
+    return report_paths
 
 async def run_agent_test():
     """단일 Agent 테스트 메뉴"""
@@ -1491,7 +1602,7 @@ async def run_dual_agent_test(first_agent: str, second_agent: str):
         
         context_info = f"""
         이전 {first_agent} Agent의 분석 결과:
-        - 데이터 구조: {context.data_info if context.data_info else "아직 분석 중"}
+        - 데이터 구조: {context.data_understanding_summary or context.data_info or "아직 분석 중"}
         - 분석 계획: {context.analysis_plan if context.analysis_plan else "아직 분석 중"}
         """
         
@@ -1611,7 +1722,7 @@ async def run_quadruple_agent_test(first_agent: str, second_agent: str, third_ag
         
         context_info = f"""
         이전 {first_agent} Agent의 분석 결과:
-        - 데이터 구조: {context.data_info if context.data_info else "아직 분석 중"}
+        - 데이터 구조: {context.data_understanding_summary or context.data_info or "아직 분석 중"}
         - 분석 계획: {context.analysis_plan if context.analysis_plan else "아직 분석 중"}
         """
         
@@ -1634,7 +1745,7 @@ async def run_quadruple_agent_test(first_agent: str, second_agent: str, third_ag
         
         context_info = f"""
         이전 분석 결과들:
-        - {first_agent}: {context.data_info if context.data_info else "아직 분석 중"}
+        - {first_agent}: {context.data_understanding_summary or context.data_info or "아직 분석 중"}
         - {second_agent}: {context.funnel_analysis if context.funnel_analysis else "아직 분석 중"}
         """
         
@@ -1657,7 +1768,7 @@ async def run_quadruple_agent_test(first_agent: str, second_agent: str, third_ag
         
         context_info = f"""
         전체 분석 결과들:
-        - {first_agent}: {context.data_info if context.data_info else "아직 분석 중"}
+        - {first_agent}: {context.data_understanding_summary or context.data_info or "아직 분석 중"}
         - {second_agent}: {context.funnel_analysis if context.funnel_analysis else "아직 분석 중"}
         - {third_agent}: {context.final_report if context.final_report else "아직 분석 중"}
         """
@@ -1667,16 +1778,16 @@ async def run_quadruple_agent_test(first_agent: str, second_agent: str, third_ag
     print(f"\n✅ {first_agent} → {second_agent} → {third_agent} → {fourth_agent} Agent 테스트 완료!")
     print("=" * 50)
 
-async def run_html_report_test():
-    """HTML 보고서만 테스트하는 함수"""
+async def run_html_report_test(csv_file: Optional[str] = None, file_tag: str = "") -> List[str]:
+    """HTML 보고서만 테스트하는 함수 (생성된 보고서 경로 목록 반환)"""
     print("📄 HTML 보고서 생성 테스트")
     print("=" * 50)
     
-    csv_file = DEFAULT_CSV_FILE
+    csv_file = csv_file or DEFAULT_CSV_FILE
     
     try:
         # 데이터 로드
-        df = pd.read_csv(csv_file)
+        df = read_csv_cached(csv_file)
         print(f"✅ 데이터 로드 완료: {len(df)}행")
         
         # 가짜 Agent 결과 생성 (테스트용)
@@ -1687,17 +1798,22 @@ async def run_html_report_test():
             'comprehensive_analysis': "종합 분석 결과 (테스트용)"
         }
         
-        # HTML 보고서 생성
+        # HTML 보고서 생성 (입력이 바뀌지 않은 섹션은 캐시 재사용)
         from core.reporting.comprehensive_html_report import create_comprehensive_html_report
-        report_path = create_comprehensive_html_report(csv_file, agent_results)
+        from core.reporting.section_cache import ReportSectionCache
+        section_cache = ReportSectionCache.for_dataset(csv_file) if settings.CACHE_RESULTS else None
+        report_path = create_comprehensive_html_report(csv_file, agent_results, section_cache=section_cache,
+                                                       file_tag=file_tag)
         
         print(f"✅ HTML 보고서 생성 완료: {report_path}")
         print(f"📂 파일 위치: {os.path.abspath(report_path)}")
+        return [report_path]
         
     except Exception as e:
         print(f"❌ 오류 발생: {str(e)}")
         import traceback
         traceback.print_exc()
+        return []
 
 async def run_category_analysis_test():
     """Category Analysis Agent만 테스트하는 함수"""
@@ -1708,7 +1824,7 @@ async def run_category_analysis_test():
     
     try:
         # 데이터 로드
-        df = pd.read_csv(csv_file)
+        df = read_csv_cached(csv_file)
         print(f"✅ 데이터 로드 완료: {len(df)}행")
         
         # Category Analysis Agent 실행
@@ -1742,7 +1858,7 @@ async def run_funnel_segment_test():
     
     try:
         # 데이터 로드
-        df = pd.read_csv(csv_file)
+        df = read_csv_cached(csv_file)
         print(f"✅ 데이터 로드 완료: {len(df)}행")
         
         # Funnel Segment Analysis Agent 실행
@@ -1767,12 +1883,13 @@ async def run_funnel_segment_test():
         import traceback
         traceback.print_exc()
 
-async def run_funnel_message_analysis_with_report():
-    """퍼널별 분석 → 문구 분석 → 레포트 생성 (분할 실행)"""
+async def run_funnel_message_analysis_with_report(csv_file: Optional[str] = None, file_tag: str = "") -> List[str]:
+    """퍼널별 분석 → 문구 분석 → 레포트 생성 (분할 실행, 생성된 보고서 경로 목록 반환)"""
     print("🚀 퍼널별 문구 분석 시스템 시작 (분할 실행)")
     print("=" * 80)
     
-    csv_file = DEFAULT_CSV_FILE
+    csv_file = csv_file or DEFAULT_CSV_FILE
+    report_paths = []
     
     try:
         # 1. Funnel Strategy Agent 실행 (퍼널별 분위수 분석)
@@ -1924,22 +2041,24 @@ async def run_funnel_message_analysis_with_report():
             for key, value in agent_results.items():
                 print(f"  - {key}: {type(value)} - {str(value)[:100]}...")
             
-            # 새로운 경영진용 2박스 구조 보고서 생성
-            new_report_generator = ComprehensiveHTMLReportGenerator(csv_file)
+            # 새로운 경영진용 2박스 구조 보고서 생성 (입력이 바뀌지 않은 섹션은 캐시 재사용)
+            from core.reporting.section_cache import ReportSectionCache
+            section_cache = ReportSectionCache.for_dataset(csv_file) if settings.CACHE_RESULTS else None
+            new_report_generator = ComprehensiveHTMLReportGenerator(csv_file, section_cache=section_cache)
             new_report_generator.set_agent_results(agent_results)  # Agent 결과 설정
-            new_report_content = new_report_generator.generate_new_executive_report()
             
-            # 새로운 보고서 저장
+            # 새로운 보고서 저장 (섹션 단위 스트리밍)
             from datetime import datetime
             today = datetime.now().strftime('%Y%m%d')
             reports_dir = f"outputs/reports/{today}"
             os.makedirs(reports_dir, exist_ok=True)
-            new_report_path = f"{reports_dir}/{datetime.now().strftime('%y%m%d_%H%M')}_funnel_message_analysis_report.html"
+            new_report_path = f"{reports_dir}/{datetime.now().strftime('%y%m%d_%H%M')}{tagged(file_tag)}_funnel_message_analysis_report.html"
             
             with open(new_report_path, 'w', encoding='utf-8') as f:
-                f.write(new_report_content)
+                new_report_generator.write_new_executive_report(f)
             
             print(f"✅ 퍼널별 문구 분석 보고서 생성 완료: {new_report_path}")
+            report_paths.append(new_report_path)
             
         except Exception as e:
             print(f"❌ HTML 보고서 생성 오류: {str(e)}")
@@ -1953,9 +2072,169 @@ async def run_funnel_message_analysis_with_report():
         print(f"❌ 오류 발생: {str(e)}")
         import traceback
         traceback.print_exc()
+    return report_paths
+
+# =============================================================================
+# 4. 비대화형 CLI (여러 데이터셋 배치 실행)
+# =============================================================================
+
+def tagged(file_tag: str) -> str:
+    """보고서 파일명용 데이터셋 구분자 (없으면 빈 문자열)"""
+    return f"_{file_tag}" if file_tag else ""
+
+def dataset_tag(csv_file: str) -> str:
+    """데이터셋 구분자: 파일명 + 경로 해시 (팀/월별 폴더에 같은 파일명이 있어도 구분)"""
+    return dataset_path_key(csv_file)
+
+# CLI 모드 -> 데이터셋 단위 실행 함수 (csv_file, file_tag, resume)
+CLI_MODES = {
+    "comprehensive": lambda csv_file, file_tag, resume: run_comprehensive_analysis(
+        resume=resume, csv_file=csv_file, file_tag=file_tag),
+    "funnel-message": lambda csv_file, file_tag, resume: run_funnel_message_analysis_with_report(
+        csv_file=csv_file, file_tag=file_tag),
+    "html-only": lambda csv_file, file_tag, resume: run_html_report_test(csv_file=csv_file, file_tag=file_tag),
+}
+
+# 배치 실행 전에 확인하는 보고서 필수 컬럼 (없으면 보고서가 빈 섹션으로만 생성되므로 실패 처리)
+BATCH_REQUIRED_COLUMNS = ["퍼널", "문구", "실험군_발송", "대조군_발송", "실험군_예약전환율", "대조군_예약전환율"]
+
+def expand_inputs(patterns: List[str]) -> List[str]:
+    """입력 glob 패턴들을 CSV 파일 목록으로 확장 (입력 순서 유지, 중복 제거)"""
+    csv_files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        csv_files.extend(path for path in matches if os.path.isfile(path))
+    return list(dict.fromkeys(csv_files))
+
+async def run_batch(mode: str, csv_files: List[str], jobs: int, resume: bool = False) -> Dict[str, str]:
+    """
+    여러 데이터셋을 한 프로세스에서 최대 jobs개씩 동시에 실행
+
+    Runner 풀, 데이터셋 캐시, LLM 레이트 리미터는 공유하고 AnalysisContext는 데이터셋마다 분리합니다.
+
+    Returns:
+        {CSV 경로: "success" 또는 오류 메시지} (필수 컬럼이 없거나 생성된 보고서가 없으면 실패)
+    """
+    semaphore = asyncio.Semaphore(max(1, jobs))
+    run_dataset = CLI_MODES[mode]
+    use_tags = len(csv_files) > 1
+
+    async def run_one(csv_file: str) -> str:
+        async with semaphore:
+            with use_context(AnalysisContext()):
+                print(f"\n📂 [{mode}] 데이터셋 실행 시작: {csv_file}")
+                started = time.perf_counter()
+                try:
+                    missing = [c for c in BATCH_REQUIRED_COLUMNS if c not in read_csv_cached(csv_file).columns]
+                    if missing:
+                        print(f"❌ [{mode}] 필수 컬럼 누락: {csv_file} - {missing}")
+                        return f"error: 필수 컬럼 누락 {missing}"
+                    report_paths = await run_dataset(csv_file, dataset_tag(csv_file) if use_tags else "", resume)
+                    # 실행 모드는 내부 오류를 잡고 정상 반환하므로 보고서가 실제로 생성되었는지로 성공 판정
+                    if not any(path and os.path.exists(path) for path in report_paths or []):
+                        print(f"❌ [{mode}] 보고서가 생성되지 않았습니다: {csv_file}")
+                        return "error: 생성된 보고서 없음"
+                    return "success"
+                except Exception as e:
+                    print(f"❌ [{mode}] 데이터셋 실행 실패: {csv_file} - {str(e)}")
+                    return f"error: {str(e)}"
+                finally:
+                    # LLM_BACKEND=fake로 실행하면 오케스트레이션 오버헤드를 네트워크 없이 재현 가능하게 측정
+                    print(f"⏱️ [{mode}] 소요 시간 {time.perf_counter() - started:.2f}초: {csv_file}")
+
+    outcomes = await asyncio.gather(*(run_one(csv_file) for csv_file in csv_files))
+    return dict(zip(csv_files, outcomes))
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    """CLI 인자 파싱"""
+    parser = argparse.ArgumentParser(description="쏘카 CRM 데이터 분석 시스템 (비대화형 배치 실행)")
+    parser.add_argument("--mode", choices=sorted(CLI_MODES), default="comprehensive",
+                        help="실행 모드 (기본: comprehensive)")
+    parser.add_argument("--input", nargs="+", default=[DEFAULT_CSV_FILE],
+                        help="분석할 CSV 경로 또는 glob 패턴 (여러 개 가능, 예: 'data/raw/**/*.csv')")
+    parser.add_argument("--jobs", type=int, default=settings.MAX_CONCURRENT_AGENTS,
+                        help="동시에 실행할 데이터셋 수 (기본: MAX_CONCURRENT_AGENTS)")
+    parser.add_argument("--resume", action="store_true",
+                        help="comprehensive 모드에서 데이터셋별 최근 체크포인트부터 재개")
+    parser.add_argument("--serve", action="store_true",
+                        help="분석 서비스 모드 (HTTP 작업 API, 프로세스를 유지해 캐시/Runner 재사용)")
+    parser.add_argument("--host", default=settings.SERVICE_HOST, help="서비스 주소 (기본: SERVICE_HOST)")
+    parser.add_argument("--port", type=int, default=settings.SERVICE_PORT, help="서비스 포트 (기본: SERVICE_PORT)")
+    return parser.parse_args(argv)
+
+def run_cli(argv: List[str]) -> int:
+    """비대화형 CLI 실행. 모든 데이터셋이 성공하면 0, 하나라도 실패하면 1 반환"""
+    args = parse_args(argv)
+    if args.serve:
+        return run_service(args.host, args.port, args.jobs)
+
+    csv_files = expand_inputs(args.input)
+    if not csv_files:
+        print(f"❌ 입력과 일치하는 CSV 파일이 없습니다: {args.input}")
+        return 1
+
+    print(f"🚀 배치 실행: mode={args.mode}, 데이터셋 {len(csv_files)}개, 동시 실행 {args.jobs}개")
+    outcomes = asyncio.run(run_batch(args.mode, csv_files, args.jobs, resume=args.resume))
+
+    failed = {path: outcome for path, outcome in outcomes.items() if outcome != "success"}
+    print(f"\n📋 배치 실행 결과: 성공 {len(outcomes) - len(failed)}개, 실패 {len(failed)}개")
+    for path, outcome in failed.items():
+        print(f"  ❌ {path}: {outcome}")
+    return 1 if failed else 0
+
+# =============================================================================
+# 5. 분석 서비스 (장기 실행 HTTP 작업 API)
+# =============================================================================
+
+# 서비스 시작 시 Runner를 미리 만들어 둘 Agent (단계명 -> Agent)
+SERVICE_AGENTS = {
+    "data_understanding": data_understanding_agent,
+    "category_analysis": category_analysis_agent,
+    "funnel_segment_analysis": funnel_segment_agent,
+    "funnel_strategy_analysis": funnel_strategy_agent,
+    "statistical_analysis": statistical_analyst_agent,
+    "llm_analysis": llm_analyst_agent,
+    "comprehensive_analysis": comprehensive_agent,
+    "data_report": data_report_agent,
+    "criticizer_analysis": criticizer_agent,
+}
+
+def warm_up_service():
+    """Runner 풀과 용어사전 색인 예열"""
+    for agent_name, agent in SERVICE_AGENTS.items():
+        get_runner(agent, agent_name)
+    from core.llm.term_extraction import get_glossary_trie
+    from core.llm.term_memory import get_term_memory
+    get_glossary_trie()
+    get_term_memory()
+    print(f"🔥 서비스 예열 완료: Runner {len(_runners)}개")
+
+def service_stats() -> Dict[str, Any]:
+    """서비스 /health 응답용 캐시/LLM 상태"""
+    return {
+        "runners": len(_runners),
+        "dataset_cache": cache_stats(),
+        "llm_circuit": llm_circuit_breaker.state,
+        "llm_rate_limiter": llm_rate_limiter.report(),
+    }
+
+def run_service(host: str, port: int, jobs: int) -> int:
+    """분석 서비스 실행 (Ctrl+C로 종료)"""
+    # 서비스에서는 같은 데이터셋 재요청 시 체크포인트의 완료 단계를 재사용 (요청의 resume=false로 비활성화)
+    service = AnalysisService(CLI_MODES, max_concurrent_jobs=jobs, warmup=warm_up_service, stats=service_stats)
+    try:
+        asyncio.run(service.serve(host, port))
+    except KeyboardInterrupt:
+        print("\n👋 분석 서비스를 종료합니다.")
+    return 0
 
 def main():
     """메인 실행 함수"""
+    # 인자가 있으면 비대화형 CLI로 실행 (예: python main.py --mode html-only --input 'data/raw/*/*.csv' --jobs 4)
+    # 서비스 모드: python main.py --serve --port 8765
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+    
     print("🚀 쏘카 CRM 데이터 분석 시스템 (Lift 기반)")
     print("=" * 80)
     print("실행 옵션을 선택하세요:")
@@ -1965,11 +2244,12 @@ def main():
     print("4. Category Analysis Agent 테스트 (카테고리 분류)")
     print("5. Funnel Segment Analysis Agent 테스트 (퍼널 세그먼트 분석)")
     print("6. 퍼널별 문구 분석 → 레포트 생성 (분할 실행) ⭐")
-    print("7. 종료")
+    print("7. 종합 분석 이어서 실행 (마지막 체크포인트부터 재개)")
+    print("8. 종료")
     
     while True:
         try:
-            choice = input("\n선택하세요 (1-7): ").strip()
+            choice = input("\n선택하세요 (1-8): ").strip()
             
             if choice == "1":
                 print("\n🔄 종합 분석 시스템을 실행합니다...")
@@ -1996,10 +2276,14 @@ def main():
                 asyncio.run(run_funnel_message_analysis_with_report())
                 break
             elif choice == "7":
+                print("\n🔄 종합 분석을 체크포인트부터 이어서 실행합니다...")
+                asyncio.run(run_comprehensive_analysis(resume=True))
+                break
+            elif choice == "8":
                 print("👋 프로그램을 종료합니다.")
                 break
             else:
-                print("❌ 잘못된 선택입니다. 1-7 중에서 선택해주세요.")
+                print("❌ 잘못된 선택입니다. 1-8 중에서 선택해주세요.")
         except KeyboardInterrupt:
             print("\n👋 프로그램을 종료합니다.")
             break
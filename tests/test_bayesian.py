@@ -0,0 +1,113 @@
+"""core.analysis.bayesian Beta-Binomial Lift 사후분포 (닫힌 형식/Monte Carlo 일치, 경험적 베이즈 축소, 발송 0건 셀)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import integrate, stats
+
+from core.analysis.bayesian import bayesian_lift, lift_posterior, method_of_moments_prior
+from core.analysis.significance import CTRL_CONVERSIONS, CTRL_SENT, EXP_CONVERSIONS, EXP_SENT
+
+# (실험군 alpha, beta, 대조군 alpha, beta) - 모두 NORMAL_APPROX_MIN_PARAM 미만이라 Monte Carlo 대상
+SMALL_CELLS = np.array([
+    [12.0, 88.0, 8.0, 92.0],
+    [3.0, 20.0, 5.0, 18.0],
+    [30.0, 270.0, 25.0, 300.0],
+])
+
+
+def exact_prob_improvement(a1, b1, a2, b2) -> float:
+    """P(p1 > p2) = ∫ f1(x) F2(x) dx (수치 적분 참조값)"""
+    value, _ = integrate.quad(lambda x: stats.beta.pdf(x, a1, b1) * stats.beta.cdf(x, a2, b2), 0.0, 1.0)
+    return value
+
+
+def test_monte_carlo_matches_closed_form():
+    draws = 200_000
+    closed = lift_posterior(*SMALL_CELLS.T, draws=0, credible=0.95)
+    sampled = lift_posterior(*SMALL_CELLS.T, draws=draws, credible=0.95, seed=42)
+
+    # 평균/표준편차는 닫힌 형식 그대로
+    a1, b1, a2, b2 = SMALL_CELLS.T
+    np.testing.assert_allclose(sampled["expected_lift"], a1 / (a1 + b1) - a2 / (a2 + b2))
+    np.testing.assert_allclose(sampled["lift_sd"], closed["lift_sd"])
+
+    # Monte Carlo P(Lift > 0)는 정확한 적분값과 표본 오차 범위 안에서 일치
+    exact = np.array([exact_prob_improvement(*cell) for cell in SMALL_CELLS])
+    tolerance = 4.0 * np.sqrt(exact * (1.0 - exact) / draws)
+    assert np.all(np.abs(sampled["prob_improvement"] - exact) < tolerance)
+    # 닫힌 형식 정규 근사와 신용구간도 모수가 클수록 Monte Carlo 결과에 가까움
+    assert abs(sampled["prob_improvement"][2] - closed["prob_improvement_normal"][2]) < 0.01
+    assert sampled["credible_low"][2] == pytest.approx(closed["credible_low"][2], abs=2e-3)
+    assert sampled["credible_high"][2] == pytest.approx(closed["credible_high"][2], abs=2e-3)
+
+
+def test_monte_carlo_is_seeded_and_skips_large_cells():
+    large = np.array([[500.0, 4500.0, 400.0, 4600.0]])
+    cells = np.vstack([SMALL_CELLS, large])
+    first = lift_posterior(*cells.T, draws=5_000, seed=7)
+    second = lift_posterior(*cells.T, draws=5_000, seed=7)
+    for name in first:
+        np.testing.assert_array_equal(first[name], second[name])
+    # 모수가 충분히 큰 셀은 닫힌 형식 값을 그대로 사용
+    assert first["prob_improvement"][-1] == first["prob_improvement_normal"][-1]
+
+
+def test_method_of_moments_prior_recovers_group_mean():
+    successes = np.array([5, 10, 20, 25, 40, 60])
+    trials = np.array([100, 100, 100, 100, 200, 200])
+    codes = np.array([0, 0, 0, 1, 1, 1])
+    alpha, beta = method_of_moments_prior(successes, trials, codes, n_groups=2)
+
+    for group in (0, 1):
+        members = codes == group
+        pooled = successes[members].sum() / trials[members].sum()
+        assert alpha[group] / (alpha[group] + beta[group]) == pytest.approx(pooled)
+        assert alpha[group] + beta[group] >= 2.0
+
+
+def test_method_of_moments_prior_needs_enough_units():
+    alpha, beta = method_of_moments_prior([5, 9], [100, 100])
+    assert np.isnan(alpha[0]) and np.isnan(beta[0])
+
+
+@pytest.fixture
+def funnel_campaigns() -> pd.DataFrame:
+    return pd.DataFrame({
+        "퍼널": ["T1"] * 6 + ["T2"] * 4,
+        EXP_SENT: [200, 200, 200, 200, 200, 40, 300, 300, 300, 0],
+        EXP_CONVERSIONS: [10, 20, 30, 40, 50, 20, 30, 36, 42, 0],
+        CTRL_SENT: [200, 200, 200, 200, 200, 40, 300, 300, 300, 300],
+        CTRL_CONVERSIONS: [20, 20, 20, 20, 20, 4, 30, 30, 30, 30],
+    })
+
+
+def test_empirical_prior_shrinks_campaigns_toward_funnel_mean(funnel_campaigns):
+    campaigns, _ = bayesian_lift(funnel_campaigns, prior="empirical", draws=0)
+
+    t1 = funnel_campaigns["퍼널"] == "T1"
+    funnel_rate = funnel_campaigns.loc[t1, EXP_CONVERSIONS].sum() / funnel_campaigns.loc[t1, EXP_SENT].sum()
+    raw_rate = funnel_campaigns.loc[t1, EXP_CONVERSIONS] / funnel_campaigns.loc[t1, EXP_SENT]
+    shrunk = campaigns.loc[t1, "exp_mean"]
+    # 모든 캠페인의 사후 평균이 원래 전환율에서 퍼널 평균 쪽으로 이동하되 퍼널 평균을 넘지 않음
+    assert ((shrunk - funnel_rate).abs() < (raw_rate - funnel_rate).abs()).all()
+    assert (np.sign(shrunk - raw_rate) == np.sign(funnel_rate - raw_rate)).all()
+    assert (np.sign(shrunk - funnel_rate) == np.sign(raw_rate - funnel_rate)).all()
+    # 발송이 적은 캠페인(40건)일수록 더 많이 축소
+    shrinkage = 1.0 - (shrunk - funnel_rate).abs() / (raw_rate - funnel_rate).abs()
+    assert shrinkage.loc[5] > shrinkage.loc[4]
+
+
+def test_zero_send_cells_are_nan(funnel_campaigns):
+    cells = funnel_campaigns.copy()
+    # 대조군 발송 0건 퍼널 추가 (퍼널 단위 셀도 NaN)
+    cells.loc[len(cells)] = {"퍼널": "T3", EXP_SENT: 100, EXP_CONVERSIONS: 10, CTRL_SENT: 0, CTRL_CONVERSIONS: 0}
+    campaigns, funnels = bayesian_lift(cells, prior="empirical", draws=2_000)
+
+    posterior_columns = ["exp_mean", "ctrl_mean", "expected_lift", "lift_sd", "prob_improvement",
+                         "credible_low", "credible_high", "raw_lift"]
+    zero = (cells[EXP_SENT] == 0) | (cells[CTRL_SENT] == 0)
+    assert campaigns.loc[zero, posterior_columns].isna().all().all()
+    assert campaigns.loc[~zero, posterior_columns].notna().all().all()
+    assert funnels.loc["T3", posterior_columns].isna().all()
+    assert funnels.loc[["T1", "T2"], posterior_columns].notna().all().all()
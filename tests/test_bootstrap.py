@@ -0,0 +1,108 @@
+"""core.analysis.bootstrap 퍼널별 합산 Lift 부트스트랩 (seed 재현성/shard 병렬/점추정)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import norm
+
+from core.analysis.bootstrap import _resample_shard, bootstrap_pooled_lift
+
+# (실험군 전환, 실험군 발송, 대조군 전환, 대조군 발송)
+COUNTS = np.array([
+    [30, 200, 20, 200],
+    [12, 150, 10, 140],
+    [55, 400, 35, 380],
+    [8, 90, 9, 100],
+    [40, 300, 22, 260],
+    [5, 60, 4, 50],
+    [18, 120, 11, 130],
+    [0, 0, 0, 0],
+    [3, 40, 2, 45],
+], dtype=float)
+GROUPS = np.array(["T1", "T1", "T1", "T2", "T2", "T2", "T2", "T3", None], dtype=object)
+
+OPTIONS = {"resamples": 600, "confidence": 0.95, "chunk_size": 150}
+
+
+@pytest.mark.parametrize("method", ["multinomial", "poisson"])
+def test_point_estimate_is_pooled_lift(method):
+    result = bootstrap_pooled_lift(COUNTS, GROUPS, method=method, seed=1, workers=1, **OPTIONS)
+
+    assert list(result.index) == ["T1", "T2", "T3"]  # 결측 그룹 캠페인은 제외
+    for group in ("T1", "T2"):
+        totals = COUNTS[GROUPS == group].sum(axis=0)
+        assert result.at[group, "lift"] == pytest.approx(totals[0] / totals[1] - totals[2] / totals[3])
+    assert result["campaigns"].tolist() == [3, 4, 1]
+    # 발송 0건 그룹은 점추정/구간 모두 NaN
+    assert result.loc["T3", ["lift", "pct_low", "pct_high", "bca_low", "bca_high"]].isna().all()
+
+
+@pytest.mark.parametrize("method", ["multinomial", "poisson"])
+def test_same_seed_reproduces_and_other_seed_differs(method):
+    first = bootstrap_pooled_lift(COUNTS, GROUPS, method=method, seed=11, workers=1, **OPTIONS)
+    second = bootstrap_pooled_lift(COUNTS, GROUPS, method=method, seed=11, workers=1, **OPTIONS)
+    other = bootstrap_pooled_lift(COUNTS, GROUPS, method=method, seed=12, workers=1, **OPTIONS)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert not np.allclose(first.loc[["T1", "T2"], "lift_se"], other.loc[["T1", "T2"], "lift_se"])
+
+
+@pytest.mark.parametrize("method", ["multinomial", "poisson"])
+def test_process_pool_shards_match_single_process(method):
+    single = bootstrap_pooled_lift(COUNTS, GROUPS, method=method, seed=5, workers=1, **OPTIONS)
+    pooled = bootstrap_pooled_lift(COUNTS, GROUPS, method=method, seed=5, workers=2, **OPTIONS)
+
+    pd.testing.assert_frame_equal(single, pooled)
+
+
+@pytest.mark.parametrize("method", ["multinomial", "poisson"])
+def test_intervals_bracket_the_estimate(method):
+    result = bootstrap_pooled_lift(COUNTS, GROUPS, method=method, seed=3, workers=1, **OPTIONS).loc[["T1", "T2"]]
+
+    assert (result["pct_low"] <= result["lift"]).all() and (result["lift"] <= result["pct_high"]).all()
+    assert (result["bca_low"] <= result["lift"]).all() and (result["lift"] <= result["bca_high"]).all()
+    assert (result["lift_se"] > 0).all()
+    # poisson은 퍼널 가중치가 모두 0인 재표본(Lift 정의 불가)을 제외
+    if method == "multinomial":
+        assert (result["resamples"] == OPTIONS["resamples"]).all()
+    else:
+        assert (result["resamples"] <= OPTIONS["resamples"]).all() and (result["resamples"] > 0.9 * OPTIONS["resamples"]).all()
+
+
+@pytest.mark.parametrize("method", ["multinomial", "poisson"])
+def test_bca_matches_textbook_formula(method):
+    result = bootstrap_pooled_lift(COUNTS, GROUPS, method=method, seed=9, workers=1, **OPTIONS)
+
+    # 같은 shard seed로 재표본을 다시 만들고 BCa를 정의대로(루프 jackknife, np.nanquantile) 계산
+    keep = np.array([group is not None for group in GROUPS])
+    codes, labels = pd.factorize(pd.Series(GROUPS[keep]), sort=False)
+    counts = COUNTS[keep]
+    sizes = [OPTIONS["chunk_size"]] * (OPTIONS["resamples"] // OPTIONS["chunk_size"])
+    seeds = np.random.SeedSequence(9).spawn(len(sizes))
+    replicates = np.vstack([_resample_shard(counts, codes, len(labels), size, method, seed)
+                            for size, seed in zip(sizes, seeds)])
+
+    def pooled(rows):
+        totals = rows.sum(axis=0)
+        return totals[0] / totals[1] - totals[2] / totals[3]
+
+    for position, group in enumerate(labels[:2]):
+        members = counts[codes == position]
+        values = replicates[:, position]
+        values = values[~np.isnan(values)]
+        estimate = pooled(members)
+        z0 = norm.ppf((np.sum(values < estimate) + 0.5 * np.sum(values == estimate)) / len(values))
+        jackknife = np.array([pooled(np.delete(members, i, axis=0)) for i in range(len(members))])
+        deviation = jackknife.mean() - jackknife
+        acceleration = (deviation ** 3).sum() / (6.0 * (deviation ** 2).sum() ** 1.5)
+        expected = []
+        for z_alpha in norm.ppf([0.025, 0.975]):
+            level = norm.cdf(z0 + (z0 + z_alpha) / (1.0 - acceleration * (z0 + z_alpha)))
+            expected.append(np.quantile(values, level))
+        assert result.at[group, "bca_low"] == pytest.approx(expected[0], rel=1e-9)
+        assert result.at[group, "bca_high"] == pytest.approx(expected[1], rel=1e-9)
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        bootstrap_pooled_lift(COUNTS, GROUPS, method="jackknife", **OPTIONS)
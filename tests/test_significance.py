@@ -0,0 +1,125 @@
+"""core.analysis.significance 검정/신뢰구간/다중검정 보정 (statsmodels 참조값 기준)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.analysis.significance import (
+    CTRL_CONVERSIONS,
+    CTRL_SENT,
+    EXP_CONVERSIONS,
+    EXP_SENT,
+    benjamini_hochberg,
+    holm_bonferroni,
+    newcombe_interval,
+    run_comparisons,
+    two_proportion_ztest,
+    wilson_interval,
+)
+
+# (실험군 전환, 실험군 발송, 대조군 전환, 대조군 발송)
+CELLS = np.array([
+    [45, 500, 30, 500],
+    [120, 1000, 100, 1000],
+    [8, 60, 3, 55],
+], dtype=float)
+
+# statsmodels.stats.proportion.proportions_ztest (합동 분산, 양측)
+ZTEST_REFERENCE = [
+    (1.8009006755629924, 0.07171853650843411),
+    (1.4293008498232314, 0.1529177818639462),
+    (1.4350012718244334, 0.1512867351780553),
+]
+# statsmodels.stats.proportion.proportion_confint(method="wilson") - 실험군 전환율
+WILSON_REFERENCE = [
+    (0.06794254788913939, 0.11830941128933345),
+    (0.10129926060130912, 0.14160907584771276),
+    (0.06914109480586972, 0.2416515967649962),
+]
+# statsmodels.stats.proportion.confint_proportions_2indep(method="newcomb", compare="diff")
+NEWCOMBE_REFERENCE = [
+    (-0.0028632407138105068, 0.06336170389042493),
+    (-0.007492167515211062, 0.047550667456339055),
+    (-0.035027111771090996, 0.19287591058422),
+]
+
+P_VALUES = [0.01, 0.04, 0.03, 0.20, 0.005]
+# statsmodels.stats.multitest.multipletests(method="fdr_bh" / "holm")
+BH_REFERENCE = [0.025, 0.05, 0.05, 0.2, 0.025]
+HOLM_REFERENCE = [0.04, 0.09, 0.09, 0.2, 0.025]
+
+
+def test_two_proportion_ztest_matches_reference():
+    z, p_value = two_proportion_ztest(CELLS[:, 0], CELLS[:, 1], CELLS[:, 2], CELLS[:, 3])
+    np.testing.assert_allclose(z, [ref[0] for ref in ZTEST_REFERENCE], rtol=1e-10)
+    np.testing.assert_allclose(p_value, [ref[1] for ref in ZTEST_REFERENCE], rtol=1e-10)
+
+
+def test_two_proportion_ztest_edge_cells():
+    z, p_value = two_proportion_ztest([0, 10], [0, 10], [1, 10], [10, 10])
+    # 발송 0건이면 NaN, 두 군 전환율이 모두 1이면 z=0, p=1
+    assert np.isnan(z[0]) and np.isnan(p_value[0])
+    assert z[1] == 0.0 and p_value[1] == 1.0
+
+
+def test_wilson_interval_matches_reference():
+    low, high = wilson_interval(CELLS[:, 0], CELLS[:, 1], confidence=0.95)
+    np.testing.assert_allclose(low, [ref[0] for ref in WILSON_REFERENCE], rtol=1e-10)
+    np.testing.assert_allclose(high, [ref[1] for ref in WILSON_REFERENCE], rtol=1e-10)
+
+
+def test_newcombe_interval_matches_reference():
+    low, high = newcombe_interval(CELLS[:, 0], CELLS[:, 1], CELLS[:, 2], CELLS[:, 3], confidence=0.95)
+    np.testing.assert_allclose(low, [ref[0] for ref in NEWCOMBE_REFERENCE], rtol=1e-10)
+    np.testing.assert_allclose(high, [ref[1] for ref in NEWCOMBE_REFERENCE], rtol=1e-10)
+
+
+def test_benjamini_hochberg_matches_reference():
+    np.testing.assert_allclose(benjamini_hochberg(P_VALUES), BH_REFERENCE, rtol=1e-12)
+
+
+def test_holm_bonferroni_matches_reference():
+    np.testing.assert_allclose(holm_bonferroni(P_VALUES), HOLM_REFERENCE, rtol=1e-12)
+
+
+@pytest.mark.parametrize("correction", [benjamini_hochberg, holm_bonferroni])
+def test_corrections_keep_nan_out_of_test_count(correction):
+    adjusted = correction([np.nan, *P_VALUES])
+    assert np.isnan(adjusted[0])
+    np.testing.assert_allclose(adjusted[1:], correction(P_VALUES))
+
+
+@pytest.fixture
+def campaign_frame() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    rows = 24
+    exp_sent = rng.integers(200, 2000, rows)
+    ctrl_sent = rng.integers(200, 2000, rows)
+    return pd.DataFrame({
+        "퍼널": np.repeat(["T1", "T2", "T3"], rows // 3),
+        "채널": np.tile(["앱푸시", "LMS"], rows // 2),
+        "목적": np.tile(["예약", "재방문", "가입", "쿠폰"], rows // 4),
+        "문구": [f"{'할인 쿠폰' if i % 3 == 0 else '지금 예약'} 안내 {i % 6}" for i in range(rows)],
+        EXP_SENT: exp_sent,
+        EXP_CONVERSIONS: rng.binomial(exp_sent, 0.12),
+        CTRL_SENT: ctrl_sent,
+        CTRL_CONVERSIONS: rng.binomial(ctrl_sent, 0.10),
+    })
+
+
+@pytest.mark.parametrize("method", ["bh", "holm"])
+def test_run_comparisons_corrects_all_families_together(campaign_frame, method):
+    keyword_groups = {"혜택": ["할인", "쿠폰"], "행동": ["예약"]}
+    comparisons = run_comparisons(campaign_frame, keyword_groups=keyword_groups, alpha=0.05, method=method)
+
+    assert set(comparisons) == {"campaign", "funnel_message", "퍼널", "채널", "목적", "keyword"}
+    stacked = pd.concat(list(comparisons.values()), ignore_index=True)
+    # 보정은 family별이 아니라 전체 p-value 벡터 하나에 대해 한 번
+    np.testing.assert_allclose(stacked["q_value"], benjamini_hochberg(stacked["p_value"]))
+    np.testing.assert_allclose(stacked["p_holm"], holm_bonferroni(stacked["p_value"]))
+    per_family = np.concatenate([benjamini_hochberg(frame["p_value"]) for frame in comparisons.values()])
+    assert not np.allclose(stacked["q_value"], per_family)
+
+    adjusted = stacked["q_value"] if method == "bh" else stacked["p_holm"]
+    np.testing.assert_array_equal(stacked["significant"].astype(bool),
+                                  stacked["sufficient_sample"].astype(bool) & (adjusted < 0.05))